@@ -74,6 +74,268 @@ class Settings(BaseSettings):
         default="1.0.0",
         description="Model version identifier for tracking"
     )
+    ML_MODEL_VARIANT: str = Field(
+        default="v1",
+        description="Custom CNN variant: 'v1' (dense heads) or 'gap_v1' (global-average-pooling heads)"
+    )
+    ML_CASCADE_ENABLED: bool = Field(
+        default=True,
+        description="Skip the condition model when the acne model is confident the skin is clear"
+    )
+    ML_CASCADE_THRESHOLD: float = Field(
+        default=0.9,
+        description="Acne-model 'no_acne' confidence required to exit the cascade early"
+    )
+    HEATMAP_OVERLAY_SIDE: int = Field(
+        default=256,
+        description="Longest side of stored Grad-CAM overlays"
+    )
+    HEATMAP_MAX_BATCH: int = Field(
+        default=8,
+        description="Heatmaps explained together in one forward/backward pass"
+    )
+    REFERENCE_INDEX_DIR: str = Field(
+        default="data/reference_index",
+        description="Directory of the memory-mapped SCIN embedding index (scripts/build_reference_index.py)"
+    )
+    REFERENCE_INDEX_NPROBE: int = Field(
+        default=32,
+        description="Coarse lists scanned per similar-case query (higher: better recall, slower)"
+    )
+
+    # Inference Worker Pool (keeps torch out of API processes)
+    INFERENCE_WORKER_SOCKET: str | None = Field(
+        default=None,
+        description="Unix socket of the inference worker pool; unset runs ML in the API process"
+    )
+    INFERENCE_WORKER_AUTHKEY: str | None = Field(
+        default=None,
+        description=(
+            "Shared secret API processes must prove to the inference workers (required with "
+            "INFERENCE_WORKER_SOCKET); the socket is owner-only, so run both as the same user"
+        )
+    )
+    INFERENCE_WORKER_PROCESSES: int = Field(default=2, description="Worker processes started by run_inference_worker.py")
+    INFERENCE_WORKER_SLOTS: int = Field(
+        default=8,
+        description="Shared-memory image slots per API process (in-flight requests before callers wait)"
+    )
+    INFERENCE_WORKER_MAX_IMAGE_SIDE: int = Field(
+        default=1024,
+        description="Slot size as the longest RGB image side; larger images are downscaled before transfer"
+    )
+    INFERENCE_WORKER_CONNECTIONS: int = Field(default=2, description="Control connections per API process")
+    INFERENCE_WORKER_TIMEOUT_SECONDS: float = Field(default=30.0, description="Per-request worker timeout")
+
+    # Scan Media Storage
+    MEDIA_BACKEND: str = Field(
+        default="local",
+        description="Scan media backend: 'local' (filesystem) or 's3' (S3-compatible)"
+    )
+    MEDIA_ROOT: str = Field(
+        default="media/scans",
+        description="Root directory for the local media backend"
+    )
+    MEDIA_S3_BUCKET: str | None = Field(
+        default=None,
+        description="Bucket name (required if MEDIA_BACKEND='s3')"
+    )
+    MEDIA_S3_ENDPOINT_URL: str | None = Field(
+        default=None,
+        description="Custom endpoint for S3-compatible stores (R2, MinIO)"
+    )
+    MEDIA_S3_REGION: str | None = Field(
+        default=None,
+        description="Region for the S3 backend"
+    )
+    MEDIA_THUMBNAIL_SIZE: int = Field(
+        default=256,
+        description="Longest side in pixels of the WebP thumbnail derivative"
+    )
+    MEDIA_ANALYSIS_SIZE: int = Field(
+        default=1024,
+        description="Longest side in pixels of the WebP analysis derivative (also the resolution scans are analyzed at)"
+    )
+    MEDIA_ARCHIVE_MAX_SIDE: int = Field(
+        default=0,
+        description="Longest side of archived originals, re-encoded as high-quality JPEG above it; 0 keeps the uploaded bytes"
+    )
+
+    # Media Retention
+    MEDIA_RETENTION_DAYS: int = Field(
+        default=90,
+        description="Days to keep original scan images (0 disables expiry)"
+    )
+    RETENTION_SWEEP_ENABLED: bool = Field(
+        default=True,
+        description="Run the periodic retention sweeper in the API process"
+    )
+    RETENTION_SWEEP_INTERVAL_SECONDS: int = Field(
+        default=300,
+        description="Seconds between retention sweeps"
+    )
+    RETENTION_SWEEP_BATCH_SIZE: int = Field(
+        default=500,
+        description="Maximum expired entries deleted per sweep batch"
+    )
+
+    # Rate Limiting
+    RATE_LIMIT_ENABLED: bool = Field(default=True, description="Enable API rate limiting")
+    RATE_LIMIT_BACKEND: str = Field(
+        default="memory",
+        description="Rate limit store: 'memory' (single process) or 'redis' (shared across workers)"
+    )
+    RATE_LIMIT_REDIS_URL: str | None = Field(
+        default=None,
+        description="Redis URL (required if RATE_LIMIT_BACKEND='redis')"
+    )
+    RATE_LIMIT_RULES: list[dict] = Field(
+        default=[
+            {
+                "path_prefix": "/api/v1/scan", "limit": 10, "window_seconds": 60,
+                "methods": ["POST"], "path_suffixes": ["/upload", "/upload-burst", "/heatmaps"],
+            },
+        ],
+        description=(
+            "Per-route limits: path_prefix, limit, window_seconds, and optional methods, path_suffixes "
+            "and user_limits overrides; OPTIONS is never counted"
+        )
+    )
+
+    # Face Detection
+    FACE_DETECTOR: str = Field(
+        default="yunet",
+        description="Front-stage detector: 'yunet' (box on downscaled image, FaceMesh on crop) or 'facemesh' (full image)"
+    )
+    YUNET_MODEL_PATH: str | None = Field(
+        default=None,
+        description="Path to yunet_2023mar.onnx (defaults to backend/models/_weights/)"
+    )
+    YUNET_AUTO_DOWNLOAD: bool = Field(
+        default=False,
+        description="Download the YuNet weights from the OpenCV model zoo if missing"
+    )
+    IMAGE_TYPE_ROUTING_ENABLED: bool = Field(
+        default=True,
+        description="Route dermoscopy close-ups to the clinical pipeline (no face stages) instead of the selfie pipeline"
+    )
+
+    # Image Quality Gate (runs before skin analysis)
+    QUALITY_GATE_ENABLED: bool = Field(default=True, description="Reject unusable images before analysis")
+    QUALITY_GATE_MIN_SHARPNESS: float = Field(
+        default=15.0,
+        description="Laplacian variance on the 128px thumbnail below which images are rejected as blurry"
+    )
+    QUALITY_GATE_WARN_SHARPNESS: float = Field(
+        default=40.0,
+        description="Laplacian variance below which images are flagged as soft"
+    )
+    QUALITY_GATE_MIN_BRIGHTNESS: float = Field(default=40.0, description="Minimum mean luminance (0-255)")
+    QUALITY_GATE_MAX_BRIGHTNESS: float = Field(default=220.0, description="Maximum mean luminance (0-255)")
+    QUALITY_GATE_REQUIRE_FACE: bool = Field(default=True, description="Reject images with no detectable face")
+    SCAN_BURST_MAX_FRAMES: int = Field(
+        default=8,
+        description="Maximum frames scored per burst upload"
+    )
+    SCAN_LATENCY_BUDGET_MS: float = Field(
+        default=3000.0,
+        description="Default per-scan latency budget; scans predicted to exceed it run a cheaper pipeline"
+    )
+    SCAN_PIPELINE_WORKERS: int = Field(
+        default=1,
+        description="Scans analyzed in parallel per process, used to predict queue wait"
+    )
+    ANALYZER_WORKERS: int = Field(
+        default=4,
+        description="Threads running independent skin analyzers concurrently, shared by all scans; 0 runs them one after another"
+    )
+    SCAN_PIPELINE_INITIAL_MS: float = Field(
+        default=800.0,
+        description="Full-pipeline compute estimate used until real timings are measured"
+    )
+
+    # Live Camera Preview (WebSocket guidance)
+    LIVE_PREVIEW_MAX_SESSIONS: int = Field(
+        default=32,
+        description="Concurrent preview connections per process; extra connections are closed with 1013"
+    )
+    LIVE_PREVIEW_WORKERS: int = Field(
+        default=2,
+        description="Threads shared by all preview connections (bounds total preview CPU)"
+    )
+    LIVE_PREVIEW_MAX_FPS: float = Field(
+        default=8.0,
+        description="Maximum frames analyzed per second per connection; newer frames replace pending ones"
+    )
+    LIVE_PREVIEW_MAX_FRAME_BYTES: int = Field(
+        default=200_000,
+        description="Largest encoded preview frame accepted"
+    )
+
+    # Re-analysis Backfill (runs after MODEL_VERSION changes)
+    BACKFILL_BATCH_SIZE: int = Field(
+        default=500,
+        description="Scans fetched, re-analyzed and committed per batch"
+    )
+    BACKFILL_CONCURRENCY: int = Field(
+        default=2,
+        description="Scans re-analyzed at once by the backfill job"
+    )
+    BACKFILL_LIVE_SCANS_THRESHOLD: int = Field(
+        default=5,
+        description="Scans started in the last minute above which the backfill pauses for live traffic"
+    )
+
+    # Product Search
+    PRODUCT_SEARCH_BRAND_BOOST: float = Field(
+        default=0.5,
+        description="Weight of query-to-brand trigram similarity in the product search score"
+    )
+
+    # Ingredient List Matching (scripts/build_ingredient_match_index.py)
+    INGREDIENT_MATCH_INDEX_DIR: str = Field(
+        default="data/ingredient_match_index",
+        description="Directory of the memory-mapped ingredient-list match index"
+    )
+    INGREDIENT_MATCH_NPROBE: int = Field(
+        default=32,
+        description="Clusters scored per ingredient-list match (higher: better recall, slower)"
+    )
+    INGREDIENT_MATCH_MIN_SCORE: float = Field(
+        default=0.3,
+        description="Lowest ingredient-list cosine similarity returned as a match"
+    )
+
+    # Ingredient Analysis
+    INGREDIENT_DICTIONARY_TTL_SECONDS: int = Field(
+        default=3600,
+        description="Seconds before the in-memory ingredient dictionary is reloaded from the database (in the background)"
+    )
+
+    # Typeahead Suggestions (in-memory, per API process)
+    TYPEAHEAD_ENABLED: bool = Field(default=True, description="Build the suggestion index at startup and keep it fresh")
+    TYPEAHEAD_REFRESH_INTERVAL_SECONDS: int = Field(
+        default=60,
+        description="Seconds between incremental refreshes of changed products and ingredients"
+    )
+    TYPEAHEAD_FULL_REBUILD_SECONDS: int = Field(
+        default=3600,
+        description="Seconds between full rebuilds, which also refresh popularity weights"
+    )
+    TYPEAHEAD_MAX_PENDING_CHANGES: int = Field(
+        default=5000,
+        description="Changed entries layered over the index before it is rebuilt"
+    )
+
+    # Near-duplicate Detection (perceptual hashes)
+    NEAR_DUPLICATE_MAX_DISTANCE: int = Field(
+        default=7,
+        description="Largest pHash Hamming distance (of 64 bits) at which two images count as near duplicates"
+    )
+    NEAR_DUPLICATE_DHASH_MAX_DISTANCE: int = Field(
+        default=12,
+        description="Largest dHash Hamming distance confirming a pHash match"
+    )
 
     class Config:
         env_file = ".env"
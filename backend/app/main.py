@@ -1,4 +1,7 @@
 
+import asyncio
+import logging
+
 from app.api.v1.routines import router as routines_router
 from app.api.v1.progress import router as progress_router
 from app.api.v1.products import router as external_products_router
@@ -10,9 +13,16 @@ from app.api.v1 import api_router
 from app.database import engine, Base
 from app.routers import scan, digital_twin
 from app.routers import admin
+from app.routers import media
 from app.routers import consent, profile  # GDPR & User Management
+from app.services.ingredient_dictionary import get_ingredient_dictionary
+from app.services.retention import get_retention_sweeper
+from app.services.suggestions import get_suggestion_service
+from middleware.rate_limiter import RateLimiterMiddleware, RateLimitRule, create_rate_limit_store
 from app.models.twin_models import *  # Import Digital Twin models for table creation# Create database tables if needed (safe for local dev)
-    
+
+logger = logging.getLogger(__name__)
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
@@ -20,15 +30,58 @@ app = FastAPI(
     debug=settings.DEBUG,
 )
 
+# Added first so CORS wraps it: 429s carry CORS headers and preflights never reach it
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimiterMiddleware,
+        rules=[RateLimitRule(**rule) for rule in settings.RATE_LIMIT_RULES],
+        store=create_rate_limit_store(settings.RATE_LIMIT_BACKEND, settings.RATE_LIMIT_REDIS_URL),
+    )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining"],
 )
 
 
+@app.on_event("startup")
+async def start_retention_sweeper():
+    """Start the periodic expiry of stored scan media"""
+    if settings.RETENTION_SWEEP_ENABLED:
+        get_retention_sweeper().start()
+
+
+@app.on_event("shutdown")
+async def stop_retention_sweeper():
+    await get_retention_sweeper().stop()
+
+
+@app.on_event("startup")
+async def start_suggestion_refresh():
+    """Build the typeahead index in the background and keep it fresh"""
+    if settings.TYPEAHEAD_ENABLED:
+        get_suggestion_service().start()
+
+
+@app.on_event("shutdown")
+async def stop_suggestion_refresh():
+    await get_suggestion_service().stop()
+
+
+@app.on_event("startup")
+async def warm_ingredient_dictionary():
+    """Load the ingredient dictionary before the first /analyze request"""
+    try:
+        await asyncio.to_thread(get_ingredient_dictionary)
+    except Exception as e:
+        # The first request retries the load
+        logger.warning(f"Ingredient dictionary warm-up failed: {e}")
+
+
 @app.get("/api/health")
 async def health_check():
     """Simple health check endpoint - always returns 200 OK"""
@@ -43,6 +96,7 @@ app.include_router(external_products_router, prefix="/api/v1", tags=["external_p
 app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])  # Admin endpoints
 app.include_router(consent.router, prefix="/api/v1", tags=["consent"])  # GDPR Compliance (FR44-FR46)
 app.include_router(profile.router, prefix="/api/v1", tags=["profile"])  # User Profile Management
+app.include_router(media.router, prefix="/api/v1", tags=["media"])  # Content-addressed scan media
 
 @app.get("/", tags=["Root"])
 def read_root():
@@ -1,5 +1,7 @@
 from app.models.user import User
 from app.models.scan import ScanSession, SkinAnalysis
+from app.models.retention import RetentionEntry
+from app.models.scan_result import ScanResultVersion, BackfillCheckpoint
 
 # Sprint 3: Digital Twin Engine models
 from app.models.twin_models import (
@@ -14,13 +16,17 @@ from app.models.twin_models import (
 from app.models.product_models import (
     Ingredient,
     Product,
-    ProductIngredient
+    ProductIngredient,
+    ProductNeighbour
 )
 
 __all__ = [
     "User",
     "ScanSession",
     "SkinAnalysis",
+    "RetentionEntry",
+    "ScanResultVersion",
+    "BackfillCheckpoint",
     "SkinStateSnapshot",
     "SkinRegionState",
     "EnvironmentSnapshot",
@@ -28,5 +34,6 @@ __all__ = [
     "RoutineProductUsage",
     "Ingredient",
     "Product",
-    "ProductIngredient"
+    "ProductIngredient",
+    "ProductNeighbour"
 ]
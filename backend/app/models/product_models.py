@@ -26,6 +26,9 @@ class Ingredient(Base):
     is_antimicrobial = Column(Integer, default=0, nullable=False)
     fda_approved = Column(Integer, default=0, nullable=False)
     eu_approved = Column(Integer, default=0, nullable=False)
+    # Precomputed flags for ingredient analysis (sprint 10 migration)
+    is_allergen = Column(Integer, default=0, nullable=False)
+    pregnancy_concern = Column(Integer, default=0, nullable=False)
     data_sources = Column(JSONB, nullable=True)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -66,3 +69,15 @@ class ProductIngredient(Base):
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
     product = relationship("Product", back_populates="product_ingredients")
     ingredient = relationship("Ingredient", back_populates="product_ingredients")
+
+
+class ProductNeighbour(Base):
+    """Precomputed ingredient-similar product (scripts/build_product_neighbours.py)"""
+    __tablename__ = "product_neighbours"
+
+    # The primary key is the lookup: one product's neighbours in rank order
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    rank = Column(Integer, primary_key=True)
+    neighbour_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Float, nullable=False)  # Cosine similarity of TF-IDF ingredient vectors
+    built_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
@@ -0,0 +1,30 @@
+"""Media Retention Index - Database Model
+
+Time-ordered index of stored files and media keys with an expiry.
+Rows are registered when a file is written and removed by the
+retention sweeper once the file has been deleted, so the sweeper
+only ever touches expired entries instead of walking directories.
+"""
+
+from sqlalchemy import Column, DateTime, Integer, String
+from datetime import datetime
+
+from ..database import Base
+
+
+class RetentionEntry(Base):
+    """A stored file scheduled for deletion at ``expires_at``"""
+
+    __tablename__ = "media_retention"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # "media" for media store keys, "file" for local filesystem paths
+    storage = Column(String(20), nullable=False, default="media")
+    location = Column(String(500), nullable=False, unique=True)
+
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<RetentionEntry(location={self.location}, expires_at={self.expires_at})>"
@@ -6,7 +6,7 @@ Status: Phase 1 Implementation - Foundation Layer
 Created: December 6, 2025
 """
 
-from sqlalchemy import Column, String, DateTime, JSON, Enum as SQLEnum, Float, Integer, ForeignKey, Text
+from sqlalchemy import BigInteger, Column, String, DateTime, JSON, Enum as SQLEnum, Float, Integer, ForeignKey, Text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -54,6 +54,8 @@ class ScanSession(Base):
     # Image information
     image_url = Column(String(500), nullable=True)  # Cloud storage URL
     image_hash = Column(String(64), nullable=True)  # SHA-256 hash for deduplication
+    perceptual_hash = Column(BigInteger, nullable=True)  # pHash (signed 64-bit) for near-duplicate detection
+    difference_hash = Column(BigInteger, nullable=True)  # dHash, confirms pHash matches
     
     # scan_metadata
     scan_metadata = Column(JSONB, nullable=True)  # lighting_quality, image_dimensions, device_info
@@ -0,0 +1,47 @@
+"""Versioned Scan Results - Database Models
+
+Analysis output per scan and model version, kept side by side so a model
+upgrade can be backfilled without overwriting what users already saw,
+plus the checkpoint table that makes backfill jobs resumable.
+"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from datetime import datetime
+
+from ..database import Base
+
+
+class ScanResultVersion(Base):
+    """Result of analyzing one scan with one model version"""
+
+    __tablename__ = "scan_result_versions"
+    __table_args__ = (
+        UniqueConstraint("scan_session_id", "model_version", name="uq_scan_result_versions_scan_model"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    scan_session_id = Column(UUID(as_uuid=True), ForeignKey("scan_sessions.id"), nullable=False, index=True)
+    model_version = Column(String(50), nullable=False, index=True)
+    result = Column(JSONB, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ScanResultVersion(scan_session_id={self.scan_session_id}, model_version={self.model_version})>"
+
+
+class BackfillCheckpoint(Base):
+    """Keyset position and counters of a resumable backfill job"""
+
+    __tablename__ = "backfill_checkpoints"
+
+    job_name = Column(String(100), primary_key=True)
+    # Last (created_at, id) processed in keyset order
+    last_created_at = Column(DateTime, nullable=True)
+    last_scan_id = Column(UUID(as_uuid=True), nullable=True)
+    processed = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<BackfillCheckpoint(job_name={self.job_name}, processed={self.processed})>"
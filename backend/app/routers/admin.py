@@ -84,6 +84,22 @@ async def health_check():
     return {"status": "healthy", "service": "admin"}
 
 
+@router.get("/metrics/scan-pipeline")
+async def scan_pipeline_metrics():
+    """Scan pipeline counters: degraded scans, selfie/clinical routing and analyzer timings."""
+    from services.deadline_scheduler import get_deadline_scheduler
+    from services.image_quality_gate import get_image_quality_gate
+    from services.image_type_router import get_pipeline_router
+    from services.skin_analysis_service import SKIN_ANALYZERS
+
+    return {
+        "scheduler": get_deadline_scheduler().stats(),
+        "quality_gate": get_image_quality_gate().stats(),
+        "image_type_routing": get_pipeline_router().stats(),
+        "analyzers": SKIN_ANALYZERS.stats(),
+    }
+
+
 @router.post("/populate-ingredients")
 async def populate_ingredients():
     """Populate ingredients table with initial data."""
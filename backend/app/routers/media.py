@@ -0,0 +1,45 @@
+"""Scan Media Router
+
+Serves content-addressed scan derivatives (thumbnail, analysis-size) for
+backends without public URLs. Digests are immutable, so responses are
+cacheable forever. Originals are never served.
+"""
+
+import asyncio
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import FileResponse, RedirectResponse, Response
+
+from app.services.media_store import ANALYSIS, DERIVATIVES, ORIGINAL, get_media_store, media_key
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+_IMMUTABLE = {"Cache-Control": "public, max-age=31536000, immutable"}
+
+
+@router.get("/{variant}/{digest}")
+async def get_scan_media(variant: str, digest: str):
+    """Serve a scan derivative, generating it on demand if the background job has not run yet"""
+    if variant not in DERIVATIVES or len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+
+    store = get_media_store()
+    key = media_key(digest, variant)
+
+    if not await asyncio.to_thread(store.backend.exists, key):
+        # Ingested uploads have their analysis derivative before the original is archived
+        sources = (media_key(digest, ORIGINAL), media_key(digest, ANALYSIS))
+        if not any([await asyncio.to_thread(store.backend.exists, source) for source in sources]):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+        await store.generate_derivatives_async(digest)
+
+    direct_url = store.backend.url(key)
+    if direct_url:
+        return RedirectResponse(direct_url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    path = store.backend.local_path(key)
+    if path is not None:
+        return FileResponse(path, media_type="image/webp", headers=_IMMUTABLE)
+
+    data = await asyncio.to_thread(store.backend.get, key)
+    return Response(content=data, media_type="image/webp", headers=_IMMUTABLE)
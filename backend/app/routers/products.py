@@ -3,7 +3,10 @@
 FastAPI router for product search, recommendations, and ingredient analysis.
 Created: December 13, 2025
 """
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from uuid import UUID
@@ -13,10 +16,18 @@ from app.schemas.product_schemas import (
     ProductResponse,
     ProductSearch,
     ProductRecommendation,
+    IngredientListMatchRequest,
+    IngredientListMatchResponse,
+    Suggestion,
     IngredientAnalysisRequest,
     SafetyAnalysis
 )
-from app.models.product_models import Product, Ingredient
+from app.models.product_models import Product, ProductNeighbour
+from app.services.ingredient_dictionary import get_ingredient_dictionary, summarize
+from app.services import product_search
+from app.services.suggestions import get_suggestion_service
+from app.config import settings
+from services.ingredient_match_index import get_ingredient_match_index, query_names
 
 router = APIRouter(
     prefix="/api/v1/products",
@@ -33,21 +44,20 @@ async def search_products(
     offset: int = Query(0, ge=0),
     db: Session = Depends(get_db)
 ):
-    """Search and filter products"""
-    query = db.query(Product)
-    
-    if search:
-        query = query.filter(
-            (Product.name.ilike(f"%{search}%")) |
-            (Product.brand.ilike(f"%{search}%"))
-        )
-    if brand:
-        query = query.filter(Product.brand.ilike(f"%{brand}%"))
-    if category:
-        query = query.filter(Product.category == category)
-    
-    products = query.offset(offset).limit(limit).all()
-    return products
+    """Search and filter products; with ``search``, best matches first (typos tolerated)"""
+    return product_search.search_products(db, search, brand=brand, category=category, limit=limit, offset=offset)
+
+
+@router.get("/suggest", response_model=List[Suggestion])
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=20),
+):
+    """Typeahead over product names, brands and INCI names, from memory"""
+    service = get_suggestion_service()
+    if not service.ready:
+        raise HTTPException(status_code=503, detail="Suggestions are still loading")
+    return [Suggestion(**vars(s)) for s in service.suggest(q, limit)]
 
 
 @router.get("/{barcode}", response_model=ProductResponse)
@@ -73,7 +83,28 @@ async def get_recommendations(
     limit: int = Query(10, ge=1, le=50),
     db: Session = Depends(get_db)
 ):
-    """Get similar product recommendations using content-based filtering"""
+    """Get similar products: precomputed ingredient-vector neighbours in rank order
+
+    Neighbours come from scripts/build_product_neighbours.py; products
+    not covered by the last run fall back to others in their category.
+    """
+    neighbours = db.execute(
+        select(Product, ProductNeighbour.score)
+        .join(ProductNeighbour, ProductNeighbour.neighbour_id == Product.id)
+        .where(ProductNeighbour.product_id == product_id)
+        .order_by(ProductNeighbour.rank)
+        .limit(limit)
+    ).all()
+    if neighbours:
+        return [
+            ProductRecommendation(
+                product=p,
+                similarity_score=min(score, 1.0),
+                reason=f"Similar {p.category} ingredient list"
+            )
+            for p, score in neighbours
+        ]
+
     # Get target product
     product = db.query(Product).filter(Product.id == product_id).first()
     if not product:
@@ -82,8 +113,6 @@ async def get_recommendations(
             detail=f"Product {product_id} not found"
         )
     
-    # For now, return similar products in same category
-    # TODO: Implement full cosine similarity algorithm
     similar_products = db.query(Product).filter(
         Product.category == product.category,
         Product.id != product_id
@@ -92,8 +121,8 @@ async def get_recommendations(
     recommendations = [
         ProductRecommendation(
             product=p,
-            similarity_score=0.85,  # Placeholder
-            reason=f"Similar {product.category} product"
+            similarity_score=0.0,  # Not yet compared
+            reason=f"Same category ({product.category})"
         )
         for p in similar_products
     ]
@@ -101,40 +130,59 @@ async def get_recommendations(
     return recommendations
 
 
+@router.post("/match-ingredients", response_model=IngredientListMatchResponse)
+async def match_ingredient_list(
+    request: IngredientListMatchRequest,
+    db: Session = Depends(get_db)
+):
+    """Find catalog products whose ingredient list is closest to a pasted one
+
+    The list is normalized to INCI names in memory (query_names) and
+    searched in the clustered index built by
+    scripts/build_ingredient_match_index.py; scores are exact cosine
+    similarities of the ingredient vectors.
+    """
+    index = get_ingredient_match_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Ingredient matching is not available yet")
+
+    normalized = query_names(request.ingredients)
+    matches = index.search(
+        normalized,
+        k=request.limit,
+        min_score=settings.INGREDIENT_MATCH_MIN_SCORE,
+        nprobe=settings.INGREDIENT_MATCH_NPROBE,
+    )
+    found = db.query(Product).filter(Product.id.in_([UUID(m.product_id) for m in matches])).all() if matches else []
+    products = {str(p.id): p for p in found}
+
+    return IngredientListMatchResponse(
+        matches=[
+            ProductRecommendation(
+                product=products[m.product_id],
+                similarity_score=min(m.score, 1.0),
+                reason="Similar ingredient list"
+            )
+            for m in matches if m.product_id in products
+        ],
+        normalized=normalized,
+        unrecognized=index.unknown(normalized),
+    )
+
+
 @router.post("/analyze", response_model=SafetyAnalysis)
 async def analyze_ingredients(
     request: IngredientAnalysisRequest,
     db: Session = Depends(get_db)
 ):
-    """Analyze ingredient safety and compatibility"""
-    flagged = []
-    total_safety = 0
-    count = 0
-    
-    for ing_name in request.ingredients:
-        ingredient = db.query(Ingredient).filter(
-            Ingredient.name_inci.ilike(f"%{ing_name}%")
-        ).first()
-        
-        if ingredient:
-            if ingredient.safety_rating:
-                total_safety += ingredient.safety_rating
-                count += 1
-            
-            # Flag potentially harmful ingredients
-            if ingredient.safety_rating and ingredient.safety_rating > 7:
-                flagged.append({
-                    "name": ingredient.name_inci,
-                    "safety_rating": ingredient.safety_rating,
-                    "reason": "High safety concern"
-                })
-    
-    avg_safety = (total_safety / count) if count > 0 else 5.0
-    
-    return SafetyAnalysis(
-        overall_safety_score=avg_safety,
-        allergen_warnings=[],
-        flagged_ingredients=flagged,
-        pregnancy_safe=len(flagged) == 0,
-        sensitive_skin_safe=avg_safety < 6.0
+    """Analyze ingredient safety and compatibility
+
+    Names are normalized and resolved against the in-memory ingredient
+    dictionary; any it does not know are looked up together in one query.
+    Both run off the event loop, as does the load if startup has not
+    warmed the dictionary yet.
+    """
+    resolved = await asyncio.to_thread(
+        lambda: get_ingredient_dictionary().resolve(request.ingredients, db=db)
     )
+    return SafetyAnalysis(**summarize(resolved))
@@ -7,32 +7,72 @@ Status: Phase 1 Implementation - Foundation Layer
 Created: December 6, 2025
 """
 
+from dataclasses import asdict
 from typing import List, Optional
-from datetime import datetime
-import os
-import uuid
+from datetime import datetime, timedelta
+from uuid import UUID
+from io import BytesIO
+import asyncio
 import json
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
+import cv2
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+from fastapi import (
+    APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, UploadFile, File, Form, WebSocket,
+    WebSocketDisconnect, status,
+)
+from fastapi.responses import Response
+from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models import User, ScanSession, SkinAnalysis
 from app.schemas.scan_schemas import (
+    BurstUploadResponse,
+    HeatmapBatchRequest,
+    HeatmapBatchResponse,
+    HeatmapItem,
     ScanInitResponse,
     ScanUploadResponse,
     ScanStatusResponse,
     ScanResultResponse,
     ScanHistoryItem,
     ScanHistoryResponse,
+    SimilarCase,
+    SimilarCasesResponse,
+)
+from app.config import settings
+from app.core.security import ALGORITHM, SECRET_KEY, get_current_user
+from app.services.explanation_heatmaps import Heatmap, HeatmapRequest, HeatmapUnavailable, get_heatmap_service
+from app.services.media_store import ANALYSIS, THUMBNAIL, IngestedImage, get_media_store
+from app.services.near_duplicates import find_near_duplicate_scan
+from app.services.reference_cases import ReferenceIndexUnavailable, get_reference_case_service, load_cases
+from app.services.retention import register_for_retention
+from app.services.scan_persistence import analysis_record, save_scan_outcome, stored_scan_result
+from middleware.file_cleanup import TempFileTracker, track_temp_files
+from services.burst_selection import (
+    decode_video_frames,
+    select_best_decoded_frame,
+    select_best_encoded_frame,
+    split_mjpeg,
 )
-from app.core.security import get_current_user
+from services.client_face import ClientFaceResult, validate_client_face
+from services.deadline_scheduler import PipelineVariant, get_deadline_scheduler
+from services.image_quality_gate import ImageQualityError, get_image_quality_gate
+from services.inference_worker import get_skin_ml_backend
+from services.live_preview import get_live_preview, run_preview_session
+from services.perceptual_hash import image_hashes
+from services.skin_analysis_service import get_skin_analysis_service
 
 router = APIRouter(prefix="/api/v1/scan", tags=["Face Scan"])
 
 ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/png", "image/webp"}
 MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5 MB
-SCAN_MEDIA_ROOT = "media/face_scans"  # adjust if you have a different media root
+MJPEG_CLIP_TYPES = {"video/x-motion-jpeg", "video/mjpeg", "multipart/x-mixed-replace"}
+VIDEO_CLIP_TYPES = {"video/webm": ".webm", "video/mp4": ".mp4"}
+MAX_CLIP_SIZE = 20 * 1024 * 1024  # 20 MB
 
 
 # ---------- Helper functions ----------
@@ -52,7 +92,7 @@ def _create_scan(db: Session, user: User) -> ScanSession:
     return scan
 
 
-def _get_user_scan_or_404(db: Session, scan_id: int, user: User) -> ScanSession:
+def _get_user_scan_or_404(db: Session, scan_id: UUID, user: User) -> ScanSession:
     scan = db.query(ScanSession).filter(ScanSession.id == scan_id).first()
     if not scan:
         raise HTTPException(
@@ -67,7 +107,7 @@ def _get_user_scan_or_404(db: Session, scan_id: int, user: User) -> ScanSession:
     return scan
 
 
-async def _validate_and_save_image(scan: ScanSession, image: UploadFile, user: User) -> str:
+async def _read_image(image: UploadFile) -> bytes:
     # Validate content type
     if image.content_type not in ALLOWED_IMAGE_TYPES:
         raise HTTPException(
@@ -83,24 +123,24 @@ async def _validate_and_save_image(scan: ScanSession, image: UploadFile, user: U
             detail=f"Image too large. Maximum size is {MAX_IMAGE_SIZE // (1024 * 1024)} MB.",
         )
     
-    # Build safe file path
-    ext = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}.get(image.content_type, "jpg")
-    user_dir = os.path.join(SCAN_MEDIA_ROOT, str(user.id))
-    os.makedirs(user_dir, exist_ok=True)
-    filename = f"{scan.id}_{uuid.uuid4().hex}.{ext}"
-    file_path = os.path.join(user_dir, filename)
-    
-    # Save file
+    return contents
+
+
+async def _ingest_image(contents: bytes, content_type: str) -> IngestedImage:
+    # Decode to the analysis-size working copy; the original is archived
+    # after the response (_process_ingested_image)
     try:
-        with open(file_path, "wb") as f:
-            f.write(contents)
+        return await get_media_store().ingest(contents, content_type)
+    except UnidentifiedImageError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not decode image.",
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to save image: {e}",
         )
-    
-    return file_path
 
 
 def _run_mock_analysis(scan: ScanSession) -> dict:
@@ -115,7 +155,7 @@ def _run_mock_analysis(scan: ScanSession) -> dict:
     - Generate personalized recommendations
     """
     # Simple deterministic mock based on scan id
-    base_score = (scan.id % 10) * 10
+    base_score = (scan.id.int % 10) * 10
     
     mock_results = {
         "scan_id": scan.id,
@@ -142,26 +182,214 @@ def _run_mock_analysis(scan: ScanSession) -> dict:
     return mock_results
 
 
-def _update_scan_status(
+def _check_client_face(contents: bytes, client_face: str) -> ClientFaceResult:
+    """Validate client-computed face metadata against the uploaded crop
+    
+    ``contents`` must already have passed ``_read_image``.
+    """
+    try:
+        metadata = json.loads(client_face)
+        # Reads only the image header
+        width, height = Image.open(BytesIO(contents)).size
+    except Exception as e:
+        return ClientFaceResult(False, f"unreadable client face upload: {e}")
+    return validate_client_face(metadata, width, height)
+
+
+def _run_analysis(
+    working: np.ndarray, client_face: Optional[dict], variant: PipelineVariant, full_analysis: bool = False
+) -> dict:
+    """Image analyzers and ML models for the scheduler's variant, on the working copy
+
+    Runs on a scan pipeline thread (DeadlineScheduler.run), with its own
+    event loop for the awaited ML call, so decoding, detection and the
+    analyzers never block the API's loop. ``full_analysis`` runs every ML
+    model, past the cascade's early exit and a degraded variant's
+    acne-only mode.
+    """
+    result = asyncio.run(get_skin_analysis_service().analyze_skin(
+        working, client_face=client_face, variant=variant, ml_backend=get_skin_ml_backend(),
+        force_full=full_analysis,
+    ))
+    return asdict(result)
+
+
+async def _process_ingested_image(
     db: Session,
     scan: ScanSession,
-    status_value: str,
-    result: Optional[dict] = None,
-    image_path: Optional[str] = None,
+    ingested: IngestedImage,
+    background_tasks: BackgroundTasks,
+    face_detection: Optional[dict] = None,
+    latency_budget_ms: Optional[float] = None,
+    client_face: Optional[dict] = None,
+    full_analysis: bool = False,
 ) -> ScanSession:
-    scan.status = status_value
-    scan.updated_at = datetime.utcnow()
+    """Attach an ingested image to the scan and run the analysis
     
-    if image_path is not None:
-        scan.image_path = image_path
+    The analysis runs inside the request on the analysis-size working
+    copy, so the outcome (status, image hash, result, retention entry and,
+    for completed scans, the SkinAnalysis, ConfidenceMetrics and
+    FairnessMetrics rows) is written once, in one round trip; the original
+    is archived after the response. The deadline scheduler picks the
+    pipeline variant the analysis runs with, runs it on one of its
+    pipeline threads and learns from its measured time. Near duplicates
+    of the user's earlier scans are flagged in the result as
+    ``near_duplicate``.
+    """
+    background_tasks.add_task(get_media_store().archive, ingested)
+    working = np.asarray(ingested.working)
+    hashes = image_hashes(working)
+    outcome = {"image_hash": ingested.digest, "image_hashes": hashes}
+    duplicate = find_near_duplicate_scan(db, scan.user_id, hashes, exclude_scan_id=scan.id)
+    if settings.MEDIA_RETENTION_DAYS > 0:
+        # Expiring the original also deletes its thumbnail and analysis copy
+        outcome["retention_key"] = ingested.key
+        outcome["retention_ttl"] = timedelta(days=settings.MEDIA_RETENTION_DAYS)
     
-    if result is not None:
-        scan.result = result
+    budget_ms = latency_budget_ms or settings.SCAN_LATENCY_BUDGET_MS
+    try:
+        analysis, decision = await get_deadline_scheduler().run(
+            budget_ms, lambda variant: _run_analysis(working, client_face, variant, full_analysis)
+        )
+        # Placeholder scores and recommendations until the scoring model lands
+        mock_results = _run_mock_analysis(scan)
+        mock_results["analysis"] = analysis
+        mock_results["pipeline"] = decision.summary()
+        mock_results["ingest"] = {
+            "source_size": list(ingested.source_size),
+            "analysis_size": list(ingested.working.size),
+            "ingest_ms": round(ingested.ingest_ms, 1),
+        }
+        if face_detection is not None:
+            mock_results["face_detection"] = face_detection
+        if duplicate is not None:
+            mock_results["near_duplicate"] = duplicate.summary()
+    except (ImageQualityError, ValueError) as e:
+        # Unusable image (quality gate, no face): the user can retake it
+        save_scan_outcome(db, scan, "failed", error_message=str(e), **outcome)
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Could not analyze image: {e}",
+        )
+    except Exception as e:
+        save_scan_outcome(db, scan, "failed", error_message=str(e), **outcome)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to process scan. Please try again later.",
+        )
+    return save_scan_outcome(
+        db, scan, "completed", result=mock_results,
+        analysis=analysis_record(analysis, settings.MODEL_VERSION), **outcome
+    )
+
+
+def _near_duplicate_of(scan: ScanSession) -> Optional[str]:
+    duplicate = (stored_scan_result(scan) or {}).get("near_duplicate")
+    return duplicate["scan_id"] if duplicate else None
+
+
+def _ensure_uploadable(scan: ScanSession) -> None:
+    if scan.status not in {"pending", "failed"}:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Cannot upload image when scan status is '{scan.status}'.",
+        )
+
+
+async def _read_burst_frames(
+    files: Optional[List[UploadFile]],
+    clip: Optional[UploadFile],
+    temp_files: TempFileTracker,
+) -> tuple:
+    """Collect burst frames as encoded images or decoded RGB arrays
+
+    Returns:
+        (encoded_frames, decoded_frames); exactly one is non-empty
+    """
+    max_frames = settings.SCAN_BURST_MAX_FRAMES
+    if files:
+        if len(files) > max_frames:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Too many frames. Maximum is {max_frames}.",
+            )
+        frames = []
+        for frame in files:
+            if frame.content_type not in ALLOWED_IMAGE_TYPES:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Unsupported image type. Allowed: JPEG, PNG, WEBP.",
+                )
+            contents = await frame.read()
+            if len(contents) > MAX_IMAGE_SIZE:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Frame too large. Maximum size is {MAX_IMAGE_SIZE // (1024 * 1024)} MB.",
+                )
+            frames.append(contents)
+        return frames, []
     
-    db.add(scan)
-    db.commit()
-    db.refresh(scan)
-    return scan
+    if clip is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either frame files or a clip.",
+        )
+    content_type = (clip.content_type or "").split(";")[0].strip()
+    contents = await clip.read()
+    if len(contents) > MAX_CLIP_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Clip too large. Maximum size is {MAX_CLIP_SIZE // (1024 * 1024)} MB.",
+        )
+    if content_type in MJPEG_CLIP_TYPES:
+        return split_mjpeg(contents, max_frames), []
+    if content_type in VIDEO_CLIP_TYPES:
+        # VideoCapture needs a file; removed once the response is sent
+        path = temp_files.create(suffix=VIDEO_CLIP_TYPES[content_type])
+        with open(path, "wb") as f:
+            f.write(contents)
+        return [], await asyncio.to_thread(decode_video_frames, path, max_frames)
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Unsupported clip type. Allowed: MJPEG, WEBM, MP4.",
+    )
+
+
+def _token_user_id(token: Optional[str]) -> Optional[int]:
+    """User id from a bearer token, without a database lookup"""
+    if not token:
+        return None
+    try:
+        subject = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+        return int(subject) if subject is not None else None
+    except (JWTError, ValueError):
+        return None
+
+
+def _analyzed_image_digest(scan: ScanSession) -> str:
+    if scan.status != "completed" or not scan.image_hash:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No analyzed image is stored for this scan.",
+        )
+    return scan.image_hash
+
+
+async def _get_heatmaps(db: Session, requests: List[HeatmapRequest]) -> List[Heatmap]:
+    """Fetch or generate heatmaps and schedule new ones for retention"""
+    try:
+        heatmaps = await get_heatmap_service().get_many(requests)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except HeatmapUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"Heatmap unavailable: {e}")
+    
+    generated = [h for h in heatmaps if h.generated]
+    if generated and settings.MEDIA_RETENTION_DAYS > 0:
+        for heatmap in generated:
+            register_for_retention(db, heatmap.key, timedelta(days=settings.MEDIA_RETENTION_DAYS))
+        db.commit()
+    return heatmaps
 
 
 # ---------- Endpoints ----------
@@ -192,65 +420,174 @@ def init_scan_session(
     status_code=status.HTTP_200_OK,
 )
 async def upload_scan_image(
-    scan_id: int,
+    scan_id: UUID,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
+    client_face: Optional[str] = Form(None),
+    latency_budget_ms: Optional[float] = Form(None, gt=0),
+    full_analysis: bool = Form(False),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
     Upload face image for an existing scan session.
-    Performs image validation and runs mock analysis.
+    Performs image validation and runs the skin analysis.
+    
+    Client-assisted mode: ``file`` is a tight face crop and ``client_face``
+    is JSON ``{"detector", "detector_version", "landmarks"}`` from the
+    browser detector. If it validates, server-side detection is skipped;
+    otherwise the upload is analyzed with full server detection.
+    
+    ``latency_budget_ms`` overrides the default budget; when the queue is
+    backed up the scan runs a cheaper pipeline and its result is marked
+    ``pipeline.degraded``.
+    
+    ``full_analysis`` runs the condition model even when the acne model
+    is confident the skin is clear, and even on a degraded pipeline.
     """
     scan = _get_user_scan_or_404(db=db, scan_id=scan_id, user=current_user)
+    _ensure_uploadable(scan)
     
-    if scan.status not in {"pending", "failed"}:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Cannot upload image when scan status is '{scan.status}'.",
-        )
+    # Validate type and size before anything opens the upload
+    contents = await _read_image(file)
+    face = _check_client_face(contents, client_face) if client_face else None
     
-    # Save image and update scan to 'processing'
-    image_path = await _validate_and_save_image(scan, file, current_user)
-    scan = _update_scan_status(
-        db=db,
-        scan=scan,
-        status_value="processing",
-        image_path=image_path,
+    # Save image, then analyze
+    ingested = await _ingest_image(contents, file.content_type)
+    scan = await _process_ingested_image(
+        db, scan, ingested, background_tasks,
+        face_detection=face.summary() if face else None,
+        latency_budget_ms=latency_budget_ms,
+        client_face=json.loads(client_face) if face is not None and face.accepted else None,
+        full_analysis=full_analysis,
     )
     
-    # Run mock analysis synchronously (TODO: move to background worker)
-    try:
-        mock_results = _run_mock_analysis(scan)
-        scan = _update_scan_status(
-            db=db,
-            scan=scan,
-            status_value="completed",
-            result=mock_results,
-        )
-    except Exception:
-        scan = _update_scan_status(
-            db=db,
-            scan=scan,
-            status_value="failed",
+    return ScanUploadResponse(
+        scan_id=scan.id,
+        status=scan.status,
+        image_url=get_media_store().url_for(scan.image_hash, ANALYSIS),
+        message="Image uploaded successfully.",
+        near_duplicate_of=_near_duplicate_of(scan),
+    )
+
+
+@router.post(
+    "/{scan_id}/upload-burst",
+    response_model=BurstUploadResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def upload_scan_burst(
+    scan_id: UUID,
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(default=[]),
+    clip: Optional[UploadFile] = File(None),
+    latency_budget_ms: Optional[float] = Form(None, gt=0),
+    full_analysis: bool = Form(False),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    temp_files: TempFileTracker = Depends(track_temp_files),
+):
+    """
+    Upload a short burst of frames for an existing scan session.
+    
+    Accepts several image ``files`` or one ``clip`` (MJPEG, WEBM or MP4).
+    Every frame is scored for sharpness, exposure and face presence on a
+    downscaled copy; only the best frame is stored and analyzed.
+    ``latency_budget_ms`` and ``full_analysis`` work as for ``/upload``.
+    """
+    scan = _get_user_scan_or_404(db=db, scan_id=scan_id, user=current_user)
+    _ensure_uploadable(scan)
+    
+    encoded, decoded = await _read_burst_frames(files, clip, temp_files)
+    if not encoded and not decoded:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No decodable frames in upload.",
         )
+    
+    gate = get_image_quality_gate()
+    if encoded:
+        best_index, frames = await asyncio.to_thread(select_best_encoded_frame, gate, encoded)
+    else:
+        best_index, frames = await asyncio.to_thread(select_best_decoded_frame, gate, decoded)
+    best = frames[best_index]
+    if not best.report.passed:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to process scan. Please try again later.",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": "No usable frame in burst.", "feedback": best.report.feedback},
         )
     
-    return ScanUploadResponse(
+    if encoded:
+        contents = encoded[best_index]
+        content_type = files[best_index].content_type if files else "image/jpeg"
+    else:
+        ok, buffer = cv2.imencode(".jpg", cv2.cvtColor(decoded[best_index], cv2.COLOR_RGB2BGR),
+                                  [cv2.IMWRITE_JPEG_QUALITY, 95])
+        contents, content_type = buffer.tobytes(), "image/jpeg"
+    
+    ingested = await _ingest_image(contents, content_type)
+    scan = await _process_ingested_image(
+        db, scan, ingested, background_tasks,
+        latency_budget_ms=latency_budget_ms, full_analysis=full_analysis,
+    )
+    
+    return BurstUploadResponse(
         scan_id=scan.id,
         status=scan.status,
-        image_path=scan.image_path,
+        image_url=get_media_store().url_for(scan.image_hash, ANALYSIS),
+        message=f"Selected frame {best_index + 1} of {len(frames)}.",
+        near_duplicate_of=_near_duplicate_of(scan),
+        frames_received=len(frames),
+        selected_frame=best_index,
+        frame_scores=[round(frame.score, 2) for frame in frames],
+        quality_warnings=best.report.warnings,
     )
 
 
+@router.websocket("/live")
+async def live_preview(websocket: WebSocket, token: Optional[str] = None):
+    """
+    Live capture guidance for the camera preview.
+    
+    Browsers cannot set headers on WebSocket requests, so the access token
+    is passed as the ``token`` query parameter. The client streams small
+    JPEG frames as binary messages; each analyzed frame gets a JSON reply
+    ``{"seq", "ready", "guidance", "face", "metrics", "dropped"}``. Frames
+    sent faster than they can be analyzed are dropped, not queued.
+    """
+    if _token_user_id(token) is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    preview = get_live_preview()
+    if not preview.sessions.try_acquire():
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+    
+    async def receive() -> Optional[bytes]:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return None
+            if message.get("bytes"):
+                return message["bytes"]
+    
+    try:
+        await websocket.accept()
+        await run_preview_session(receive, websocket.send_json, preview.analyzer, preview.executor)
+    except WebSocketDisconnect:
+        # Client went away mid-reply
+        pass
+    finally:
+        preview.sessions.release()
+
+
 @router.get(
     "/{scan_id}/status",
     response_model=ScanStatusResponse,
 )
 def get_scan_status(
-    scan_id: int,
+    scan_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -272,7 +609,7 @@ def get_scan_status(
     response_model=ScanResultResponse,
 )
 def get_scan_results(
-    scan_id: int,
+    scan_id: UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -287,14 +624,14 @@ def get_scan_results(
             detail=f"Scan is not completed yet. Current status: '{scan.status}'.",
         )
     
-    if not scan.result:
+    result_data = stored_scan_result(scan)
+    if not result_data:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Scan result is missing. Please try re-running the scan.",
         )
     
     # If result is stored as text JSON in DB, handle parsing
-    result_data = scan.result
     if isinstance(result_data, str):
         try:
             result_data = json.loads(result_data)
@@ -304,12 +641,132 @@ def get_scan_results(
                 detail="Failed to parse scan result data.",
             )
     
+    media_store = get_media_store()
     return ScanResultResponse(
         scan_id=scan.id,
         status=scan.status,
         result=result_data,
         created_at=scan.created_at,
         updated_at=scan.updated_at,
+        thumbnail_url=media_store.url_for(scan.image_hash, THUMBNAIL),
+        image_url=media_store.url_for(scan.image_hash, ANALYSIS),
+    )
+
+
+@router.get("/{scan_id}/heatmap")
+async def get_scan_heatmap(
+    scan_id: UUID,
+    model: str = "acne",
+    target: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get the Grad-CAM overlay explaining a scan's result.
+    
+    Generated on first request and served from cache afterwards; the
+    overlay is a WebP with alpha sized to the analysis image.
+    """
+    scan = _get_user_scan_or_404(db=db, scan_id=scan_id, user=current_user)
+    request = HeatmapRequest(_analyzed_image_digest(scan), model, target)
+    headers = {"Cache-Control": "private, max-age=31536000, immutable"}
+    
+    service = get_heatmap_service()
+    try:
+        expected = service.describe(request)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    # The ETag is derived from the inputs, so a match needs no storage access
+    if if_none_match and expected.etag in {tag.strip() for tag in if_none_match.split(",")}:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": expected.etag, **headers})
+    
+    heatmap = (await _get_heatmaps(db, [request]))[0]
+    data = await asyncio.to_thread(service.store.backend.get, heatmap.key)
+    return Response(content=data, media_type="image/webp", headers={"ETag": heatmap.etag, **headers})
+
+
+@router.post(
+    "/heatmaps",
+    response_model=HeatmapBatchResponse,
+)
+async def get_scan_heatmaps(
+    payload: HeatmapBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Prepare heatmaps for several scans at once (e.g. a history grid).
+    
+    Missing heatmaps are generated together in batched model passes.
+    """
+    scans = (
+        db.query(ScanSession)
+        .filter(ScanSession.id.in_(payload.scan_ids), ScanSession.user_id == current_user.id)
+        .all()
+    )
+    by_id = {scan.id: scan for scan in scans}
+    missing = [str(scan_id) for scan_id in payload.scan_ids if scan_id not in by_id]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Scans not found: {', '.join(missing)}",
+        )
+    
+    ordered = [by_id[scan_id] for scan_id in payload.scan_ids]
+    requests = [HeatmapRequest(_analyzed_image_digest(scan), payload.model, payload.target) for scan in ordered]
+    heatmaps = await _get_heatmaps(db, requests)
+    
+    query = f"?model={payload.model}" + (f"&target={payload.target}" if payload.target else "")
+    return HeatmapBatchResponse(heatmaps=[
+        HeatmapItem(
+            scan_id=scan.id,
+            heatmap_url=f"{router.prefix}/{scan.id}/heatmap{query}",
+            etag=heatmap.etag,
+            generated=heatmap.generated,
+        )
+        for scan, heatmap in zip(ordered, heatmaps)
+    ])
+
+
+@router.get(
+    "/{scan_id}/similar-cases",
+    response_model=SimilarCasesResponse,
+)
+async def get_similar_cases(
+    scan_id: UUID,
+    k: int = Query(5, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get the SCIN reference cases that look most like the scan.
+    """
+    scan = _get_user_scan_or_404(db=db, scan_id=scan_id, user=current_user)
+    digest = _analyzed_image_digest(scan)
+    
+    try:
+        found = await asyncio.to_thread(get_reference_case_service().similar, digest, k)
+    except ReferenceIndexUnavailable as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Scan image is no longer stored.")
+    
+    return SimilarCasesResponse(
+        scan_id=scan.id,
+        cases=[
+            SimilarCase(
+                scin_id=case.id,
+                distance=hit.distance,
+                diagnosis=case.diagnosis,
+                diagnosis_label=case.diagnosis_label,
+                fitzpatrick_scale=case.fitzpatrick_scale,
+                url=case.url,
+            )
+            for hit, case in load_cases(db, found.hits)
+        ],
+        embed_ms=found.embed_ms,
+        search_ms=found.search_ms,
     )
 
 
@@ -331,13 +788,14 @@ def get_scan_history(
         .all()
     )
     
+    media_store = get_media_store()
     items: List[ScanHistoryItem] = [
         ScanHistoryItem(
             scan_id=s.id,
             status=s.status,
             created_at=s.created_at,
             updated_at=s.updated_at,
-            image_path=getattr(s, "image_path", None),
+            thumbnail_url=media_store.url_for(s.image_hash, THUMBNAIL),
         )
         for s in scans
     ]
@@ -65,6 +65,14 @@ class ProductSearch(BaseModel):
     offset: int = Field(0, ge=0)
 
 
+class Suggestion(BaseModel):
+    """Typeahead suggestion"""
+    text: str
+    kind: str = Field(..., description="'product', 'brand' or 'ingredient'")
+    ref: str = Field(..., description="Product or ingredient id, or the brand name")
+    score: float = Field(..., description="Popularity and rating weight")
+
+
 class ProductRecommendation(BaseModel):
     """Product recommendation response"""
     product: ProductResponse
@@ -72,6 +80,19 @@ class ProductRecommendation(BaseModel):
     reason: str = Field(..., description="Why recommended")
 
 
+class IngredientListMatchRequest(BaseModel):
+    """Pasted INCI list to find catalog products like"""
+    ingredients: str = Field(..., min_length=1, description="Comma-separated INCI list in label order")
+    limit: int = Field(10, ge=1, le=50)
+
+
+class IngredientListMatchResponse(BaseModel):
+    """Closest catalog products to a pasted INCI list"""
+    matches: List[ProductRecommendation]
+    normalized: List[str] = Field(..., description="INCI names the list was normalized to, in order")
+    unrecognized: List[str] = Field(..., description="Normalized names not found in any catalog product")
+
+
 class IngredientAnalysisRequest(BaseModel):
     """Ingredient analysis request"""
     ingredients: List[str] = Field(..., min_items=1)
@@ -119,6 +119,8 @@ class AnalysisResponse(BaseModel):
     analysis_version: Optional[str] = Field(None, description="ML model version")
     created_at: datetime = Field(..., description="Analysis timestamp")
     processing_time_ms: Optional[int] = Field(None, description="Processing time in milliseconds")
+    thumbnail_url: Optional[str] = Field(None, description="Thumbnail image URL")
+    image_url: Optional[str] = Field(None, description="Analysis-size image URL")
 
     class Config:
         json_schema_extra = {
@@ -216,6 +218,9 @@ class ScanUploadResponse(BaseModel):
     status: ScanStatusEnum = Field(..., description="Upload status")
     image_url: Optional[str] = Field(None, description="Uploaded image URL")
     message: str = Field(..., description="Status message")
+    near_duplicate_of: Optional[UUID] = Field(
+        None, description="Earlier scan of the same user whose image this upload nearly duplicates"
+    )
     
     class Config:
         json_schema_extra = {
@@ -249,3 +254,52 @@ class ScanStatusResponse(BaseModel):
 
 # Alias for analysis/result response
 ScanResultResponse = AnalysisResponse
+
+
+# Burst upload response schema
+class BurstUploadResponse(ScanUploadResponse):
+    """Response after a burst upload; only the best frame is analyzed"""
+    frames_received: int = Field(..., description="Number of frames scored", ge=1)
+    selected_frame: int = Field(..., description="Zero-based index of the analyzed frame", ge=0)
+    frame_scores: List[float] = Field(..., description="Quality score per frame (higher is better)")
+    quality_warnings: List[str] = Field(default_factory=list, description="Non-blocking quality issues of the selected frame")
+
+
+# Heatmap schemas
+class HeatmapBatchRequest(BaseModel):
+    """Request explanation heatmaps for several scans at once"""
+    scan_ids: List[UUID] = Field(..., description="Scans to explain", min_length=1, max_length=50)
+    model: str = Field("acne", description="Model to explain: acne or condition")
+    target: Optional[str] = Field(None, description="Label to explain; defaults to the predicted label")
+
+
+class HeatmapItem(BaseModel):
+    """Location and cache validator of one scan's heatmap"""
+    scan_id: UUID = Field(..., description="Scan session ID")
+    heatmap_url: str = Field(..., description="Overlay image URL (WebP with alpha)")
+    etag: str = Field(..., description="Strong ETag of the overlay")
+    generated: bool = Field(..., description="True if the heatmap was computed for this request")
+
+
+class HeatmapBatchResponse(BaseModel):
+    """Heatmaps for a batch of scans"""
+    heatmaps: List[HeatmapItem] = Field(default_factory=list)
+
+
+# Reference case schemas
+class SimilarCase(BaseModel):
+    """A SCIN reference case visually similar to the scan"""
+    scin_id: int = Field(..., description="scin_samples.id")
+    distance: float = Field(..., description="Squared L2 distance between embeddings (0 = identical)")
+    diagnosis: Optional[str] = Field(None, description="Reference diagnosis")
+    diagnosis_label: Optional[str] = Field(None, description="Reference diagnosis label")
+    fitzpatrick_scale: Optional[str] = Field(None, description="Fitzpatrick skin type of the case")
+    url: Optional[str] = Field(None, description="Reference case URL")
+
+
+class SimilarCasesResponse(BaseModel):
+    """Nearest reference cases for a scan"""
+    scan_id: UUID = Field(..., description="Scan session ID")
+    cases: List[SimilarCase] = Field(default_factory=list)
+    embed_ms: float = Field(..., description="Time spent embedding the scan image (0 when cached)")
+    search_ms: float = Field(..., description="Index search time")
@@ -0,0 +1,290 @@
+"""Explanation Heatmaps - Lazy, Cached Grad-CAM Overlays
+
+Heatmaps are generated the first time a scan's explanation is requested,
+never during the scan itself. Each overlay is a small semi-transparent
+WebP stored in the media store under a digest of everything that
+determines it (image digest, model variant and version, explained
+label), so it is computed once and the digest doubles as a strong ETag.
+Like the scan's ML result, Grad-CAM explains the region the pipeline
+analyzes (the face crop, or the whole image when there is none); the map
+is placed over that region in an otherwise transparent overlay of the
+whole image.
+
+Requests arriving within a short window are coalesced: missing heatmaps
+for the same model are explained in one batched forward/backward pass,
+and concurrent requests for the same heatmap share one computation.
+"""
+
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from app.config import settings
+from app.services.media_store import ANALYSIS, ORIGINAL, MediaStore, get_media_store, media_key
+
+logger = logging.getLogger(__name__)
+
+HEATMAP = "heatmap"
+HEATMAP_MODELS = ("acne", "condition")
+
+# (model, images, target labels) -> (maps in [0, 1] of shape (N, h, w), explained labels)
+Explainer = Callable[[str, List[np.ndarray], List[Optional[str]]], Tuple[np.ndarray, List[str]]]
+# (x0, y0, x1, y1) in pixels
+Box = Tuple[int, int, int, int]
+# RGB image -> box of the region to explain, or None to explain the whole image
+Locator = Callable[[np.ndarray], Optional[Box]]
+
+
+class HeatmapUnavailable(RuntimeError):
+    """Raised when a heatmap cannot be generated (image gone, model not loaded)"""
+
+
+@dataclass(frozen=True)
+class HeatmapRequest:
+    """One explanation: which image, which model, which label"""
+    image_digest: str
+    model: str = "acne"
+    # None explains whatever the model predicts
+    target: Optional[str] = None
+
+
+@dataclass
+class Heatmap:
+    """A stored heatmap overlay"""
+    digest: str
+    key: str
+    generated: bool = False
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest}"'
+
+
+def heatmap_digest(request: HeatmapRequest, model_variant: str, model_version: str) -> str:
+    """Content address of a heatmap; changes whenever the model that produced it does"""
+    # "grad_cam_region": maps of the analyzed region, not of the whole image
+    material = ":".join([
+        "grad_cam_region", request.image_digest, model_variant, model_version,
+        request.model, request.target or "predicted",
+    ])
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def render_overlay(
+    cam: np.ndarray, size: Tuple[int, int], max_alpha: float = 0.6, box: Optional[Box] = None
+) -> bytes:
+    """
+    Encode a [0, 1] activation map as a colour overlay with alpha
+
+    Args:
+        cam: Activation map at model resolution
+        size: (width, height) of the overlay
+        max_alpha: Opacity of the strongest activation
+        box: Part of the overlay the map covers, in overlay pixels; None
+            covers all of it
+
+    Returns:
+        WebP bytes (BGRA, transparent where the model did not look)
+    """
+    width, height = size
+    x0, y0, x1, y1 = box or (0, 0, width, height)
+    resized = cv2.resize(cam, (x1 - x0, y1 - y0), interpolation=cv2.INTER_LINEAR)
+    intensity = (np.clip(resized, 0, 1) * 255).astype(np.uint8)
+    overlay = np.zeros((height, width, 4), dtype=np.uint8)
+    overlay[y0:y1, x0:x1, :3] = cv2.applyColorMap(intensity, cv2.COLORMAP_JET)
+    overlay[y0:y1, x0:x1, 3] = (intensity * max_alpha).astype(np.uint8)
+    ok, buffer = cv2.imencode(".webp", overlay, [cv2.IMWRITE_WEBP_QUALITY, 80])
+    if not ok:
+        raise HeatmapUnavailable("Failed to encode heatmap overlay")
+    return buffer.tobytes()
+
+
+def scale_box(box: Box, scale: float, size: Tuple[int, int]) -> Box:
+    """``box`` scaled by ``scale`` and kept at least one pixel inside ``size``"""
+    width, height = size
+    x0, y0 = min(int(box[0] * scale), width - 1), min(int(box[1] * scale), height - 1)
+    x1, y1 = min(max(round(box[2] * scale), x0 + 1), width), min(max(round(box[3] * scale), y0 + 1), height)
+    return x0, y0, x1, y1
+
+
+def ml_grad_cam(model: str, images: List[np.ndarray], targets: List[Optional[str]]) -> Tuple[np.ndarray, List[str]]:
+    """Grad-CAM from the inference worker pool, or in-process without one (loads torch)"""
+    from services.inference_worker import InferenceWorkerError, InferenceWorkerUnavailable, get_skin_ml_backend
+
+    try:
+        return get_skin_ml_backend().grad_cam(images, model=model, targets=targets)
+    except InferenceWorkerError as e:
+        if e.error_type == "ValueError":
+            raise ValueError(str(e))
+        raise HeatmapUnavailable(str(e))
+    except (RuntimeError, InferenceWorkerUnavailable) as e:
+        raise HeatmapUnavailable(str(e))
+
+
+class HeatmapService:
+    """Generates heatmaps on demand, batching misses and caching results"""
+
+    def __init__(
+        self,
+        store: MediaStore,
+        explainer: Explainer = ml_grad_cam,
+        locate: Optional[Locator] = None,
+        model_variant: str = "v1",
+        model_version: str = "1.0.0",
+        overlay_side: int = 256,
+        max_batch: int = 8,
+        batch_window: float = 0.02,
+    ):
+        """
+        Args:
+            store: Media store holding scan images and heatmaps
+            explainer: Computes activation maps for a batch of images
+            locate: Box of the region the scan analyzed; without one, or
+                when it finds none, the whole image is explained
+            model_variant: Part of the cache key
+            model_version: Part of the cache key
+            overlay_side: Longest side of stored overlays
+            max_batch: Largest batch passed to the explainer
+            batch_window: Seconds to wait for more requests before explaining
+        """
+        self.store = store
+        self.explainer = explainer
+        self.locate = locate
+        self.model_variant = model_variant
+        self.model_version = model_version
+        self.overlay_side = overlay_side
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._queue: List[Tuple[HeatmapRequest, str]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self.batches_run = 0
+
+    def describe(self, request: HeatmapRequest) -> Heatmap:
+        """Digest and storage key of a heatmap, without checking it exists"""
+        if request.model not in HEATMAP_MODELS:
+            raise ValueError(f"Unknown model '{request.model}', expected one of {list(HEATMAP_MODELS)}")
+        digest = heatmap_digest(request, self.model_variant, self.model_version)
+        return Heatmap(digest, media_key(digest, HEATMAP))
+
+    async def get(self, request: HeatmapRequest) -> Heatmap:
+        return (await self.get_many([request]))[0]
+
+    async def get_many(self, requests: Sequence[HeatmapRequest]) -> List[Heatmap]:
+        """
+        Heatmaps for several requests, generating the missing ones together
+
+        Raises:
+            ValueError: Unknown model or label
+            HeatmapUnavailable: An image or model needed for a miss is gone
+        """
+        heatmaps = [self.describe(request) for request in requests]
+        exists = await asyncio.gather(*(
+            asyncio.to_thread(self.store.backend.exists, heatmap.key) for heatmap in heatmaps
+        ))
+        waits = []
+        for request, heatmap, present in zip(requests, heatmaps, exists):
+            if present:
+                continue
+            future = self._inflight.get(heatmap.digest)
+            if future is None:
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[heatmap.digest] = future
+                self._queue.append((request, heatmap.digest))
+            heatmap.generated = True
+            waits.append(future)
+        if waits:
+            self._schedule_flush()
+            await asyncio.gather(*waits)
+        return heatmaps
+
+    def _schedule_flush(self) -> None:
+        if len(self._queue) >= self.max_batch:
+            if self._flush_task is not None:
+                self._flush_task.cancel()
+            self._flush_task = None
+            asyncio.get_running_loop().create_task(self._flush())
+        elif self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush(self.batch_window))
+
+    async def _flush(self, delay: float = 0.0) -> None:
+        if delay:
+            await asyncio.sleep(delay)
+            self._flush_task = None
+        queued, self._queue = self._queue, []
+        by_model: Dict[str, List[Tuple[HeatmapRequest, str]]] = {}
+        for request, digest in queued:
+            by_model.setdefault(request.model, []).append((request, digest))
+        for model, items in by_model.items():
+            for start in range(0, len(items), self.max_batch):
+                batch = items[start:start + self.max_batch]
+                try:
+                    await asyncio.to_thread(self._generate, model, batch)
+                    outcome = None
+                except Exception as e:
+                    logger.warning(f"Heatmap generation for {len(batch)} {model} image(s) failed: {e}")
+                    outcome = e if isinstance(e, (ValueError, HeatmapUnavailable)) else HeatmapUnavailable(str(e))
+                for _, digest in batch:
+                    future = self._inflight.pop(digest)
+                    if future.done():
+                        continue
+                    if outcome is None:
+                        future.set_result(None)
+                    else:
+                        future.set_exception(outcome)
+
+    def _load_image(self, digest: str) -> np.ndarray:
+        backend = self.store.backend
+        for key in (media_key(digest, ANALYSIS), media_key(digest, ORIGINAL)):
+            if backend.exists(key):
+                image = cv2.imdecode(np.frombuffer(backend.get(key), np.uint8), cv2.IMREAD_COLOR)
+                if image is not None:
+                    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        raise HeatmapUnavailable(f"Image {digest[:12]} is no longer stored")
+
+    def _box(self, image: np.ndarray) -> Box:
+        h, w = image.shape[:2]
+        box = self.locate(image) if self.locate is not None else None
+        if box is None or box[2] <= box[0] or box[3] <= box[1]:
+            return 0, 0, w, h
+        return box
+
+    def _generate(self, model: str, batch: List[Tuple[HeatmapRequest, str]]) -> None:
+        images = [self._load_image(request.image_digest) for request, _ in batch]
+        boxes = [self._box(image) for image in images]
+        crops = [image[y0:y1, x0:x1] for image, (x0, y0, x1, y1) in zip(images, boxes)]
+        cams, _ = self.explainer(model, crops, [request.target for request, _ in batch])
+        self.batches_run += 1
+        for image, box, cam, (_, digest) in zip(images, boxes, cams, batch):
+            h, w = image.shape[:2]
+            scale = min(1.0, self.overlay_side / max(h, w))
+            size = (max(1, round(w * scale)), max(1, round(h * scale)))
+            overlay = render_overlay(cam, size, box=scale_box(box, scale, size))
+            self.store.backend.put(media_key(digest, HEATMAP), overlay, "image/webp")
+        logger.info(f"Generated {len(batch)} {model} heatmap(s) in one batch")
+
+
+# Global instance
+_heatmap_service: Optional[HeatmapService] = None
+
+
+def get_heatmap_service() -> HeatmapService:
+    """Get or create the heatmap service singleton"""
+    global _heatmap_service
+    if _heatmap_service is None:
+        from services.skin_analysis_service import get_skin_analysis_service
+
+        _heatmap_service = HeatmapService(
+            get_media_store(),
+            locate=get_skin_analysis_service().analysis_box,
+            model_variant=settings.ML_MODEL_VARIANT,
+            model_version=settings.MODEL_VERSION,
+            overlay_side=settings.HEATMAP_OVERLAY_SIDE,
+            max_batch=settings.HEATMAP_MAX_BATCH,
+        )
+    return _heatmap_service
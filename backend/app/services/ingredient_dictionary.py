@@ -0,0 +1,226 @@
+"""Ingredient Dictionary - In-memory INCI Lookup for Ingredient Analysis
+
+Holds every ingredient's safety attributes in two dicts: by exact
+(lower-cased) INCI name, and by a folded key - accents, case,
+punctuation, spacing and bracketed qualifiers removed - which also
+indexes common names and INCINormalizer's variants ("Vitamin E" ->
+Tocopherol). So "alpha isomethyl ionone", "Retinol (Vitamin A)" and
+"Water" normalize to their INCI entries without touching the database;
+names still unknown are fetched together in one query (ingredients added
+since the dictionary was loaded), and names that query did not find are
+remembered as missing. The dictionary is reloaded in a background thread
+after ``ttl_seconds``, which also forgets the missing names; requests keep
+using the previous dictionary until the new one is ready.
+"""
+
+import logging
+import re
+import threading
+import time
+import unicodedata
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.product_models import Ingredient
+from services.inci_normalizer import INCINormalizer
+
+logger = logging.getLogger(__name__)
+
+# Safety ratings above this are flagged
+HIGH_CONCERN_RATING = 7
+# Names remembered as missing before the set is cleared (pasted lists are unbounded)
+MAX_MISSING_NAMES = 50_000
+
+_PARENTHESES = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def exact_key(name: str) -> str:
+    """Lower-cased name with whitespace collapsed"""
+    return " ".join(name.lower().split())
+
+
+def folded_key(name: str) -> str:
+    """Accent-, case-, punctuation- and space-insensitive key; qualifiers in brackets are dropped"""
+    name = unicodedata.normalize("NFKD", _PARENTHESES.sub(" ", name))
+    return _NON_ALNUM.sub("", name.encode("ascii", "ignore").decode().lower())
+
+
+@dataclass
+class IngredientFacts:
+    """What ingredient analysis needs to know about one ingredient"""
+    id: uuid.UUID
+    name_inci: str
+    safety_rating: Optional[int]
+    is_allergen: bool
+    pregnancy_concern: bool
+
+
+def _columns():
+    return (
+        Ingredient.id, Ingredient.name_inci, Ingredient.common_names, Ingredient.safety_rating,
+        Ingredient.is_allergen, Ingredient.pregnancy_concern,
+    )
+
+
+def _facts(row) -> IngredientFacts:
+    ingredient_id, name_inci, _, safety_rating, is_allergen, pregnancy_concern = row
+    return IngredientFacts(ingredient_id, name_inci, safety_rating, bool(is_allergen), bool(pregnancy_concern))
+
+
+class IngredientDictionary:
+    """Exact plus folded-key ingredient lookup"""
+
+    def __init__(self, rows: Iterable = ()):
+        self.by_name: Dict[str, IngredientFacts] = {}
+        self.by_key: Dict[str, IngredientFacts] = {}
+        # Exact keys the database did not have either; never queried again
+        self.missing: Set[str] = set()
+        common = []
+        for row in rows:
+            facts = self.add(row)
+            common.extend((name, facts) for name in (row[2] or []))
+        common.extend(
+            (variant, self.by_name[exact_key(inci_name)])
+            for variant, inci_name in INCINormalizer.COMMON_VARIANTS.items()
+            if exact_key(inci_name) in self.by_name
+        )
+        # Common names and variants never shadow an INCI name
+        for name, facts in common:
+            self.by_key.setdefault(folded_key(name), facts)
+
+    def __len__(self) -> int:
+        return len(self.by_name)
+
+    def add(self, row) -> IngredientFacts:
+        """Add an ``(id, name_inci, common_names, safety_rating, is_allergen, pregnancy_concern)`` row"""
+        facts = _facts(row)
+        self.by_name[exact_key(facts.name_inci)] = facts
+        self.by_key[folded_key(facts.name_inci)] = facts
+        return facts
+
+    def lookup(self, name: str) -> Optional[IngredientFacts]:
+        return self.by_name.get(exact_key(name)) or self.by_key.get(folded_key(name))
+
+    def resolve(self, names: Sequence[str], db: Optional[Session] = None) -> List[Optional[IngredientFacts]]:
+        """
+        Facts for each of ``names`` (None where unknown), in order
+
+        With ``db``, names the dictionary does not know are looked up in
+        one query and any found are added to the dictionary; names not
+        found there are not looked up again.
+        """
+        found = [self.lookup(name) for name in names]
+        missing = [i for i, facts in enumerate(found) if facts is None and exact_key(names[i]) not in self.missing]
+        if missing and db is not None:
+            keys = {exact_key(names[i]) for i in missing}
+            for row in db.execute(select(*_columns()).where(func.lower(Ingredient.name_inci).in_(keys))):
+                self.add(row)
+            for i in missing:
+                found[i] = self.lookup(names[i])
+            if len(self.missing) > MAX_MISSING_NAMES:
+                self.missing.clear()
+            self.missing.update(exact_key(names[i]) for i in missing if found[i] is None)
+        return found
+
+
+def summarize(resolved: Iterable[Optional[IngredientFacts]]) -> dict:
+    """SafetyAnalysis fields for resolved ingredients, in one pass; repeats count once"""
+    seen = set()
+    flagged, allergens = [], []
+    total_safety, rated = 0, 0
+    pregnancy_safe = True
+    for facts in resolved:
+        if facts is None or facts.id in seen:
+            continue
+        seen.add(facts.id)
+        if facts.safety_rating:
+            total_safety += facts.safety_rating
+            rated += 1
+            if facts.safety_rating > HIGH_CONCERN_RATING:
+                flagged.append({
+                    "name": facts.name_inci,
+                    "safety_rating": facts.safety_rating,
+                    "reason": "High safety concern"
+                })
+        if facts.is_allergen:
+            allergens.append(facts.name_inci)
+        if facts.pregnancy_concern:
+            pregnancy_safe = False
+
+    avg_safety = (total_safety / rated) if rated else 5.0
+    return {
+        "overall_safety_score": avg_safety,
+        "allergen_warnings": allergens,
+        "flagged_ingredients": flagged,
+        "pregnancy_safe": pregnancy_safe,
+        "sensitive_skin_safe": avg_safety < 6.0,
+    }
+
+
+class IngredientDictionaryService:
+    """Loads the dictionary from the database and reloads it in the background when stale"""
+
+    def __init__(self, session_factory: Callable[[], Session], ttl_seconds: int = 3600):
+        self.session_factory = session_factory
+        self.ttl_seconds = ttl_seconds
+        self._dictionary: Optional[IngredientDictionary] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._reload: Optional[threading.Thread] = None
+
+    def load(self) -> IngredientDictionary:
+        start = time.perf_counter()
+        db = self.session_factory()
+        try:
+            dictionary = IngredientDictionary(db.execute(select(*_columns())))
+        finally:
+            db.close()
+        self._dictionary, self._loaded_at = dictionary, time.monotonic()
+        logger.info(f"Ingredient dictionary loaded: {len(dictionary)} ingredients in {time.perf_counter() - start:.2f}s")
+        return dictionary
+
+    def _reload_in_background(self) -> None:
+        try:
+            self.load()
+        except Exception as e:
+            # Keep serving the previous dictionary; try again after another TTL
+            logger.warning(f"Ingredient dictionary reload failed: {e}")
+            self._loaded_at = time.monotonic()
+
+    def get(self) -> IngredientDictionary:
+        """
+        The current dictionary
+
+        Only the first call waits for a load; once the dictionary is stale
+        it is returned as is while a background thread loads the next one.
+        """
+        if self._dictionary is None:
+            with self._lock:
+                if self._dictionary is None:
+                    return self.load()
+        if time.monotonic() - self._loaded_at > self.ttl_seconds:
+            with self._lock:
+                if self._reload is None or not self._reload.is_alive():
+                    self._reload = threading.Thread(
+                        target=self._reload_in_background, name="ingredient-dictionary-reload", daemon=True
+                    )
+                    self._reload.start()
+        return self._dictionary
+
+
+# Global instance
+_dictionary_service: Optional[IngredientDictionaryService] = None
+
+def get_ingredient_dictionary() -> IngredientDictionary:
+    global _dictionary_service
+    if _dictionary_service is None:
+        from app.config import settings
+        from app.database import SessionLocal
+
+        _dictionary_service = IngredientDictionaryService(SessionLocal, settings.INGREDIENT_DICTIONARY_TTL_SECONDS)
+    return _dictionary_service.get()
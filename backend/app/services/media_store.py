@@ -0,0 +1,437 @@
+"""Scan Media Store - Content-Addressed Blob Storage
+
+Stores scan images keyed by their SHA-256 digest, sharded by hash prefix:
+
+    originals/ab/cd/abcd...ef
+    thumbnail/ab/cd/abcd...ef.webp
+    analysis/ab/cd/abcd...ef.webp
+
+Identical uploads resolve to the same key and are only written once.
+Blocking I/O runs off the event loop, and the WebP thumbnail and
+analysis-size derivatives are generated in the background so history
+and progress screens never ship the original image.
+
+Scan uploads go through ``ingest``: the upload is decoded straight to
+its analysis-size working copy (JPEG scales down while decoding, so the
+cost follows the analysis size, not the camera's megapixels), and only
+the small analysis derivative is written in the request. ``archive``
+stores the original and the thumbnail afterwards, off the request path.
+
+Backends:
+- LocalMediaBackend: local filesystem (dev, Railway volume)
+- S3MediaBackend: any S3-compatible API (AWS S3, Cloudflare R2, MinIO)
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+ORIGINAL = "originals"
+THUMBNAIL = "thumbnail"
+ANALYSIS = "analysis"
+DERIVATIVES = (THUMBNAIL, ANALYSIS)
+
+# Route that serves derivatives for backends without public URLs
+MEDIA_ROUTE_PREFIX = "/api/v1/media"
+
+_MAGIC_CONTENT_TYPES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"RIFF", "image/webp"),
+)
+
+
+def sniff_content_type(data: bytes) -> str:
+    """Best-effort content type from magic bytes"""
+    for magic, content_type in _MAGIC_CONTENT_TYPES:
+        if data.startswith(magic):
+            return content_type
+    return "application/octet-stream"
+
+
+def media_key(digest: str, variant: str = ORIGINAL) -> str:
+    """Build the sharded storage key for a digest and variant"""
+    shard = f"{digest[:2]}/{digest[2:4]}/{digest}"
+    if variant == ORIGINAL:
+        return f"{ORIGINAL}/{shard}"
+    return f"{variant}/{shard}.webp"
+
+
+@dataclass
+class StoredMedia:
+    """Result of storing a blob"""
+    digest: str
+    key: str
+    size: int
+    content_type: str
+    deduplicated: bool
+
+
+@dataclass
+class IngestedImage:
+    """An upload decoded to its analysis-size working copy, original not yet archived"""
+    digest: str
+    key: str
+    content_type: str
+    original: bytes
+    # RGB, EXIF-oriented, longest side at most the analysis size
+    working: Image.Image
+    source_size: Tuple[int, int]
+    ingest_ms: float
+
+    @property
+    def size(self) -> int:
+        return len(self.original)
+
+
+class MediaBackend:
+    """Interface implemented by every media storage backend"""
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        raise NotImplementedError
+
+    def get(self, key: str) -> bytes:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def url(self, key: str) -> Optional[str]:
+        """Direct URL for a key, or None if it must be served by the API"""
+        return None
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Filesystem path for a key, or None for remote backends"""
+        return None
+
+
+class LocalMediaBackend(MediaBackend):
+    """Filesystem backend with atomic writes"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def local_path(self, key: str) -> Path:
+        return self.root / key
+
+    def exists(self, key: str) -> bool:
+        return self.local_path(key).is_file()
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        path = self.local_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file in the same directory, then rename, so
+        # concurrent readers never observe a partially written blob
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, key: str) -> bytes:
+        return self.local_path(key).read_bytes()
+
+    def delete(self, key: str) -> None:
+        try:
+            self.local_path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+
+class S3MediaBackend(MediaBackend):
+    """S3-compatible backend
+
+    Accepts any boto3-style client exposing ``head_object``, ``put_object``,
+    ``get_object``, ``delete_object`` and ``generate_presigned_url``, so tests
+    can pass an in-memory stand-in and production can point at S3, R2 or MinIO.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        client: Any = None,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        presign_ttl_seconds: int = 3600,
+    ):
+        self.bucket = bucket
+        self.presign_ttl_seconds = presign_ttl_seconds
+        if client is None:
+            try:
+                import boto3
+            except ImportError as e:
+                raise RuntimeError("boto3 is required for MEDIA_BACKEND='s3'") from e
+            client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        self.client = client
+
+    @staticmethod
+    def _is_not_found(error: Exception) -> bool:
+        response = getattr(error, "response", None) or {}
+        code = str(response.get("Error", {}).get("Code", ""))
+        return code in {"404", "NoSuchKey", "NotFound"}
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except Exception as e:
+            if self._is_not_found(e):
+                return False
+            raise
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        self.client.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=data,
+            ContentType=content_type,
+            CacheControl="public, max-age=31536000, immutable",
+        )
+
+    def get(self, key: str) -> bytes:
+        response = self.client.get_object(Bucket=self.bucket, Key=key)
+        return response["Body"].read()
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def url(self, key: str) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=self.presign_ttl_seconds,
+        )
+
+
+class MediaStore:
+    """Content-addressed scan media store with background derivatives"""
+
+    def __init__(
+        self,
+        backend: MediaBackend,
+        thumbnail_size: int = 256,
+        analysis_size: int = 1024,
+        archive_max_side: int = 0,
+    ):
+        self.backend = backend
+        self.derivative_sizes: Dict[str, int] = {
+            THUMBNAIL: thumbnail_size,
+            ANALYSIS: analysis_size,
+        }
+        # Longest side of archived originals; 0 keeps the uploaded bytes
+        self.archive_max_side = archive_max_side
+
+    def _save_sync(self, data: bytes, content_type: Optional[str]) -> StoredMedia:
+        digest = hashlib.sha256(data).hexdigest()
+        key = media_key(digest)
+        content_type = content_type or sniff_content_type(data)
+
+        if self.backend.exists(key):
+            logger.debug(f"Deduplicated upload {digest[:12]}")
+            return StoredMedia(digest, key, len(data), content_type, deduplicated=True)
+
+        self.backend.put(key, data, content_type)
+        logger.info(f"Stored media {digest[:12]} ({len(data)} bytes)")
+        return StoredMedia(digest, key, len(data), content_type, deduplicated=False)
+
+    async def save(self, data: bytes, content_type: Optional[str] = None) -> StoredMedia:
+        """Hash and store a blob without blocking the event loop
+
+        Args:
+            data: Raw image bytes
+            content_type: MIME type; sniffed from magic bytes if omitted
+
+        Returns:
+            StoredMedia describing the stored (or already present) blob
+        """
+        return await asyncio.to_thread(self._save_sync, data, content_type)
+
+    def _render_derivative(self, image: Image.Image, max_side: int) -> bytes:
+        derivative = image.copy()
+        derivative.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        derivative.save(output, format="WEBP", quality=80, method=4)
+        return output.getvalue()
+
+    def decode_working_copy(self, data: bytes) -> Tuple[Image.Image, Tuple[int, int]]:
+        """Decode to the RGB, EXIF-oriented, analysis-size image scans are analyzed on
+
+        Returns:
+            (working copy, source size)
+        """
+        image = Image.open(io.BytesIO(data))
+        source_size = image.size
+        side = self.derivative_sizes[ANALYSIS]
+        # JPEG decodes at 1/2, 1/4 or 1/8 scale in the DCT domain (never
+        # below the requested size); other formats decode in full
+        image.draft("RGB", (side, side))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        image.thumbnail((side, side), Image.Resampling.LANCZOS)
+        return image, source_size
+
+    def _ingest_sync(self, data: bytes, content_type: Optional[str]) -> IngestedImage:
+        start = time.perf_counter()
+        digest = hashlib.sha256(data).hexdigest()
+        working, source_size = self.decode_working_copy(data)
+        analysis_key = media_key(digest, ANALYSIS)
+        if not self.backend.exists(analysis_key):
+            analysis = self._render_derivative(working, self.derivative_sizes[ANALYSIS])
+            self.backend.put(analysis_key, analysis, "image/webp")
+        return IngestedImage(
+            digest=digest,
+            key=media_key(digest),
+            content_type=content_type or sniff_content_type(data),
+            original=data,
+            working=working,
+            source_size=source_size,
+            ingest_ms=(time.perf_counter() - start) * 1000,
+        )
+
+    async def ingest(self, data: bytes, content_type: Optional[str] = None) -> IngestedImage:
+        """Decode an upload to its analysis-size working copy and store only that
+
+        A repeated upload reuses the stored analysis copy. The original is
+        not stored yet; call ``archive`` once the response is on its way.
+
+        Raises:
+            PIL.UnidentifiedImageError: If the data is not a decodable image
+        """
+        return await asyncio.to_thread(self._ingest_sync, data, content_type)
+
+    def _capped_original(self, ingested: IngestedImage) -> bytes:
+        if not self.archive_max_side or max(ingested.source_size) <= self.archive_max_side:
+            return ingested.original
+        image = Image.open(io.BytesIO(ingested.original))
+        image.draft("RGB", (self.archive_max_side, self.archive_max_side))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        image.thumbnail((self.archive_max_side, self.archive_max_side), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=92)
+        return output.getvalue()
+
+    def archive(self, ingested: IngestedImage) -> StoredMedia:
+        """Store the original (capped to ``archive_max_side``) and the thumbnail
+
+        The original stays keyed by the digest of the uploaded bytes, so
+        identical uploads are still archived once.
+        """
+        thumbnail_key = media_key(ingested.digest, THUMBNAIL)
+        if not self.backend.exists(thumbnail_key):
+            thumbnail = self._render_derivative(ingested.working, self.derivative_sizes[THUMBNAIL])
+            self.backend.put(thumbnail_key, thumbnail, "image/webp")
+
+        if self.backend.exists(ingested.key):
+            return StoredMedia(ingested.digest, ingested.key, ingested.size, ingested.content_type, deduplicated=True)
+        data = self._capped_original(ingested)
+        content_type = ingested.content_type if data is ingested.original else "image/jpeg"
+        self.backend.put(ingested.key, data, content_type)
+        logger.info(f"Archived media {ingested.digest[:12]} ({len(data)} of {ingested.size} bytes)")
+        return StoredMedia(ingested.digest, ingested.key, len(data), content_type, deduplicated=False)
+
+    def generate_derivatives(self, digest: str) -> Dict[str, str]:
+        """Create the thumbnail and analysis-size WebP derivatives
+
+        Existing derivatives are left untouched, so this is safe to call
+        for every upload including deduplicated ones. Before an ingested
+        upload is archived, the thumbnail is rendered from its analysis
+        derivative.
+
+        Returns:
+            Mapping of variant name to storage key
+        """
+        keys = {variant: media_key(digest, variant) for variant in DERIVATIVES}
+        missing = [v for v, key in keys.items() if not self.backend.exists(key)]
+        if not missing:
+            return keys
+
+        source = media_key(digest)
+        if ANALYSIS not in missing and not self.backend.exists(source):
+            source = keys[ANALYSIS]
+        try:
+            image = Image.open(io.BytesIO(self.backend.get(source)))
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            # Largest first so the smaller derivative resizes a smaller image
+            for variant in sorted(missing, key=lambda v: -self.derivative_sizes[v]):
+                data = self._render_derivative(image, self.derivative_sizes[variant])
+                self.backend.put(keys[variant], data, "image/webp")
+        except Exception as e:
+            logger.error(f"Failed to generate derivatives for {digest[:12]}: {e}")
+            raise
+
+        logger.debug(f"Generated derivatives {missing} for {digest[:12]}")
+        return keys
+
+    async def generate_derivatives_async(self, digest: str) -> Dict[str, str]:
+        return await asyncio.to_thread(self.generate_derivatives, digest)
+
+    def delete(self, key: str) -> None:
+        """Delete a stored blob; deleting an original also deletes its derivatives
+
+        The thumbnail and analysis copies are face images too, so they
+        expire with the original they were rendered from.
+        """
+        self.backend.delete(key)
+        if key.startswith(f"{ORIGINAL}/"):
+            digest = key.rsplit("/", 1)[-1]
+            for variant in DERIVATIVES:
+                self.backend.delete(media_key(digest, variant))
+
+    def url_for(self, digest: Optional[str], variant: str = THUMBNAIL) -> Optional[str]:
+        """Public URL for a derivative; originals are never exposed"""
+        if not digest or variant not in DERIVATIVES:
+            return None
+        direct = self.backend.url(media_key(digest, variant))
+        return direct or f"{MEDIA_ROUTE_PREFIX}/{variant}/{digest}"
+
+
+def create_media_store() -> MediaStore:
+    """Build a MediaStore from application settings"""
+    if settings.MEDIA_BACKEND == "s3":
+        if not settings.MEDIA_S3_BUCKET:
+            raise ValueError("MEDIA_S3_BUCKET is required when MEDIA_BACKEND='s3'")
+        backend: MediaBackend = S3MediaBackend(
+            bucket=settings.MEDIA_S3_BUCKET,
+            endpoint_url=settings.MEDIA_S3_ENDPOINT_URL,
+            region=settings.MEDIA_S3_REGION,
+        )
+    else:
+        backend = LocalMediaBackend(settings.MEDIA_ROOT)
+
+    return MediaStore(
+        backend,
+        thumbnail_size=settings.MEDIA_THUMBNAIL_SIZE,
+        analysis_size=settings.MEDIA_ANALYSIS_SIZE,
+        archive_max_side=settings.MEDIA_ARCHIVE_MAX_SIDE,
+    )
+
+
+# Global instance
+_media_store: Optional[MediaStore] = None
+
+
+def get_media_store() -> MediaStore:
+    """Get or create the media store singleton"""
+    global _media_store
+    if _media_store is None:
+        _media_store = create_media_store()
+    return _media_store
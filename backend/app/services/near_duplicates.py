@@ -0,0 +1,59 @@
+"""Near-Duplicate Scans - Flag Re-uploads of an Earlier Scan
+
+Uploads are compared by perceptual hash (services/perceptual_hash.py)
+against the same user's earlier scans, so a re-encoded or slightly
+re-framed selfie is flagged even though its SHA-256 digest differs.
+Only the user's own scans are considered; the hashes come from one
+indexed query on scan_sessions.user_id, which every API worker sees
+immediately, and the comparison itself takes microseconds.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.scan import ScanSession
+from services.perceptual_hash import ImageHashes, from_signed, hamming, is_near_duplicate
+
+
+@dataclass
+class NearDuplicate:
+    scan_id: Any
+    distance: int
+
+    def summary(self) -> dict:
+        return {"scan_id": str(self.scan_id), "distance": self.distance}
+
+
+def find_near_duplicate_scan(
+    db: Session,
+    user_id: int,
+    hashes: ImageHashes,
+    exclude_scan_id: Any = None,
+    max_distance: Optional[int] = None,
+    dhash_max_distance: Optional[int] = None,
+) -> Optional[NearDuplicate]:
+    """Closest earlier scan of the user that nearly duplicates ``hashes``, if any"""
+    if max_distance is None or dhash_max_distance is None:
+        from app.config import settings
+
+        max_distance = settings.NEAR_DUPLICATE_MAX_DISTANCE if max_distance is None else max_distance
+        if dhash_max_distance is None:
+            dhash_max_distance = settings.NEAR_DUPLICATE_DHASH_MAX_DISTANCE
+
+    query = db.query(ScanSession.id, ScanSession.perceptual_hash, ScanSession.difference_hash).filter(
+        ScanSession.user_id == user_id,
+        ScanSession.perceptual_hash.isnot(None),
+    )
+    if exclude_scan_id is not None:
+        query = query.filter(ScanSession.id != exclude_scan_id)
+
+    best: Optional[NearDuplicate] = None
+    for scan_id, phash, dhash in query:
+        earlier = ImageHashes(from_signed(phash), from_signed(dhash))
+        if is_near_duplicate(hashes, earlier, max_distance, dhash_max_distance):
+            distance = hamming(hashes.phash, earlier.phash)
+            if best is None or distance < best.distance:
+                best = NearDuplicate(scan_id, distance)
+    return best
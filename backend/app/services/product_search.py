@@ -0,0 +1,173 @@
+"""Product Search - Ranked, Typo-Tolerant Catalog Search
+
+On PostgreSQL, products carry a weighted ``search_vector`` (brand A, name
+B) and trigram indexes on name and brand (migrations/
+sprint8_product_search.py). A product matches when every query word is a
+prefix of one of its words, or, for misspellings, when the query is
+similar enough to its name or brand by pg_trgm word similarity. Both
+predicates, and the brand filter's ILIKE, are answered from GIN indexes,
+so search no longer scans the table. Matches are ordered by text rank
+plus trigram similarity, with brand similarity boosted so "cerave" ranks
+CeraVe products above products that merely mention it.
+
+Other databases (SQLite in tests) rank in Python: every query word must
+prefix-match, or be trigram-similar to, a word of the name or brand, and
+scores use the same brand-over-name weights and pg_trgm's trigrams. It
+scans the filtered rows and is meant for tests and local development,
+not the production catalog.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, String, bindparam, func, literal_column, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.product_models import Product
+
+# pg_trgm.word_similarity_threshold, the cut-off of the ``<%`` operator
+TYPO_THRESHOLD = 0.6
+# ts_rank weights of the A (brand) and B (name) labels
+BRAND_WEIGHT = 1.0
+NAME_WEIGHT = 0.4
+
+# Generated column, not mapped on Product so the model still creates on SQLite
+SEARCH_VECTOR = literal_column("products.search_vector")
+
+
+def search_terms(query: str) -> List[str]:
+    """Lowercased words of a query; also safe to splice into a tsquery"""
+    return re.findall(r"\w+", query.lower())
+
+
+@lru_cache(maxsize=65536)
+def trigrams(word: str) -> FrozenSet[str]:
+    """pg_trgm trigrams of one word (padded with two spaces before, one after)"""
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+@lru_cache(maxsize=65536)
+def _word_similarity(term: str, word: str) -> float:
+    if word.startswith(term):
+        return 1.0
+    term_trigrams = trigrams(term)
+    return len(term_trigrams & trigrams(word)) / len(term_trigrams)
+
+
+def term_similarity(term: str, words: Sequence[str]) -> float:
+    """Best match of a query term among ``words``
+
+    1.0 for a prefix, otherwise the share of the term's trigrams found in
+    the word (pg_trgm word_similarity for a single word).
+    """
+    return max((_word_similarity(term, word) for word in words), default=0.0)
+
+
+def _filtered(statement: Select, brand: Optional[str], category: Optional[str]) -> Select:
+    if brand:
+        statement = statement.where(Product.brand.ilike(f"%{brand}%"))
+    if category:
+        statement = statement.where(Product.category == category)
+    return statement
+
+
+def ranked_search_statement(
+    query: str,
+    brand: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = 10,
+    offset: int = 0,
+    brand_boost: float = 0.5,
+) -> Select:
+    """PostgreSQL query of ranked product ids for ``query``"""
+    terms = search_terms(query)
+    tsquery = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+    text = bindparam("search_text", " ".join(terms), type_=String)
+    score = (
+        func.ts_rank_cd(SEARCH_VECTOR, tsquery)
+        + func.word_similarity(text, Product.name)
+        + brand_boost * func.word_similarity(text, Product.brand)
+    ).label("score")
+
+    statement = select(Product.id, score).where(
+        or_(
+            SEARCH_VECTOR.op("@@")(tsquery),
+            text.op("<%")(Product.name),
+            text.op("<%")(Product.brand),
+        )
+    )
+    statement = _filtered(statement, brand, category)
+    return statement.order_by(score.desc(), Product.id).offset(offset).limit(limit)
+
+
+def rank_in_memory(
+    rows: Iterable[Tuple[Any, str, str]],
+    query: str,
+    limit: int = 10,
+    offset: int = 0,
+    brand_boost: float = 0.5,
+) -> List[Any]:
+    """Ids of ``(id, name, brand)`` rows matching ``query``, best first"""
+    terms = search_terms(query)
+    scored = []
+    for row_id, name, brand in rows:
+        name_words, brand_words = search_terms(name or ""), search_terms(brand or "")
+        name_scores = [term_similarity(term, name_words) for term in terms]
+        brand_scores = [term_similarity(term, brand_words) for term in terms]
+        if not all(max(n, b) >= TYPO_THRESHOLD for n, b in zip(name_scores, brand_scores)):
+            continue
+        name_similarity = sum(name_scores) / len(terms)
+        brand_similarity = sum(brand_scores) / len(terms)
+        text_rank = sum(
+            BRAND_WEIGHT if b == 1.0 else NAME_WEIGHT if n == 1.0 else 0.0
+            for n, b in zip(name_scores, brand_scores)
+        ) / len(terms)
+        scored.append((-(text_rank + name_similarity + brand_boost * brand_similarity), str(row_id), row_id))
+    scored.sort()
+    return [row_id for _, _, row_id in scored[offset:offset + limit]]
+
+
+def ranked_product_ids(
+    db: Session,
+    query: str,
+    brand: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = 10,
+    offset: int = 0,
+    brand_boost: Optional[float] = None,
+) -> List[Any]:
+    """Ids of the products matching ``query``, best first"""
+    if brand_boost is None:
+        from app.config import settings
+
+        brand_boost = settings.PRODUCT_SEARCH_BRAND_BOOST
+    if not search_terms(query):
+        return []
+
+    if db.get_bind().dialect.name == "postgresql":
+        statement = ranked_search_statement(query, brand, category, limit, offset, brand_boost)
+        return [row_id for row_id, _ in db.execute(statement)]
+
+    rows = db.execute(_filtered(select(Product.id, Product.name, Product.brand), brand, category))
+    return rank_in_memory(rows, query, limit, offset, brand_boost)
+
+
+def search_products(
+    db: Session,
+    query: Optional[str] = None,
+    brand: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = 10,
+    offset: int = 0,
+) -> List[Product]:
+    """Products matching ``query`` best first, or all filtered products without one"""
+    if not query or not search_terms(query):
+        return db.scalars(_filtered(select(Product), brand, category).offset(offset).limit(limit)).all()
+
+    ids = ranked_product_ids(db, query, brand, category, limit, offset)
+    if not ids:
+        return []
+    products = {product.id: product for product in db.scalars(select(Product).where(Product.id.in_(ids)))}
+    return [products[row_id] for row_id in ids if row_id in products]
@@ -0,0 +1,321 @@
+"""Re-analysis Backfill - Versioned Results After a Model Upgrade
+
+Streams completed scans in (created_at, id) keyset order, re-runs them
+through the inference engine in large batches with a small concurrency
+cap, and writes the output to ``scan_result_versions`` next to the
+results users already saw. The keyset position is committed with each
+batch's results, so a stopped job resumes exactly where it left off.
+The job backs off while live scans are arriving.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, exists, func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.scan import ScanSession, ScanStatus
+from app.models.scan_result import BackfillCheckpoint, ScanResultVersion
+
+logger = logging.getLogger(__name__)
+
+Keyset = Tuple[datetime, object]
+
+
+@dataclass
+class BackfillProgress:
+    """Counters and rate of a backfill run"""
+    pending: int = 0
+    processed: int = 0
+    failed: int = 0
+    started: float = field(default_factory=time.monotonic)
+    paused_seconds: float = 0.0
+
+    @property
+    def done(self) -> int:
+        return self.processed + self.failed
+
+    @property
+    def throughput(self) -> float:
+        """Scans per second of active (not paused) time"""
+        active = time.monotonic() - self.started - self.paused_seconds
+        return self.done / active if active > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        rate = self.throughput
+        if rate <= 0:
+            return None
+        return max(0, self.pending - self.done) / rate
+
+    def summary(self) -> str:
+        eta = self.eta_seconds
+        eta_text = str(timedelta(seconds=int(eta))) if eta is not None else "unknown"
+        return (
+            f"{self.done}/{self.pending} scans ({self.failed} failed), "
+            f"{self.throughput:.2f} scans/s, ETA {eta_text}"
+        )
+
+
+def pending_scans_query(model_version: str, after: Optional[Keyset] = None, limit: Optional[int] = None):
+    """Completed scans without a result for ``model_version``, in keyset order"""
+    query = (
+        select(ScanSession.id, ScanSession.created_at, ScanSession.image_hash)
+        .where(
+            ScanSession.status == ScanStatus.COMPLETED,
+            ScanSession.image_hash.isnot(None),
+            ~exists().where(
+                ScanResultVersion.scan_session_id == ScanSession.id,
+                ScanResultVersion.model_version == model_version,
+            ),
+        )
+        .order_by(ScanSession.created_at, ScanSession.id)
+    )
+    if after is not None:
+        created_at, scan_id = after
+        query = query.where(or_(
+            ScanSession.created_at > created_at,
+            and_(ScanSession.created_at == created_at, ScanSession.id > scan_id),
+        ))
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def recent_scan_probe(session_factory: Callable[[], Session], window_seconds: int, threshold: int) -> Callable[[], bool]:
+    """Probe reporting live traffic when ``threshold`` scans started within the window"""
+
+    def busy() -> bool:
+        db = session_factory()
+        try:
+            since = datetime.utcnow() - timedelta(seconds=window_seconds)
+            count = db.execute(
+                select(func.count()).select_from(ScanSession).where(ScanSession.created_at >= since)
+            ).scalar_one()
+            return count >= threshold
+        finally:
+            db.close()
+
+    return busy
+
+
+async def reanalyze_image(
+    data: bytes,
+    decode: Callable[[bytes], np.ndarray],
+    crop: Callable[[np.ndarray], Optional[np.ndarray]],
+    ml_backend,
+) -> Dict:
+    """
+    Re-run the ML models on a stored image the way a live scan does
+
+    Args:
+        data: Stored image bytes
+        decode: Bytes to the RGB working copy live scans are analyzed on
+            (MediaStore.decode_working_copy)
+        crop: Working copy to the analyzed region, None without a face
+            (SkinAnalysisService.analysis_region)
+        ml_backend: Worker pool client or in-process ML service
+
+    Raises:
+        ValueError: If the image has no face
+    """
+    def prepare() -> Optional[np.ndarray]:
+        return crop(decode(data))
+
+    region = await asyncio.to_thread(prepare)
+    if region is None:
+        raise ValueError("No face detected in stored image")
+    return await ml_backend.analyze_skin_with_ml(region, force_full=True)
+
+
+class ReanalysisBackfill:
+    """Throttled, resumable re-analysis of historical scans"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        model_version: str,
+        reanalyze: Callable[[bytes], Awaitable[Dict]],
+        load_image: Callable[[str], Optional[bytes]],
+        batch_size: int = 500,
+        concurrency: int = 2,
+        max_rate: Optional[float] = None,
+        traffic_probe: Optional[Callable[[], bool]] = None,
+        probe_interval: float = 10.0,
+        yield_seconds: float = 5.0,
+        job_name: Optional[str] = None,
+    ):
+        """
+        Args:
+            session_factory: Creates database sessions
+            model_version: Version the results are written under
+            reanalyze: Runs the inference engine on image bytes
+            load_image: Returns the stored image for a digest, or None
+            batch_size: Scans fetched, re-analyzed and committed together
+            concurrency: Scans re-analyzed at once
+            max_rate: Optional ceiling in scans per second
+            traffic_probe: Returns True while live traffic should take priority
+            probe_interval: Seconds between traffic probes
+            yield_seconds: Pause while the probe reports live traffic
+            job_name: Checkpoint key (defaults to the model version)
+        """
+        self.session_factory = session_factory
+        self.model_version = model_version
+        self.reanalyze = reanalyze
+        self.load_image = load_image
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self.max_rate = max_rate
+        self.traffic_probe = traffic_probe
+        self.probe_interval = probe_interval
+        self.yield_seconds = yield_seconds
+        self.job_name = job_name or f"reanalysis:{model_version}"
+        self._last_probe = 0.0
+        self._rate_lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    # ---------- Database ----------
+
+    def load_checkpoint(self) -> Optional[Keyset]:
+        db = self.session_factory()
+        try:
+            checkpoint = db.get(BackfillCheckpoint, self.job_name)
+            if checkpoint is None or checkpoint.last_created_at is None:
+                return None
+            return checkpoint.last_created_at, checkpoint.last_scan_id
+        finally:
+            db.close()
+
+    def reset_checkpoint(self) -> None:
+        db = self.session_factory()
+        try:
+            db.query(BackfillCheckpoint).filter(BackfillCheckpoint.job_name == self.job_name).delete()
+            db.commit()
+        finally:
+            db.close()
+
+    def count_pending(self, after: Optional[Keyset]) -> int:
+        db = self.session_factory()
+        try:
+            subquery = pending_scans_query(self.model_version, after).subquery()
+            return db.execute(select(func.count()).select_from(subquery)).scalar_one()
+        finally:
+            db.close()
+
+    def fetch_batch(self, after: Optional[Keyset]) -> List[Tuple]:
+        db = self.session_factory()
+        try:
+            return list(db.execute(pending_scans_query(self.model_version, after, self.batch_size)).all())
+        finally:
+            db.close()
+
+    def commit_batch(self, results: List[Tuple[object, Dict]], last: Keyset, processed: int, failed: int) -> None:
+        """Write a batch's results and advance the checkpoint in one transaction"""
+        db = self.session_factory()
+        try:
+            if results:
+                db.execute(
+                    pg_insert(ScanResultVersion)
+                    .values([
+                        {"scan_session_id": scan_id, "model_version": self.model_version, "result": result}
+                        for scan_id, result in results
+                    ])
+                    .on_conflict_do_nothing(constraint="uq_scan_result_versions_scan_model")
+                )
+            checkpoint = db.get(BackfillCheckpoint, self.job_name)
+            if checkpoint is None:
+                checkpoint = BackfillCheckpoint(job_name=self.job_name, processed=0, failed=0)
+                db.add(checkpoint)
+            checkpoint.last_created_at, checkpoint.last_scan_id = last
+            checkpoint.processed += processed
+            checkpoint.failed += failed
+            checkpoint.updated_at = datetime.utcnow()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    # ---------- Throttling ----------
+
+    async def _yield_to_live_traffic(self, progress: BackfillProgress) -> None:
+        if self.traffic_probe is None:
+            return
+        while time.monotonic() - self._last_probe >= self.probe_interval:
+            self._last_probe = time.monotonic()
+            if not await asyncio.to_thread(self.traffic_probe):
+                return
+            logger.info(f"Live traffic detected, pausing backfill for {self.yield_seconds}s")
+            await asyncio.sleep(self.yield_seconds)
+            progress.paused_seconds += self.yield_seconds
+            # Probe again straight away after the pause
+            self._last_probe = 0.0
+
+    async def _respect_rate(self) -> None:
+        if not self.max_rate:
+            return
+        async with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + 1.0 / self.max_rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    # ---------- Run ----------
+
+    async def _process(self, row, semaphore: asyncio.Semaphore, progress: BackfillProgress) -> Optional[Dict]:
+        async with semaphore:
+            await self._yield_to_live_traffic(progress)
+            await self._respect_rate()
+            try:
+                data = await asyncio.to_thread(self.load_image, row.image_hash)
+                if data is None:
+                    raise FileNotFoundError(f"image {row.image_hash[:12]} no longer stored")
+                result = await self.reanalyze(data)
+                return {**result, "model_version": self.model_version, "reanalyzed_at": datetime.utcnow().isoformat()}
+            except Exception as e:
+                logger.warning(f"Backfill failed for scan {row.id}: {e}")
+                return None
+
+    async def run(
+        self,
+        max_scans: Optional[int] = None,
+        on_batch: Optional[Callable[[BackfillProgress], None]] = None,
+    ) -> BackfillProgress:
+        """
+        Backfill until no pending scans remain (or ``max_scans`` are done)
+
+        Returns:
+            Final progress counters
+        """
+        after = await asyncio.to_thread(self.load_checkpoint)
+        progress = BackfillProgress(pending=await asyncio.to_thread(self.count_pending, after))
+        if max_scans is not None:
+            progress.pending = min(progress.pending, max_scans)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        logger.info(f"Backfill {self.job_name}: {progress.pending} scans pending, resuming after {after}")
+
+        while max_scans is None or progress.done < max_scans:
+            rows = await asyncio.to_thread(self.fetch_batch, after)
+            if max_scans is not None:
+                rows = rows[:max_scans - progress.done]
+            if not rows:
+                break
+            outputs = await asyncio.gather(*(self._process(row, semaphore, progress) for row in rows))
+            results = [(row.id, output) for row, output in zip(rows, outputs) if output is not None]
+            failed = len(rows) - len(results)
+            after = (rows[-1].created_at, rows[-1].id)
+            await asyncio.to_thread(self.commit_batch, results, after, len(results), failed)
+            progress.processed += len(results)
+            progress.failed += failed
+            logger.info(f"Backfill {self.job_name}: {progress.summary()}")
+            if on_batch is not None:
+                on_batch(progress)
+        return progress
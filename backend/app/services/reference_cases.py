@@ -0,0 +1,147 @@
+"""Reference Cases - Visually Similar SCIN Cases for a Scan
+
+Embeds the region of a scan's analysis image that the live pipeline
+analyzes (the face crop, or the whole image when there is none) with the
+condition model, and looks up its nearest SCIN reference cases in the memory-mapped IVF-PQ index
+(services/reference_index.py). Embeddings are cached per image digest,
+so repeated lookups for a scan cost only the index search.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.scin import SCINSample
+from app.services.media_store import ANALYSIS, ORIGINAL, MediaStore, get_media_store, media_key
+from services.reference_index import ReferenceIndex, SearchHit, get_reference_index
+
+logger = logging.getLogger(__name__)
+
+# RGB images -> (N, d) normalised embeddings
+Embedder = Callable[[List[np.ndarray]], np.ndarray]
+# RGB image -> region to embed, or None to embed the whole image
+Cropper = Callable[[np.ndarray], Optional[np.ndarray]]
+
+
+class ReferenceIndexUnavailable(RuntimeError):
+    """Raised when the index has not been built or the embedding model is missing"""
+
+
+@dataclass
+class SimilarCases:
+    hits: List[SearchHit]
+    embed_ms: float
+    search_ms: float
+    cached_embedding: bool
+
+
+def ml_embedder(images: List[np.ndarray]) -> np.ndarray:
+    """Condition-model embeddings from the inference worker pool, or in-process without one (loads torch)"""
+    from services.inference_worker import InferenceWorkerUnavailable, get_skin_ml_backend
+
+    try:
+        return get_skin_ml_backend().embed(images, model="condition")
+    except (RuntimeError, InferenceWorkerUnavailable) as e:
+        raise ReferenceIndexUnavailable(str(e))
+
+
+def crop_or_whole(image: np.ndarray, crop: Optional[Cropper]) -> np.ndarray:
+    """``crop(image)``, falling back to the whole image; shared by the index build and queries"""
+    region = crop(image) if crop is not None else None
+    return region if region is not None and region.size else image
+
+
+class ReferenceCaseService:
+    """Nearest reference cases for stored scan images"""
+
+    def __init__(
+        self,
+        index: Optional[ReferenceIndex],
+        store: MediaStore,
+        embedder: Embedder = ml_embedder,
+        crop: Optional[Cropper] = None,
+        nprobe: int = 32,
+        cache_size: int = 1024,
+    ):
+        self.index = index
+        self.store = store
+        self.embedder = embedder
+        self.crop = crop
+        self.nprobe = nprobe
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load_image(self, digest: str) -> np.ndarray:
+        backend = self.store.backend
+        for key in (media_key(digest, ANALYSIS), media_key(digest, ORIGINAL)):
+            if backend.exists(key):
+                image = cv2.imdecode(np.frombuffer(backend.get(key), np.uint8), cv2.IMREAD_COLOR)
+                if image is not None:
+                    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        raise FileNotFoundError(f"Image {digest[:12]} is no longer stored")
+
+    def embedding(self, digest: str) -> Tuple[np.ndarray, bool]:
+        """Embedding of a stored image, and whether it came from the cache"""
+        with self._lock:
+            cached = self._cache.get(digest)
+            if cached is not None:
+                self._cache.move_to_end(digest)
+                return cached, True
+        vector = self.embedder([crop_or_whole(self._load_image(digest), self.crop)])[0]
+        with self._lock:
+            self._cache[digest] = vector
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return vector, False
+
+    def similar(self, digest: str, k: int = 5) -> SimilarCases:
+        """
+        k most similar reference cases for a stored image
+
+        Raises:
+            ReferenceIndexUnavailable: No index built, or no embedding model
+            FileNotFoundError: The image is no longer stored
+        """
+        if self.index is None:
+            raise ReferenceIndexUnavailable("Reference index has not been built")
+        start = time.perf_counter()
+        vector, cached = self.embedding(digest)
+        embedded = time.perf_counter()
+        hits = self.index.search(vector, k=k, nprobe=self.nprobe)
+        done = time.perf_counter()
+        return SimilarCases(hits, (embedded - start) * 1000, (done - embedded) * 1000, cached)
+
+
+def load_cases(db: Session, hits: List[SearchHit]) -> List[Tuple[SearchHit, SCINSample]]:
+    """SCIN rows for the hits, in hit order (rows deleted since the build are skipped)"""
+    rows = db.query(SCINSample).filter(SCINSample.id.in_([hit.id for hit in hits])).all()
+    by_id = {row.id: row for row in rows}
+    return [(hit, by_id[hit.id]) for hit in hits if hit.id in by_id]
+
+
+# Global instance
+_reference_case_service: Optional[ReferenceCaseService] = None
+
+
+def get_reference_case_service() -> ReferenceCaseService:
+    """Get or create the reference case service singleton"""
+    global _reference_case_service
+    if _reference_case_service is None or _reference_case_service.index is None:
+        from app.config import settings
+        from services.skin_analysis_service import get_skin_analysis_service
+
+        _reference_case_service = ReferenceCaseService(
+            get_reference_index(),
+            get_media_store(),
+            crop=get_skin_analysis_service().analysis_region,
+            nprobe=settings.REFERENCE_INDEX_NPROBE,
+        )
+    return _reference_case_service
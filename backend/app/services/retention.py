@@ -0,0 +1,176 @@
+"""Retention Service - Indexed Expiry of Stored Files
+
+Files are registered in the ``media_retention`` index when they are
+written. A periodic async sweeper reads expired rows in ``expires_at``
+order and deletes them in bounded batches, so each sweep costs
+O(batch) regardless of how many scans are stored.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.retention import RetentionEntry
+
+logger = logging.getLogger(__name__)
+
+MEDIA = "media"
+FILE = "file"
+
+
+def register_for_retention(
+    db: Session,
+    location: str,
+    ttl: timedelta,
+    storage: str = MEDIA,
+) -> RetentionEntry:
+    """Schedule a stored file for deletion
+
+    Adds (or extends) the index entry on the given session without
+    committing, so it lands in the same transaction as the write that
+    produced the file. Re-registering a location keeps the later expiry,
+    which matters for content-addressed blobs shared by several scans.
+
+    Args:
+        db: Database session
+        location: Media store key or filesystem path
+        ttl: Time until the file may be deleted
+        storage: MEDIA for media store keys, FILE for local paths
+    """
+    expires_at = datetime.utcnow() + ttl
+    entry = db.query(RetentionEntry).filter(RetentionEntry.location == location).first()
+    if entry is None:
+        entry = RetentionEntry(storage=storage, location=location, expires_at=expires_at)
+        db.add(entry)
+    elif entry.expires_at < expires_at:
+        entry.expires_at = expires_at
+    return entry
+
+
+def _delete_media(location: str) -> None:
+    from app.services.media_store import get_media_store
+
+    get_media_store().delete(location)
+
+
+def _delete_file(location: str) -> None:
+    try:
+        os.remove(location)
+    except FileNotFoundError:
+        pass
+
+
+class RetentionSweeper:
+    """Periodic task that deletes expired files in bounded batches"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        interval_seconds: int = 300,
+        batch_size: int = 500,
+        retry_delay: timedelta = timedelta(hours=1),
+    ):
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+        self.deleters = {MEDIA: _delete_media, FILE: _delete_file}
+        self._task: Optional[asyncio.Task] = None
+
+    def sweep_batch(self, now: Optional[datetime] = None) -> int:
+        """Delete up to ``batch_size`` expired entries
+
+        Returns:
+            Number of entries removed from the index
+        """
+        now = now or datetime.utcnow()
+        db = self.session_factory()
+        try:
+            expired = (
+                db.query(RetentionEntry)
+                .filter(RetentionEntry.expires_at <= now)
+                .order_by(RetentionEntry.expires_at)
+                .limit(self.batch_size)
+                # Lets several API workers sweep concurrently without overlap
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            removed = 0
+            for entry in expired:
+                try:
+                    self.deleters[entry.storage](entry.location)
+                    db.delete(entry)
+                    removed += 1
+                except Exception as e:
+                    # Push the failure back so it does not block the batch head
+                    logger.error(f"Retention delete failed for {entry.location}: {e}")
+                    entry.expires_at = now + self.retry_delay
+            db.commit()
+            return removed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def sweep(self, now: Optional[datetime] = None) -> int:
+        """Drain all currently expired entries, one bounded batch at a time"""
+        total = 0
+        while True:
+            removed = self.sweep_batch(now)
+            total += removed
+            if removed < self.batch_size:
+                return total
+
+    async def run(self) -> None:
+        """Sweep forever, yielding to the event loop between batches"""
+        while True:
+            try:
+                total = 0
+                while True:
+                    removed = await asyncio.to_thread(self.sweep_batch)
+                    total += removed
+                    if removed < self.batch_size:
+                        break
+                if total:
+                    logger.info(f"Retention sweep removed {total} expired files")
+            except Exception as e:
+                logger.error(f"Retention sweep failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        """Start the periodic sweep on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global instance
+_retention_sweeper: Optional[RetentionSweeper] = None
+
+
+def get_retention_sweeper() -> RetentionSweeper:
+    """Get or create the retention sweeper singleton"""
+    global _retention_sweeper
+    if _retention_sweeper is None:
+        from app.database import SessionLocal
+
+        _retention_sweeper = RetentionSweeper(
+            SessionLocal,
+            interval_seconds=settings.RETENTION_SWEEP_INTERVAL_SECONDS,
+            batch_size=settings.RETENTION_SWEEP_BATCH_SIZE,
+        )
+    return _retention_sweeper
@@ -0,0 +1,318 @@
+"""Scan Outcome Persistence - One Round Trip per Scan Outcome
+
+Writes everything a scan outcome touches (the status change, the result,
+the SkinAnalysis row, its ConfidenceMetrics and FairnessMetrics rows and
+the retention index entry) as a single PostgreSQL statement built from
+data-modifying CTEs, inside one transaction. Primary keys are generated
+client-side so the child inserts never wait on the parent's RETURNING,
+and the RETURNING values of the scan update are written back onto the
+ORM instance instead of refreshing it. ``analysis_record`` maps a
+completed SkinAnalysisService result onto those rows.
+"""
+
+import json
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Select, func, inspect, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models.retention import RetentionEntry
+from app.models.scan import (
+    ConfidenceMetrics,
+    FairnessMetrics,
+    ScanSession,
+    ScanStatus,
+    SkinAnalysis,
+    SkinType,
+)
+from app.services.retention import MEDIA
+from services.perceptual_hash import ImageHashes, to_signed
+
+RESULT_KEY = "result"
+
+# Five skin tone bins onto the 1-6 Fitzpatrick scale (V and VI are not told apart)
+FITZPATRICK_BY_TONE = {"very_light": 1, "light": 2, "medium": 3, "medium_dark": 4, "dark": 5}
+# Laplacian variance at which calculate_confidence treats an image as fully sharp
+SHARP_LAPLACIAN_VAR = 100.0
+
+
+@dataclass
+class AnalysisRecord:
+    """A SkinAnalysis row and its metric rows, ready to insert"""
+    skin_type: str
+    fitzpatrick_scale: int
+    concerns: List[Dict[str, Any]]
+    confidence_scores: Dict[str, float]
+    overall_confidence: float
+    analysis_version: str
+    landmarks: Optional[List[Dict[str, float]]] = None
+    # ConfidenceMetrics
+    uncertainty_factors: List[str] = field(default_factory=list)
+    image_quality_score: Optional[float] = None
+    lighting_quality_score: Optional[float] = None
+    # FairnessMetrics
+    accuracy_by_tone: Optional[Dict[str, float]] = None
+    bias_indicators: Optional[Dict[str, float]] = None
+
+
+def _severity(score: float, moderate: float, severe: float) -> str:
+    return "severe" if score >= severe else "moderate" if score >= moderate else "mild"
+
+
+def analysis_record(analysis: Dict[str, Any], analysis_version: str) -> AnalysisRecord:
+    """
+    Rows for a completed analysis (``asdict`` of a SkinAnalysisResult)
+
+    Concerns are the detected acne, wrinkles and dark circles; acne takes
+    the acne model's probability as its confidence when the model ran.
+    Quality scores come from the quality gate's sharpness and exposure
+    metrics, when the gate ran.
+    """
+    confidence = analysis["confidence_score"]
+    acne_model = ((analysis.get("ml_analysis") or {}).get("acne_analysis") or {}).get("probabilities")
+    concerns = []
+    if analysis["acne_detected"]:
+        concerns.append({
+            "concern_type": "acne",
+            "severity": analysis["acne_severity"],
+            "confidence": acne_model["acne"] if acne_model else confidence,
+        })
+    if analysis["wrinkles_detected"]:
+        concerns.append({
+            "concern_type": "wrinkles",
+            "severity": _severity(analysis["wrinkle_density"], 0.1, 0.2),
+            "confidence": confidence,
+        })
+    if analysis["dark_circles_detected"]:
+        concerns.append({
+            "concern_type": "dark_circles",
+            "severity": _severity(analysis["dark_circle_severity"], 0.5, 0.8),
+            "confidence": confidence,
+        })
+
+    uncertainty = list(analysis.get("quality_warnings") or [])
+    if analysis.get("degraded"):
+        uncertainty.append(f"degraded_pipeline:{analysis['pipeline_variant']}")
+    metrics = analysis.get("quality_metrics") or {}
+    image_quality = lighting_quality = None
+    if metrics:
+        image_quality = min(metrics["sharpness"] / SHARP_LAPLACIAN_VAR, 1.0)
+        clipped = metrics["dark_fraction"] + metrics["bright_fraction"]
+        lighting_quality = max(0.0, 1.0 - abs(metrics["brightness"] - 128.0) / 128.0 - clipped)
+
+    return AnalysisRecord(
+        skin_type=analysis["skin_type"],
+        fitzpatrick_scale=FITZPATRICK_BY_TONE.get(analysis["skin_tone"], 3),
+        concerns=concerns,
+        confidence_scores={concern["concern_type"]: concern["confidence"] for concern in concerns},
+        overall_confidence=confidence,
+        analysis_version=analysis_version,
+        landmarks=analysis.get("face_landmarks"),
+        uncertainty_factors=uncertainty,
+        image_quality_score=image_quality,
+        lighting_quality_score=lighting_quality,
+    )
+
+
+def _jsonable(value: Any) -> Any:
+    # Results carry UUIDs and datetimes that the JSONB driver cannot encode
+    return json.loads(json.dumps(value, default=str))
+
+
+def build_outcome_statement(
+    scan_id: Any,
+    status_value: str,
+    now: datetime,
+    image_hash: Optional[str] = None,
+    image_hashes: Optional[ImageHashes] = None,
+    scan_metadata: Optional[dict] = None,
+    error_message: Optional[str] = None,
+    analysis: Optional[AnalysisRecord] = None,
+    retention_key: Optional[str] = None,
+    retention_expires_at: Optional[datetime] = None,
+) -> Select:
+    """Build the single statement that persists one scan outcome
+
+    Returns:
+        SELECT over the scan UPDATE ... RETURNING, with the inserts and the
+        retention upsert attached as CTEs (PostgreSQL runs every
+        data-modifying CTE whether or not the outer query reads it)
+    """
+    status_enum = ScanStatus(status_value)
+    values: Dict[str, Any] = {"status": status_enum, "updated_at": now}
+    if status_enum == ScanStatus.COMPLETED:
+        values["completed_at"] = now
+    if image_hash is not None:
+        values["image_hash"] = image_hash
+    if image_hashes is not None:
+        values["perceptual_hash"] = to_signed(image_hashes.phash)
+        values["difference_hash"] = to_signed(image_hashes.dhash)
+    if scan_metadata is not None:
+        values["scan_metadata"] = scan_metadata
+    if error_message is not None:
+        values["error_message"] = error_message
+
+    scan_update = (
+        update(ScanSession)
+        .where(ScanSession.id == scan_id)
+        .values(**values)
+        .returning(ScanSession.status, ScanSession.updated_at, ScanSession.completed_at)
+        .cte("scan_update")
+    )
+
+    ctes = []
+    if analysis is not None:
+        analysis_id = uuid.uuid4()
+        ctes.append(
+            insert(SkinAnalysis)
+            .values(
+                id=analysis_id,
+                scan_session_id=scan_id,
+                skin_type=SkinType(analysis.skin_type),
+                fitzpatrick_scale=analysis.fitzpatrick_scale,
+                concerns=_jsonable(analysis.concerns),
+                landmarks=_jsonable(analysis.landmarks),
+                confidence_scores=_jsonable(analysis.confidence_scores),
+                overall_confidence=analysis.overall_confidence,
+                analysis_version=analysis.analysis_version,
+                created_at=now,
+            )
+            .returning(SkinAnalysis.id)
+            .cte("analysis_insert")
+        )
+        ctes.append(
+            insert(ConfidenceMetrics)
+            .values(
+                id=uuid.uuid4(),
+                analysis_id=analysis_id,
+                overall_confidence=analysis.overall_confidence,
+                concern_confidences=_jsonable(analysis.confidence_scores),
+                uncertainty_factors=list(analysis.uncertainty_factors),
+                image_quality_score=analysis.image_quality_score,
+                lighting_quality_score=analysis.lighting_quality_score,
+                created_at=now,
+            )
+            .returning(ConfidenceMetrics.id)
+            .cte("confidence_insert")
+        )
+        ctes.append(
+            insert(FairnessMetrics)
+            .values(
+                id=uuid.uuid4(),
+                analysis_id=analysis_id,
+                fitzpatrick_scale=analysis.fitzpatrick_scale,
+                accuracy_by_tone=_jsonable(analysis.accuracy_by_tone),
+                bias_indicators=_jsonable(analysis.bias_indicators),
+                created_at=now,
+            )
+            .returning(FairnessMetrics.id)
+            .cte("fairness_insert")
+        )
+
+    if retention_key is not None and retention_expires_at is not None:
+        # Same semantics as register_for_retention: keep the later expiry
+        upsert = pg_insert(RetentionEntry).values(
+            storage=MEDIA, location=retention_key, expires_at=retention_expires_at, created_at=now
+        )
+        ctes.append(
+            upsert.on_conflict_do_update(
+                index_elements=[RetentionEntry.location],
+                set_={"expires_at": func.greatest(RetentionEntry.expires_at, upsert.excluded.expires_at)},
+            )
+            .returning(RetentionEntry.id)
+            .cte("retention_upsert")
+        )
+
+    stmt = select(scan_update.c.status, scan_update.c.updated_at, scan_update.c.completed_at)
+    if ctes:
+        stmt = stmt.add_cte(*ctes)
+    return stmt
+
+
+def save_scan_outcome(
+    db: Session,
+    scan: ScanSession,
+    status_value: str,
+    result: Optional[dict] = None,
+    image_hash: Optional[str] = None,
+    image_hashes: Optional[ImageHashes] = None,
+    error_message: Optional[str] = None,
+    analysis: Optional[AnalysisRecord] = None,
+    retention_key: Optional[str] = None,
+    retention_ttl: Optional[timedelta] = None,
+) -> ScanSession:
+    """Persist a scan outcome in one statement and one commit
+
+    Args:
+        db: Database session; anything already pending on it is flushed
+            into the same transaction
+        scan: Scan being updated
+        status_value: New ScanStatus value
+        result: Analysis result, stored under ``scan_metadata["result"]``
+        image_hash: Digest of the stored image
+        image_hashes: Perceptual hashes of the stored image
+        error_message: Failure reason for failed scans
+        analysis: Structured analysis and metric rows to insert
+        retention_key: Media key to register for expiry
+        retention_ttl: Time until ``retention_key`` may be deleted
+
+    Returns:
+        ``scan`` with the written values applied, without a reload
+    """
+    now = datetime.utcnow()
+    scan_metadata = None
+    if result is not None:
+        scan_metadata = dict(scan.scan_metadata or {})
+        scan_metadata[RESULT_KEY] = _jsonable(result)
+
+    stmt = build_outcome_statement(
+        scan.id,
+        status_value,
+        now,
+        image_hash=image_hash,
+        image_hashes=image_hashes,
+        scan_metadata=scan_metadata,
+        error_message=error_message,
+        analysis=analysis,
+        retention_key=retention_key,
+        retention_expires_at=now + retention_ttl if retention_key and retention_ttl else None,
+    )
+
+    # Commit expires the instance; keep what is already loaded so reading
+    # it afterwards does not cost another SELECT
+    state = inspect(scan)
+    loaded = {
+        attr.key: state.dict[attr.key]
+        for attr in state.mapper.column_attrs
+        if attr.key in state.dict
+    }
+    try:
+        row = db.execute(stmt).one()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    written = dict(loaded, status=row.status, updated_at=row.updated_at, completed_at=row.completed_at)
+    if image_hash is not None:
+        written["image_hash"] = image_hash
+    if image_hashes is not None:
+        written["perceptual_hash"] = to_signed(image_hashes.phash)
+        written["difference_hash"] = to_signed(image_hashes.dhash)
+    if scan_metadata is not None:
+        written["scan_metadata"] = scan_metadata
+    if error_message is not None:
+        written["error_message"] = error_message
+    for key, value in written.items():
+        set_committed_value(scan, key, value)
+    return scan
+
+
+def stored_scan_result(scan: ScanSession) -> Optional[dict]:
+    """Result written by ``save_scan_outcome``, if any"""
+    return (scan.scan_metadata or {}).get(RESULT_KEY)
@@ -0,0 +1,222 @@
+"""Suggestions - Typeahead over the Catalog, Kept Fresh in the Background
+
+Loads products, brands and INCI ingredient names into the in-memory
+typeahead index (services/typeahead.py) so autocomplete never queries
+the database per keystroke. Weights combine popularity and rating:
+products by how often they appear in logged routines and their average
+rating, brands by the summed use of their products, ingredients by the
+number of products listing them.
+
+A periodic task picks up products and ingredients changed since the last
+refresh and layers them over the index; the index is rebuilt from
+scratch once enough changes have piled up or ``full_rebuild_seconds``
+have passed, which also refreshes popularity.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.product_models import Ingredient, Product, ProductIngredient
+from app.models.twin_models import RoutineProductUsage
+from services.typeahead import (
+    BRAND,
+    INGREDIENT,
+    PRODUCT,
+    LiveTypeahead,
+    Suggestion,
+    TypeaheadEntry,
+    TypeaheadIndex,
+    suggestion_weight,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _routine_uses():
+    return (
+        select(RoutineProductUsage.product_id, func.count().label("uses"))
+        .group_by(RoutineProductUsage.product_id)
+        .subquery()
+    )
+
+
+def product_entries(db: Session, since: Optional[datetime] = None) -> List[TypeaheadEntry]:
+    """Products (updated after ``since``) weighted by routine use and rating"""
+    uses = _routine_uses()
+    statement = select(
+        Product.id, Product.brand, Product.name, Product.average_rating, func.coalesce(uses.c.uses, 0)
+    ).outerjoin(uses, uses.c.product_id == Product.id)
+    if since is not None:
+        statement = statement.where(Product.updated_at > since)
+    return [
+        TypeaheadEntry(f"{brand} {name}", PRODUCT, str(product_id), suggestion_weight(count, rating))
+        for product_id, brand, name, rating, count in db.execute(statement)
+    ]
+
+
+def brand_entries(db: Session, brands: Optional[Iterable[str]] = None) -> List[TypeaheadEntry]:
+    """Brands (or only ``brands``) weighted by their products' use and mean rating"""
+    uses = _routine_uses()
+    statement = (
+        select(Product.brand, func.coalesce(func.sum(uses.c.uses), 0), func.avg(Product.average_rating))
+        .outerjoin(uses, uses.c.product_id == Product.id)
+        .group_by(Product.brand)
+    )
+    if brands is not None:
+        statement = statement.where(Product.brand.in_(list(brands)))
+    return [
+        TypeaheadEntry(brand, BRAND, brand, suggestion_weight(count, rating))
+        for brand, count, rating in db.execute(statement)
+    ]
+
+
+def ingredient_entries(db: Session, since: Optional[datetime] = None) -> List[TypeaheadEntry]:
+    """INCI names (added after ``since``) weighted by how many products list them"""
+    listed = (
+        select(ProductIngredient.ingredient_id, func.count().label("products"))
+        .group_by(ProductIngredient.ingredient_id)
+        .subquery()
+    )
+    statement = select(Ingredient.id, Ingredient.name_inci, func.coalesce(listed.c.products, 0)).outerjoin(
+        listed, listed.c.ingredient_id == Ingredient.id
+    )
+    if since is not None:
+        statement = statement.where(Ingredient.created_at > since)
+    return [
+        TypeaheadEntry(name, INGREDIENT, str(ingredient_id), suggestion_weight(count))
+        for ingredient_id, name, count in db.execute(statement)
+    ]
+
+
+class SuggestionService:
+    """Typeahead index over the catalog with periodic incremental refresh"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        refresh_interval_seconds: int = 60,
+        full_rebuild_seconds: int = 3600,
+        max_pending: int = 5000,
+    ):
+        self.session_factory = session_factory
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.full_rebuild_seconds = full_rebuild_seconds
+        self.max_pending = max_pending
+        self.typeahead = LiveTypeahead()
+        self._watermark: Optional[datetime] = None
+        self._built_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._watermark is not None
+
+    def rebuild(self) -> int:
+        """Load the whole catalog into a fresh index
+
+        Returns:
+            Number of entries indexed
+        """
+        watermark = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            entries = product_entries(db) + brand_entries(db) + ingredient_entries(db)
+        finally:
+            db.close()
+        index = TypeaheadIndex.build(entries)
+        self.typeahead.replace(index)
+        self._watermark, self._built_at = watermark, time.monotonic()
+        logger.info(f"Typeahead index built: {len(index)} entries, {index.nbytes / 1e6:.1f} MB")
+        return len(index)
+
+    def refresh(self) -> int:
+        """Apply products and ingredients changed since the last refresh
+
+        Falls back to ``rebuild`` before the first build, when too many
+        changes are pending, or when the full rebuild interval has passed.
+
+        Returns:
+            Number of entries applied (or indexed, on a rebuild)
+        """
+        stale = time.monotonic() - self._built_at >= self.full_rebuild_seconds
+        if not self.ready or stale or self.typeahead.pending >= self.max_pending:
+            return self.rebuild()
+
+        watermark = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            products = product_entries(db, since=self._watermark)
+            changed = products + ingredient_entries(db, since=self._watermark)
+            if products:
+                brands = db.scalars(
+                    select(Product.brand).where(Product.updated_at > self._watermark).distinct()
+                ).all()
+                changed += brand_entries(db, brands)
+        finally:
+            db.close()
+        if changed:
+            self.typeahead.apply(changed)
+        self._watermark = watermark
+        return len(changed)
+
+    def suggest(self, query: str, limit: int = 10) -> List[Suggestion]:
+        return self.typeahead.suggest(query, limit)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.typeahead),
+            "pending_changes": self.typeahead.pending,
+            "index_mb": round(self.typeahead.nbytes / 1e6, 2),
+            "refreshed_at": self._watermark.isoformat() if self._watermark else None,
+        }
+
+    async def run(self) -> None:
+        """Refresh forever off the event loop"""
+        while True:
+            try:
+                applied = await asyncio.to_thread(self.refresh)
+                if applied:
+                    logger.debug(f"Typeahead refresh applied {applied} entries")
+            except Exception as e:
+                logger.error(f"Typeahead refresh failed: {e}")
+            await asyncio.sleep(self.refresh_interval_seconds)
+
+    def start(self) -> None:
+        """Build the index and keep it fresh on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Global instance
+_suggestion_service: Optional[SuggestionService] = None
+
+
+def get_suggestion_service() -> SuggestionService:
+    """Get or create the suggestion service singleton"""
+    global _suggestion_service
+    if _suggestion_service is None:
+        from app.config import settings
+        from app.database import SessionLocal
+
+        _suggestion_service = SuggestionService(
+            SessionLocal,
+            refresh_interval_seconds=settings.TYPEAHEAD_REFRESH_INTERVAL_SECONDS,
+            full_rebuild_seconds=settings.TYPEAHEAD_FULL_REBUILD_SECONDS,
+            max_pending=settings.TYPEAHEAD_MAX_PENDING_CHANGES,
+        )
+    return _suggestion_service
@@ -1,5 +1,5 @@
 # Middleware package for Sprint 2 Phase 3
 from .rate_limiter import RateLimiterMiddleware
-from .file_cleanup import FileCleanupMiddleware
+from .file_cleanup import TempFileTracker, track_temp_files
 
-__all__ = ["RateLimiterMiddleware", "FileCleanupMiddleware"]
+__all__ = ["RateLimiterMiddleware", "TempFileTracker", "track_temp_files"]
@@ -1,94 +1,293 @@
-# Rate Limiting Middleware for Sprint 2 Phase 3
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
-from datetime import datetime, timedelta
-from collections import defaultdict
-import asyncio
-from typing import Dict, Tuple
+# Rate Limiting Middleware
+"""
+Sliding-window-counter rate limiting with a pluggable shared store.
 
+Each (rule, identity) pair keeps two integer counters: the current and the
+previous fixed window. The request rate is estimated as
 
-class RateLimiterMiddleware(BaseHTTPMiddleware):
+    previous * (1 - elapsed_fraction) + current
+
+which approximates a true sliding window with O(1) memory per key. With the
+Redis store the counters are shared, so the configured limit holds across all
+API workers instead of being multiplied by the worker count.
+"""
+import json
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
     """
-    Rate limiting middleware to prevent abuse of scan endpoints
-    Implements token bucket algorithm with per-user limits
+    Limit applied to requests whose path starts with ``path_prefix``
+
+    ``methods`` and ``path_suffixes`` narrow the rule further (empty means
+    any), e.g. only POSTs ending in "/upload". CORS preflights (OPTIONS) are
+    never counted.
     """
-    
-    def __init__(self, app, max_requests: int = 10, window_seconds: int = 60):
-        super().__init__(app)
-        self.max_requests = max_requests
-        self.window_seconds = window_seconds
-        # Store: {user_id: (request_count, window_start_time)}
-        self.rate_limit_store: Dict[str, Tuple[int, datetime]] = defaultdict(
-            lambda: (0, datetime.now())
+    path_prefix: str
+    limit: int
+    window_seconds: int = 60
+    # Per-identity overrides, e.g. {"user:42": 100}
+    user_limits: Dict[str, int] = field(default_factory=dict, hash=False)
+    methods: Sequence[str] = field(default=(), hash=False)
+    path_suffixes: Sequence[str] = field(default=(), hash=False)
+
+    def limit_for(self, identity: str) -> int:
+        return self.user_limits.get(identity, self.limit)
+
+    def applies_to(self, path: str, method: str) -> bool:
+        return (
+            path.startswith(self.path_prefix)
+            and (not self.methods or method in self.methods)
+            and (not self.path_suffixes or path.endswith(tuple(self.path_suffixes)))
         )
-        # Start cleanup task
-        asyncio.create_task(self._cleanup_old_entries())
-    
-    async def dispatch(self, request: Request, call_next):
-        # Only rate limit scan endpoints
-        if not request.url.path.startswith("/api/v1/scan"):
-            return await call_next(request)
-        
-        # Get user identifier (IP or user_id from auth)
-        user_id = self._get_user_identifier(request)
-        
-        # Check rate limit
-        if not self._check_rate_limit(user_id):
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Too many requests. Please try again later.",
-                headers={"Retry-After": str(self.window_seconds)}
+
+    @property
+    def key(self) -> str:
+        """Counter namespace; rules sharing a prefix but not their scope count separately"""
+        scope = ",".join(self.methods) + "|" + ",".join(self.path_suffixes)
+        return self.path_prefix if scope == "|" else f"{self.path_prefix}[{scope}]"
+
+
+@dataclass
+class RateLimitDecision:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int = 0
+
+
+def _window_position(now: float, window_seconds: int) -> Tuple[int, float]:
+    window = int(now // window_seconds)
+    elapsed_fraction = (now - window * window_seconds) / window_seconds
+    return window, elapsed_fraction
+
+
+def _retry_after(previous: int, current: int, limit: int, elapsed_fraction: float, window_seconds: int) -> int:
+    """Seconds until one more request fits, assuming no further traffic"""
+    if limit <= 0:
+        return window_seconds
+    # Still inside the current window: wait for the previous window to decay
+    if current <= limit - 1 and previous > 0:
+        needed_fraction = 1.0 - (limit - 1 - current) / previous
+        wait = (needed_fraction - elapsed_fraction) * window_seconds
+    else:
+        # Next window: the current count becomes the decaying previous one
+        needed_fraction = max(0.0, 1.0 - (limit - 1) / current) if current else 0.0
+        wait = (1.0 - elapsed_fraction + needed_fraction) * window_seconds
+    return max(1, math.ceil(wait))
+
+
+def _decide(previous: int, current: int, limit: int, elapsed_fraction: float, window_seconds: int) -> RateLimitDecision:
+    """Decide for a request already counted in ``current``"""
+    estimate = previous * (1.0 - elapsed_fraction) + current
+    if estimate <= limit:
+        return RateLimitDecision(True, limit, max(0, int(limit - estimate)))
+    retry = _retry_after(previous, current - 1, limit, elapsed_fraction, window_seconds)
+    return RateLimitDecision(False, limit, 0, retry)
+
+
+class RateLimitStore:
+    """Interface for rate limit counter storage"""
+
+    async def hit(self, key: str, limit: int, window_seconds: int, now: Optional[float] = None) -> RateLimitDecision:
+        raise NotImplementedError
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """Single-process store: two counters per key, pruned lazily"""
+
+    def __init__(self, prune_every: int = 10000):
+        # key -> [window_index, current_count, previous_count, window_seconds]
+        self._counters: Dict[str, List[int]] = {}
+        self._prune_every = prune_every
+        self._hits_since_prune = 0
+
+    def _prune(self, now: float) -> None:
+        # A key is stale once both of its windows have fully elapsed
+        stale = [k for k, (w, _, _, ws) in self._counters.items() if (w + 2) * ws <= now]
+        for key in stale:
+            del self._counters[key]
+
+    async def hit(self, key: str, limit: int, window_seconds: int, now: Optional[float] = None) -> RateLimitDecision:
+        now = time.time() if now is None else now
+        window, elapsed_fraction = _window_position(now, window_seconds)
+
+        counter = self._counters.get(key)
+        if counter is None or counter[0] < window - 1:
+            counter = [window, 0, 0, window_seconds]
+            self._counters[key] = counter
+        elif counter[0] == window - 1:
+            counter[:] = [window, 0, counter[1], window_seconds]
+
+        counter[1] += 1
+        decision = _decide(counter[2], counter[1], limit, elapsed_fraction, window_seconds)
+        if not decision.allowed:
+            counter[1] -= 1
+
+        self._hits_since_prune += 1
+        if self._hits_since_prune >= self._prune_every:
+            self._hits_since_prune = 0
+            self._prune(now)
+        return decision
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """Shared store for multi-worker deployments
+
+    Uses an atomic INCR on the current window key, so concurrent workers can
+    never admit more than the limit; denied requests are refunded with DECR.
+    Works with ``redis.asyncio.Redis`` or any client exposing the same
+    ``pipeline``/``decr`` coroutine API.
+    """
+
+    def __init__(self, client: Any, prefix: str = "ratelimit"):
+        self.client = client
+        self.prefix = prefix
+
+    async def hit(self, key: str, limit: int, window_seconds: int, now: Optional[float] = None) -> RateLimitDecision:
+        now = time.time() if now is None else now
+        window, elapsed_fraction = _window_position(now, window_seconds)
+        current_key = f"{self.prefix}:{key}:{window}"
+        previous_key = f"{self.prefix}:{key}:{window - 1}"
+
+        pipe = self.client.pipeline(transaction=False)
+        pipe.incr(current_key)
+        pipe.pexpire(current_key, window_seconds * 2000)
+        pipe.get(previous_key)
+        current, _, previous = await pipe.execute()
+
+        decision = _decide(int(previous or 0), int(current), limit, elapsed_fraction, window_seconds)
+        if not decision.allowed:
+            await self.client.decr(current_key)
+        return decision
+
+
+def _bearer_subject(headers: Dict[bytes, bytes]) -> Optional[str]:
+    """Verified JWT subject from the Authorization header, if any"""
+    auth = headers.get(b"authorization", b"")
+    if not auth.lower().startswith(b"bearer "):
+        return None
+    try:
+        from jose import jwt
+        from app.core.security import ALGORITHM, SECRET_KEY
+
+        payload = jwt.decode(auth[7:].decode("latin-1"), SECRET_KEY, algorithms=[ALGORITHM])
+        return payload.get("sub")
+    except Exception:
+        return None
+
+
+def default_identity(scope: Dict[str, Any]) -> str:
+    """Prefer the authenticated user, fall back to the client IP"""
+    subject = _bearer_subject(dict(scope.get("headers") or []))
+    if subject:
+        return f"user:{subject}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimiterMiddleware:
+    """
+    Pure ASGI rate limiting middleware
+
+    Requests not matching any rule, and OPTIONS preflights, pass straight
+    through. Add it before CORSMiddleware so CORS wraps it and 429s still
+    carry Access-Control-Allow-Origin for the browser to read. Rate-limited
+    requests get a 429 JSON response with Retry-After; allowed requests
+    carry X-RateLimit-Limit / X-RateLimit-Remaining headers. If the store
+    is unavailable the limiter fails open rather than taking the API down.
+    """
+
+    def __init__(
+        self,
+        app: Callable[..., Awaitable[None]],
+        rules: Optional[List[RateLimitRule]] = None,
+        store: Optional[RateLimitStore] = None,
+        identify: Callable[[Dict[str, Any]], str] = default_identity,
+    ):
+        self.app = app
+        rules = rules if rules is not None else [
+            RateLimitRule("/api/v1/scan", limit=10, window_seconds=60, methods=("POST",))
+        ]
+        # Longest prefix wins
+        self.rules = sorted(rules, key=lambda r: len(r.path_prefix), reverse=True)
+        self.store = store or InMemoryRateLimitStore()
+        self.identify = identify
+
+    def match(self, path: str, method: str = "GET") -> Optional[RateLimitRule]:
+        if method == "OPTIONS":
+            return None
+        for rule in self.rules:
+            if rule.applies_to(path, method):
+                return rule
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rule = self.match(scope["path"], scope.get("method", "GET"))
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        identity = self.identify(scope)
+        try:
+            decision = await self.store.hit(
+                f"{rule.key}:{identity}", rule.limit_for(identity), rule.window_seconds
             )
-        
-        response = await call_next(request)
-        return response
-    
-    def _get_user_identifier(self, request: Request) -> str:
-        """
-        Get unique identifier for rate limiting
-        Prefer authenticated user_id, fallback to IP address
-        """
-        # Try to get user from auth state
-        if hasattr(request.state, "user"):
-            return f"user_{request.state.user.id}"
-        
-        # Fallback to IP address
-        client_host = request.client.host if request.client else "unknown"
-        return f"ip_{client_host}"
-    
-    def _check_rate_limit(self, user_id: str) -> bool:
-        """
-        Check if user has exceeded rate limit
-        Returns True if request is allowed, False if rate limited
-        """
-        now = datetime.now()
-        request_count, window_start = self.rate_limit_store[user_id]
-        
-        # Check if window has expired
-        if now - window_start > timedelta(seconds=self.window_seconds):
-            # Reset window
-            self.rate_limit_store[user_id] = (1, now)
-            return True
-        
-        # Check if under limit
-        if request_count < self.max_requests:
-            self.rate_limit_store[user_id] = (request_count + 1, window_start)
-            return True
-        
-        # Rate limit exceeded
-        return False
-    
-    async def _cleanup_old_entries(self):
-        """
-        Periodic cleanup of expired rate limit entries
-        Runs every 5 minutes to prevent memory leaks
-        """
-        while True:
-            await asyncio.sleep(300)  # 5 minutes
-            now = datetime.now()
-            expired_keys = [
-                key for key, (_, window_start) in self.rate_limit_store.items()
-                if now - window_start > timedelta(seconds=self.window_seconds * 2)
-            ]
-            for key in expired_keys:
-                del self.rate_limit_store[key]
+        except Exception as e:
+            logger.error(f"Rate limit store unavailable, allowing request: {e}")
+            await self.app(scope, receive, send)
+            return
+
+        if not decision.allowed:
+            await self._reject(send, decision)
+            return
+
+        limit_headers = [
+            (b"x-ratelimit-limit", str(decision.limit).encode()),
+            (b"x-ratelimit-remaining", str(decision.remaining).encode()),
+        ]
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + limit_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    @staticmethod
+    async def _reject(send, decision: RateLimitDecision) -> None:
+        body = json.dumps({"detail": "Too many requests. Please try again later."}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(decision.retry_after).encode()),
+                (b"x-ratelimit-limit", str(decision.limit).encode()),
+                (b"x-ratelimit-remaining", b"0"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def create_rate_limit_store(backend: str = "memory", redis_url: Optional[str] = None) -> RateLimitStore:
+    """Build a store for the configured backend"""
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("RATE_LIMIT_REDIS_URL is required when RATE_LIMIT_BACKEND='redis'")
+        import redis.asyncio as redis
+
+        return RedisRateLimitStore(redis.from_url(redis_url))
+    return InMemoryRateLimitStore()
@@ -0,0 +1,60 @@
+"""Sprint 10 – Precomputed ingredient analysis flags
+
+Columns:
+1. ingredients.is_allergen (EU-declarable fragrance allergens)
+2. ingredients.pregnancy_concern (retinoids, hydroquinone, formaldehyde)
+
+Indexes:
+1. ix_ingredients_name_inci_lower (lower(name_inci), for the analysis fallback lookup)
+
+Depends on Sprint 9 migration.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# Alembic identifiers
+revision = "sprint10_ingredient_flags"
+down_revision = "sprint9_product_neighbours"
+branch_labels = None
+depends_on = None
+
+# Fragrance allergens that must be declared on EU labels (Regulation (EC) 1223/2009, Annex III)
+ALLERGENS = [
+    "Alpha-Isomethyl Ionone", "Amyl Cinnamal", "Amylcinnamyl Alcohol", "Anise Alcohol", "Benzyl Alcohol",
+    "Benzyl Benzoate", "Benzyl Cinnamate", "Benzyl Salicylate", "Butylphenyl Methylpropional", "Cinnamal",
+    "Cinnamyl Alcohol", "Citral", "Citronellol", "Coumarin", "Eugenol", "Evernia Furfuracea Extract",
+    "Evernia Prunastri Extract", "Farnesol", "Geraniol", "Hexyl Cinnamal", "Hydroxycitronellal",
+    "Hydroxyisohexyl 3-Cyclohexene Carboxaldehyde", "Isoeugenol", "Limonene", "Linalool", "Methyl 2-Octynoate",
+]
+
+# Commonly advised against during pregnancy
+PREGNANCY_CONCERNS = [
+    "Retinol", "Retinal", "Retinyl Palmitate", "Retinyl Acetate", "Retinyl Propionate", "Retinyl Retinoate",
+    "Hydroxypinacolone Retinoate", "Tretinoin", "Isotretinoin", "Adapalene", "Tazarotene", "Hydroquinone",
+    "Formaldehyde",
+]
+
+
+def _flag(column: str, names: list) -> None:
+    ingredients = sa.table("ingredients", sa.column("name_inci", sa.String), sa.column(column, sa.Integer))
+    op.execute(
+        ingredients.update()
+        .where(sa.func.lower(ingredients.c.name_inci).in_([name.lower() for name in names]))
+        .values({column: 1})
+    )
+
+
+def upgrade():
+    op.add_column("ingredients", sa.Column("is_allergen", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("ingredients", sa.Column("pregnancy_concern", sa.Integer(), nullable=False, server_default="0"))
+    _flag("is_allergen", ALLERGENS)
+    _flag("pregnancy_concern", PREGNANCY_CONCERNS)
+
+    op.create_index("ix_ingredients_name_inci_lower", "ingredients", [sa.text("lower(name_inci)")])
+
+
+def downgrade():
+    op.drop_index("ix_ingredients_name_inci_lower", table_name="ingredients")
+    op.drop_column("ingredients", "pregnancy_concern")
+    op.drop_column("ingredients", "is_allergen")
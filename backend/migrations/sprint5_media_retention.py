@@ -0,0 +1,35 @@
+"""Sprint 5 – Media retention index
+
+Tables:
+1. media_retention
+
+Depends on Sprint 4 migration.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# Alembic identifiers
+revision = "sprint5_media_retention"
+down_revision = "sprint4_routines_tracking"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "media_retention",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("storage", sa.String(20), nullable=False, server_default="media"),
+        sa.Column("location", sa.String(500), nullable=False, unique=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    # The sweeper reads expired rows in expires_at order, so this index
+    # keeps each batch an index range scan regardless of table size
+    op.create_index("ix_media_retention_expires_at", "media_retention", ["expires_at"])
+
+
+def downgrade():
+    op.drop_index("ix_media_retention_expires_at", table_name="media_retention")
+    op.drop_table("media_retention")
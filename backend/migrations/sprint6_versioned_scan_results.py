@@ -0,0 +1,53 @@
+"""Sprint 6 – Versioned scan results and backfill checkpoints
+
+Tables:
+1. scan_result_versions
+2. backfill_checkpoints
+
+Depends on Sprint 5 migration.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# Alembic identifiers
+revision = "sprint6_versioned_scan_results"
+down_revision = "sprint5_media_retention"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "scan_result_versions",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("scan_session_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("scan_sessions.id"), nullable=False),
+        sa.Column("model_version", sa.String(50), nullable=False),
+        sa.Column("result", postgresql.JSONB(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.UniqueConstraint("scan_session_id", "model_version", name="uq_scan_result_versions_scan_model"),
+    )
+    op.create_index("ix_scan_result_versions_scan_session_id", "scan_result_versions", ["scan_session_id"])
+    op.create_index("ix_scan_result_versions_model_version", "scan_result_versions", ["model_version"])
+
+    op.create_table(
+        "backfill_checkpoints",
+        sa.Column("job_name", sa.String(100), primary_key=True),
+        sa.Column("last_created_at", sa.DateTime(), nullable=True),
+        sa.Column("last_scan_id", postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column("processed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("failed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    # Backfills page through scans in (created_at, id) order; this keeps
+    # every page an index range scan instead of an OFFSET walk
+    op.create_index("ix_scan_sessions_created_at_id", "scan_sessions", ["created_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_scan_sessions_created_at_id", table_name="scan_sessions")
+    op.drop_table("backfill_checkpoints")
+    op.drop_index("ix_scan_result_versions_model_version", table_name="scan_result_versions")
+    op.drop_index("ix_scan_result_versions_scan_session_id", table_name="scan_result_versions")
+    op.drop_table("scan_result_versions")
@@ -0,0 +1,29 @@
+"""Sprint 7 – Perceptual hashes on scan sessions
+
+Columns:
+1. scan_sessions.perceptual_hash
+2. scan_sessions.difference_hash
+
+Depends on Sprint 6 migration.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# Alembic identifiers
+revision = "sprint7_perceptual_hashes"
+down_revision = "sprint6_versioned_scan_results"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Signed 64-bit pHash/dHash; near-duplicate lookups run in memory
+    # (services/perceptual_hash.py), so neither column is indexed
+    op.add_column("scan_sessions", sa.Column("perceptual_hash", sa.BigInteger(), nullable=True))
+    op.add_column("scan_sessions", sa.Column("difference_hash", sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("scan_sessions", "difference_hash")
+    op.drop_column("scan_sessions", "perceptual_hash")
@@ -0,0 +1,53 @@
+"""Sprint 8 – Ranked product search
+
+Columns:
+1. products.search_vector (generated tsvector: brand weighted A, name B)
+
+Indexes:
+1. ix_products_search_vector (GIN)
+2. ix_products_name_trgm, ix_products_brand_trgm (GIN, pg_trgm)
+
+Depends on Sprint 7 migration.
+"""
+
+from alembic import op
+
+# Alembic identifiers
+revision = "sprint8_product_search"
+down_revision = "sprint7_perceptual_hashes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # 'simple' configuration: brand and product names are proper nouns in
+    # many languages, which English stemming would only mangle
+    op.execute(
+        """
+        ALTER TABLE products ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(brand, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(name, '')), 'B')
+        ) STORED
+        """
+    )
+    op.create_index("ix_products_search_vector", "products", ["search_vector"], postgresql_using="gin")
+
+    # Serve word_similarity (<%) for typos and the brand filter's ILIKE '%...%'
+    op.create_index(
+        "ix_products_name_trgm", "products", ["name"],
+        postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_products_brand_trgm", "products", ["brand"],
+        postgresql_using="gin", postgresql_ops={"brand": "gin_trgm_ops"},
+    )
+
+
+def downgrade():
+    op.drop_index("ix_products_brand_trgm", table_name="products")
+    op.drop_index("ix_products_name_trgm", table_name="products")
+    op.drop_index("ix_products_search_vector", table_name="products")
+    op.drop_column("products", "search_vector")
@@ -0,0 +1,40 @@
+"""Sprint 9 – Precomputed product neighbours
+
+Tables:
+1. product_neighbours
+
+Depends on Sprint 8 migration.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# Alembic identifiers
+revision = "sprint9_product_neighbours"
+down_revision = "sprint8_product_search"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (product_id, rank) is the primary key, so recommendations are one
+    # index range scan already in rank order
+    op.create_table(
+        "product_neighbours",
+        sa.Column(
+            "product_id", postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("products.id", ondelete="CASCADE"), primary_key=True,
+        ),
+        sa.Column("rank", sa.Integer(), primary_key=True),
+        sa.Column(
+            "neighbour_id", postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("products.id", ondelete="CASCADE"), nullable=False,
+        ),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("built_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table("product_neighbours")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Re-analyze historical scans with the current model version
+
+Streams completed scans that have no result for the model version yet,
+re-runs the ML models on the same RGB working copy and face crop a live
+scan uses (in the worker pool when INFERENCE_WORKER_SOCKET is set) and
+stores the output in scan_result_versions next to the original results. Progress is
+checkpointed per batch; rerunning the script resumes where it stopped.
+The job runs at low CPU priority and pauses while live scans arrive.
+
+Usage:
+    python scripts/backfill_scan_results.py [--model-version 1.1.0] [--batch-size 500] [--concurrency 2]
+                                             [--max-rate 20] [--max-scans 1000] [--restart]
+"""
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.media_store import ANALYSIS, get_media_store, media_key
+from app.services.reanalysis_backfill import BackfillProgress, ReanalysisBackfill, reanalyze_image, recent_scan_probe
+from services.inference_worker import get_skin_ml_backend
+from services.skin_analysis_service import get_skin_analysis_service
+
+
+def load_image(digest: str) -> Optional[bytes]:
+    """Stored original, or the analysis derivative of an upload not yet archived
+
+    Both expire together, so an expired scan has neither and is skipped.
+    """
+    backend = get_media_store().backend
+    for key in (media_key(digest), media_key(digest, ANALYSIS)):
+        if backend.exists(key):
+            return backend.get(key)
+    return None
+
+
+def decode(data: bytes) -> np.ndarray:
+    working, _ = get_media_store().decode_working_copy(data)
+    return np.asarray(working)
+
+
+async def reanalyze(data: bytes) -> Dict:
+    return await reanalyze_image(data, decode, get_skin_analysis_service().analysis_region, get_skin_ml_backend())
+
+
+def report(progress: BackfillProgress) -> None:
+    print(f"  {progress.summary()}", flush=True)
+
+
+def main(args) -> None:
+    if hasattr(os, "nice"):
+        os.nice(args.nice)
+
+    job = ReanalysisBackfill(
+        SessionLocal,
+        args.model_version,
+        reanalyze=reanalyze,
+        load_image=load_image,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        max_rate=args.max_rate,
+        traffic_probe=recent_scan_probe(SessionLocal, 60, args.live_threshold) if args.live_threshold > 0 else None,
+    )
+    if args.restart:
+        job.reset_checkpoint()
+
+    print("=" * 80)
+    print(f"Re-analysis backfill for model version {args.model_version}")
+    print("=" * 80)
+    progress = asyncio.run(job.run(max_scans=args.max_scans, on_batch=report))
+    print(f"Done: {progress.processed} re-analyzed, {progress.failed} failed, "
+          f"{progress.throughput:.2f} scans/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-version", default=settings.MODEL_VERSION, help="Version to write results under")
+    parser.add_argument("--batch-size", type=int, default=settings.BACKFILL_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=settings.BACKFILL_CONCURRENCY)
+    parser.add_argument("--max-rate", type=float, help="Ceiling in scans per second")
+    parser.add_argument("--max-scans", type=int, help="Stop after this many scans")
+    parser.add_argument("--live-threshold", type=int, default=settings.BACKFILL_LIVE_SCANS_THRESHOLD,
+                        help="Pause while this many scans started in the last minute (0 disables)")
+    parser.add_argument("--nice", type=int, default=10, help="CPU niceness increment")
+    parser.add_argument("--restart", action="store_true", help="Discard the checkpoint and start over")
+    main(parser.parse_args())
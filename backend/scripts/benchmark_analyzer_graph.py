@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Measure single-scan analyzer latency, serial vs concurrent
+
+Runs the skin analyzer graph (services/skin_analysis_service.py) on a
+synthetic face region and reports:
+
+- per-node average time and the critical path (the lower bound on wall
+  time with unlimited cores)
+- mean wall time per scan run inline and on pools of ``--workers``
+  threads
+
+The concurrent speedup is bounded by the host's cores; on a single core
+the pooled runs only add scheduling overhead.
+
+Usage:
+    python scripts/benchmark_analyzer_graph.py [--side 768] [--runs 30] [--workers 2 4 8]
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cv2
+import numpy as np
+
+from services.analyzer_graph import usable_cores
+from services.skin_analysis_service import SKIN_ANALYZERS
+
+
+def synthetic_face(side: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    image = np.full((side, side, 3), (200, 150, 120), dtype=np.uint8)
+    noise = rng.normal(0, 12, image.shape)
+    return cv2.GaussianBlur(np.clip(image + noise, 0, 255).astype(np.uint8), (0, 0), 1.5)
+
+
+def critical_path_ms(timings: dict) -> float:
+    """Longest chain of dependent node times"""
+    nodes = {node.name: node for node in SKIN_ANALYZERS.nodes}
+    finish = {}
+
+    def finish_time(name: str) -> float:
+        if name not in timings:
+            return 0.0
+        if name not in finish:
+            finish[name] = timings[name] + max((finish_time(i) for i in nodes[name].inputs), default=0.0)
+        return finish[name]
+
+    return max(finish_time(name) for name in timings)
+
+
+def mean_wall_ms(seeds: dict, executor, runs: int) -> float:
+    SKIN_ANALYZERS.run(seeds, executor)  # warm-up
+    start = time.perf_counter()
+    for _ in range(runs):
+        SKIN_ANALYZERS.run(seeds, executor)
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def main(args) -> None:
+    seeds = {"image": synthetic_face(args.side), "landmarks": [{"x": 0.5, "y": 0.5, "z": 0.0}] * 478}
+
+    SKIN_ANALYZERS.run(seeds)  # first LAB conversion builds OpenCV's lookup tables
+    inline = SKIN_ANALYZERS.run(seeds)
+    print("=" * 80)
+    print(f"Skin analyzer graph: {args.side}x{args.side} face region, "
+          f"{usable_cores()} usable cores, OpenCV threads {cv2.getNumThreads()}")
+    print("=" * 80)
+    for name, ms in sorted(inline.timings_ms.items(), key=lambda item: -item[1]):
+        print(f"  {name:<15} {ms:8.2f} ms")
+    print(f"  {'serial sum':<15} {inline.serial_ms:8.2f} ms")
+    print(f"  {'critical path':<15} {critical_path_ms(inline.timings_ms):8.2f} ms")
+    print()
+
+    print(f"{'mode':<12} {'ms/scan':>9} {'speedup':>8}")
+    baseline = mean_wall_ms(seeds, None, args.runs)
+    print(f"{'inline':<12} {baseline:>9.2f} {1.0:>8.2f}")
+    for workers in args.workers:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            ms = mean_wall_ms(seeds, pool, args.runs)
+        print(f"{f'{workers} threads':<12} {ms:>9.2f} {baseline / ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--side", type=int, default=768, help="Face region side in pixels")
+    parser.add_argument("--runs", type=int, default=30, help="Scans timed per mode")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8], help="Pool sizes to compare")
+    main(parser.parse_args())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Benchmark face detection latency on large selfies
+
+Compares the FaceMesh-only path (478 refined landmarks on the full image)
+with the two-stage path (YuNet box on a downscaled image, FaceMesh on the
+face crop), plus the cost of rejecting an image with no face.
+
+Images are upscaled to --size (longest side) to mimic phone cameras.
+
+Usage:
+    python scripts/benchmark_face_detection.py selfie1.jpg selfie2.jpg [--size 4032] [--runs 10]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cv2
+import numpy as np
+
+from services.face_detection import create_face_detector
+from services.skin_analysis_service import SkinAnalysisService
+
+
+def load(path: Path, size: int) -> np.ndarray:
+    image = cv2.cvtColor(cv2.imread(str(path)), cv2.COLOR_BGR2RGB)
+    h, w = image.shape[:2]
+    scale = size / max(h, w)
+    return cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_CUBIC)
+
+
+def time_detect(service: SkinAnalysisService, image: np.ndarray, runs: int):
+    service._detect_face(image)  # warm-up
+    timings, found = [], False
+    for _ in range(runs):
+        start = time.perf_counter()
+        region, _ = service._detect_face(image)
+        timings.append((time.perf_counter() - start) * 1000)
+        found = region is not None
+    return statistics.median(timings), found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("images", type=Path, nargs="+")
+    parser.add_argument("--size", type=int, default=4032, help="Longest side after upscaling")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--yunet-model", default=None)
+    args = parser.parse_args()
+
+    detector = create_face_detector(args.yunet_model)
+    if detector is None:
+        sys.exit("YuNet is unavailable; set --yunet-model or YUNET_AUTO_DOWNLOAD")
+
+    facemesh_only = SkinAnalysisService()
+    two_stage = SkinAnalysisService(face_detector=detector)
+
+    print("=" * 80)
+    print(f"Face detection latency (median of {args.runs}, images at {args.size}px)")
+    print("=" * 80)
+    print(f"{'image':<30} {'FaceMesh ms':>12} {'YuNet+Mesh ms':>14} {'speedup':>8} {'faces':>10}")
+    for path in args.images:
+        image = load(path, args.size)
+        full_ms, full_found = time_detect(facemesh_only, image, args.runs)
+        staged_ms, staged_found = time_detect(two_stage, image, args.runs)
+        print(
+            f"{path.name[:30]:<30} {full_ms:>12.1f} {staged_ms:>14.1f} {full_ms / staged_ms:>7.1f}x "
+            f"{str(full_found) + '/' + str(staged_found):>10}"
+        )
+
+    # No-face rejection: uniform noise at the same size
+    blank = np.random.default_rng(0).integers(0, 255, (args.size * 3 // 4, args.size, 3), dtype=np.uint8)
+    full_ms, _ = time_detect(facemesh_only, blank, args.runs)
+    staged_ms, _ = time_detect(two_stage, blank, args.runs)
+    print(f"{'(no face)':<30} {full_ms:>12.1f} {staged_ms:>14.1f} {full_ms / staged_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Measure upload ingest latency against camera resolution
+
+For synthetic JPEG uploads of increasing megapixels, compares:
+
+- before: the previous request path, storing the original, rendering
+  both derivatives from it and decoding it in full for analysis
+- ingest: MediaStore.ingest, which decodes at reduced scale, writes only
+  the analysis derivative and leaves the original for ``archive``
+
+Usage:
+    python scripts/benchmark_ingest.py [--analysis-size 1024] [--runs 5]
+"""
+import argparse
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+from PIL import Image
+
+from app.services.media_store import LocalMediaBackend, MediaStore
+
+RESOLUTIONS = [(1600, 1200), (3024, 4032), (4284, 5712), (6000, 8000)]
+
+
+def synthetic_jpeg(width: int, height: int, seed: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    coarse = Image.fromarray(rng.integers(0, 255, (24, 32, 3), dtype=np.uint8))
+    image = coarse.resize((width, height), Image.Resampling.BICUBIC)
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=85)
+    return output.getvalue()
+
+
+def store_and_decode(store: MediaStore, data: bytes) -> np.ndarray:
+    stored = store._save_sync(data, "image/jpeg")
+    store.generate_derivatives(stored.digest)
+    return np.asarray(Image.open(io.BytesIO(data)).convert("RGB"))
+
+
+def main(args) -> None:
+    print("=" * 80)
+    print(f"Ingest latency by upload resolution (analysis size {args.analysis_size}px)")
+    print("=" * 80)
+    print(f"{'upload':>12} {'MP':>5} {'MB':>6} {'before ms':>10} {'ingest ms':>10} {'archive ms':>11}")
+    with tempfile.TemporaryDirectory() as before_root, tempfile.TemporaryDirectory() as root:
+        before = MediaStore(LocalMediaBackend(before_root), analysis_size=args.analysis_size)
+        store = MediaStore(LocalMediaBackend(root), analysis_size=args.analysis_size)
+        for width, height in RESOLUTIONS:
+            uploads = [synthetic_jpeg(width, height, seed) for seed in range(args.runs)]
+            start = time.perf_counter()
+            for data in uploads:
+                store_and_decode(before, data)
+            before_ms = (time.perf_counter() - start) / args.runs * 1000
+
+            start = time.perf_counter()
+            ingested = [store._ingest_sync(data, "image/jpeg") for data in uploads]
+            ingest_ms = (time.perf_counter() - start) / args.runs * 1000
+
+            start = time.perf_counter()
+            for item in ingested:
+                store.archive(item)
+            archive_ms = (time.perf_counter() - start) / args.runs * 1000
+
+            print(f"{f'{width}x{height}':>12} {width * height / 1e6:>5.1f} "
+                  f"{np.mean([len(d) for d in uploads]) / 1e6:>6.2f} "
+                  f"{before_ms:>10.1f} {ingest_ms:>10.1f} {archive_ms:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--analysis-size", type=int, default=1024, help="Working copy longest side")
+    parser.add_argument("--runs", type=int, default=5, help="Uploads per resolution")
+    main(parser.parse_args())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Measure live preview throughput per core
+
+Encodes synthetic 320x240 preview frames and reports:
+
+- single-core analysis rate (frames/s) of PreviewAnalyzer
+- served frames/s and drop rate when ``--sessions`` simulated clients
+  each stream at ``--client-fps`` through run_preview_session, sharing a
+  pool of ``--workers`` threads
+
+Usage:
+    python scripts/benchmark_live_preview.py [--frames 500] [--sessions 16] [--client-fps 30] [--workers 2] [--seconds 5]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cv2
+import numpy as np
+
+from services.face_detection import create_face_detector
+from services.image_quality_gate import ImageQualityGate
+from services.live_preview import PreviewAnalyzer, PreviewLimits, run_preview_session
+
+
+def synthetic_frames(count: int) -> list:
+    """Skin-toned ellipse on a textured background, slightly moving"""
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(count):
+        image = rng.integers(60, 200, (240, 320, 3), dtype=np.uint8)
+        cv2.ellipse(image, (160 + i % 20, 120), (70, 90), 0, 0, 360, (120, 150, 200), -1)
+        ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 70])
+        frames.append(buffer.tobytes())
+    return frames
+
+
+def single_core_rate(analyzer: PreviewAnalyzer, frames: list) -> float:
+    start = time.perf_counter()
+    for frame in frames:
+        analyzer.analyze_bytes(frame)
+    return len(frames) / (time.perf_counter() - start)
+
+
+async def simulate(analyzer: PreviewAnalyzer, frames: list, args) -> dict:
+    executor = ThreadPoolExecutor(max_workers=args.workers)
+    deadline = time.perf_counter() + args.seconds
+    interval = 1.0 / args.client_fps
+
+    async def client(offset: int) -> dict:
+        index = offset
+
+        async def receive():
+            nonlocal index
+            await asyncio.sleep(interval)
+            if time.perf_counter() >= deadline:
+                return None
+            index += 1
+            return frames[index % len(frames)]
+
+        async def send(message):
+            pass
+
+        return await run_preview_session(receive, send, analyzer, executor)
+
+    results = await asyncio.gather(*(client(i) for i in range(args.sessions)))
+    executor.shutdown()
+    return {
+        key: sum(stats[key] for stats in results)
+        for key in ("received", "analyzed", "dropped", "rejected")
+    }
+
+
+def main(args) -> None:
+    frames = synthetic_frames(args.frames)
+    factory = (lambda: create_face_detector(args.yunet_model)) if args.yunet_model else None
+    analyzer = PreviewAnalyzer(
+        ImageQualityGate(), face_detector_factory=factory, limits=PreviewLimits(max_fps=args.max_fps)
+    )
+
+    rate = single_core_rate(analyzer, frames)
+    totals = asyncio.run(simulate(analyzer, frames, args))
+    served = totals["analyzed"] / args.seconds
+
+    print("=" * 80)
+    print(f"Live preview ({'YuNet' if factory else 'gate only'}, 320x240 JPEG frames)")
+    print("=" * 80)
+    print(f"Single-core analysis rate:   {rate:8.1f} frames/s")
+    print(f"Simulated sessions:          {args.sessions} x {args.client_fps} fps for {args.seconds}s, "
+          f"{args.workers} workers, per-session cap {args.max_fps} fps")
+    print(f"Frames received:             {totals['received']}")
+    print(f"Frames analyzed:             {totals['analyzed']} ({served:.1f} frames/s, "
+          f"{served / args.workers:.1f} per worker)")
+    print(f"Frames dropped as stale:     {totals['dropped']} "
+          f"({100 * totals['dropped'] / max(1, totals['received']):.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=500, help="Frames for the single-core run")
+    parser.add_argument("--sessions", type=int, default=16, help="Simulated concurrent clients")
+    parser.add_argument("--client-fps", type=float, default=30.0, help="Frames per second each client sends")
+    parser.add_argument("--max-fps", type=float, default=8.0, help="Per-session analysis cap")
+    parser.add_argument("--workers", type=int, default=2, help="Shared analysis threads")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Simulation length")
+    parser.add_argument("--yunet-model", help="Path to yunet_2023mar.onnx to include face detection")
+    main(parser.parse_args())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Measure per-request overhead of the rate limiter middleware
+
+Compares a bare ASGI app against the same app wrapped in
+RateLimiterMiddleware and prints the added latency in microseconds.
+
+Usage:
+    python scripts/benchmark_rate_limiter.py [--requests 20000] [--keys 1000] [--redis-url redis://localhost:6379/0]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from middleware.rate_limiter import RateLimiterMiddleware, RateLimitRule, create_rate_limit_store
+
+
+async def bare_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def time_requests(app, requests: int, keys: int) -> float:
+    """Average seconds per request, spreading traffic over ``keys`` clients"""
+    scopes = [
+        {"type": "http", "path": "/api/v1/scan/upload", "headers": [], "client": (f"10.0.{i // 256}.{i % 256}", 0)}
+        for i in range(keys)
+    ]
+    start = time.perf_counter()
+    for i in range(requests):
+        await app(scopes[i % keys], receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+async def main(args) -> None:
+    backend = "redis" if args.redis_url else "memory"
+    store = create_rate_limit_store(backend, args.redis_url)
+    # High limit so every request takes the full "allowed" path
+    limited = RateLimiterMiddleware(
+        bare_app, rules=[RateLimitRule("/api/v1/scan", limit=10**9)], store=store
+    )
+
+    baseline = await time_requests(bare_app, args.requests, args.keys)
+    wrapped = await time_requests(limited, args.requests, args.keys)
+
+    print("=" * 60)
+    print(f"Rate limiter overhead ({backend} store, {args.keys} keys, {args.requests} requests)")
+    print("=" * 60)
+    print(f"  bare app:       {baseline * 1e6:8.2f} us/request")
+    print(f"  with limiter:   {wrapped * 1e6:8.2f} us/request")
+    print(f"  overhead:       {(wrapped - baseline) * 1e6:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--redis-url", default=None)
+    asyncio.run(main(parser.parse_args()))
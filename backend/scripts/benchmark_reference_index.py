@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Benchmark the IVF-PQ reference case index
+
+Builds an index over clustered synthetic embeddings (or a saved index's
+float16 vectors with ``--index-dir``) and reports:
+
+- build time and per-array memory (codes vs full float32 vectors)
+- recall@k against brute force and mean query latency for several
+  ``nprobe`` values, with and without float16 reranking
+- latency after reloading the index memory-mapped from disk
+
+Usage:
+    python scripts/benchmark_reference_index.py [--count 20000] [--dim 256] [--m 16] [--k 5] [--queries 200]
+    python scripts/benchmark_reference_index.py --index-dir data/reference_index
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from services.reference_index import ReferenceIndex, recall_at_k
+
+
+def synthetic_embeddings(count: int, dim: int, clusters: int = 64, intrinsic_dim: int = 16, seed: int = 0) -> np.ndarray:
+    """Normalised vectors shaped like CNN embeddings of labelled cases
+
+    One centre per diagnosis-like cluster, variation along a low-dimensional
+    subspace, plus isotropic noise.
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    latent = rng.normal(size=(count, intrinsic_dim)).astype(np.float32)
+    projection = 0.5 * rng.normal(size=(intrinsic_dim, dim)).astype(np.float32)
+    vectors = (
+        centres[rng.integers(clusters, size=count)]
+        + latent @ projection
+        + 0.2 * rng.normal(size=(count, dim)).astype(np.float32)
+    )
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main(args) -> None:
+    if args.index_dir:
+        saved = ReferenceIndex.load(Path(args.index_dir))
+        if saved.vectors is None:
+            sys.exit("Saved index has no stored vectors to rebuild from")
+        vectors = np.asarray(saved.vectors, dtype=np.float32)
+        ids = np.asarray(saved.ids)
+    else:
+        vectors = synthetic_embeddings(args.count, args.dim)
+        ids = np.arange(len(vectors))
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), args.queries, replace=False)]
+    queries = queries + 0.05 * rng.normal(size=queries.shape).astype(np.float32)
+
+    start = time.perf_counter()
+    index = ReferenceIndex.build(vectors, ids, m=args.m)
+    build_s = time.perf_counter() - start
+
+    sizes = index.nbytes()
+    print("=" * 80)
+    print(f"IVF-PQ reference index: {len(vectors)} x {vectors.shape[1]}-d, "
+          f"nlist={index.meta['nlist']}, m={index.m} ({index.m} bytes/vector)")
+    print("=" * 80)
+    print(f"Build time:            {build_s:8.2f} s")
+    print(f"Full float32 vectors:  {vectors.nbytes / 1e6:8.2f} MB")
+    print(f"PQ codes:              {sizes['codes'] / 1e6:8.2f} MB")
+    print(f"float16 rerank copy:   {sizes.get('vectors', 0) / 1e6:8.2f} MB (paged in only for candidates)")
+    print(f"Centroids + codebooks: {(sizes['centroids'] + sizes['codebooks']) / 1e6:8.2f} MB")
+    print()
+    print(f"{'nprobe':>6} {'rerank':>6} {f'recall@{args.k}':>10} {'ms/query':>9}")
+    for nprobe in (4, 8, 16, 32):
+        for rerank in (0, 20):
+            recall, ms = recall_at_k(index, vectors, ids, queries, args.k, nprobe=nprobe, rerank=rerank)
+            print(f"{nprobe:>6} {rerank:>6} {recall:>10.3f} {ms:>9.3f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        index.save(Path(directory))
+        mapped = ReferenceIndex.load(Path(directory))
+        recall, ms = recall_at_k(mapped, vectors, ids, queries, args.k, nprobe=args.nprobe, rerank=20)
+    print()
+    print(f"Memory-mapped (nprobe={args.nprobe}, rerank=20): recall@{args.k} {recall:.3f}, {ms:.3f} ms/query")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=20000, help="Synthetic reference cases")
+    parser.add_argument("--dim", type=int, default=256, help="Embedding size (condition model: 256)")
+    parser.add_argument("--m", type=int, default=16, help="PQ subquantizers (bytes per vector)")
+    parser.add_argument("--k", type=int, default=5, help="Neighbours per query")
+    parser.add_argument("--nprobe", type=int, default=32, help="Lists probed for the memory-mapped run")
+    parser.add_argument("--queries", type=int, default=200, help="Queries for recall and latency")
+    parser.add_argument("--index-dir", help="Benchmark on the vectors of a saved index instead")
+    main(parser.parse_args())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Measure typeahead latency and memory against catalog size
+
+Builds the suggestion index (services/typeahead.py) over synthetic
+products, their brands and INCI names, then replays every prefix of a
+set of typed queries and reports:
+
+- build time, entries, keys and index memory
+- p50/p99 latency per keystroke, and per prefix length
+- the same keystrokes against a linear scan over the entry list, the
+  cost of answering without an index
+
+Usage:
+    python scripts/benchmark_typeahead.py [--products 10000 100000] [--ingredients 30000]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from services.typeahead import BRAND, INGREDIENT, PRODUCT, TypeaheadEntry, TypeaheadIndex, normalize
+
+SYLLABLES = ["ce", "ra", "ve", "ni", "a", "ci", "na", "mi", "de", "hy", "al", "ro", "sal", "ic", "pep", "ti", "squa",
+             "lane", "to", "co", "pher", "ol", "gly", "cer", "in", "zin", "ox", "bo", "tan", "ex", "tract", "lo"]
+TYPES = ["Cleanser", "Moisturizer", "Serum", "Toner", "Sunscreen", "Cream", "Gel", "Lotion", "Mask", "Balm"]
+TYPED = ["cerave foaming", "niacinamide", "hyaluronic acid", "la roche posay", "retinol serum", "zinc oxide",
+         "vitamin c", "squalane oil", "the ordinary", "salicylic acid cleanser"]
+
+
+def word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def synthetic_entries(products: int, ingredients: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    brands = [f"{word(rng)} {word(rng)}" if rng.random() < 0.3 else word(rng) for _ in range(max(products // 40, 10))]
+    entries = [TypeaheadEntry(brand, BRAND, brand, rng.lognormvariate(1, 1)) for brand in brands]
+    entries += [
+        TypeaheadEntry(
+            f"{rng.choice(brands)} {word(rng)} {word(rng)} {rng.choice(TYPES)}", PRODUCT, f"p{i}",
+            rng.lognormvariate(0, 1),
+        )
+        for i in range(products)
+    ]
+    entries += [
+        TypeaheadEntry(f"{word(rng)} {word(rng)}".upper(), INGREDIENT, f"i{i}", rng.lognormvariate(0, 1))
+        for i in range(ingredients)
+    ]
+    # The typed queries' targets, so every keystroke has answers
+    entries += [TypeaheadEntry(text.title(), PRODUCT, f"t{i}", 5.0) for i, text in enumerate(TYPED)]
+    return entries
+
+
+def linear_suggest(entries: list, normalized: list, query: str, limit: int) -> list:
+    prefix = normalize(query)
+    matches = [
+        entry for entry, text in zip(entries, normalized)
+        if text.startswith(prefix) or f" {prefix}" in text
+    ]
+    return sorted(matches, key=lambda entry: -entry.weight)[:limit]
+
+
+def percentile_us(samples: list, q: float) -> float:
+    return float(np.percentile(samples, q)) * 1e6
+
+
+def main(args) -> None:
+    keystrokes = [text[:n] for text in TYPED for n in range(1, len(text) + 1)]
+    print("=" * 80)
+    print(f"Typeahead: {len(keystrokes)} keystrokes from {len(TYPED)} typed queries, limit {args.limit}")
+    print("=" * 80)
+
+    for products in args.products:
+        entries = synthetic_entries(products, args.ingredients)
+        start = time.perf_counter()
+        index = TypeaheadIndex.build(entries)
+        build_s = time.perf_counter() - start
+
+        for query in keystrokes:  # warm-up
+            index.suggest(query, args.limit)
+        timings = []
+        by_length = {}
+        for query in keystrokes:
+            start = time.perf_counter()
+            index.suggest(query, args.limit)
+            elapsed = time.perf_counter() - start
+            timings.append(elapsed)
+            by_length.setdefault(min(len(query), 5), []).append(elapsed)
+
+        normalized = [normalize(entry.text) for entry in entries]
+        linear = []
+        for query in keystrokes[::args.linear_every]:
+            start = time.perf_counter()
+            linear_suggest(entries, normalized, query, args.limit)
+            linear.append(time.perf_counter() - start)
+
+        print(f"{len(entries):,} entries ({products:,} products), {len(index.keys):,} keys, "
+              f"{index.nbytes / 1e6:.1f} MB, built in {build_s:.2f} s")
+        print(f"  index:  p50 {percentile_us(timings, 50):8.1f} us   p99 {percentile_us(timings, 99):8.1f} us")
+        print(f"  linear: p50 {percentile_us(linear, 50):8.1f} us   p99 {percentile_us(linear, 99):8.1f} us")
+        print("  p50 by prefix length: " + "  ".join(
+            f"{'5+' if length == 5 else length}: {percentile_us(samples, 50):.1f} us"
+            for length, samples in sorted(by_length.items())
+        ))
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, nargs="+", default=[10_000, 100_000], help="Catalog sizes")
+    parser.add_argument("--ingredients", type=int, default=30_000, help="INCI names indexed")
+    parser.add_argument("--limit", type=int, default=8, help="Suggestions per keystroke")
+    parser.add_argument("--linear-every", type=int, default=10, help="Time every n-th keystroke with the linear scan")
+    main(parser.parse_args())
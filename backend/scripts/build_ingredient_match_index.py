@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Build the ingredient-list match index and measure it against exact search
+
+Builds the position-weighted TF-IDF matrix from product_ingredients
+(keyed by lower-cased INCI name, so pasted lists normalised by
+INCINormalizer land on the same columns), clusters and indexes it
+(services/ingredient_match_index.py) and saves it to
+INGREDIENT_MATCH_INDEX_DIR for the /products/match-ingredients endpoint.
+
+It then replays perturbed catalog lists as queries - a share of each list
+dropped and a few other ingredients inserted, like a pasted label of a
+reformulated product - and reports recall@k against brute-force cosine
+search (of the whole top k, and of the exact matches above the
+endpoint's INGREDIENT_MATCH_MIN_SCORE) and the per-query latency of both.
+
+--synthetic generates a catalog of product families (variants of shared
+base formulas) instead of reading the database.
+
+Usage:
+    python scripts/build_ingredient_match_index.py [--out data/ingredient_match_index] [--nlist 316]
+    python scripts/build_ingredient_match_index.py --synthetic 100000 --out /tmp/match_index
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from services.ingredient_match_index import IngredientMatchIndex, ingredient_key, recall_at_k
+from services.ingredient_similarity import build_matrix
+
+
+def load_catalog():
+    """(product_id, ingredient name, position) rows"""
+    from sqlalchemy import func
+
+    from app.database import SessionLocal
+    from app.models.product_models import Ingredient, ProductIngredient
+
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(ProductIngredient.product_id, func.lower(Ingredient.name_inci), ProductIngredient.position)
+            .join(Ingredient, Ingredient.id == ProductIngredient.ingredient_id)
+        )
+        return [(product_id, ingredient_key(name), position) for product_id, name, position in rows.yield_per(50_000)]
+    finally:
+        db.close()
+
+
+def perturb(ingredients: list, vocabulary: list, rng: np.random.Generator, drop: float = 0.15, extra: int = 4) -> list:
+    """Drop a share of ``ingredients`` and insert up to ``extra`` others"""
+    kept = [name for name in ingredients if rng.random() >= drop]
+    for name in rng.choice(vocabulary, size=rng.integers(0, extra + 1)):
+        kept.insert(int(rng.integers(0, len(kept) + 1)), str(name))
+    return list(dict.fromkeys(kept))
+
+
+def synthetic_catalog(products: int, vocabulary: int = 20_000, family_size: int = 10, seed: int = 0):
+    """Products as variants of Zipf-sampled base formulas of 10-40 ingredients"""
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, vocabulary + 1)
+    popularity /= popularity.sum()
+    names = [f"ingredient {i}" for i in range(vocabulary)]
+    bases = [
+        [names[i] for i in rng.choice(vocabulary, size=rng.integers(10, 40), replace=False, p=popularity)]
+        for _ in range(max(1, products // family_size))
+    ]
+    rows = []
+    for product in range(products):
+        ingredients = perturb(bases[rng.integers(len(bases))], names[:2000], rng)
+        rows.extend((f"p{product}", name, position) for position, name in enumerate(ingredients, start=1))
+    return rows
+
+
+def main(args) -> None:
+    print("=" * 80)
+    print("Building ingredient match index")
+    print("=" * 80)
+
+    start = time.perf_counter()
+    rows = synthetic_catalog(args.synthetic) if args.synthetic else load_catalog()
+    print(f"Loaded {len(rows)} ingredient rows in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    matrix = build_matrix(rows, max_df=args.max_df)
+    index = IngredientMatchIndex.build(matrix, nlist=args.nlist)
+    print(f"Indexed {len(index)} products over {len(index.vocabulary)} ingredients "
+          f"(nlist {index.nlist}) in {time.perf_counter() - start:.1f}s")
+    index.save(Path(args.out))
+    print(f"Saved to {args.out}: {sum(index.nbytes().values()) / 1e6:.1f} MB")
+
+    # Queries from the saved, memory-mapped copy, as the API loads it
+    index = IngredientMatchIndex.load(Path(args.out))
+    lists = {}
+    for product_id, name, position in sorted(rows, key=lambda row: (str(row[0]), row[2])):
+        lists.setdefault(str(product_id), []).append(name)
+    rng = np.random.default_rng(1)
+    sample = rng.choice(sorted(lists), size=min(args.queries, len(lists)), replace=False)
+    vocabulary = sorted(index.vocabulary)
+    queries = [perturb(lists[product_id], vocabulary, rng) for product_id in sample]
+
+    start = time.perf_counter()
+    for query in queries:
+        index.exact_search(query, args.k)
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    print(f"\nExact search: {exact_ms:.2f} ms/query")
+    print(f"{'nprobe':>8} {'recall@' + str(args.k):>10} {'>= ' + str(args.min_score):>10} {'ms/query':>10}")
+    for nprobe in args.nprobe:
+        recall, ms = recall_at_k(index, queries, args.k, nprobe=nprobe)
+        close, _ = recall_at_k(index, queries, args.k, args.min_score, nprobe=nprobe)
+        print(f"{nprobe:>8} {recall:>10.3f} {close:>10.3f} {ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=settings.INGREDIENT_MATCH_INDEX_DIR, help="Index directory")
+    parser.add_argument("--nlist", type=int, default=None, help="Clusters (default about sqrt(N))")
+    parser.add_argument("--max-df", type=float, default=0.5, help="Drop ingredients listed by more than this share")
+    parser.add_argument("--k", type=int, default=10, help="Matches per query")
+    parser.add_argument("--min-score", type=float, default=settings.INGREDIENT_MATCH_MIN_SCORE,
+                        help="Also report recall of the exact matches above this similarity")
+    parser.add_argument("--queries", type=int, default=500, help="Perturbed catalog lists replayed")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 16, 32, 64], help="Clusters scored per query")
+    parser.add_argument("--synthetic", type=int, default=0, help="Index N generated products (no database)")
+    main(parser.parse_args())
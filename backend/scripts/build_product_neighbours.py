@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Precompute ingredient-similar products
+
+Builds the position-weighted TF-IDF ingredient matrix from
+product_ingredients, finds every product's top-k cosine neighbours within
+its category (services/ingredient_similarity.py) and replaces the
+contents of product_neighbours in one transaction, so the recommendations
+endpoint keeps serving the previous set until the new one is committed.
+
+Run after catalog imports (or nightly); --synthetic times the computation
+on a generated catalog without a database.
+
+Usage:
+    python scripts/build_product_neighbours.py [--k 20] [--min-score 0.05] [--max-df 0.5] [--dry-run]
+    python scripts/build_product_neighbours.py --synthetic 100000
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from services.ingredient_similarity import build_matrix, category_neighbours
+
+CATEGORIES = ["Cleanser", "Moisturizer", "Serum", "Toner", "Sunscreen", "Cream", "Mask", "Lotion", "Oil", "Balm"]
+
+
+def load_catalog():
+    """(product_id, ingredient_id, position) rows and product categories"""
+    from app.database import SessionLocal
+    from app.models.product_models import Product, ProductIngredient
+
+    db = SessionLocal()
+    try:
+        rows = db.query(ProductIngredient.product_id, ProductIngredient.ingredient_id, ProductIngredient.position)
+        ingredient_rows = [tuple(row) for row in rows.yield_per(50_000)]
+        categories = dict(db.query(Product.id, Product.category).all())
+    finally:
+        db.close()
+    return ingredient_rows, categories
+
+
+def synthetic_catalog(products: int, vocabulary: int = 20_000, seed: int = 0):
+    """Zipf-distributed INCI lists of 10-40 ingredients"""
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, vocabulary + 1)
+    popularity /= popularity.sum()
+    lengths = rng.integers(10, 40, size=products)
+    rows = []
+    for product, length in enumerate(lengths):
+        ingredients = rng.choice(vocabulary, size=length, replace=False, p=popularity)
+        rows.extend((product, int(ingredient), position + 1) for position, ingredient in enumerate(ingredients))
+    categories = {product: CATEGORIES[c] for product, c in enumerate(rng.integers(0, len(CATEGORIES), products))}
+    return rows, categories
+
+
+def write_neighbours(neighbours, batch_size: int = 10_000) -> int:
+    from sqlalchemy import delete, insert
+
+    from app.database import SessionLocal
+    from app.models.product_models import ProductNeighbour
+
+    built_at = datetime.now(timezone.utc)
+    db = SessionLocal()
+    written = 0
+    try:
+        db.execute(delete(ProductNeighbour))
+        batch = []
+        for product_id, ranked in neighbours:
+            batch.extend(
+                {"product_id": product_id, "rank": rank, "neighbour_id": neighbour_id,
+                 "score": score, "built_at": built_at}
+                for rank, (neighbour_id, score) in enumerate(ranked, start=1)
+            )
+            if len(batch) >= batch_size:
+                db.execute(insert(ProductNeighbour), batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            db.execute(insert(ProductNeighbour), batch)
+            written += len(batch)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    return written
+
+
+def main(args) -> None:
+    print("=" * 80)
+    print("Building product neighbours")
+    print("=" * 80)
+
+    start = time.perf_counter()
+    rows, categories = synthetic_catalog(args.synthetic) if args.synthetic else load_catalog()
+    print(f"Loaded {len(rows)} ingredient rows for {len(categories)} products in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    matrix = build_matrix(rows, max_df=args.max_df)
+    print(f"TF-IDF matrix {matrix.matrix.shape[0]} x {matrix.matrix.shape[1]}, "
+          f"{matrix.matrix.nnz} non-zeros in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    neighbours = category_neighbours(matrix, categories, args.k, args.min_score, args.block_cells)
+    if args.synthetic or args.dry_run:
+        counts = [len(ranked) for _, ranked in neighbours]
+        print(f"Computed neighbours for {len(counts)} products "
+              f"(mean {np.mean(counts) if counts else 0:.1f}) in {time.perf_counter() - start:.1f}s")
+        return
+    written = write_neighbours(neighbours)
+    print(f"Wrote {written} neighbour rows in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=20, help="Neighbours stored per product")
+    parser.add_argument("--min-score", type=float, default=0.05, help="Lowest cosine similarity stored")
+    parser.add_argument("--max-df", type=float, default=0.5, help="Drop ingredients listed by more than this share")
+    parser.add_argument("--block-cells", type=int, default=16_000_000, help="Similarities held in memory per block")
+    parser.add_argument("--dry-run", action="store_true", help="Compute without writing")
+    parser.add_argument("--synthetic", type=int, default=0, help="Time on N generated products (no database)")
+    main(parser.parse_args())
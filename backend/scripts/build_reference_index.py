@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Build the SCIN reference case index
+
+Embeds every SCIN image stored in scin_samples (image_1_data) with the
+condition model in batches, cropped the way queries are (the region the
+live pipeline analyzes, else the whole image), trains an IVF-PQ index over the embeddings
+and writes it to REFERENCE_INDEX_DIR, where the API memory-maps it.
+API processes pick up a rebuilt index on restart.
+
+Usage:
+    python scripts/build_reference_index.py [--output data/reference_index] [--batch-size 64] [--m 16] [--limit 0]
+"""
+import argparse
+import base64
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cv2
+import numpy as np
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.scin import SCINSample
+from app.services.reference_cases import crop_or_whole
+from services.ml_inference_service import get_ml_inference_service
+from services.reference_index import ReferenceIndex
+from services.skin_analysis_service import get_skin_analysis_service
+
+
+def iter_scin_images(limit: int, chunk: int = 500):
+    """(id, RGB image) for every decodable SCIN image, streamed in id order"""
+    db = SessionLocal()
+    try:
+        query = (
+            db.query(SCINSample.id, SCINSample.image_1_data)
+            .filter(SCINSample.image_1_data.isnot(None))
+            .order_by(SCINSample.id)
+        )
+        if limit:
+            query = query.limit(limit)
+        for row in query.yield_per(chunk):
+            image = cv2.imdecode(np.frombuffer(base64.b64decode(row.image_1_data), np.uint8), cv2.IMREAD_COLOR)
+            if image is not None:
+                yield row.id, cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    finally:
+        db.close()
+
+
+def embed_all(batch_size: int, limit: int):
+    service = get_ml_inference_service()
+    crop = get_skin_analysis_service().analysis_region
+    ids, vectors, batch_ids, batch = [], [], [], []
+    for scin_id, image in iter_scin_images(limit):
+        batch_ids.append(scin_id)
+        batch.append(crop_or_whole(image, crop))
+        if len(batch) == batch_size:
+            vectors.append(service.embed(batch))
+            ids.extend(batch_ids)
+            batch_ids, batch = [], []
+            print(f"  embedded {len(ids)} images", flush=True)
+    if batch:
+        vectors.append(service.embed(batch))
+        ids.extend(batch_ids)
+    if not ids:
+        return np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32)
+    return np.asarray(ids, dtype=np.int64), np.concatenate(vectors)
+
+
+def main(args) -> None:
+    print("=" * 80)
+    print("Building SCIN reference case index")
+    print("=" * 80)
+
+    start = time.perf_counter()
+    ids, vectors = embed_all(args.batch_size, args.limit)
+    if not len(ids):
+        sys.exit("No SCIN images with image_1_data found")
+    embed_s = time.perf_counter() - start
+    print(f"Embedded {len(ids)} images ({vectors.shape[1]}-d) in {embed_s:.1f}s")
+
+    start = time.perf_counter()
+    index = ReferenceIndex.build(vectors, ids, m=args.m)
+    build_s = time.perf_counter() - start
+    index.save(Path(args.output), extra_meta={
+        "model_variant": settings.ML_MODEL_VARIANT,
+        "model_version": settings.MODEL_VERSION,
+        "built_at": datetime.utcnow().isoformat(),
+    })
+
+    sizes = index.nbytes()
+    print(f"Index built in {build_s:.1f}s: nlist={index.meta['nlist']}, m={index.m}")
+    print(f"Codes {sizes['codes'] / 1e6:.2f} MB, total {sum(sizes.values()) / 1e6:.2f} MB on disk")
+    print(f"Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=settings.REFERENCE_INDEX_DIR, help="Index directory")
+    parser.add_argument("--batch-size", type=int, default=64, help="Images embedded per forward pass")
+    parser.add_argument("--m", type=int, default=16, help="PQ subquantizers (bytes per vector)")
+    parser.add_argument("--limit", type=int, default=0, help="Only index the first N cases (0 = all)")
+    main(parser.parse_args())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""Count database round trips spent persisting one scan outcome
+
+Persists the same outcome (status, image hash, result, SkinAnalysis with
+its ConfidenceMetrics and FairnessMetrics rows, retention entry) twice
+against a migrated PostgreSQL database:
+
+- legacy: ORM writes with a "processing" and a "completed" status update,
+  each followed by commit and refresh, as the scan router used to do
+- single: app.services.scan_persistence.save_scan_outcome
+
+Every statement sent to the server, including BEGIN and COMMIT, counts as
+one round trip. All rows created by the run are deleted afterwards.
+
+Usage:
+    DATABASE_URL=postgresql://... python scripts/count_scan_roundtrips.py [--scans 20]
+"""
+import argparse
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import event
+
+from app.database import SessionLocal, engine
+from app.models import User
+from app.models.retention import RetentionEntry
+from app.models.scan import (
+    ConfidenceMetrics,
+    FairnessMetrics,
+    ScanSession,
+    ScanStatus,
+    SkinAnalysis,
+    SkinType,
+)
+from app.services.retention import register_for_retention
+from app.services.scan_persistence import AnalysisRecord, save_scan_outcome
+
+RETENTION_TTL = timedelta(days=90)
+
+
+class RoundTripCounter:
+    """Counts statements, BEGINs and COMMITs on the engine"""
+
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._hit)
+        event.listen(engine, "begin", self._hit)
+        event.listen(engine, "commit", self._hit)
+
+    def _hit(self, *args, **kwargs):
+        self.count += 1
+
+
+def _analysis() -> AnalysisRecord:
+    return AnalysisRecord(
+        skin_type="combination",
+        fitzpatrick_scale=3,
+        concerns=[{"concern_type": "acne", "severity": "mild", "confidence": 0.72}],
+        confidence_scores={"acne": 0.72, "redness": 0.64},
+        overall_confidence=0.7,
+        analysis_version="1.0.0",
+        uncertainty_factors=["uneven_lighting"],
+        image_quality_score=0.8,
+    )
+
+
+def _result(scan: ScanSession) -> dict:
+    return {"scan_id": str(scan.id), "status": "completed", "scores": {"acne": 30, "redness": 15}}
+
+
+def persist_legacy(db, scan: ScanSession, image_hash: str) -> None:
+    register_for_retention(db, f"roundtrip/{image_hash}.jpg", RETENTION_TTL)
+    scan.status = ScanStatus.PROCESSING
+    scan.image_hash = image_hash
+    scan.updated_at = datetime.utcnow()
+    db.add(scan)
+    db.commit()
+    db.refresh(scan)
+
+    record = _analysis()
+    analysis = SkinAnalysis(
+        scan_session_id=scan.id,
+        skin_type=SkinType(record.skin_type),
+        fitzpatrick_scale=record.fitzpatrick_scale,
+        concerns=record.concerns,
+        confidence_scores=record.confidence_scores,
+        overall_confidence=record.overall_confidence,
+        analysis_version=record.analysis_version,
+    )
+    db.add(analysis)
+    db.flush()
+    db.add(ConfidenceMetrics(
+        analysis_id=analysis.id,
+        overall_confidence=record.overall_confidence,
+        concern_confidences=record.confidence_scores,
+        uncertainty_factors=record.uncertainty_factors,
+        image_quality_score=record.image_quality_score,
+    ))
+    db.add(FairnessMetrics(analysis_id=analysis.id, fitzpatrick_scale=record.fitzpatrick_scale))
+    scan.status = ScanStatus.COMPLETED
+    scan.scan_metadata = {"result": _result(scan)}
+    scan.updated_at = datetime.utcnow()
+    db.add(scan)
+    db.commit()
+    db.refresh(scan)
+
+
+def persist_single(db, scan: ScanSession, image_hash: str) -> None:
+    save_scan_outcome(
+        db, scan, "completed",
+        result=_result(scan),
+        image_hash=image_hash,
+        analysis=_analysis(),
+        retention_key=f"roundtrip/{image_hash}.jpg",
+        retention_ttl=RETENTION_TTL,
+    )
+
+
+def run(persist, user_id: int, scans: int, counter: RoundTripCounter, created: list) -> tuple:
+    """Average round trips and milliseconds per scan for one strategy"""
+    db = SessionLocal()
+    try:
+        pending = []
+        for _ in range(scans):
+            scan = ScanSession(user_id=user_id, status=ScanStatus.PENDING)
+            db.add(scan)
+            pending.append(scan)
+        db.commit()
+        for scan in pending:
+            # Loaded the way the router loads it, outside the measurement
+            db.refresh(scan)
+            created.append(scan.id)
+
+        counter.count = 0
+        start = time.perf_counter()
+        for scan in pending:
+            persist(db, scan, uuid.uuid4().hex)
+        elapsed = time.perf_counter() - start
+        return counter.count / scans, elapsed / scans * 1000
+    finally:
+        db.close()
+
+
+def cleanup(scan_ids: list) -> None:
+    db = SessionLocal()
+    try:
+        analysis_ids = [
+            row.id for row in db.query(SkinAnalysis.id).filter(SkinAnalysis.scan_session_id.in_(scan_ids))
+        ]
+        if analysis_ids:
+            db.query(ConfidenceMetrics).filter(ConfidenceMetrics.analysis_id.in_(analysis_ids)).delete(synchronize_session=False)
+            db.query(FairnessMetrics).filter(FairnessMetrics.analysis_id.in_(analysis_ids)).delete(synchronize_session=False)
+            db.query(SkinAnalysis).filter(SkinAnalysis.id.in_(analysis_ids)).delete(synchronize_session=False)
+        db.query(RetentionEntry).filter(RetentionEntry.location.like("roundtrip/%")).delete(synchronize_session=False)
+        db.query(ScanSession).filter(ScanSession.id.in_(scan_ids)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def main(args) -> None:
+    db = SessionLocal()
+    user = db.query(User).first()
+    db.close()
+    if user is None:
+        sys.exit("No users in the database; run scripts/seed_database.py first")
+
+    counter = RoundTripCounter()
+    created: list = []
+    try:
+        legacy_trips, legacy_ms = run(persist_legacy, user.id, args.scans, counter, created)
+        single_trips, single_ms = run(persist_single, user.id, args.scans, counter, created)
+    finally:
+        cleanup(created)
+
+    print("=" * 80)
+    print(f"Scan outcome persistence ({args.scans} scans each)")
+    print("=" * 80)
+    print(f"{'strategy':<12}{'round trips/scan':>20}{'ms/scan':>12}")
+    print(f"{'legacy':<12}{legacy_trips:>20.1f}{legacy_ms:>12.2f}")
+    print(f"{'single':<12}{single_trips:>20.1f}{single_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scans", type=int, default=20, help="Scans persisted per strategy")
+    main(parser.parse_args())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Find near-duplicate images across the training datasets
+
+HAM10000, ISIC and SCIN overlap, and a copy of one image in both the
+train and test split inflates every evaluation. This hashes every image
+(pHash + dHash) in a process pool, groups near duplicates with the
+multi-index Hamming lookup in services/perceptual_hash.py and writes
+ml/data/processed/near_duplicates.json:
+
+- ``groups``: every group of near duplicates, the kept image first
+- ``exclude``: every other member; import_ham10000.py drops these before
+  splitting, so each image lands in exactly one split
+
+Images are keyed ``<dataset>/<image id>``. Earlier datasets win ties:
+HAM10000, then ISIC, then SCIN.
+
+Usage:
+    python scripts/dedupe_datasets.py [--workers 8] [--max-distance 7] [--skip-scin]
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import chain, islice
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.perceptual_hash import ImageHashes, NearDuplicateIndex, group_near_duplicates, hash_encoded
+
+ML_DATA_DIR = Path(__file__).parent.parent / "ml" / "data"
+MANIFEST_PATH = ML_DATA_DIR / "processed" / "near_duplicates.json"
+IMAGE_DIRS = {
+    "ham10000": [ML_DATA_DIR / "raw" / "ham10000" / "HAM10000_images_part_1",
+                 ML_DATA_DIR / "raw" / "ham10000" / "HAM10000_images_part_2"],
+    "isic": [ML_DATA_DIR / "raw" / "isic" / "images"],
+}
+
+
+def iter_file_sources() -> Iterator[Tuple[str, str, str]]:
+    """(key, "file", path) for every dataset image on disk"""
+    for dataset, directories in IMAGE_DIRS.items():
+        for directory in directories:
+            if not directory.is_dir():
+                continue
+            for path in sorted(directory.glob("*.jpg")):
+                yield f"{dataset}/{path.stem}", "file", str(path)
+
+
+def iter_scin_sources(chunk: int = 500) -> Iterator[Tuple[str, str, str]]:
+    """(key, "base64", data) for every SCIN image stored in scin_samples"""
+    from app.database import SessionLocal
+    from app.models.scin import SCINSample
+
+    db = SessionLocal()
+    try:
+        query = (
+            db.query(SCINSample.id, SCINSample.image_1_data)
+            .filter(SCINSample.image_1_data.isnot(None))
+            .order_by(SCINSample.id)
+        )
+        for row in query.yield_per(chunk):
+            yield f"scin/{row.id}", "base64", row.image_1_data
+    finally:
+        db.close()
+
+
+def hash_source(source: Tuple[str, str, str]) -> Tuple[str, Optional[ImageHashes]]:
+    """Runs in a worker process: decode one image and hash it"""
+    key, kind, payload = source
+    try:
+        if kind == "file":
+            with open(payload, "rb") as f:
+                data = f.read()
+        else:
+            data = base64.b64decode(payload)
+        return key, hash_encoded(data)
+    except (OSError, ValueError):
+        return key, None
+
+
+def hash_all(sources: Iterator[Tuple[str, str, str]], workers: int, chunksize: int):
+    """(key, hashes) for every source, in source order
+
+    Executor.map submits its whole input up front, which would hold every
+    SCIN image in memory; feeding it bounded windows keeps memory flat.
+    """
+    window = workers * chunksize * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            batch = list(islice(sources, window))
+            if not batch:
+                return
+            yield from pool.map(hash_source, batch, chunksize=chunksize)
+
+
+def main(args) -> None:
+    print("=" * 80)
+    print("Near-duplicate detection across HAM10000, ISIC and SCIN")
+    print("=" * 80)
+
+    sources = iter_file_sources()
+    if not args.skip_scin:
+        sources = chain(sources, iter_scin_sources())
+
+    start = time.perf_counter()
+    entries = []
+    unreadable = 0
+    for key, hashes in hash_all(sources, args.workers, args.chunksize):
+        if hashes is None:
+            unreadable += 1
+            continue
+        entries.append((key, hashes))
+        if len(entries) % 10000 == 0:
+            print(f"  hashed {len(entries)} images", flush=True)
+    hash_s = time.perf_counter() - start
+    if not entries:
+        sys.exit("No dataset images found")
+    print(f"Hashed {len(entries)} images in {hash_s:.1f}s ({len(entries) / hash_s:.0f}/s, "
+          f"{args.workers} workers); {unreadable} unreadable")
+
+    start = time.perf_counter()
+    groups = group_near_duplicates(entries, args.max_distance, args.dhash_max_distance)
+    group_s = time.perf_counter() - start
+    print(f"Grouped in {group_s:.2f}s ({group_s / len(entries) * 1e6:.0f} us per image, lookup + insert)")
+
+    # Lookup latency on the finished index, as seen by a single query
+    index: NearDuplicateIndex[str] = NearDuplicateIndex(args.max_distance, args.dhash_max_distance)
+    for key, hashes in entries:
+        index.add(hashes, key)
+    sample = entries[:: max(1, len(entries) // 1000)]
+    start = time.perf_counter()
+    for _, hashes in sample:
+        index.matches(hashes)
+    print(f"Lookup: {(time.perf_counter() - start) / len(sample) * 1000:.3f} ms per query over {len(index)} images")
+
+    exclude = sorted(key for group in groups for key in group[1:])
+    cross_dataset = sum(1 for group in groups if len({key.split("/")[0] for key in group}) > 1)
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(MANIFEST_PATH, "w") as f:
+        json.dump({
+            "generated_at": datetime.utcnow().isoformat(),
+            "max_distance": args.max_distance,
+            "dhash_max_distance": args.dhash_max_distance,
+            "images": len(entries),
+            "groups": groups,
+            "exclude": exclude,
+        }, f, indent=2)
+
+    print(f"{len(groups)} duplicate groups ({cross_dataset} spanning datasets), {len(exclude)} images excluded")
+    print(f"Manifest written to {MANIFEST_PATH}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Hashing processes")
+    parser.add_argument("--chunksize", type=int, default=64, help="Images sent to a worker at a time")
+    parser.add_argument("--max-distance", type=int, default=7, help="pHash Hamming radius")
+    parser.add_argument("--dhash-max-distance", type=int, default=12, help="dHash radius confirming a match")
+    parser.add_argument("--skip-scin", action="store_true", help="Only hash the image files on disk")
+    main(parser.parse_args())
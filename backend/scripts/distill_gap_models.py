@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Distill the GAP-head model variants from the v1 CNNs
+
+The student shares the teacher's convolution stack, so its features start
+from the v1 weights and only the global-average-pooling head is trained
+from scratch (features are fine-tuned at a lower learning rate). Training
+uses soft teacher targets only, so any skin images work as transfer data:
+the HAM10000 / ISIC images staged under ml/data by the import scripts, and
+optionally SCIN images stored in the database by import_scin.py.
+
+Usage:
+    python scripts/distill_gap_models.py [--models acne condition] [--epochs 5] [--scin-limit 5000]
+"""
+import argparse
+import base64
+import hashlib
+import io
+import logging
+import random
+import sys
+from pathlib import Path
+from typing import List, Union
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from PIL import Image
+from torch.utils.data import DataLoader, Dataset
+
+from services.ml_inference_service import MODEL_VARIANTS
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ML_DATA_DIR = Path(__file__).parent.parent / "ml" / "data"
+MODELS_DIR = Path(__file__).parent.parent / "models"
+STAGED_DIRS = [
+    ML_DATA_DIR / "processed" / "ham10000",
+    ML_DATA_DIR / "processed" / "isic",
+    ML_DATA_DIR / "raw" / "isic" / "images",
+]
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+# Must match MLInferenceService.preprocess_image
+IMG_SIZE = (224, 224)
+MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+class TransferImages(Dataset):
+    """Unlabelled images from staged files or raw bytes"""
+
+    def __init__(self, items: List[Union[Path, bytes]], augment: bool = False):
+        self.items = items
+        self.augment = augment
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, idx):
+        item = self.items[idx]
+        image = Image.open(item if isinstance(item, Path) else io.BytesIO(item)).convert("RGB")
+        if self.augment and random.random() < 0.5:
+            image = image.transpose(Image.FLIP_LEFT_RIGHT)
+        array = (np.asarray(image.resize(IMG_SIZE), dtype=np.float32) / 255.0 - MEAN) / STD
+        return torch.from_numpy(array).permute(2, 0, 1)
+
+
+def collect_staged_images() -> List[Path]:
+    paths = []
+    for root in STAGED_DIRS:
+        if root.exists():
+            paths.extend(p for p in root.rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES)
+    return sorted(set(paths))
+
+
+def collect_scin_images(limit: int) -> List[bytes]:
+    from app.database import SessionLocal
+    from app.models.scin import SCINSample
+
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(SCINSample.image_1_data)
+            .filter(SCINSample.image_1_data.isnot(None))
+            .limit(limit)
+            .all()
+        )
+        return [base64.b64decode(row.image_1_data) for row in rows]
+    finally:
+        db.close()
+
+
+def load_teacher(role: str, device: torch.device) -> torch.nn.Module:
+    model_id, model_cls = MODEL_VARIANTS["v1"][role]
+    model = model_cls()
+    model.load_state_dict(torch.load(MODELS_DIR / f"{model_id}.pt", map_location=device))
+    return model.to(device).eval()
+
+
+def kd_loss(student_logits, teacher_logits, temperature: float) -> torch.Tensor:
+    return F.kl_div(
+        F.log_softmax(student_logits / temperature, dim=1),
+        F.softmax(teacher_logits / temperature, dim=1),
+        reduction="batchmean",
+    ) * temperature ** 2
+
+
+@torch.no_grad()
+def agreement(student, teacher, loader, device) -> float:
+    student.eval()
+    agree = total = 0
+    for batch in loader:
+        batch = batch.to(device)
+        agree += (student(batch).argmax(1) == teacher(batch).argmax(1)).sum().item()
+        total += batch.shape[0]
+    return agree / total if total else 0.0
+
+
+def distill(role: str, train_loader, val_loader, args, device) -> Path:
+    teacher = load_teacher(role, device)
+    student_id, student_cls = MODEL_VARIANTS["gap_v1"][role]
+    student = student_cls().to(device)
+    student.features.load_state_dict(teacher.features.state_dict())
+
+    optimizer = torch.optim.AdamW([
+        {"params": student.features.parameters(), "lr": args.lr * 0.1},
+        {"params": student.classifier.parameters(), "lr": args.lr},
+    ], weight_decay=1e-4)
+
+    best, out_path = -1.0, MODELS_DIR / f"{student_id}.pt"
+    for epoch in range(1, args.epochs + 1):
+        student.train()
+        running = 0.0
+        for batch in train_loader:
+            batch = batch.to(device)
+            with torch.no_grad():
+                teacher_logits = teacher(batch)
+            loss = kd_loss(student(batch), teacher_logits, args.temperature)
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            running += loss.item() * batch.shape[0]
+
+        val_agreement = agreement(student, teacher, val_loader, device)
+        logger.info(
+            f"[{student_id}] epoch {epoch}/{args.epochs} "
+            f"loss={running / len(train_loader.dataset):.4f} teacher_agreement={val_agreement:.2%}"
+        )
+        if val_agreement > best:
+            best = val_agreement
+            torch.save(student.state_dict(), out_path)
+
+    digest = hashlib.sha256(out_path.read_bytes()).hexdigest()
+    logger.info(f"[{student_id}] saved {out_path} (agreement {best:.2%}, sha256 {digest})")
+    return out_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", nargs="+", choices=["acne", "condition"], default=["acne", "condition"])
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--temperature", type=float, default=4.0)
+    parser.add_argument("--val-fraction", type=float, default=0.1)
+    parser.add_argument("--scin-limit", type=int, default=0, help="Also use up to N SCIN images from the database")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    random.seed(42)
+    torch.manual_seed(42)
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+    items: List[Union[Path, bytes]] = list(collect_staged_images())
+    if args.scin_limit:
+        items.extend(collect_scin_images(args.scin_limit))
+    if not items:
+        sys.exit(f"No transfer images found; run the import scripts to stage data under {ML_DATA_DIR}")
+    random.shuffle(items)
+
+    n_val = max(1, int(len(items) * args.val_fraction))
+    train_loader = DataLoader(
+        TransferImages(items[n_val:], augment=True), batch_size=args.batch_size,
+        shuffle=True, num_workers=args.workers,
+    )
+    val_loader = DataLoader(TransferImages(items[:n_val]), batch_size=args.batch_size, num_workers=args.workers)
+    logger.info(f"Distilling on {len(items) - n_val} images, validating on {n_val} ({device})")
+
+    for role in args.models:
+        distill(role, train_loader, val_loader, args, device)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Offline report for the acne -> condition early-exit cascade
+
+Runs the full pipeline (both models) once over a labelled image set,
+records per-stage latency, then replays the cascade decision at several
+thresholds to show compute saved against agreement with the full
+pipeline and accuracy against the labels.
+
+The labelled set is either a directory with one sub-directory per
+condition label (normal/, acne/, rosacea/, ...) or a CSV with
+``path,label`` rows.
+
+Usage:
+    python scripts/evaluate_cascade.py data/labelled_faces --thresholds 0.8 0.9 0.95 [--json report.json]
+"""
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cv2
+
+from services.ml_inference_service import MLInferenceService, cascade_can_exit
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+
+def load_labelled_set(source: Path) -> List[Tuple[Path, str]]:
+    if source.is_file():
+        with open(source, newline="") as f:
+            return [(Path(row["path"]), row["label"]) for row in csv.DictReader(f)]
+    return [
+        (path, label_dir.name)
+        for label_dir in sorted(p for p in source.iterdir() if p.is_dir())
+        for path in sorted(label_dir.iterdir())
+        if path.suffix.lower() in IMAGE_SUFFIXES
+    ]
+
+
+async def run_full_pipeline(service: MLInferenceService, samples):
+    records = []
+    for path, label in samples:
+        image = cv2.imread(str(path))
+        if image is None:
+            print(f"  ! skipping unreadable {path}")
+            continue
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+        start = time.perf_counter()
+        acne = await service.predict_acne(image)
+        acne_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        condition = await service.predict_condition(image)
+        condition_ms = (time.perf_counter() - start) * 1000
+
+        records.append({
+            "label": label,
+            "acne": acne,
+            "condition": condition["condition"],
+            "acne_ms": acne_ms,
+            "condition_ms": condition_ms,
+        })
+    return records
+
+
+def replay(records, threshold: float) -> dict:
+    """Cascade outcome at ``threshold`` computed from full-pipeline records"""
+    full_ms = sum(r["acne_ms"] + r["condition_ms"] for r in records)
+    exits = [cascade_can_exit(r["acne"], threshold) for r in records]
+    saved_ms = sum(r["condition_ms"] for r, e in zip(records, exits) if e)
+    cascade_labels = ["normal" if e else r["condition"] for r, e in zip(records, exits)]
+
+    n = len(records)
+    return {
+        "threshold": threshold,
+        "early_exit_rate": sum(exits) / n,
+        "compute_saved": saved_ms / full_ms if full_ms else 0.0,
+        "agreement_with_full": sum(c == r["condition"] for c, r in zip(cascade_labels, records)) / n,
+        "accuracy_full": sum(r["condition"] == r["label"] for r in records) / n,
+        "accuracy_cascade": sum(c == r["label"] for c, r in zip(cascade_labels, records)) / n,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("dataset", type=Path, help="Label directory or path,label CSV")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.8, 0.85, 0.9, 0.95, 0.99])
+    parser.add_argument("--json", type=Path, default=None, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    samples = load_labelled_set(args.dataset)
+    if not samples:
+        sys.exit(f"No labelled images found in {args.dataset}")
+
+    service = MLInferenceService(cascade_enabled=False)
+    if service.acne_model is None or service.condition_model is None:
+        sys.exit("Both acne_binary_v1.pt and other_condition_v1.pt are required")
+
+    records = asyncio.run(run_full_pipeline(service, samples))
+    report = [replay(records, t) for t in sorted(args.thresholds)]
+
+    print("=" * 80)
+    print(f"Cascade report: {len(records)} images")
+    print("=" * 80)
+    print(f"{'threshold':>10} {'exit rate':>10} {'saved':>8} {'agree':>8} {'acc full':>9} {'acc casc':>9}")
+    for row in report:
+        print(
+            f"{row['threshold']:>10.2f} {row['early_exit_rate']:>10.1%} {row['compute_saved']:>8.1%} "
+            f"{row['agreement_with_full']:>8.1%} {row['accuracy_full']:>9.1%} {row['accuracy_cascade']:>9.1%}"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps({"images": len(records), "thresholds": report}, indent=2))
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Side-by-side comparison of the v1 and GAP-head model variants
+
+Reports, per model role (acne, condition) and variant:
+  - parameter count and weight size
+  - activation memory of one forward pass
+  - CPU latency at batch size 1 (mean / p95)
+  - accuracy on a labelled set and agreement with v1, if --dataset is given
+
+The labelled set uses the same layout as scripts/evaluate_cascade.py.
+Variants whose weight file is missing are still timed with random weights.
+
+Usage:
+    python scripts/evaluate_model_variants.py [--dataset data/labelled_faces] [--runs 50] [--json report.json]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import cv2
+import numpy as np
+import torch
+
+from services.ml_inference_service import MODEL_VARIANTS, MLInferenceService
+
+MODELS_DIR = Path(__file__).parent.parent / "models"
+ROLES = {"acne": ["no_acne", "acne"], "condition": ["normal", "acne", "rosacea", "eczema", "pigmentation"]}
+
+
+def load_variant(role: str, variant: str):
+    model_id, model_cls = MODEL_VARIANTS[variant][role]
+    model = model_cls(num_classes=len(ROLES[role]))
+    weights = MODELS_DIR / f"{model_id}.pt"
+    if weights.exists():
+        model.load_state_dict(torch.load(weights, map_location="cpu"))
+    return model_id, model.eval(), weights.exists()
+
+
+def activation_mb(model: torch.nn.Module, sample: torch.Tensor) -> float:
+    """Sum of leaf-module output sizes for one forward pass"""
+    sizes = []
+
+    def record(_module, _inputs, output):
+        sizes.append(output.numel() * output.element_size())
+
+    hooks = [m.register_forward_hook(record) for m in model.modules() if not list(m.children())]
+    with torch.no_grad():
+        model(sample)
+    for hook in hooks:
+        hook.remove()
+    return sum(sizes) / 1e6
+
+
+def latency_ms(model: torch.nn.Module, sample: torch.Tensor, runs: int):
+    timings = []
+    with torch.no_grad():
+        for _ in range(5):
+            model(sample)
+        for _ in range(runs):
+            start = time.perf_counter()
+            model(sample)
+            timings.append((time.perf_counter() - start) * 1000)
+    return float(np.mean(timings)), float(np.percentile(timings, 95))
+
+
+def predict_all(model, tensors):
+    with torch.no_grad():
+        return [int(model(t).argmax(1)) for t in tensors]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", type=Path, default=None)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--threads", type=int, default=1, help="torch CPU threads (1 matches a busy API worker)")
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    # Reuse the production preprocessing without loading any weights
+    preprocess = MLInferenceService.__new__(MLInferenceService)
+    preprocess.img_size, preprocess.device = (224, 224), torch.device("cpu")
+    preprocess.mean, preprocess.std = [0.485, 0.456, 0.406], [0.229, 0.224, 0.225]
+
+    samples = []
+    if args.dataset:
+        from evaluate_cascade import load_labelled_set
+
+        for path, label in load_labelled_set(args.dataset):
+            image = cv2.imread(str(path))
+            if image is not None:
+                samples.append((preprocess.preprocess_image(cv2.cvtColor(image, cv2.COLOR_BGR2RGB)), label))
+    sample = torch.randn(1, 3, 224, 224)
+
+    report = []
+    for role, classes in ROLES.items():
+        reference = None
+        for variant in MODEL_VARIANTS:
+            model_id, model, has_weights = load_variant(role, variant)
+            params = sum(p.numel() for p in model.parameters())
+            mean_ms, p95_ms = latency_ms(model, sample, args.runs)
+            row = {
+                "role": role,
+                "variant": variant,
+                "model_id": model_id,
+                "weights_loaded": has_weights,
+                "parameters": params,
+                "weights_mb": params * 4 / 1e6,
+                "activation_mb": activation_mb(model, sample),
+                "latency_mean_ms": mean_ms,
+                "latency_p95_ms": p95_ms,
+            }
+            if samples:
+                predictions = predict_all(model, [t for t, _ in samples])
+                truth = [
+                    label if role == "condition" else ("acne" if label == "acne" else "no_acne")
+                    for _, label in samples
+                ]
+                row["accuracy"] = float(np.mean([classes[p] == t for p, t in zip(predictions, truth)]))
+                if reference is None:
+                    reference = predictions
+                row["agreement_with_v1"] = float(np.mean([a == b for a, b in zip(predictions, reference)]))
+            report.append(row)
+
+    print("=" * 100)
+    print(f"Model variants ({args.threads} CPU thread(s), {args.runs} runs" + (f", {len(samples)} images)" if samples else ")"))
+    print("=" * 100)
+    print(f"{'model':<24} {'weights':>8} {'params':>11} {'w MB':>8} {'act MB':>8} {'mean ms':>8} {'p95 ms':>8} {'acc':>7} {'agree':>7}")
+    for row in report:
+        print(
+            f"{row['model_id']:<24} {'yes' if row['weights_loaded'] else 'random':>8} {row['parameters']:>11,} "
+            f"{row['weights_mb']:>8.1f} {row['activation_mb']:>8.1f} {row['latency_mean_ms']:>8.2f} "
+            f"{row['latency_p95_ms']:>8.2f} {row.get('accuracy', float('nan')):>7.1%} "
+            f"{row.get('agreement_with_v1', float('nan')):>7.1%}"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
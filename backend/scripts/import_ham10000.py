@@ -37,13 +37,15 @@ logger = logging.getLogger(__name__)
 ML_DATA_DIR = Path(__file__).parent.parent / "ml" / "data"
 RAW_DIR = ML_DATA_DIR / "raw" / "ham10000"
 PROCESSED_DIR = ML_DATA_DIR / "processed" / "ham10000"
+# Written by scripts/dedupe_datasets.py
+NEAR_DUPLICATES_PATH = ML_DATA_DIR / "processed" / "near_duplicates.json"
 
 # Dataset will be downloaded via Kaggle API
 # Command: kaggle datasets download -d kmader/skin-cancer-mnist-ham10000
 
 class HAM10000Importer:
     def __init__(self):
-        self.stats = {'images': 0, 'train': 0, 'val': 0, 'test': 0}
+        self.stats = {'images': 0, 'train': 0, 'val': 0, 'test': 0, 'near_duplicates': 0}
         self.categories = ['nv', 'mel', 'bkl', 'bcc', 'akiec', 'vasc', 'df']
     
     def check_kaggle_setup(self) -> bool:
@@ -100,6 +102,7 @@ Please set up Kaggle API:
             return
         
         df = pd.read_csv(metadata_path)
+        df = self._drop_near_duplicates(df)
         
         # Create split directories
         for split in ['train', 'val', 'test']:
@@ -120,6 +123,20 @@ Please set up Kaggle API:
         
         logger.info(f"Dataset organized: {self.stats}")
     
+    def _drop_near_duplicates(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Drop images that near-duplicate one kept elsewhere, so no image leaks across splits"""
+        if not NEAR_DUPLICATES_PATH.exists():
+            logger.warning(f"No near-duplicate manifest at {NEAR_DUPLICATES_PATH}; "
+                           "run scripts/dedupe_datasets.py to keep duplicates out of the splits")
+            return df
+        
+        with open(NEAR_DUPLICATES_PATH) as f:
+            excluded = set(json.load(f)['exclude'])
+        keep = ~('ham10000/' + df['image_id']).isin(excluded)
+        self.stats['near_duplicates'] = int((~keep).sum())
+        logger.info(f"Dropping {self.stats['near_duplicates']} near-duplicate images")
+        return df[keep]
+    
     def _copy_images(self, df: pd.DataFrame, split: str):
         """Copy images to split directory"""
         for _, row in df.iterrows():
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Run the local inference worker pool
+
+Starts INFERENCE_WORKER_PROCESSES workers that load the skin models and
+serve API processes over INFERENCE_WORKER_SOCKET (see
+services/inference_worker.py). Point the API at the same socket to keep
+torch out of the API workers. Both sides must share
+INFERENCE_WORKER_AUTHKEY and run as the same user (the socket is 0600).
+
+Usage:
+    INFERENCE_WORKER_SOCKET=/run/skin-inference/worker.sock INFERENCE_WORKER_AUTHKEY=... \
+        python scripts/run_inference_worker.py [--processes 2]
+"""
+import argparse
+import logging
+import signal
+import sys
+from multiprocessing.connection import wait
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from services.inference_worker import start_workers, stop_workers
+
+
+def main(args) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(levelname)s %(message)s")
+    if not args.socket:
+        sys.exit("Set INFERENCE_WORKER_SOCKET or pass --socket")
+    if not settings.INFERENCE_WORKER_AUTHKEY:
+        sys.exit("Set INFERENCE_WORKER_AUTHKEY to the secret the API processes use")
+
+    listener, workers = start_workers(
+        args.socket, settings.INFERENCE_WORKER_AUTHKEY.encode(), processes=args.processes
+    )
+    print("=" * 80)
+    print(f"Inference workers {[w.pid for w in workers]} listening on {args.socket}")
+    print("=" * 80)
+
+    def shutdown(signum, frame):
+        stop_workers(listener, workers)
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    wait([worker.sentinel for worker in workers])
+    # A worker died (e.g. failed to load models); take the pool down with it
+    stop_workers(listener, workers)
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=settings.INFERENCE_WORKER_SOCKET, help="Unix socket path")
+    parser.add_argument("--processes", type=int, default=settings.INFERENCE_WORKER_PROCESSES, help="Worker processes")
+    main(parser.parse_args())
@@ -0,0 +1,242 @@
+"""Analyzer Graph - Concurrent, Pluggable Analysis Steps
+
+Skin analyzers are independent once the face region and landmarks are
+known, and the OpenCV calls they spend their time in release the GIL.
+An AnalyzerGraph holds named nodes that declare the values they read:
+seeds supplied by the caller (the face region, landmarks), shared planes
+(grayscale, LAB, HSV, ...) computed once for every analyzer that needs
+them, and other analyzers' outputs. ``run`` starts every node as soon as
+its inputs exist, on a shared thread pool, and records per-node timings.
+
+New analyzers are registered as plugins without touching the caller:
+
+    @SKIN_ANALYZERS.register("redness", inputs=("lab",))
+    def redness(lab): ...
+"""
+
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class AnalyzerNode:
+    """One step: ``fn(**inputs)`` -> value stored under ``name``"""
+    name: str
+    fn: Callable[..., Any]
+    inputs: Tuple[str, ...] = ()
+    # Shared intermediate (colour plane, filter response), not a result
+    plane: bool = False
+
+
+@dataclass
+class GraphRun:
+    """Values and timings of one run"""
+    values: Dict[str, Any]
+    timings_ms: Dict[str, float]
+    wall_ms: float
+    # Analyzers not run: skipped by the caller, or missing one of their inputs
+    skipped: List[str] = field(default_factory=list)
+
+    @property
+    def serial_ms(self) -> float:
+        """What the run would have taken one node after another"""
+        return sum(self.timings_ms.values())
+
+
+def _timed(node: AnalyzerNode, args: Dict[str, Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    value = node.fn(**args)
+    return value, (time.perf_counter() - start) * 1000
+
+
+class AnalyzerGraph:
+    """Registry and dependency-ordered executor of analyzer nodes"""
+
+    def __init__(self):
+        self._nodes: Dict[str, AnalyzerNode] = {}
+        self._lock = threading.Lock()
+        self._runs = 0
+        self._node_runs: Dict[str, int] = defaultdict(int)
+        self._node_ms: Dict[str, float] = defaultdict(float)
+        self._wall_ms = 0.0
+        self._serial_ms = 0.0
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._nodes
+
+    @property
+    def nodes(self) -> List[AnalyzerNode]:
+        return list(self._nodes.values())
+
+    def copy(self) -> "AnalyzerGraph":
+        """New graph with the same nodes (and fresh stats), to extend without affecting this one"""
+        graph = AnalyzerGraph()
+        graph._nodes = dict(self._nodes)
+        return graph
+
+    def add(self, node: AnalyzerNode, replace: bool = False) -> AnalyzerNode:
+        if node.name in self._nodes and not replace:
+            raise ValueError(f"Analyzer '{node.name}' is already registered")
+        self._nodes[node.name] = node
+        return node
+
+    def register(
+        self, name: str, inputs: Iterable[str] = (), plane: bool = False, replace: bool = False
+    ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Decorator registering ``fn`` as node ``name``; the function is returned unchanged"""
+        def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+            self.add(AnalyzerNode(name, fn, tuple(inputs), plane), replace=replace)
+            return fn
+        return decorator
+
+    def plan(self, seeds: Iterable[str], skip: Iterable[str] = ()) -> Tuple[List[AnalyzerNode], List[str]]:
+        """Nodes that can run, in dependency order, and analyzers that cannot
+
+        A node cannot run if it is skipped, or if one of its inputs is
+        neither a seed nor a node that runs. Blocked planes are not listed.
+
+        Raises:
+            ValueError: On a dependency cycle
+        """
+        available = set(seeds)
+        skip = set(skip)
+        order: List[AnalyzerNode] = []
+        state: Dict[str, str] = {}
+
+        def visit(name: str) -> bool:
+            if name in available:
+                return True
+            node = self._nodes.get(name)
+            if node is None:
+                return False
+            if state.get(name) == "visiting":
+                raise ValueError(f"Analyzer dependency cycle through '{name}'")
+            if name in state:
+                return state[name] == "runs"
+            state[name] = "visiting"
+            runs = name not in skip and all([visit(dependency) for dependency in node.inputs])
+            state[name] = "runs" if runs else "blocked"
+            if runs:
+                order.append(node)
+            return runs
+
+        for name in self._nodes:
+            visit(name)
+        blocked = [name for name, outcome in state.items() if outcome == "blocked" and not self._nodes[name].plane]
+        return order, blocked
+
+    def run(
+        self,
+        seeds: Mapping[str, Any],
+        executor: Optional[Executor] = None,
+        skip: Iterable[str] = (),
+    ) -> GraphRun:
+        """Run every runnable node; concurrently when ``executor`` is given
+
+        Raises:
+            The first exception raised by a node; nodes not yet started are
+            cancelled
+        """
+        start = time.perf_counter()
+        order, skipped = self.plan(seeds, skip)
+        values: Dict[str, Any] = dict(seeds)
+        timings: Dict[str, float] = {}
+
+        if executor is None:
+            for node in order:
+                values[node.name], timings[node.name] = _timed(node, {i: values[i] for i in node.inputs})
+        else:
+            self._run_concurrently(order, values, timings, executor)
+
+        result = GraphRun(values, timings, (time.perf_counter() - start) * 1000, skipped)
+        self._record(result)
+        return result
+
+    @staticmethod
+    def _run_concurrently(
+        order: List[AnalyzerNode], values: Dict[str, Any], timings: Dict[str, float], executor: Executor
+    ) -> None:
+        waiting = {node.name: {i for i in node.inputs if i not in values} for node in order}
+        dependents: Dict[str, List[AnalyzerNode]] = defaultdict(list)
+        for node in order:
+            for dependency in waiting[node.name]:
+                dependents[dependency].append(node)
+
+        running: Dict[Future, AnalyzerNode] = {}
+        ready = [node for node in order if not waiting[node.name]]
+        try:
+            while ready or running:
+                for node in ready:
+                    args = {i: values[i] for i in node.inputs}
+                    running[executor.submit(_timed, node, args)] = node
+                ready = []
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    node = running.pop(future)
+                    values[node.name], timings[node.name] = future.result()
+                    for dependent in dependents[node.name]:
+                        waiting[dependent.name].discard(node.name)
+                        if not waiting[dependent.name]:
+                            ready.append(dependent)
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+
+    def _record(self, result: GraphRun) -> None:
+        with self._lock:
+            self._runs += 1
+            self._wall_ms += result.wall_ms
+            self._serial_ms += result.serial_ms
+            for name, ms in result.timings_ms.items():
+                self._node_runs[name] += 1
+                self._node_ms[name] += ms
+
+    def stats(self) -> dict:
+        """Per-node average timings, and wall time against the serial sum"""
+        with self._lock:
+            runs = self._runs
+            return {
+                "runs": runs,
+                "avg_wall_ms": round(self._wall_ms / runs, 2) if runs else None,
+                "avg_serial_ms": round(self._serial_ms / runs, 2) if runs else None,
+                "nodes": {
+                    name: {"runs": count, "avg_ms": round(self._node_ms[name] / count, 3)}
+                    for name, count in self._node_runs.items()
+                },
+            }
+
+
+# Singleton instance
+_analyzer_pool: Optional[ThreadPoolExecutor] = None
+_analyzer_pool_lock = threading.Lock()
+
+def usable_cores() -> int:
+    """Cores this process may run on (CPU affinity, not the host total)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def get_analyzer_pool() -> Optional[ThreadPoolExecutor]:
+    """Thread pool shared by every scan's analyzer graph
+
+    None (analyzers run inline) when ANALYZER_WORKERS is 0 or the process
+    has a single core, where the pool would only add hand-off overhead.
+    """
+    global _analyzer_pool
+    from app.config import settings
+
+    if settings.ANALYZER_WORKERS <= 0 or usable_cores() < 2:
+        return None
+    with _analyzer_pool_lock:
+        if _analyzer_pool is None:
+            _analyzer_pool = ThreadPoolExecutor(
+                max_workers=settings.ANALYZER_WORKERS, thread_name_prefix="skin-analyzer"
+            )
+    return _analyzer_pool
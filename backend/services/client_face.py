@@ -0,0 +1,107 @@
+"""
+Client-Assisted Face Detection
+Validates face crops and landmarks computed in the browser so the server
+can skip its own detection stage; anything that fails validation falls
+back to full server-side detection
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Accepted client detectors: name -> (landmark counts, (eye_a, eye_b, nose, mouth) indices)
+CLIENT_DETECTORS: Dict[str, Tuple[set, Tuple[int, int, int, int]]] = {
+    "mediapipe-face-landmarker": ({468, 478}, (33, 263, 1, 13)),
+    "mediapipe-face-detector": ({6}, (0, 1, 2, 3)),
+    # TensorFlow.js BlazeFace, the browser detector: eyes, nose, mouth, ears
+    "blazeface": ({6}, (0, 1, 2, 3)),
+    "yunet": ({5}, (0, 1, 2, 3)),
+}
+
+MIN_CROP_SIDE = 128
+MAX_CROP_SIDE = 1024
+# Normalized landmarks may sit slightly outside a tight crop
+LANDMARK_SLACK = 0.05
+# Eye distance as a fraction of crop width: below is not a tight face crop.
+# A face box with 15% margin puts the eyes about 0.3 apart; a selfie whose
+# face does not dominate the frame (used whole as the face region) is lower
+MIN_EYE_DISTANCE = 0.25
+MAX_EYE_DISTANCE = 0.9
+
+
+@dataclass
+class ClientFaceResult:
+    """Outcome of validating a client-supplied face crop"""
+    accepted: bool
+    reason: str = ""
+    detector: str = ""
+    landmarks: Optional[List[Dict[str, float]]] = None
+
+    def summary(self) -> Dict[str, str]:
+        """Compact record of which detection path ran, for scan results"""
+        if self.accepted:
+            return {"source": "client", "detector": self.detector}
+        if self.reason:
+            return {"source": "server", "fallback_reason": self.reason}
+        return {"source": "server"}
+
+
+def _reject(reason: str) -> ClientFaceResult:
+    logger.info(f"Client face rejected, falling back to server detection: {reason}")
+    return ClientFaceResult(False, reason)
+
+
+def validate_client_face(metadata: Optional[dict], width: int, height: int) -> ClientFaceResult:
+    """
+    Cheaply check a client face crop and its landmarks
+
+    Args:
+        metadata: ``{"detector", "detector_version", "landmarks": [[x, y(, z)], ...]}``
+            with landmarks normalized to the crop
+        width: Crop width in pixels
+        height: Crop height in pixels
+
+    Returns:
+        ClientFaceResult; landmarks are returned as {"x", "y", "z"} dicts
+        matching SkinAnalysisService._detect_face
+    """
+    if not metadata:
+        return ClientFaceResult(False)
+
+    detector = str(metadata.get("detector", ""))
+    if detector not in CLIENT_DETECTORS:
+        return _reject(f"unsupported detector '{detector}'")
+    if not metadata.get("detector_version"):
+        return _reject("missing detector_version")
+    counts, (eye_a, eye_b, nose, mouth) = CLIENT_DETECTORS[detector]
+
+    if min(width, height) < MIN_CROP_SIDE or max(width, height) > MAX_CROP_SIDE:
+        return _reject(f"crop size {width}x{height} outside {MIN_CROP_SIDE}-{MAX_CROP_SIDE}px")
+
+    raw = metadata.get("landmarks") or []
+    if len(raw) not in counts:
+        return _reject(f"expected {sorted(counts)} landmarks for {detector}, got {len(raw)}")
+    try:
+        points = [(float(p[0]), float(p[1]), float(p[2]) if len(p) > 2 else 0.0) for p in raw]
+    except (TypeError, ValueError, IndexError):
+        return _reject("malformed landmarks")
+
+    lo, hi = -LANDMARK_SLACK, 1.0 + LANDMARK_SLACK
+    if any(not (lo <= x <= hi and lo <= y <= hi) for x, y, _ in points):
+        return _reject("landmarks outside crop")
+
+    # Upright-face geometry: eyes apart and above the nose, nose above the mouth
+    eye_distance = abs(points[eye_a][0] - points[eye_b][0])
+    if not MIN_EYE_DISTANCE <= eye_distance <= MAX_EYE_DISTANCE:
+        return _reject(f"eye distance {eye_distance:.2f} is not a tight face crop")
+    eye_y = (points[eye_a][1] + points[eye_b][1]) / 2
+    if not eye_y < points[nose][1] < points[mouth][1]:
+        return _reject("implausible landmark geometry")
+
+    return ClientFaceResult(
+        accepted=True,
+        detector=f"{detector}@{metadata['detector_version']}",
+        landmarks=[{"x": x, "y": y, "z": z} for x, y, z in points],
+    )
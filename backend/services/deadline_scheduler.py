@@ -0,0 +1,245 @@
+"""
+Deadline-Aware Pipeline Scheduler
+Gives every scan a latency budget and, when the predicted queue wait plus
+compute time would exceed it, picks a cheaper pipeline variant (lower
+analysis resolution, acne-model-only ML, skipped analyzers) instead of
+letting latency grow for everyone. Admitted scans run on a pool of
+``workers`` pipeline threads, so the event loop stays free and a scan
+waiting for a thread already counts toward the predicted wait.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+WRINKLES = "wrinkles"
+DARK_CIRCLES = "dark_circles"
+
+
+@dataclass(frozen=True)
+class PipelineVariant:
+    """One way of running the analysis pipeline, from full to cheapest"""
+    name: str
+    # Longest image side fed to the analyzers; None keeps the upload size
+    max_side: Optional[int] = None
+    # Run only the acne model (no condition model, regardless of cascade)
+    ml_acne_only: bool = False
+    skip_analyzers: Tuple[str, ...] = ()
+    # Compute time relative to the full pipeline, until measured
+    relative_cost: float = 1.0
+
+
+PIPELINE_VARIANTS: List[PipelineVariant] = [
+    PipelineVariant("full"),
+    PipelineVariant("reduced_resolution", max_side=512, relative_cost=0.55),
+    PipelineVariant("acne_model_only", max_side=512, ml_acne_only=True, relative_cost=0.35),
+    PipelineVariant(
+        "minimal", max_side=384, ml_acne_only=True, skip_analyzers=(WRINKLES, DARK_CIRCLES), relative_cost=0.25
+    ),
+]
+
+
+@dataclass
+class ScheduleDecision:
+    """Variant chosen for one request and the prediction behind it"""
+    variant: PipelineVariant
+    budget_ms: float
+    predicted_wait_ms: float
+    predicted_compute_ms: float
+    elapsed_ms: float = 0.0
+    # Time on a pipeline thread (set by ``run``); elapsed_ms then includes the queue wait
+    compute_ms: Optional[float] = None
+
+    @property
+    def degraded(self) -> bool:
+        return self.variant.name != PIPELINE_VARIANTS[0].name
+
+    def summary(self) -> Dict:
+        """Compact record of the decision, for scan results"""
+        return {
+            "variant": self.variant.name,
+            "degraded": self.degraded,
+            "budget_ms": self.budget_ms,
+            "predicted_ms": round(self.predicted_wait_ms + self.predicted_compute_ms, 1),
+        }
+
+
+@dataclass
+class _VariantStats:
+    requests: int = 0
+    ewma_ms: Optional[float] = None
+
+
+class DeadlineScheduler:
+    """Chooses a pipeline variant per request from the current backlog
+
+    Predicted wait is the predicted compute of all admitted, unfinished
+    requests divided by the number of requests that run in parallel.
+    Compute per variant is an exponentially weighted moving average of
+    measured times, seeded from the full pipeline's estimate.
+    """
+
+    def __init__(
+        self,
+        variants: Sequence[PipelineVariant] = tuple(PIPELINE_VARIANTS),
+        workers: int = 1,
+        initial_full_ms: float = 800.0,
+        smoothing: float = 0.2,
+    ):
+        self.variants = list(variants)
+        self.workers = max(1, workers)
+        self.initial_full_ms = initial_full_ms
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _VariantStats] = {v.name: _VariantStats() for v in self.variants}
+        self._in_flight_ms = 0.0
+        self._in_flight = 0
+        self._total = 0
+        self._degraded = 0
+        self._over_budget = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """The ``workers`` threads admitted pipelines run on (created on first use)"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scan-pipeline")
+            return self._executor
+
+    def predicted_compute_ms(self, variant: PipelineVariant) -> float:
+        measured = self._stats[variant.name].ewma_ms
+        if measured is not None:
+            return measured
+        full = self._stats[self.variants[0].name].ewma_ms or self.initial_full_ms
+        return full * variant.relative_cost
+
+    def choose(self, budget_ms: float) -> ScheduleDecision:
+        """Pick the most complete variant predicted to finish within budget
+
+        Falls back to the cheapest variant when none fits.
+        """
+        with self._lock:
+            return self._choose_locked(budget_ms)
+
+    def _choose_locked(self, budget_ms: float) -> ScheduleDecision:
+        wait = self._in_flight_ms / self.workers
+        for variant in self.variants:
+            compute = self.predicted_compute_ms(variant)
+            if wait + compute <= budget_ms:
+                return ScheduleDecision(variant, budget_ms, wait, compute)
+        cheapest = self.variants[-1]
+        return ScheduleDecision(cheapest, budget_ms, wait, self.predicted_compute_ms(cheapest))
+
+    @contextmanager
+    def admit(self, budget_ms: float) -> Iterator[ScheduleDecision]:
+        """
+        Choose a variant and account for the request while it runs
+
+        Usage::
+
+            with scheduler.admit(budget_ms) as decision:
+                run_pipeline(decision.variant)
+        """
+        with self._lock:
+            decision = self._choose_locked(budget_ms)
+            self._in_flight += 1
+            self._in_flight_ms += decision.predicted_compute_ms
+            self._total += 1
+            if decision.degraded:
+                self._degraded += 1
+        start = time.perf_counter()
+        succeeded = False
+        try:
+            yield decision
+            succeeded = True
+        finally:
+            decision.elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._in_flight -= 1
+                self._in_flight_ms = max(0.0, self._in_flight_ms - decision.predicted_compute_ms)
+                if succeeded:
+                    self._observe_locked(decision)
+        if decision.degraded:
+            logger.info(
+                f"Scan degraded to '{decision.variant.name}': predicted "
+                f"{decision.predicted_wait_ms:.0f}ms wait + {decision.predicted_compute_ms:.0f}ms compute "
+                f"> {budget_ms:.0f}ms budget for full pipeline"
+            )
+
+    async def run(self, budget_ms: float, job: Callable[[PipelineVariant], T]) -> Tuple[T, ScheduleDecision]:
+        """
+        Admit a request and run ``job(variant)`` on a pipeline thread
+
+        The request counts toward the predicted wait from admission, also
+        while it queues for a thread; only the time ``job`` itself takes
+        is learned as the variant's compute time.
+        """
+        with self.admit(budget_ms) as decision:
+            def timed() -> T:
+                start = time.perf_counter()
+                try:
+                    return job(decision.variant)
+                finally:
+                    decision.compute_ms = (time.perf_counter() - start) * 1000
+
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        return result, decision
+
+    def _observe_locked(self, decision: ScheduleDecision) -> None:
+        # Only compute time is learned; queue wait is what we predict from
+        compute_ms = decision.compute_ms if decision.compute_ms is not None else decision.elapsed_ms
+        stats = self._stats[decision.variant.name]
+        stats.requests += 1
+        if stats.ewma_ms is None:
+            stats.ewma_ms = compute_ms
+        else:
+            stats.ewma_ms += self.smoothing * (compute_ms - stats.ewma_ms)
+        if decision.compute_ms is not None:
+            # Measured from admission, queue wait included
+            total_ms = decision.elapsed_ms
+        else:
+            total_ms = decision.predicted_wait_ms + decision.elapsed_ms
+        if total_ms > decision.budget_ms:
+            self._over_budget += 1
+
+    def stats(self) -> Dict:
+        """Request counts per variant and the share of degraded requests"""
+        with self._lock:
+            return {
+                "requests": self._total,
+                "degraded": self._degraded,
+                "degraded_ratio": self._degraded / self._total if self._total else 0.0,
+                "over_budget": self._over_budget,
+                "in_flight": self._in_flight,
+                "predicted_wait_ms": self._in_flight_ms / self.workers,
+                "variants": {
+                    name: {"requests": s.requests, "avg_compute_ms": s.ewma_ms}
+                    for name, s in self._stats.items()
+                },
+            }
+
+
+# Singleton instance
+_deadline_scheduler: Optional[DeadlineScheduler] = None
+
+def get_deadline_scheduler() -> DeadlineScheduler:
+    """Get or create the scheduler configured from SCAN_* settings"""
+    global _deadline_scheduler
+    if _deadline_scheduler is None:
+        from app.config import settings
+
+        _deadline_scheduler = DeadlineScheduler(
+            workers=settings.SCAN_PIPELINE_WORKERS,
+            initial_full_ms=settings.SCAN_PIPELINE_INITIAL_MS,
+        )
+    return _deadline_scheduler
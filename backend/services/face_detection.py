@@ -0,0 +1,137 @@
+"""
+Fast Face Detection Front Stage
+Locates the face with YuNet (cv2.FaceDetectorYN) on a downscaled copy of
+the image so that FaceMesh only has to run on a small face crop
+"""
+
+import logging
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# models/model_registry.yml: pretrained_models.yunet_face_detection
+YUNET_DOWNLOAD_URL = (
+    "https://github.com/opencv/opencv_zoo/raw/main/models/face_detection_yunet/"
+    "face_detection_yunet_2023mar.onnx"
+)
+DEFAULT_YUNET_PATH = Path(__file__).parent.parent / "models" / "_weights" / "yunet_2023mar.onnx"
+
+
+@dataclass
+class FaceBox:
+    """Face bounding box in full-image pixel coordinates"""
+    x: int
+    y: int
+    w: int
+    h: int
+    score: float
+    # left_eye, right_eye, nose, left_mouth, right_mouth
+    landmarks: List[Tuple[float, float]]
+
+    def expanded(self, margin: float, image_w: int, image_h: int) -> Tuple[int, int, int, int]:
+        """Box grown by ``margin`` of its size on every side, clipped to the image
+
+        Returns:
+            x_min, y_min, x_max, y_max
+        """
+        dx, dy = int(self.w * margin), int(self.h * margin)
+        return (
+            max(0, self.x - dx),
+            max(0, self.y - dy),
+            min(image_w, self.x + self.w + dx),
+            min(image_h, self.y + self.h + dy),
+        )
+
+
+class YuNetFaceDetector:
+    """Single-face YuNet detector running on a downscaled image"""
+
+    def __init__(
+        self,
+        model_path: Path = DEFAULT_YUNET_PATH,
+        input_size: int = 320,
+        score_threshold: float = 0.7,
+        nms_threshold: float = 0.3,
+    ):
+        self.input_size = input_size
+        self._detector = cv2.FaceDetectorYN.create(
+            str(model_path), "", (input_size, input_size), score_threshold, nms_threshold, 50
+        )
+
+    def detect(self, image: np.ndarray) -> Optional[FaceBox]:
+        """
+        Find the most confident face
+
+        Args:
+            image: RGB image of any size
+
+        Returns:
+            FaceBox scaled back to ``image`` coordinates, or None
+        """
+        h, w = image.shape[:2]
+        scale = min(1.0, self.input_size / max(h, w))
+        small = image
+        if scale < 1.0:
+            small = cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+        small_h, small_w = small.shape[:2]
+        self._detector.setInputSize((small_w, small_h))
+        _, faces = self._detector.detect(cv2.cvtColor(small, cv2.COLOR_RGB2BGR))
+        if faces is None or len(faces) == 0:
+            return None
+
+        # Row: x, y, w, h, 5 x (lx, ly), score
+        best = faces[int(np.argmax(faces[:, -1]))]
+        inv = 1.0 / scale
+        return FaceBox(
+            x=int(best[0] * inv),
+            y=int(best[1] * inv),
+            w=int(best[2] * inv),
+            h=int(best[3] * inv),
+            score=float(best[-1]),
+            landmarks=[(float(best[i] * inv), float(best[i + 1] * inv)) for i in range(4, 14, 2)],
+        )
+
+
+def ensure_yunet_model(model_path: Path, download: bool = False) -> bool:
+    """Check for the YuNet weights, optionally fetching them
+
+    Returns:
+        True if the weights are available at ``model_path``
+    """
+    if model_path.exists():
+        return True
+    if not download:
+        return False
+    try:
+        model_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = model_path.with_suffix(".part")
+        urllib.request.urlretrieve(YUNET_DOWNLOAD_URL, tmp_path)
+        tmp_path.replace(model_path)
+        logger.info(f"Downloaded YuNet weights to {model_path}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to download YuNet weights: {e}")
+        return False
+
+
+def create_face_detector(model_path: Optional[str] = None, download: bool = False) -> Optional[YuNetFaceDetector]:
+    """Build the YuNet front stage, or None if it cannot run here"""
+    path = Path(model_path) if model_path else DEFAULT_YUNET_PATH
+    if not hasattr(cv2, "FaceDetectorYN"):
+        logger.warning("cv2.FaceDetectorYN unavailable, using FaceMesh-only detection")
+        return None
+    if not ensure_yunet_model(path, download):
+        logger.warning(f"YuNet weights not found at {path}, using FaceMesh-only detection")
+        return None
+    try:
+        return YuNetFaceDetector(path)
+    except Exception as e:
+        logger.error(f"Failed to initialise YuNet: {e}")
+        return None
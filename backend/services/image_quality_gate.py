@@ -0,0 +1,255 @@
+"""
+Pre-inference Image Quality Gate
+Rejects or flags blurry, badly exposed and face-less selfies on a small
+thumbnail before the full MediaPipe and analyzer pipeline runs
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+REJECT = "reject"
+WARN = "warn"
+
+
+@dataclass
+class QualityThresholds:
+    """Gate thresholds, measured on the grayscale thumbnail"""
+    thumbnail_size: int = 128
+    # Variance of the Laplacian; below reject is unusable, below warn is soft
+    min_sharpness: float = 15.0
+    warn_sharpness: float = 40.0
+    # Mean luminance bounds (0-255)
+    min_brightness: float = 40.0
+    max_brightness: float = 220.0
+    # Fraction of pixels crushed to black / blown to white
+    max_clipped_fraction: float = 0.35
+    require_face: bool = True
+    # Skin-coloured fraction that downgrades a missed face to a warning
+    min_skin_fraction: float = 0.15
+
+
+@dataclass
+class QualityIssue:
+    code: str
+    severity: str
+    message: str
+
+
+@dataclass
+class QualityReport:
+    """Outcome of the gate for one image"""
+    passed: bool
+    issues: List[QualityIssue] = field(default_factory=list)
+    metrics: Dict[str, float] = field(default_factory=dict)
+    elapsed_ms: float = 0.0
+
+    @property
+    def feedback(self) -> List[str]:
+        """User-facing messages, rejections first"""
+        ordered = sorted(self.issues, key=lambda i: i.severity != REJECT)
+        return [issue.message for issue in ordered]
+
+    @property
+    def warnings(self) -> List[str]:
+        return [issue.message for issue in self.issues if issue.severity == WARN]
+
+
+class ImageQualityError(ValueError):
+    """Raised when an image fails the quality gate"""
+
+    def __init__(self, report: QualityReport):
+        self.report = report
+        super().__init__("; ".join(report.feedback) or "Image failed quality checks")
+
+
+class ImageQualityGate:
+    """Few-millisecond sharpness, exposure and face-presence checks"""
+
+    def __init__(self, thresholds: Optional[QualityThresholds] = None):
+        self.thresholds = thresholds or QualityThresholds()
+        self._face_cascade = self._load_face_cascade()
+        self._lock = threading.Lock()
+        self._checked = 0
+        self._rejected = 0
+        self._warned = 0
+        self._gate_ms = 0.0
+        self._pipeline_runs = 0
+        self._pipeline_ms = 0.0
+
+    @staticmethod
+    def _load_face_cascade():
+        # Haar cascades ship with opencv-python 4.x only
+        if not hasattr(cv2, "CascadeClassifier"):
+            logger.warning("Face cascade unavailable, using skin-colour face check")
+            return None
+        try:
+            cascade = cv2.CascadeClassifier(
+                cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+            )
+            if not cascade.empty():
+                return cascade
+        except Exception as e:
+            logger.warning(f"Face cascade unavailable, using skin-colour face check: {e}")
+        return None
+
+    def _thumbnail(self, image: np.ndarray) -> np.ndarray:
+        h, w = image.shape[:2]
+        scale = self.thresholds.thumbnail_size / max(h, w)
+        if scale < 1.0:
+            image = cv2.resize(
+                image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA
+            )
+        return image
+
+    def check(self, image: np.ndarray, record: bool = True, require_face: Optional[bool] = None) -> QualityReport:
+        """
+        Run all checks on an RGB image
+
+        Args:
+            image: Decoded RGB image of any size
+            record: Count the result in ``stats()``; off when ranking
+                candidate frames rather than gating an analysis
+            require_face: Override ``thresholds.require_face`` (off for
+                dermoscopy images, which never show a face)
+
+        Returns:
+            QualityReport; ``passed`` is False if any check rejected
+        """
+        start = time.perf_counter()
+        t = self.thresholds
+        thumb = self._thumbnail(image)
+        gray = cv2.cvtColor(thumb, cv2.COLOR_RGB2GRAY)
+        issues: List[QualityIssue] = []
+
+        # Sharpness
+        sharpness = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+        if sharpness < t.min_sharpness:
+            issues.append(QualityIssue(
+                "blurry", REJECT, "Image is too blurry. Hold the camera steady and tap to focus on your face."
+            ))
+        elif sharpness < t.warn_sharpness:
+            issues.append(QualityIssue(
+                "soft_focus", WARN, "Image is slightly out of focus; results may be less accurate."
+            ))
+
+        # Exposure
+        hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+        total = float(hist.sum()) or 1.0
+        brightness = float(np.dot(hist, np.arange(256)) / total)
+        dark_fraction = float(hist[:16].sum() / total)
+        bright_fraction = float(hist[240:].sum() / total)
+        if brightness < t.min_brightness or dark_fraction > t.max_clipped_fraction:
+            issues.append(QualityIssue(
+                "underexposed", REJECT, "Image is too dark. Face a window or turn on more light."
+            ))
+        elif brightness > t.max_brightness or bright_fraction > t.max_clipped_fraction:
+            issues.append(QualityIssue(
+                "overexposed", REJECT, "Image is overexposed. Move away from direct light or the flash."
+            ))
+
+        # Face presence
+        faces = -1
+        skin_fraction = 0.0
+        if t.require_face if require_face is None else require_face:
+            if self._face_cascade is not None:
+                min_side = max(16, min(gray.shape) // 5)
+                faces = len(self._face_cascade.detectMultiScale(
+                    gray, scaleFactor=1.2, minNeighbors=3, minSize=(min_side, min_side)
+                ))
+            if faces <= 0:
+                # The cascade misses tilted or very close faces; skin colour
+                # tells those apart from images with no person at all
+                ycrcb = cv2.cvtColor(thumb, cv2.COLOR_RGB2YCrCb)
+                skin = cv2.inRange(ycrcb, (0, 135, 85), (255, 180, 135))
+                skin_fraction = float(np.count_nonzero(skin) / skin.size)
+                if skin_fraction < t.min_skin_fraction:
+                    issues.append(QualityIssue(
+                        "no_face", REJECT, "No face found. Center your face in the frame, facing the camera."
+                    ))
+                elif faces == 0:
+                    issues.append(QualityIssue(
+                        "face_unclear", WARN, "Face is hard to see. Look straight at the camera."
+                    ))
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        report = QualityReport(
+            passed=not any(issue.severity == REJECT for issue in issues),
+            issues=issues,
+            metrics={
+                "sharpness": sharpness,
+                "brightness": brightness,
+                "dark_fraction": dark_fraction,
+                "bright_fraction": bright_fraction,
+                "faces": float(faces),
+                "skin_fraction": skin_fraction,
+            },
+            elapsed_ms=elapsed_ms,
+        )
+        if record:
+            self._record(report)
+        return report
+
+    def check_bytes(self, image_data: bytes, record: bool = True) -> QualityReport:
+        """Decode at reduced resolution and run the checks"""
+        nparr = np.frombuffer(image_data, np.uint8)
+        image = cv2.imdecode(nparr, cv2.IMREAD_REDUCED_COLOR_4)
+        if image is None:
+            return QualityReport(False, [QualityIssue("unreadable", REJECT, "Image could not be decoded.")])
+        return self.check(cv2.cvtColor(image, cv2.COLOR_BGR2RGB), record=record)
+
+    def _record(self, report: QualityReport) -> None:
+        with self._lock:
+            self._checked += 1
+            self._gate_ms += report.elapsed_ms
+            if not report.passed:
+                self._rejected += 1
+            elif report.warnings:
+                self._warned += 1
+
+    def record_pipeline_time(self, elapsed_ms: float) -> None:
+        """Report how long the full pipeline took for an image that passed"""
+        with self._lock:
+            self._pipeline_runs += 1
+            self._pipeline_ms += elapsed_ms
+
+    def stats(self) -> Dict[str, float]:
+        """Gate counters and the estimated pipeline time saved by rejections"""
+        with self._lock:
+            avg_gate = self._gate_ms / self._checked if self._checked else 0.0
+            avg_pipeline = self._pipeline_ms / self._pipeline_runs if self._pipeline_runs else 0.0
+            return {
+                "checked": self._checked,
+                "rejected": self._rejected,
+                "warned": self._warned,
+                "avg_gate_ms": avg_gate,
+                "avg_pipeline_ms": avg_pipeline,
+                "estimated_saved_ms": self._rejected * avg_pipeline,
+                "gate_overhead_ms": self._gate_ms,
+            }
+
+
+# Singleton instance
+_image_quality_gate: Optional[ImageQualityGate] = None
+
+def get_image_quality_gate() -> ImageQualityGate:
+    """Get or create the gate configured from QUALITY_GATE_* settings"""
+    global _image_quality_gate
+    if _image_quality_gate is None:
+        from app.config import settings
+
+        _image_quality_gate = ImageQualityGate(QualityThresholds(
+            min_sharpness=settings.QUALITY_GATE_MIN_SHARPNESS,
+            warn_sharpness=settings.QUALITY_GATE_WARN_SHARPNESS,
+            min_brightness=settings.QUALITY_GATE_MIN_BRIGHTNESS,
+            max_brightness=settings.QUALITY_GATE_MAX_BRIGHTNESS,
+            require_face=settings.QUALITY_GATE_REQUIRE_FACE,
+        ))
+    return _image_quality_gate
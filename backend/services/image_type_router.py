@@ -0,0 +1,249 @@
+"""
+Image-Type Pipeline Router
+Classifies each upload as a selfie or a clinical (dermoscopy) close-up
+from thumbnail colour statistics and a face/no-face check, and sends it
+to the matching pipeline from models/model_registry.yml
+(usage_guidelines.selfie_pipeline / clinical_pipeline). Dermoscopy
+images then skip the face detection stages entirely.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+import yaml
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_PATH = Path(__file__).parent.parent / "models" / "model_registry.yml"
+
+SELFIE = "selfie"
+CLINICAL = "clinical_dermoscopy"
+
+# image_compatibility key -> usage_guidelines key
+IMAGE_TYPE_PIPELINES = {SELFIE: "selfie_pipeline", CLINICAL: "clinical_pipeline"}
+
+
+@dataclass(frozen=True)
+class PipelineSpec:
+    """A pipeline from the model registry"""
+    name: str
+    image_type: str
+    models: Tuple[str, ...] = ()
+    # Selfie pipelines locate the face before analysis; dermoscopy has none
+    face_stage: bool = True
+    notes: str = ""
+
+
+def load_pipeline_specs(registry_path: Path = REGISTRY_PATH) -> Dict[str, PipelineSpec]:
+    """Read the selfie and clinical pipelines, keyed by image type"""
+    with open(registry_path) as f:
+        guidelines = (yaml.safe_load(f) or {}).get("usage_guidelines") or {}
+    specs = {}
+    for image_type, name in IMAGE_TYPE_PIPELINES.items():
+        entry = guidelines.get(name) or {}
+        specs[image_type] = PipelineSpec(
+            name=name,
+            image_type=image_type,
+            models=tuple(entry.get("recommended_models") or ()),
+            face_stage=image_type == SELFIE,
+            notes=entry.get("notes", ""),
+        )
+    return specs
+
+
+@dataclass
+class ImageTypeThresholds:
+    """Classifier thresholds, measured on the thumbnail"""
+    thumbnail_size: int = 96
+    # Corner pixels darker than this count towards the dermoscope vignette
+    vignette_luminance: float = 40.0
+    # Share of dark corner pixels that marks a circular dermoscope field
+    min_vignette: float = 0.6
+    # Share of skin-coloured pixels (inside the field) for a skin close-up
+    min_closeup_skin: float = 0.85
+
+
+@dataclass
+class ImageTypeDecision:
+    """Routing decision for one image"""
+    image_type: str
+    pipeline: PipelineSpec
+    confidence: float
+    reason: str
+    features: Dict[str, float] = field(default_factory=dict)
+    elapsed_ms: float = 0.0
+
+    def summary(self) -> Dict:
+        """Compact record of the decision, for scan results"""
+        return {
+            "image_type": self.image_type,
+            "pipeline": self.pipeline.name,
+            "confidence": round(self.confidence, 2),
+            "reason": self.reason,
+            "classify_ms": round(self.elapsed_ms, 2),
+        }
+
+
+class ImageTypeClassifier:
+    """Sub-millisecond selfie vs dermoscopy classifier"""
+
+    def __init__(
+        self,
+        face_check: Optional[Callable[[np.ndarray], bool]] = None,
+        thresholds: Optional[ImageTypeThresholds] = None,
+    ):
+        """
+        Args:
+            face_check: Returns True if an RGB image contains a face; run
+                only when the colour statistics are not conclusive
+            thresholds: Classifier thresholds
+        """
+        self.face_check = face_check
+        self.thresholds = thresholds or ImageTypeThresholds()
+        h = w = self.thresholds.thumbnail_size
+        yy, xx = np.mgrid[0:h, 0:w]
+        radius = np.hypot((yy - (h - 1) / 2) / (h / 2), (xx - (w - 1) / 2) / (w / 2))
+        # Corners outside the inscribed circle
+        self._corners = radius > 1.05
+
+    def features(self, image: np.ndarray) -> Dict[str, float]:
+        """Colour statistics of a square RGB thumbnail"""
+        size = self.thresholds.thumbnail_size
+        thumb = cv2.resize(image, (size, size), interpolation=cv2.INTER_AREA)
+        luminance = cv2.cvtColor(thumb, cv2.COLOR_RGB2GRAY)
+        dark = luminance < self.thresholds.vignette_luminance
+        ycrcb = cv2.cvtColor(thumb, cv2.COLOR_RGB2YCrCb)
+        skin = cv2.inRange(ycrcb, (0, 135, 85), (255, 180, 135)) > 0
+        in_field = ~dark
+        return {
+            "vignette": float(dark[self._corners].mean()),
+            "skin_fraction": float(skin[in_field].mean()) if in_field.any() else 0.0,
+            "saturation": float(cv2.cvtColor(thumb, cv2.COLOR_RGB2HSV)[:, :, 1][in_field].mean()) / 255
+            if in_field.any() else 0.0,
+        }
+
+    def classify(self, image: np.ndarray, specs: Dict[str, PipelineSpec]) -> ImageTypeDecision:
+        """Pick the image type (and so the pipeline) for an RGB image"""
+        start = time.perf_counter()
+        t = self.thresholds
+        features = self.features(image)
+
+        if features["vignette"] >= t.min_vignette:
+            # Conclusive without the (more expensive) face check
+            image_type, confidence, reason = CLINICAL, features["vignette"], "dermoscope_vignette"
+        else:
+            has_face = self.face_check(image) if self.face_check is not None else None
+            features["face_checked"] = float(has_face is not None)
+            if has_face:
+                image_type, confidence, reason = SELFIE, 0.95, "face_found"
+            elif features["skin_fraction"] >= t.min_closeup_skin:
+                image_type, confidence, reason = CLINICAL, features["skin_fraction"], "skin_closeup"
+                if has_face is None:
+                    # No face check ran; a tight selfie crop looks the same
+                    confidence *= 0.7
+            else:
+                image_type, confidence, reason = SELFIE, 0.6, "default"
+
+        return ImageTypeDecision(
+            image_type=image_type,
+            pipeline=specs[image_type],
+            confidence=float(confidence),
+            reason=reason,
+            features=features,
+            elapsed_ms=(time.perf_counter() - start) * 1000,
+        )
+
+
+@dataclass
+class _PipelineStats:
+    routes: int = 0
+    runs: int = 0
+    total_ms: float = 0.0
+
+    @property
+    def avg_ms(self) -> Optional[float]:
+        return self.total_ms / self.runs if self.runs else None
+
+
+class PipelineRouter:
+    """Routes images to registry pipelines and reports the decisions
+
+    Time saved is estimated per clinical image as the difference between
+    the average selfie and clinical pipeline times, i.e. the face stages
+    a fixed selfie-only path would have spent on it.
+    """
+
+    def __init__(self, classifier: ImageTypeClassifier, specs: Optional[Dict[str, PipelineSpec]] = None):
+        self.classifier = classifier
+        self.specs = specs or load_pipeline_specs()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _PipelineStats] = {image_type: _PipelineStats() for image_type in self.specs}
+        self._classify_ms = 0.0
+        self._reasons: Dict[str, int] = {}
+
+    def route(self, image: np.ndarray) -> ImageTypeDecision:
+        decision = self.classifier.classify(image, self.specs)
+        with self._lock:
+            self._stats[decision.image_type].routes += 1
+            self._classify_ms += decision.elapsed_ms
+            self._reasons[decision.reason] = self._reasons.get(decision.reason, 0) + 1
+        logger.debug(f"Routed image to {decision.pipeline.name} ({decision.reason})")
+        return decision
+
+    def record(self, decision: ImageTypeDecision, elapsed_ms: float) -> None:
+        """Record how long the chosen pipeline took"""
+        with self._lock:
+            stats = self._stats[decision.image_type]
+            stats.runs += 1
+            stats.total_ms += elapsed_ms
+
+    def stats(self) -> Dict:
+        """Routes per pipeline, average pipeline times and estimated time saved"""
+        with self._lock:
+            routes = sum(s.routes for s in self._stats.values())
+            selfie_ms = self._stats[SELFIE].avg_ms
+            clinical = self._stats[CLINICAL]
+            saved_ms = None
+            if selfie_ms is not None and clinical.avg_ms is not None:
+                saved_ms = clinical.runs * max(0.0, selfie_ms - clinical.avg_ms)
+            return {
+                "routes": routes,
+                "avg_classify_ms": self._classify_ms / routes if routes else 0.0,
+                "reasons": dict(self._reasons),
+                "estimated_saved_ms": saved_ms,
+                "pipelines": {
+                    self.specs[image_type].name: {
+                        "image_type": image_type,
+                        "routes": s.routes,
+                        "avg_pipeline_ms": s.avg_ms,
+                        "models": list(self.specs[image_type].models),
+                    }
+                    for image_type, s in self._stats.items()
+                },
+            }
+
+
+# Singleton instance
+_pipeline_router: Optional[PipelineRouter] = None
+
+def get_pipeline_router() -> PipelineRouter:
+    """Get or create the router, with YuNet as face check when configured"""
+    global _pipeline_router
+    if _pipeline_router is None:
+        from app.config import settings
+
+        face_check = None
+        if settings.FACE_DETECTOR == "yunet":
+            from services.face_detection import create_face_detector
+
+            detector = create_face_detector(settings.YUNET_MODEL_PATH, settings.YUNET_AUTO_DOWNLOAD)
+            if detector is not None:
+                face_check = lambda image: detector.detect(image) is not None
+        _pipeline_router = PipelineRouter(ImageTypeClassifier(face_check=face_check))
+    return _pipeline_router
@@ -194,6 +194,21 @@ class INCINormalizer:
         self.close()
 
 
+# Global instance
+_normalizer: Optional[INCINormalizer] = None
+
+def get_inci_normalizer() -> INCINormalizer:
+    """Shared normalizer; its ingredient mappings are loaded once per process"""
+    global _normalizer
+    if _normalizer is None:
+        from app.config import settings
+
+        _normalizer = INCINormalizer(settings.DATABASE_URL)
+        # Lookups only read the in-memory cache; don't hold a connection open
+        _normalizer.close()
+    return _normalizer
+
+
 # Example usage
 if __name__ == '__main__':
     import sys
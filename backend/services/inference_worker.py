@@ -0,0 +1,468 @@
+"""
+Local Inference Worker Pool
+Keeps the ML runtimes (torch and the skin models) in dedicated worker
+processes instead of every API worker. API processes copy decoded images
+into a shared-memory ring of fixed-size slots and send only a small
+control message (slot offset, shape, dtype, task) over a Unix socket, so
+pixel data is never pickled.
+
+Control messages are pickled, so a peer on the socket can run code in the
+workers. Every connection must therefore prove it knows the shared
+``authkey`` (HMAC challenge in both directions) before any message is
+read, and the socket is created owner-only (0600, in a 0700 directory when
+the pool creates it): API and worker processes must run as the same user.
+"""
+
+import asyncio
+import logging
+import os
+import queue
+import threading
+from multiprocessing import AuthenticationError, connection, get_context, resource_tracker, shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ML_ANALYSIS = "ml_analysis"
+GRAD_CAM = "grad_cam"
+EMBED = "embed"
+
+
+class InferenceWorkerUnavailable(ConnectionError):
+    """Raised when no inference worker can be reached"""
+
+
+class InferenceWorkerError(RuntimeError):
+    """Raised when a worker fails to run a task"""
+
+    def __init__(self, message: str, error_type: str = ""):
+        super().__init__(message)
+        # Name of the exception the task raised, e.g. "ValueError"
+        self.error_type = error_type
+
+
+class SharedImageRing:
+    """Fixed-size image slots in one shared-memory segment
+
+    Only the owning (API) process allocates slots; a slot is handed back
+    once the worker has replied, so slots are reused round-robin and a
+    full ring blocks callers instead of growing memory.
+    """
+
+    def __init__(self, slots: int, slot_bytes: int):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self._free: "queue.Queue[int]" = queue.Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def acquire(self, timeout: Optional[float] = None) -> int:
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise InferenceWorkerUnavailable("All shared image slots are busy")
+
+    def release(self, slot: int) -> None:
+        self._free.put(slot)
+
+    def write(self, slot: int, image: np.ndarray) -> Dict:
+        """Copy ``image`` into ``slot``
+
+        Returns:
+            The ``offset``, ``shape`` and ``dtype`` a worker needs to read it
+        """
+        if image.nbytes > self.slot_bytes:
+            raise ValueError(f"Image of {image.nbytes} bytes does not fit a {self.slot_bytes}-byte slot")
+        offset = slot * self.slot_bytes
+        view = np.ndarray(image.shape, dtype=image.dtype, buffer=self.shm.buf, offset=offset)
+        view[...] = image
+        return {"offset": offset, "shape": list(image.shape), "dtype": image.dtype.str}
+
+    def close(self) -> None:
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def attach_segment(name: str) -> shared_memory.SharedMemory:
+    """Open a segment owned by another process without taking ownership"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 the resource tracker would unlink the segment
+        # when this process exits
+        segment = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(segment._name, "shared_memory")
+        return segment
+
+
+def read_image(segment: shared_memory.SharedMemory, offset: int, shape: List[int], dtype: str) -> np.ndarray:
+    """Zero-copy view of an image written by SharedImageRing.write"""
+    return np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=segment.buf, offset=offset)
+
+
+class InferenceClient:
+    """API-side handle on the worker pool
+
+    Holds up to ``connections`` control connections; each one serves one
+    request at a time, and the pool's workers share them out between
+    themselves when accepting.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        authkey: bytes,
+        slots: int = 8,
+        max_image_side: int = 1024,
+        connections: int = 2,
+        timeout: float = 30.0,
+    ):
+        self.address = address
+        self.authkey = authkey
+        self.max_image_side = max_image_side
+        self.max_connections = connections
+        self.timeout = timeout
+        self.ring = SharedImageRing(slots, max_image_side * max_image_side * 3)
+        self._idle: "queue.LifoQueue[connection.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._batch_lock = threading.Lock()
+
+    def _open(self) -> connection.Connection:
+        try:
+            conn = connection.Client(self.address, family="AF_UNIX", authkey=self.authkey)
+            conn.send({"op": "attach", "shm": self.ring.name})
+            if not conn.poll(self.timeout):
+                raise TimeoutError("worker did not answer attach")
+            conn.recv()
+            return conn
+        except (OSError, EOFError, TimeoutError, AuthenticationError) as e:
+            raise InferenceWorkerUnavailable(f"Cannot reach inference worker at {self.address}: {e}")
+
+    def _acquire_connection(self) -> connection.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_open = self._opened < self.max_connections
+            if can_open:
+                self._opened += 1
+        if can_open:
+            try:
+                return self._open()
+            except InferenceWorkerUnavailable:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise InferenceWorkerUnavailable("Timed out waiting for an inference connection")
+
+    def _discard(self, conn: connection.Connection) -> None:
+        conn.close()
+        with self._lock:
+            self._opened -= 1
+
+    def _fit(self, image: np.ndarray) -> np.ndarray:
+        h, w = image.shape[:2]
+        scale = self.max_image_side / max(h, w)
+        if scale < 1.0:
+            image = cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        return np.ascontiguousarray(image)
+
+    def _request(self, request: Dict):
+        conn = self._acquire_connection()
+        try:
+            conn.send(request)
+            if not conn.poll(self.timeout):
+                raise TimeoutError(f"no reply within {self.timeout}s")
+            reply = conn.recv()
+        except (OSError, EOFError, TimeoutError) as e:
+            # The reply may still arrive later; never reuse this connection
+            self._discard(conn)
+            raise InferenceWorkerUnavailable(f"Inference worker connection failed: {e}")
+        self._idle.put(conn)
+        if "error" in reply:
+            raise InferenceWorkerError(reply["error"], reply.get("error_type", ""))
+        return reply["result"]
+
+    def infer(self, task: str, image: np.ndarray, **params) -> Dict:
+        """
+        Run ``task`` on ``image`` in a worker (blocking)
+
+        Raises:
+            InferenceWorkerUnavailable: No worker reachable or no free slot
+            InferenceWorkerError: The worker raised while running the task
+        """
+        image = self._fit(image)
+        slot = self.ring.acquire(self.timeout)
+        try:
+            return self._request({"op": "infer", "task": task, "params": params, **self.ring.write(slot, image)})
+        finally:
+            self.ring.release(slot)
+
+    def infer_batch(self, task: str, images: List[np.ndarray], **params):
+        """
+        Run ``task`` on up to ``ring.slots`` images in one worker call (blocking)
+
+        The task receives the list of images; see ``chunks`` for larger batches.
+        """
+        if len(images) > self.ring.slots:
+            raise ValueError(f"Batch of {len(images)} images exceeds the {self.ring.slots} shared slots")
+        images = [self._fit(image) for image in images]
+        slots = []
+        try:
+            # One batch claims its slots at a time, so two batches can
+            # never each hold part of the ring and wait on each other
+            with self._batch_lock:
+                for _ in images:
+                    slots.append(self.ring.acquire(self.timeout))
+            views = [self.ring.write(slot, image) for slot, image in zip(slots, images)]
+            return self._request({"op": "infer", "task": task, "params": params, "images": views})
+        finally:
+            for slot in slots:
+                self.ring.release(slot)
+
+    def chunks(self, count: int) -> List[slice]:
+        """Slices of a batch of ``count`` images that fit the ring"""
+        return [slice(start, start + self.ring.slots) for start in range(0, count, self.ring.slots)]
+
+    async def analyze_skin_with_ml(self, face_region: np.ndarray, force_full: bool = False, acne_only: bool = False) -> Dict:
+        """Same contract as MLInferenceService.analyze_skin_with_ml"""
+        return await asyncio.to_thread(
+            self.infer, ML_ANALYSIS, face_region, force_full=force_full, acne_only=acne_only
+        )
+
+    def grad_cam(
+        self, images: List[np.ndarray], model: str = "acne", targets: Optional[List[Optional[str]]] = None
+    ) -> Tuple[np.ndarray, List[str]]:
+        """Same contract as MLInferenceService.grad_cam"""
+        targets = list(targets) if targets is not None else [None] * len(images)
+        cams, labels = [], []
+        for chunk in self.chunks(len(images)):
+            result = self.infer_batch(GRAD_CAM, images[chunk], model=model, targets=targets[chunk])
+            cams.append(result["cams"])
+            labels.extend(result["labels"])
+        return np.concatenate(cams), labels
+
+    def embed(self, images: List[np.ndarray], model: str = "condition") -> np.ndarray:
+        """Same contract as MLInferenceService.embed"""
+        return np.concatenate([
+            self.infer_batch(EMBED, images[chunk], model=model) for chunk in self.chunks(len(images))
+        ])
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        self.ring.close()
+
+
+# ---------- Worker side ----------
+
+def _run_ml_analysis(image: np.ndarray, force_full: bool = False, acne_only: bool = False) -> Dict:
+    # Imported here so only worker processes load torch
+    from services.ml_inference_service import get_ml_inference_service
+
+    return asyncio.run(get_ml_inference_service().analyze_skin_with_ml(image, force_full=force_full, acne_only=acne_only))
+
+
+def _run_grad_cam(images: List[np.ndarray], model: str = "acne", targets: Optional[List[Optional[str]]] = None) -> Dict:
+    from services.ml_inference_service import get_ml_inference_service
+
+    cams, labels = get_ml_inference_service().grad_cam(images, model=model, targets=targets)
+    return {"cams": cams, "labels": labels}
+
+
+def _run_embed(images: List[np.ndarray], model: str = "condition") -> np.ndarray:
+    from services.ml_inference_service import get_ml_inference_service
+
+    return get_ml_inference_service().embed(images, model=model)
+
+
+def _warm_ml_analysis() -> None:
+    from services.ml_inference_service import get_ml_inference_service
+
+    get_ml_inference_service()
+
+
+# Single-image tasks get one image; batch tasks (sent with infer_batch) a list
+TASKS: Dict[str, Callable[..., Dict]] = {
+    ML_ANALYSIS: _run_ml_analysis,
+    GRAD_CAM: _run_grad_cam,
+    EMBED: _run_embed,
+}
+
+
+def _authenticate(conn: connection.Connection, authkey: bytes) -> bool:
+    """Mutual HMAC challenge, as Listener.accept does, but off the accept loop"""
+    try:
+        connection.deliver_challenge(conn, authkey)
+        connection.answer_challenge(conn, authkey)
+        return True
+    except (AuthenticationError, EOFError, OSError) as e:
+        logger.warning(f"Rejected inference connection: {e}")
+        conn.close()
+        return False
+
+
+def _serve_connection(
+    conn: connection.Connection,
+    tasks: Dict[str, Callable[..., Dict]],
+    run_lock: threading.Lock,
+    authkey: bytes,
+) -> None:
+    if not _authenticate(conn, authkey):
+        return
+    segments: Dict[str, shared_memory.SharedMemory] = {}
+    segment = None
+    try:
+        while True:
+            message = conn.recv()
+            op = message.get("op")
+            if op == "attach":
+                segment = segments.get(message["shm"]) or attach_segment(message["shm"])
+                segments[message["shm"]] = segment
+                conn.send({"ok": True, "pid": os.getpid()})
+            elif op == "ping":
+                conn.send({"ok": True, "pid": os.getpid()})
+            elif op == "infer":
+                handler = tasks.get(message["task"])
+                if handler is None or segment is None:
+                    conn.send({"error": f"unknown task '{message['task']}'" if segment else "not attached"})
+                    continue
+                if "images" in message:
+                    image = [read_image(segment, m["offset"], m["shape"], m["dtype"]) for m in message["images"]]
+                else:
+                    image = read_image(segment, message["offset"], message["shape"], message["dtype"])
+                try:
+                    # One inference per process at a time; processes are the unit of parallelism
+                    with run_lock:
+                        result = handler(image, **message.get("params", {}))
+                    conn.send({"result": result})
+                except Exception as e:
+                    logger.exception(f"Inference task {message['task']} failed")
+                    conn.send({"error": f"{type(e).__name__}: {e}", "error_type": type(e).__name__})
+                finally:
+                    del image
+    except (EOFError, OSError):
+        pass
+    finally:
+        conn.close()
+        for shm in segments.values():
+            shm.close()
+
+
+def _worker_main(
+    listener: connection.Listener,
+    authkey: bytes,
+    tasks: Dict[str, Callable[..., Dict]],
+    warmup: Optional[Callable[[], None]],
+) -> None:
+    if warmup is not None:
+        warmup()
+    logger.info(f"Inference worker {os.getpid()} ready")
+    run_lock = threading.Lock()
+    while True:
+        # The listener has no authkey so a silent peer cannot stall accept();
+        # each connection authenticates in its own thread
+        conn = listener.accept()
+        threading.Thread(target=_serve_connection, args=(conn, tasks, run_lock, authkey), daemon=True).start()
+
+
+def start_workers(
+    address: str,
+    authkey: bytes,
+    processes: int = 2,
+    tasks: Optional[Dict[str, Callable[..., Dict]]] = None,
+    warmup: Optional[Callable[[], None]] = _warm_ml_analysis,
+) -> Tuple[connection.Listener, list]:
+    """
+    Fork ``processes`` workers accepting on one Unix socket
+
+    The listening socket is created before forking, so the kernel hands
+    each new client connection to whichever worker is free to accept. It
+    is owner-only (0600); a missing parent directory is created 0700.
+    Clients must present ``authkey``.
+
+    Returns:
+        The listener (close it after stopping the workers) and the processes
+    """
+    if not authkey:
+        raise ValueError("An authkey is required to start inference workers")
+    directory = os.path.dirname(os.path.abspath(address))
+    if not os.path.isdir(directory):
+        os.makedirs(directory, mode=0o700)
+    if os.path.exists(address):
+        os.unlink(address)
+    # Bind with an owner-only umask so the socket is never briefly world-accessible
+    umask = os.umask(0o177)
+    try:
+        listener = connection.Listener(address, family="AF_UNIX", backlog=64)
+    finally:
+        os.umask(umask)
+    os.chmod(address, 0o600)
+    context = get_context("fork")
+    workers = [
+        context.Process(target=_worker_main, args=(listener, authkey, tasks or TASKS, warmup), daemon=True)
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    return listener, workers
+
+
+def stop_workers(listener: connection.Listener, workers: list) -> None:
+    for worker in workers:
+        worker.terminate()
+    for worker in workers:
+        worker.join(timeout=5)
+    address = listener.address
+    listener.close()
+    if isinstance(address, str) and os.path.exists(address):
+        os.unlink(address)
+
+
+# Singleton instance
+_inference_client: Optional[InferenceClient] = None
+
+def get_skin_ml_backend():
+    """Worker pool client if INFERENCE_WORKER_SOCKET is set, else the in-process service
+
+    Both expose ``analyze_skin_with_ml``, ``grad_cam`` and ``embed``; the in-process fallback is only
+    imported when used, so API processes talking to workers never load torch.
+    """
+    global _inference_client
+    from app.config import settings
+
+    if not settings.INFERENCE_WORKER_SOCKET:
+        from services.ml_inference_service import get_ml_inference_service
+
+        return get_ml_inference_service()
+    if _inference_client is None:
+        if not settings.INFERENCE_WORKER_AUTHKEY:
+            raise ValueError("INFERENCE_WORKER_AUTHKEY is required when INFERENCE_WORKER_SOCKET is set")
+        _inference_client = InferenceClient(
+            settings.INFERENCE_WORKER_SOCKET,
+            settings.INFERENCE_WORKER_AUTHKEY.encode(),
+            slots=settings.INFERENCE_WORKER_SLOTS,
+            max_image_side=settings.INFERENCE_WORKER_MAX_IMAGE_SIDE,
+            connections=settings.INFERENCE_WORKER_CONNECTIONS,
+            timeout=settings.INFERENCE_WORKER_TIMEOUT_SECONDS,
+        )
+    return _inference_client
@@ -0,0 +1,321 @@
+"""
+Ingredient List Matching (IVF over sparse TF-IDF rows)
+Finds the catalog products whose INCI list is closest to a pasted one.
+A list is weighted exactly like a row of the ingredient similarity matrix
+(services/ingredient_similarity.py: position weight x IDF, L2-normalised),
+so its dot product with a catalog row is their cosine similarity.
+
+Rows are clustered by spherical k-means on the sparse vectors themselves
+and stored grouped by cluster. A query scores the centroids on its own
+ingredients only, then scores every row of the ``nprobe`` best clusters
+exactly: the probe is the only approximate step, and returned scores are
+true cosine similarities.
+
+All arrays are saved as .npy files and memory-mapped on load, like the
+reference index: a query reads the centroid rows of its ingredients and
+the rows of the probed clusters.
+"""
+
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from services.inci_normalizer import INCINormalizer
+from services.ingredient_similarity import IngredientMatrix, position_weight
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT = "ingredient-ivf-v1"
+_ARRAYS = ("centroids_t", "offsets", "idf", "indptr", "indices", "data", "product_ids")
+_QUALIFIERS = re.compile(r"\([^)]*\)|\[[^\]]*\]")
+
+
+def ingredient_key(name: str) -> str:
+    """Vocabulary key of an INCI name (catalog rows and queries alike)"""
+    return " ".join(name.lower().split())
+
+
+def query_names(ingredients: str) -> List[str]:
+    """
+    A pasted comma-separated list as INCI names, without a database round trip
+
+    Bracketed qualifiers are dropped ("Retinol (Vitamin A)" -> Retinol)
+    and INCINormalizer's common variants mapped ("Vitamin E" ->
+    Tocopherol); other names are kept as typed and matched by
+    ``ingredient_key``. Blank entries are skipped.
+    """
+    names = []
+    for name in _QUALIFIERS.sub(" ", ingredients).split(","):
+        cleaned = " ".join(name.split())
+        if cleaned:
+            names.append(INCINormalizer.COMMON_VARIANTS.get(ingredient_key(cleaned), cleaned))
+    return names
+
+
+def spherical_kmeans(rows: sparse.csr_matrix, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """(k, columns) unit centroids of the L2-normalised ``rows``; empty clusters are re-seeded"""
+    rng = np.random.default_rng(seed)
+    k = min(k, rows.shape[0])
+    centroids = rows[rng.choice(rows.shape[0], k, replace=False)].toarray().astype(np.float32)
+    for _ in range(iterations):
+        assign = assign_clusters(rows, centroids)
+        members = sparse.csr_matrix(
+            (np.ones(len(assign), dtype=np.float32), (assign, np.arange(len(assign)))),
+            shape=(k, rows.shape[0]),
+        )
+        centroids = (members @ rows).toarray().astype(np.float32)
+        empty = np.flatnonzero(np.bincount(assign, minlength=k) == 0)
+        if len(empty):
+            centroids[empty] = rows[rng.choice(rows.shape[0], len(empty))].toarray()
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return centroids
+
+
+def assign_clusters(rows: sparse.csr_matrix, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+    """Index of the most similar centroid for every row"""
+    out = np.empty(rows.shape[0], dtype=np.int64)
+    for start in range(0, rows.shape[0], chunk):
+        out[start:start + chunk] = np.asarray(rows[start:start + chunk] @ centroids.T).argmax(axis=1)
+    return out
+
+
+@dataclass
+class IngredientMatch:
+    product_id: str
+    score: float
+
+
+class IngredientMatchIndex:
+    """Approximate cosine search over position-weighted TF-IDF ingredient lists"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], vocabulary: Dict[str, int], meta: Dict):
+        # (ingredients, nlist), so a query reads one row per ingredient
+        self.centroids_t = arrays["centroids_t"]
+        # Rows of cluster c are offsets[c]:offsets[c + 1]
+        self.offsets = arrays["offsets"]
+        self.idf = arrays["idf"]
+        # CSR arrays of the L2-normalised product rows, in cluster order
+        self.indptr = arrays["indptr"]
+        self.indices = arrays["indices"]
+        self.data = arrays["data"]
+        self.product_ids = arrays["product_ids"]
+        self.vocabulary = vocabulary
+        self.meta = meta
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+    @property
+    def nlist(self) -> int:
+        return len(self.offsets) - 1
+
+    # ---------- Build ----------
+
+    @classmethod
+    def build(
+        cls,
+        matrix: IngredientMatrix,
+        nlist: Optional[int] = None,
+        iterations: int = 10,
+        train_size: int = 50_000,
+        seed: int = 0,
+    ) -> "IngredientMatchIndex":
+        """
+        Cluster the catalog rows and store them grouped by cluster
+
+        Args:
+            matrix: Catalog rows from build_matrix, keyed by ``ingredient_key`` names
+            nlist: Clusters; defaults to about sqrt(N)
+            train_size: Rows sampled to train the centroids
+        """
+        rows = matrix.matrix.tocsr()
+        n = rows.shape[0]
+        nlist = nlist or max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        train = rows[np.sort(rng.choice(n, min(n, train_size), replace=False))]
+        centroids = spherical_kmeans(train, nlist, iterations, seed)
+        nlist = len(centroids)
+
+        # Store each cluster contiguously so a probe is one slice
+        clusters = assign_clusters(rows, centroids)
+        order = np.argsort(clusters, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(clusters, minlength=nlist), out=offsets[1:])
+        grouped = rows[order]
+        arrays = {
+            "centroids_t": np.ascontiguousarray(centroids.T),
+            "offsets": offsets,
+            "idf": np.asarray(matrix.idf, dtype=np.float32),
+            "indptr": grouped.indptr.astype(np.int64),
+            "indices": grouped.indices.astype(np.int32),
+            "data": grouped.data.astype(np.float32),
+            "product_ids": np.asarray([str(matrix.product_ids[row]) for row in order]),
+        }
+        vocabulary = {str(name): column for column, name in enumerate(matrix.ingredient_ids)}
+        meta = {"format": INDEX_FORMAT, "count": int(n), "ingredients": int(rows.shape[1]), "nlist": int(nlist)}
+        return cls(arrays, vocabulary, meta)
+
+    # ---------- Persistence ----------
+
+    def save(self, directory: Path, extra_meta: Optional[Dict] = None) -> None:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(directory / f"{name}.npy", np.asarray(getattr(self, name)))
+        (directory / "vocabulary.json").write_text(json.dumps(self.vocabulary))
+        (directory / "meta.json").write_text(json.dumps({**self.meta, **(extra_meta or {})}, indent=2))
+
+    @classmethod
+    def load(cls, directory: Path) -> "IngredientMatchIndex":
+        """Memory-map a saved index; nothing is read until it is searched"""
+        directory = Path(directory)
+        meta = json.loads((directory / "meta.json").read_text())
+        if meta.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported index format {meta.get('format')!r} in {directory}")
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in _ARRAYS}
+        vocabulary = json.loads((directory / "vocabulary.json").read_text())
+        return cls(arrays, vocabulary, meta)
+
+    def nbytes(self) -> Dict[str, int]:
+        """Size of each array (on disk, and in memory when fully paged in)"""
+        return {name: int(getattr(self, name).nbytes) for name in _ARRAYS}
+
+    # ---------- Query ----------
+
+    def unknown(self, ingredients: Sequence[str]) -> List[str]:
+        """Names that are not in the catalog vocabulary (and so do not count)"""
+        return [name for name in ingredients if ingredient_key(name) not in self.vocabulary]
+
+    def vectorize(self, ingredients: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        ``(columns, weights)`` of an INCI list in label order
+
+        Positions count every pasted ingredient, known or not, so the
+        weights follow the list as printed; repeats keep their first
+        position. Weights are L2-normalised; empty arrays mean nothing in
+        the list is informative.
+        """
+        columns: Dict[int, int] = {}
+        for position, name in enumerate(ingredients, start=1):
+            column = self.vocabulary.get(ingredient_key(name))
+            if column is not None and column not in columns:
+                columns[column] = position
+        cols = np.fromiter(columns.keys(), dtype=np.int64, count=len(columns))
+        positions = np.fromiter(columns.values(), dtype=np.float32, count=len(columns))
+        weights = position_weight(positions).astype(np.float32) * np.asarray(self.idf[cols], dtype=np.float32)
+        keep = weights > 0
+        cols, weights = cols[keep], weights[keep]
+        norm = np.linalg.norm(weights)
+        return (cols, weights / norm) if norm > 0 else (cols, weights)
+
+    def _dense(self, cols: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        query = np.zeros(self.meta["ingredients"], dtype=np.float32)
+        query[cols] = weights
+        return query
+
+    def _top(self, rows: np.ndarray, scores: np.ndarray, k: int, min_score: float) -> List[IngredientMatch]:
+        if len(scores) > k:
+            keep = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[keep], scores[keep]
+        order = np.lexsort((rows, -scores))
+        ids = np.asarray(self.product_ids[rows[order]]).tolist()
+        return [
+            IngredientMatch(product_id, score)
+            for product_id, score in zip(ids, scores[order].tolist())
+            if score > 0 and score >= min_score
+        ]
+
+    def search(self, ingredients: Sequence[str], k: int = 10, min_score: float = 0.0, nprobe: int = 16) -> List[IngredientMatch]:
+        """
+        Approximate top ``k`` products by cosine similarity, best first
+
+        Args:
+            ingredients: Normalised INCI names in label order
+            min_score: Lowest similarity returned
+            nprobe: Clusters scored exactly (higher: better recall, slower)
+        """
+        cols, weights = self.vectorize(ingredients)
+        if not len(cols):
+            return []
+        coarse = weights @ np.asarray(self.centroids_t[cols])
+        nprobe = min(nprobe, self.nlist)
+        probes = np.sort(np.argpartition(-coarse, nprobe - 1)[:nprobe])
+        first, last = np.asarray(self.offsets[probes]), np.asarray(self.offsets[probes + 1])
+        rows = np.concatenate([np.arange(a, b) for a, b in zip(first, last)])
+        if not len(rows):
+            return []
+
+        # Every stored entry of the probed rows, one contiguous range per cluster
+        entries = np.concatenate([
+            np.arange(a, b) for a, b in zip(np.asarray(self.indptr[first]), np.asarray(self.indptr[last]))
+        ])
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(np.asarray(self.indptr[rows + 1]) - np.asarray(self.indptr[rows]), out=indptr[1:])
+        probed = sparse.csr_matrix(
+            (np.asarray(self.data[entries]), np.asarray(self.indices[entries]), indptr),
+            shape=(len(rows), self.meta["ingredients"]),
+        )
+        return self._top(rows, probed @ self._dense(cols, weights), k, min_score)
+
+    def exact_search(self, ingredients: Sequence[str], k: int = 10, min_score: float = 0.0) -> List[IngredientMatch]:
+        """Brute-force top ``k`` over every product (for recall measurement)"""
+        cols, weights = self.vectorize(ingredients)
+        if not len(cols):
+            return []
+        matrix = sparse.csr_matrix(
+            (self.data, self.indices, self.indptr), shape=(len(self), self.meta["ingredients"]), copy=False,
+        )
+        scores = matrix @ self._dense(cols, weights)
+        return self._top(np.arange(len(scores)), scores, k, min_score)
+
+
+def recall_at_k(
+    index: IngredientMatchIndex,
+    queries: Sequence[Sequence[str]],
+    k: int = 10,
+    min_score: float = 0.0,
+    **search,
+) -> Tuple[float, float]:
+    """
+    Mean recall@k against exact search, and mean query time in ms
+
+    Args:
+        queries: INCI lists
+        min_score: Similarity floor applied to both searches; only exact
+            matches above it count towards recall
+        search: Extra arguments for IngredientMatchIndex.search
+    """
+    hits, expected, elapsed = 0, 0, 0.0
+    for query in queries:
+        truth = {match.product_id for match in index.exact_search(query, k, min_score)}
+        start = time.perf_counter()
+        found = index.search(query, k=k, min_score=min_score, **search)
+        elapsed += time.perf_counter() - start
+        hits += len(truth & {match.product_id for match in found})
+        expected += len(truth)
+    return hits / max(expected, 1), elapsed * 1000 / max(len(queries), 1)
+
+
+# Singleton instance
+_match_index: Optional[IngredientMatchIndex] = None
+
+def get_ingredient_match_index() -> Optional[IngredientMatchIndex]:
+    """Memory-mapped index from INGREDIENT_MATCH_INDEX_DIR, or None if not built yet"""
+    global _match_index
+    if _match_index is None:
+        from app.config import settings
+
+        directory = Path(settings.INGREDIENT_MATCH_INDEX_DIR)
+        if not (directory / "meta.json").exists():
+            logger.warning(f"No ingredient match index at {directory}; run scripts/build_ingredient_match_index.py")
+            return None
+        _match_index = IngredientMatchIndex.load(directory)
+        logger.info(f"Loaded ingredient match index ({len(_match_index)} products) from {directory}")
+    return _match_index
@@ -0,0 +1,139 @@
+"""
+Ingredient Similarity (sparse TF-IDF, blocked top-k)
+Products are rows of a sparse ingredient matrix. INCI lists are ordered
+by concentration, so an ingredient's term weight falls with its position
+(1 / log2(position + 1)); it is multiplied by a smoothed IDF so that
+near-universal ingredients (aqua, glycerin) count for little, and rows
+are L2-normalised so a row product is a cosine similarity.
+
+Neighbours are only searched within a product's category, which keeps
+the existing "similar <category> product" semantics and splits the
+all-pairs problem into much smaller ones. Each category is multiplied in
+row blocks (block x category similarities at a time), so memory stays
+bounded by ``max_block_cells`` whatever the catalog size.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Hashable, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+
+def position_weight(positions: np.ndarray) -> np.ndarray:
+    """Term weight of an ingredient at 1-based INCI list ``positions``"""
+    return 1.0 / np.log2(np.maximum(positions, 1) + 1.0)
+
+
+@dataclass
+class IngredientMatrix:
+    """L2-normalised TF-IDF rows, one per product"""
+    matrix: sparse.csr_matrix
+    product_ids: List[Hashable]
+    # Ingredient column -> ingredient id
+    ingredient_ids: List[Hashable]
+    # Per-column IDF (0 for dropped ingredients), to weight query lists alike
+    idf: np.ndarray
+
+
+def build_matrix(
+    rows: Iterable[Tuple[Hashable, Hashable, int]],
+    max_df: float = 0.5,
+) -> IngredientMatrix:
+    """Matrix from ``(product_id, ingredient_id, position)`` rows
+
+    Ingredients listed by more than ``max_df`` of the products are
+    dropped: they say nothing about similarity and would make every
+    block product dense.
+    """
+    product_index: Dict[Hashable, int] = {}
+    ingredient_index: Dict[Hashable, int] = {}
+    product_col, ingredient_col, positions = [], [], []
+    for product_id, ingredient_id, position in rows:
+        product_col.append(product_index.setdefault(product_id, len(product_index)))
+        ingredient_col.append(ingredient_index.setdefault(ingredient_id, len(ingredient_index)))
+        positions.append(position)
+
+    shape = (len(product_index), len(ingredient_index))
+    weights = position_weight(np.asarray(positions, dtype=np.float32)).astype(np.float32)
+    # Duplicate (product, ingredient) pairs are summed by the COO -> CSR conversion
+    matrix = sparse.coo_matrix((weights, (product_col, ingredient_col)), shape=shape, dtype=np.float32).tocsr()
+
+    document_frequency = np.bincount(matrix.indices, minlength=shape[1])
+    idf = (np.log((1.0 + shape[0]) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+    idf[document_frequency > max_df * shape[0]] = 0.0
+    matrix = matrix @ sparse.diags(idf)
+    matrix.eliminate_zeros()
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    matrix = sparse.diags(1.0 / norms).astype(np.float32) @ matrix
+
+    return IngredientMatrix(
+        matrix=matrix.tocsr(),
+        product_ids=list(product_index),
+        ingredient_ids=list(ingredient_index),
+        idf=idf,
+    )
+
+
+def top_k_rows(
+    matrix: sparse.csr_matrix,
+    k: int,
+    min_score: float = 0.05,
+    max_block_cells: int = 16_000_000,
+) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """Yield ``(row, neighbour_rows, scores)`` of every row's top ``k`` cosine neighbours
+
+    Rows are multiplied against the whole matrix in blocks of
+    ``max_block_cells // n_rows`` rows; a row is never its own
+    neighbour and scores below ``min_score`` are dropped.
+    """
+    n_rows = matrix.shape[0]
+    if n_rows < 2:
+        return
+    block_rows = max(1, min(n_rows, max_block_cells // n_rows))
+    transposed = matrix.T.tocsc()
+    k = min(k, n_rows - 1)
+    for start in range(0, n_rows, block_rows):
+        stop = min(start + block_rows, n_rows)
+        scores = (matrix[start:stop] @ transposed).toarray()
+        scores[np.arange(stop - start), np.arange(start, stop)] = -1.0
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        for offset in range(stop - start):
+            keep = top_scores[offset] >= min_score
+            yield start + offset, top[offset][keep], top_scores[offset][keep]
+
+
+def category_neighbours(
+    matrix: IngredientMatrix,
+    categories: Dict[Hashable, str],
+    k: int = 20,
+    min_score: float = 0.05,
+    max_block_cells: int = 16_000_000,
+) -> Iterator[Tuple[Hashable, List[Tuple[Hashable, float]]]]:
+    """Yield ``(product_id, [(neighbour_id, score), ...])`` per product, best first
+
+    Only products in the same category are compared; products without a
+    category entry are skipped.
+    """
+    by_category: Dict[str, List[int]] = {}
+    for row, product_id in enumerate(matrix.product_ids):
+        category = categories.get(product_id)
+        if category is not None:
+            by_category.setdefault(category, []).append(row)
+
+    for category, rows in sorted(by_category.items(), key=lambda item: -len(item[1])):
+        members = np.asarray(rows)
+        ids: Sequence[Hashable] = [matrix.product_ids[row] for row in rows]
+        block = matrix.matrix[members]
+        for row, neighbours, scores in top_k_rows(block, k, min_score, max_block_cells):
+            yield ids[row], [(ids[n], float(s)) for n, s in zip(neighbours, scores)]
+        logger.debug(f"Neighbours computed for {len(rows)} products in {category}")
@@ -0,0 +1,309 @@
+"""
+Live Camera Preview Guidance
+Runs only the cheap stages (quality gate, face box, lighting balance) on
+small preview frames streamed over a WebSocket and answers with capture
+guidance. Each connection analyzes at most one frame at a time and only
+ever the newest one: frames that arrive while an analysis is running
+replace each other instead of queueing.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from services.face_detection import FaceBox, YuNetFaceDetector, create_face_detector
+from services.image_quality_gate import ImageQualityGate, get_image_quality_gate
+
+logger = logging.getLogger(__name__)
+
+GUIDANCE_MESSAGES = {
+    "no_face": "Center your face in the frame.",
+    "too_dark": "Too dark. Face a window or turn on more light.",
+    "too_bright": "Too bright. Move away from direct light.",
+    "move_closer": "Move closer to the camera.",
+    "move_back": "Move back a little.",
+    "center_face": "Center your face in the frame.",
+    "uneven_lighting": "Light is uneven. Turn to face the light source.",
+    "hold_still": "Hold still.",
+}
+
+# Gate issue code -> guidance code
+GATE_GUIDANCE = {
+    "blurry": "hold_still",
+    "soft_focus": "hold_still",
+    "underexposed": "too_dark",
+    "overexposed": "too_bright",
+    "no_face": "no_face",
+}
+
+
+@dataclass
+class PreviewLimits:
+    """Per-connection bounds on the work one preview stream can cause"""
+    max_frame_side: int = 320
+    max_frame_bytes: int = 200_000
+    max_fps: float = 8.0
+    # Face width as a fraction of the frame width
+    min_face_fraction: float = 0.3
+    max_face_fraction: float = 0.75
+    # Face centre offset from the frame centre, as a fraction of the frame
+    max_center_offset: float = 0.15
+    # Relative luminance difference between the two halves of the face
+    max_lighting_imbalance: float = 0.3
+
+
+class PreviewAnalyzer:
+    """Cheap per-frame checks that produce capture guidance"""
+
+    def __init__(
+        self,
+        gate: ImageQualityGate,
+        face_detector_factory: Optional[Callable[[], Optional[YuNetFaceDetector]]] = None,
+        limits: Optional[PreviewLimits] = None,
+    ):
+        self.gate = gate
+        self.limits = limits or PreviewLimits()
+        self._face_detector_factory = face_detector_factory
+        # cv2.FaceDetectorYN keeps per-call state, so each worker thread gets its own
+        self._local = threading.local()
+
+    def _face_detector(self) -> Optional[YuNetFaceDetector]:
+        if self._face_detector_factory is None:
+            return None
+        if not hasattr(self._local, "detector"):
+            self._local.detector = self._face_detector_factory()
+        return self._local.detector
+
+    def analyze_bytes(self, data: bytes) -> Dict:
+        """Decode an encoded preview frame and analyze it"""
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return {"error": "unreadable_frame"}
+        h, w = image.shape[:2]
+        scale = self.limits.max_frame_side / max(h, w)
+        if scale < 1.0:
+            # Clients should already downscale; never let a large frame cost more
+            image = cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        return self.analyze(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
+    def analyze(self, image: np.ndarray) -> Dict:
+        """
+        Produce guidance for one RGB preview frame
+
+        Returns:
+            ``{"ready", "guidance": [{"code", "message"}], "face", "metrics", "elapsed_ms"}``
+            with the face box normalized to the frame
+        """
+        start = time.perf_counter()
+        limits = self.limits
+        h, w = image.shape[:2]
+        report = self.gate.check(image, record=False)
+        codes: List[str] = []
+
+        detector = self._face_detector()
+        face: Optional[FaceBox] = detector.detect(image) if detector is not None else None
+        for issue in report.issues:
+            code = GATE_GUIDANCE.get(issue.code)
+            # The detector is more reliable than the gate's skin-colour fallback
+            if code == "no_face" and detector is not None:
+                continue
+            if code and code not in codes:
+                codes.append(code)
+        if detector is not None and face is None:
+            codes.insert(0, "no_face")
+
+        if face is not None:
+            face_fraction = face.w / w
+            if face_fraction < limits.min_face_fraction:
+                codes.append("move_closer")
+            elif face_fraction > limits.max_face_fraction:
+                codes.append("move_back")
+            offset_x = abs(face.x + face.w / 2 - w / 2) / w
+            offset_y = abs(face.y + face.h / 2 - h / 2) / h
+            if max(offset_x, offset_y) > limits.max_center_offset:
+                codes.append("center_face")
+            if self._lighting_imbalance(image, face) > limits.max_lighting_imbalance:
+                codes.append("uneven_lighting")
+
+        order = list(GUIDANCE_MESSAGES)
+        codes = sorted(set(codes), key=order.index)
+        return {
+            "ready": not codes,
+            "guidance": [{"code": code, "message": GUIDANCE_MESSAGES[code]} for code in codes],
+            "face": None if face is None else {
+                "x": face.x / w, "y": face.y / h, "w": face.w / w, "h": face.h / h,
+            },
+            "metrics": {
+                "brightness": round(report.metrics.get("brightness", 0.0), 1),
+                "sharpness": round(report.metrics.get("sharpness", 0.0), 1),
+            },
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    @staticmethod
+    def _lighting_imbalance(image: np.ndarray, face: FaceBox) -> float:
+        x0, y0 = max(0, face.x), max(0, face.y)
+        region = image[y0:face.y + face.h, x0:face.x + face.w]
+        if region.size == 0 or region.shape[1] < 2:
+            return 0.0
+        gray = cv2.cvtColor(region, cv2.COLOR_RGB2GRAY)
+        half = gray.shape[1] // 2
+        left, right = float(gray[:, :half].mean()), float(gray[:, half:].mean())
+        return abs(left - right) / max(left, right, 1.0)
+
+
+class LatestFrame:
+    """Single-slot mailbox: a new frame replaces any frame not yet taken"""
+
+    def __init__(self):
+        self._item = None
+        self._closed = False
+        self._event = asyncio.Event()
+
+    def put(self, item) -> bool:
+        """Store ``item``; returns True if it replaced an unprocessed frame"""
+        replaced = self._item is not None
+        self._item = item
+        self._event.set()
+        return replaced
+
+    def close(self) -> None:
+        self._closed = True
+        self._event.set()
+
+    async def get(self):
+        """Wait for and take the newest frame, or None once closed and empty"""
+        while self._item is None:
+            if self._closed:
+                return None
+            self._event.clear()
+            await self._event.wait()
+        item, self._item = self._item, None
+        return item
+
+
+class PreviewSessionLimiter:
+    """Non-blocking cap on concurrent preview connections"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.active = 0
+
+    def try_acquire(self) -> bool:
+        if self.active >= self.capacity:
+            return False
+        self.active += 1
+        return True
+
+    def release(self) -> None:
+        self.active = max(0, self.active - 1)
+
+
+async def run_preview_session(
+    receive: Callable[[], Awaitable[Optional[bytes]]],
+    send: Callable[[Dict], Awaitable[None]],
+    analyzer: PreviewAnalyzer,
+    executor: Optional[Executor] = None,
+) -> Dict[str, int]:
+    """
+    Serve one preview stream until the client disconnects
+
+    Args:
+        receive: Returns the next encoded frame, or None on disconnect
+        send: Sends one JSON message to the client
+        analyzer: Shared analyzer
+        executor: Pool the analysis runs on; shared across connections so
+            total CPU stays bounded by its worker count
+
+    Returns:
+        Counters for the session: received, analyzed, dropped, rejected
+    """
+    loop = asyncio.get_running_loop()
+    limits = analyzer.limits
+    min_interval = 1.0 / limits.max_fps if limits.max_fps > 0 else 0.0
+    slot = LatestFrame()
+    stats = {"received": 0, "analyzed": 0, "dropped": 0, "rejected": 0}
+
+    async def read_frames() -> None:
+        try:
+            while True:
+                data = await receive()
+                if data is None:
+                    break
+                stats["received"] += 1
+                if slot.put((stats["received"], data)):
+                    stats["dropped"] += 1
+        finally:
+            slot.close()
+
+    reader = asyncio.create_task(read_frames())
+    next_allowed = 0.0
+    try:
+        while True:
+            wait = next_allowed - loop.time()
+            if wait > 0:
+                # Frames arriving meanwhile overwrite each other in the slot
+                await asyncio.sleep(wait)
+            item: Optional[Tuple[int, bytes]] = await slot.get()
+            if item is None:
+                break
+            seq, data = item
+            next_allowed = loop.time() + min_interval
+            if len(data) > limits.max_frame_bytes:
+                stats["rejected"] += 1
+                await send({"seq": seq, "error": "frame_too_large", "max_frame_bytes": limits.max_frame_bytes})
+                continue
+            result = await loop.run_in_executor(executor, analyzer.analyze_bytes, data)
+            stats["analyzed"] += 1
+            await send({"seq": seq, "dropped": stats["dropped"], **result})
+    finally:
+        reader.cancel()
+        try:
+            await reader
+        except asyncio.CancelledError:
+            pass
+    return stats
+
+
+@dataclass
+class LivePreview:
+    """Process-wide preview state shared by all connections"""
+    analyzer: PreviewAnalyzer
+    executor: ThreadPoolExecutor
+    sessions: PreviewSessionLimiter
+
+
+# Singleton instance
+_live_preview: Optional[LivePreview] = None
+
+def get_live_preview() -> LivePreview:
+    """Get or create the preview runtime configured from LIVE_PREVIEW_* settings"""
+    global _live_preview
+    if _live_preview is None:
+        from app.config import settings
+
+        factory = None
+        if settings.FACE_DETECTOR == "yunet":
+            factory = lambda: create_face_detector(settings.YUNET_MODEL_PATH, download=False)
+        _live_preview = LivePreview(
+            analyzer=PreviewAnalyzer(
+                get_image_quality_gate(),
+                face_detector_factory=factory,
+                limits=PreviewLimits(
+                    max_fps=settings.LIVE_PREVIEW_MAX_FPS,
+                    max_frame_bytes=settings.LIVE_PREVIEW_MAX_FRAME_BYTES,
+                ),
+            ),
+            executor=ThreadPoolExecutor(
+                max_workers=settings.LIVE_PREVIEW_WORKERS, thread_name_prefix="live-preview"
+            ),
+            sessions=PreviewSessionLimiter(settings.LIVE_PREVIEW_MAX_SESSIONS),
+        )
+    return _live_preview
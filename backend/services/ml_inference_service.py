@@ -8,13 +8,25 @@ import torch
 import torch.nn as nn
 import numpy as np
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import cv2
 from PIL import Image
 import io
 
+from app.config import settings
+
 logger = logging.getLogger(__name__)
 
+# Cascade stage names recorded in ``stages_run``
+ACNE_STAGE = "acne_binary"
+CONDITION_STAGE = "condition"
+
+
+def cascade_can_exit(acne_result: Dict[str, any], threshold: float) -> bool:
+    """True if the acne model is confident enough that the skin is clear
+    to skip the condition model"""
+    return acne_result.get("label") == "no_acne" and acne_result.get("confidence", 0.0) >= threshold
+
 # Define model architectures to match training
 class AcneBinaryModel(nn.Module):
     """Binary acne detection model architecture"""
@@ -75,18 +87,115 @@ class OtherConditionModel(nn.Module):
         x = self.classifier(x)
         return x
 
+def _gap_head(in_channels: int, num_classes: int) -> nn.Sequential:
+    """Global-average-pooling classifier head
+    
+    Replaces Flatten -> Linear(C*H*W, 512): a 1x1 conv mixes channels,
+    then spatial pooling leaves a C-dim vector, so the head costs
+    O(C^2) parameters instead of O(C*H*W*512).
+    """
+    return nn.Sequential(
+        nn.Conv2d(in_channels, in_channels, kernel_size=1),
+        nn.ReLU(inplace=True),
+        nn.AdaptiveAvgPool2d(1),
+        nn.Flatten(),
+        nn.Dropout(0.2),
+        nn.Linear(in_channels, num_classes)
+    )
+
+class AcneBinaryGAPModel(nn.Module):
+    """Acne binary model with a global-average-pooling head
+    
+    Same feature extractor as AcneBinaryModel, so it can be distilled
+    from acne_binary_v1 starting from its convolution weights.
+    """
+    def __init__(self, num_classes=2):
+        super(AcneBinaryGAPModel, self).__init__()
+        self.features = nn.Sequential(
+            nn.Conv2d(3, 32, kernel_size=3, padding=1),
+            nn.ReLU(inplace=True),
+            nn.MaxPool2d(kernel_size=2, stride=2),
+            nn.Conv2d(32, 64, kernel_size=3, padding=1),
+            nn.ReLU(inplace=True),
+            nn.MaxPool2d(kernel_size=2, stride=2),
+            nn.Conv2d(64, 128, kernel_size=3, padding=1),
+            nn.ReLU(inplace=True),
+            nn.MaxPool2d(kernel_size=2, stride=2),
+        )
+        self.classifier = _gap_head(128, num_classes)
+    
+    def forward(self, x):
+        x = self.features(x)
+        x = self.classifier(x)
+        return x
+
+class OtherConditionGAPModel(nn.Module):
+    """Skin condition model with a global-average-pooling head
+    
+    Same feature extractor as OtherConditionModel.
+    """
+    def __init__(self, num_classes=5):
+        super(OtherConditionGAPModel, self).__init__()
+        self.features = nn.Sequential(
+            nn.Conv2d(3, 32, kernel_size=3, padding=1),
+            nn.ReLU(inplace=True),
+            nn.MaxPool2d(kernel_size=2, stride=2),
+            nn.Conv2d(32, 64, kernel_size=3, padding=1),
+            nn.ReLU(inplace=True),
+            nn.MaxPool2d(kernel_size=2, stride=2),
+            nn.Conv2d(64, 128, kernel_size=3, padding=1),
+            nn.ReLU(inplace=True),
+            nn.MaxPool2d(kernel_size=2, stride=2),
+            nn.Conv2d(128, 256, kernel_size=3, padding=1),
+            nn.ReLU(inplace=True),
+            nn.MaxPool2d(kernel_size=2, stride=2),
+        )
+        self.classifier = _gap_head(256, num_classes)
+    
+    def forward(self, x):
+        x = self.features(x)
+        x = self.classifier(x)
+        return x
+
+# Selectable model variants: role -> (registry id in models/model_registry.yml, architecture)
+MODEL_VARIANTS = {
+    "v1": {
+        "acne": ("acne_binary_v1", AcneBinaryModel),
+        "condition": ("other_condition_v1", OtherConditionModel),
+    },
+    "gap_v1": {
+        "acne": ("acne_binary_gap_v1", AcneBinaryGAPModel),
+        "condition": ("other_condition_gap_v1", OtherConditionGAPModel),
+    },
+}
+
 class MLInferenceService:
     """Production ML inference service for skin analysis"""
     
-    def __init__(self):
-        """Initialize models and load weights"""
+    def __init__(self, cascade_enabled: bool = True, cascade_threshold: float = 0.9, model_variant: str = "v1"):
+        """Initialize models and load weights
+        
+        Args:
+            model_variant: Key of MODEL_VARIANTS to load
+            cascade_enabled: Run the condition model only when needed
+            cascade_threshold: Acne-model confidence in "no_acne" required to
+                skip the condition model
+        """
+        self.cascade_enabled = cascade_enabled
+        self.cascade_threshold = cascade_threshold
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         logger.info(f"Using device: {self.device}")
         
         # Model paths
+        if model_variant not in MODEL_VARIANTS:
+            raise ValueError(f"Unknown model variant '{model_variant}', expected one of {sorted(MODEL_VARIANTS)}")
+        self.model_variant = model_variant
+        variant = MODEL_VARIANTS[model_variant]
+        self.acne_model_id, self.acne_model_cls = variant["acne"]
+        self.condition_model_id, self.condition_model_cls = variant["condition"]
         self.models_dir = Path(__file__).parent.parent / "models"
-        self.acne_model_path = self.models_dir / "acne_binary_v1.pt"
-        self.condition_model_path = self.models_dir / "other_condition_v1.pt"
+        self.acne_model_path = self.models_dir / f"{self.acne_model_id}.pt"
+        self.condition_model_path = self.models_dir / f"{self.condition_model_id}.pt"
         
         # Load models
         self.acne_model = None
@@ -115,7 +224,7 @@ class MLInferenceService:
         try:
             # Load acne binary model
             if self.acne_model_path.exists():
-                self.acne_model = AcneBinaryModel(num_classes=2)
+                self.acne_model = self.acne_model_cls(num_classes=2)
                 self.acne_model.load_state_dict(torch.load(
                     self.acne_model_path,
                     map_location=self.device
@@ -128,7 +237,7 @@ class MLInferenceService:
             
             # Load condition model
             if self.condition_model_path.exists():
-                self.condition_model = OtherConditionModel(num_classes=5)
+                self.condition_model = self.condition_model_cls(num_classes=5)
                 self.condition_model.load_state_dict(torch.load(
                     self.condition_model_path,
                     map_location=self.device
@@ -238,21 +347,129 @@ class MLInferenceService:
         except Exception as e:
             logger.error(f"Error in condition prediction: {str(e)}")
             return {"condition": "error", "confidence": 0.0}
-    
-    async def analyze_skin_with_ml(self, face_region: np.ndarray) -> Dict[str, any]:
-        """Complete ML-based skin analysis"""
+
+    def embed(self, images: List[np.ndarray], model: str = "condition") -> np.ndarray:
+        """
+        Compact visual embeddings for similarity search
+
+        Global average of the last convolution block of ``model``,
+        L2-normalised (256 floats for the condition model).
+
+        Returns:
+            Array of shape (N, channels), float32
+        """
+        network = {"acne": self.acne_model, "condition": self.condition_model}.get(model)
+        if network is None:
+            raise RuntimeError(f"The {model} model is not loaded")
+        batch = torch.cat([self.preprocess_image(image) for image in images])
+        with torch.no_grad():
+            pooled = network.features(batch).mean(dim=(2, 3))
+            pooled = torch.nn.functional.normalize(pooled, dim=1)
+        return pooled.cpu().numpy().astype(np.float32)
+
+    def grad_cam(
+        self, images: List[np.ndarray], model: str = "acne", targets: Optional[List[Optional[str]]] = None
+    ) -> Tuple[np.ndarray, List[str]]:
+        """
+        Grad-CAM maps for a batch of face crops in one forward/backward pass
+
+        Gradients of each image's target logit with respect to the last
+        convolution's activations weight those activation channels; the
+        positive part of the weighted sum is where the model looked.
+
+        Args:
+            images: RGB face crops (any size)
+            model: "acne" or "condition"
+            targets: Class label to explain per image; None explains the prediction
+
+        Returns:
+            Maps of shape (N, h, w) scaled to [0, 1], and the explained labels
+        """
+        network, labels = {
+            "acne": (self.acne_model, self.acne_labels),
+            "condition": (self.condition_model, self.condition_labels),
+        }.get(model, (None, None))
+        if labels is None:
+            raise ValueError(f"Unknown model '{model}', expected 'acne' or 'condition'")
+        if network is None:
+            raise RuntimeError(f"The {model} model is not loaded")
+        label_ids = {label: index for index, label in labels.items()}
+        unknown = {t for t in targets or [] if t and t not in label_ids}
+        if unknown:
+            raise ValueError(f"Unknown {model} labels {sorted(unknown)}, expected one of {sorted(label_ids)}")
+
+        layer = [m for m in network.features.modules() if isinstance(m, nn.Conv2d)][-1]
+        captured = {}
+        handle = layer.register_forward_hook(lambda module, inputs, output: captured.update(activations=output))
+        try:
+            batch = torch.cat([self.preprocess_image(image) for image in images])
+            with torch.enable_grad():
+                logits = network(batch)
+                predicted = logits.argmax(dim=1).tolist()
+                classes = [
+                    label_ids[target] if target else pred
+                    for target, pred in zip(targets or [None] * len(images), predicted)
+                ]
+                score = logits[torch.arange(len(images)), torch.tensor(classes)].sum()
+                activations = captured["activations"]
+                gradients, = torch.autograd.grad(score, activations)
+        finally:
+            handle.remove()
+
+        weights = gradients.mean(dim=(2, 3), keepdim=True)
+        cams = torch.relu((weights * activations).sum(dim=1)).detach()
+        peak = cams.flatten(1).max(dim=1).values.clamp(min=1e-8)
+        cams = (cams / peak[:, None, None]).cpu().numpy().astype(np.float32)
+        return cams, [labels[c] for c in classes]
+
+    async def analyze_skin_with_ml(
+        self, face_region: np.ndarray, force_full: bool = False, acne_only: bool = False
+    ) -> Dict[str, any]:
+        """
+        Cascaded ML-based skin analysis
+        
+        The cheap acne model runs first. The condition model only runs when
+        the acne model is not confident the skin is clear, when the cascade
+        is disabled, or when the caller asks for the full pipeline.
+        
+        Args:
+            face_region: RGB face crop
+            force_full: Always run every model
+            acne_only: Run only the acne model (degraded mode under load)
+        """
         try:
-            # Run both models
             acne_result = await self.predict_acne(face_region)
-            condition_result = await self.predict_condition(face_region)
+            stages_run = [ACNE_STAGE]
+            
+            early_exit = (
+                self.cascade_enabled
+                and not force_full
+                and not acne_only
+                and self.acne_model is not None
+                and cascade_can_exit(acne_result, self.cascade_threshold)
+            )
+            if acne_only and not force_full:
+                condition_result = {"condition": "unknown", "confidence": 0.0, "skipped": True}
+            elif early_exit:
+                condition_result = {
+                    "condition": "normal",
+                    "confidence": acne_result["confidence"],
+                    "inferred_from": ACNE_STAGE,
+                }
+            else:
+                condition_result = await self.predict_condition(face_region)
+                stages_run.append(CONDITION_STAGE)
             
             return {
                 "acne_analysis": acne_result,
                 "condition_analysis": condition_result,
+                "model_variant": self.model_variant,
                 "ml_models_used": {
                     "acne_model": self.acne_model is not None,
-                    "condition_model": self.condition_model is not None
-                }
+                    "condition_model": CONDITION_STAGE in stages_run and self.condition_model is not None
+                },
+                "stages_run": stages_run,
+                "early_exit": early_exit,
             }
         
         except Exception as e:
@@ -266,5 +483,9 @@ def get_ml_inference_service() -> MLInferenceService:
     """Get or create singleton instance of MLInferenceService"""
     global _ml_inference_service
     if _ml_inference_service is None:
-        _ml_inference_service = MLInferenceService()
+        _ml_inference_service = MLInferenceService(
+            cascade_enabled=settings.ML_CASCADE_ENABLED,
+            cascade_threshold=settings.ML_CASCADE_THRESHOLD,
+            model_variant=settings.ML_MODEL_VARIANT,
+        )
     return _ml_inference_service
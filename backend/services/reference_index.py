@@ -0,0 +1,265 @@
+"""
+Reference Case Index (IVF-PQ on NumPy)
+Approximate nearest-neighbour search over CNN embeddings of the SCIN
+reference images. Vectors are assigned to coarse k-means lists and their
+residuals product-quantized to one byte per subvector, so a 256-d float
+embedding is stored in ``m`` bytes. All arrays are saved as .npy files
+and memory-mapped on load: the index is shared by every worker through
+the page cache and only the probed lists are ever read.
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT = "ivfpq-v1"
+_ARRAYS = ("centroids", "codebooks", "codes", "ids", "offsets", "vectors")
+
+
+def kmeans(data: np.ndarray, k: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """Plain Lloyd k-means; empty clusters are re-seeded from random points"""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(data))
+    centroids = data[rng.choice(len(data), k, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assign = assign_nearest(data, centroids)
+        for c in range(k):
+            members = data[assign == c]
+            centroids[c] = members.mean(axis=0) if len(members) else data[rng.integers(len(data))]
+    return centroids
+
+
+def assign_nearest(data: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+    """Index of the nearest centroid for every row (squared L2)"""
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    out = np.empty(len(data), dtype=np.int64)
+    for start in range(0, len(data), chunk):
+        block = data[start:start + chunk]
+        out[start:start + chunk] = np.argmin(centroid_norms[None, :] - 2 * block @ centroids.T, axis=1)
+    return out
+
+
+@dataclass
+class SearchHit:
+    id: int
+    distance: float
+
+
+class ReferenceIndex:
+    """IVF-PQ index over L2-normalised embeddings"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict):
+        self.centroids = arrays["centroids"]
+        self.codebooks = arrays["codebooks"]
+        self.codes = arrays["codes"]
+        self.ids = arrays["ids"]
+        self.offsets = arrays["offsets"]
+        # float16 copies of the vectors, used only to rerank candidates
+        self.vectors = arrays.get("vectors")
+        self.meta = meta
+        self.m, self.ksub, self.dsub = self.codebooks.shape
+        self._codebooks_t = np.ascontiguousarray(np.transpose(self.codebooks, (0, 2, 1)))
+        self._codeword_norms = (np.asarray(self.codebooks) ** 2).sum(axis=2)
+
+    @property
+    def dim(self) -> int:
+        return self.m * self.dsub
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # ---------- Build ----------
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        ids: np.ndarray,
+        nlist: Optional[int] = None,
+        m: int = 16,
+        ksub: int = 256,
+        iterations: int = 20,
+        train_size: int = 50_000,
+        keep_vectors: bool = True,
+        seed: int = 0,
+    ) -> "ReferenceIndex":
+        """
+        Train the coarse and product quantizers and encode ``vectors``
+
+        Args:
+            vectors: (N, d) embeddings; d must be divisible by ``m``
+            ids: (N,) external ids (e.g. scin_samples.id)
+            nlist: Coarse lists; defaults to about sqrt(N)
+            m: Subquantizers (bytes per encoded vector)
+            ksub: Centroids per subquantizer (at most 256)
+            keep_vectors: Store float16 vectors for exact reranking
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        n, dim = vectors.shape
+        if dim % m:
+            raise ValueError(f"Embedding size {dim} is not divisible by m={m}")
+        nlist = nlist or max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        train = vectors[rng.choice(n, min(n, train_size), replace=False)]
+
+        centroids = kmeans(train, nlist, iterations, seed)
+        nlist = len(centroids)
+        train_residuals = train - centroids[assign_nearest(train, centroids)]
+        dsub = dim // m
+        codebooks = np.stack([
+            kmeans(train_residuals[:, j * dsub:(j + 1) * dsub], ksub, iterations, seed + j)
+            for j in range(m)
+        ])
+        if codebooks.shape[1] < ksub:
+            ksub = codebooks.shape[1]
+
+        lists = assign_nearest(vectors, centroids)
+        residuals = vectors - centroids[lists]
+        codes = np.stack([
+            assign_nearest(residuals[:, j * dsub:(j + 1) * dsub], codebooks[j]) for j in range(m)
+        ], axis=1).astype(np.uint8)
+
+        # Store each list contiguously so a probe is one slice
+        order = np.argsort(lists, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(lists, minlength=nlist), out=offsets[1:])
+        arrays = {
+            "centroids": centroids,
+            "codebooks": codebooks.astype(np.float32),
+            "codes": codes[order],
+            "ids": np.asarray(ids, dtype=np.int64)[order],
+            "offsets": offsets,
+        }
+        if keep_vectors:
+            arrays["vectors"] = vectors[order].astype(np.float16)
+        meta = {"format": INDEX_FORMAT, "count": int(n), "dim": int(dim), "nlist": int(nlist), "m": m, "ksub": ksub}
+        return cls(arrays, meta)
+
+    # ---------- Persistence ----------
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {name: getattr(self, name) for name in _ARRAYS}
+        return {name: array for name, array in arrays.items() if array is not None}
+
+    def save(self, directory: Path, extra_meta: Optional[Dict] = None) -> None:
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, array in self._arrays().items():
+            np.save(directory / f"{name}.npy", np.asarray(array))
+        (directory / "meta.json").write_text(json.dumps({**self.meta, **(extra_meta or {})}, indent=2))
+
+    @classmethod
+    def load(cls, directory: Path) -> "ReferenceIndex":
+        """Memory-map a saved index; nothing is read until it is searched"""
+        directory = Path(directory)
+        meta = json.loads((directory / "meta.json").read_text())
+        if meta.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported index format {meta.get('format')!r} in {directory}")
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode="r")
+            for name in _ARRAYS
+            if (directory / f"{name}.npy").exists()
+        }
+        return cls(arrays, meta)
+
+    def nbytes(self) -> Dict[str, int]:
+        """Size of each array (on disk, and in memory when fully paged in)"""
+        return {name: int(array.nbytes) for name, array in self._arrays().items()}
+
+    # ---------- Search ----------
+
+    def search(self, query: np.ndarray, k: int = 5, nprobe: int = 32, rerank: int = 20) -> List[SearchHit]:
+        """
+        Approximate k nearest neighbours of one embedding
+
+        Args:
+            query: (d,) embedding, normalised like the indexed vectors
+            k: Neighbours to return
+            nprobe: Coarse lists scanned
+            rerank: Re-score the best ``rerank * k`` PQ candidates with the
+                stored float16 vectors (0 returns PQ distances)
+
+        Returns:
+            Hits ordered by increasing squared L2 distance
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        coarse = ((self.centroids - query) ** 2).sum(axis=1)
+        probes = np.argsort(coarse)[:min(nprobe, len(coarse))]
+
+        # (probes, m, ksub) distance of each query subvector to each codeword
+        # ||r - c||^2 = ||r||^2 - 2 r.c + ||c||^2, as one batched matmul
+        residuals = (query - self.centroids[probes]).reshape(len(probes), self.m, 1, self.dsub)
+        dots = np.matmul(residuals, self._codebooks_t[None])[:, :, 0, :]
+        tables = (residuals[:, :, 0, :] ** 2).sum(axis=2)[:, :, None] - 2 * dots + self._codeword_norms[None]
+
+        starts, ends = self.offsets[probes], self.offsets[probes + 1]
+        sizes = ends - starts
+        if not sizes.sum():
+            return []
+        rows = np.concatenate([np.arange(a, b) for a, b in zip(starts, ends)])
+        owner = np.repeat(np.arange(len(probes)), sizes)
+        codes = np.asarray(self.codes[rows])
+        dists = tables[owner[:, None], np.arange(self.m)[None, :], codes].sum(axis=1)
+
+        keep = min(len(rows), k * rerank if rerank and self.vectors is not None else k)
+        best = np.argpartition(dists, keep - 1)[:keep]
+        rows, dists = rows[best], dists[best]
+        if rerank and self.vectors is not None:
+            # Sort rows so the memory-mapped reads are sequential
+            order = np.argsort(rows)
+            rows = rows[order]
+            exact = np.asarray(self.vectors[rows], dtype=np.float32)
+            dists = ((exact - query) ** 2).sum(axis=1)
+        top = np.argsort(dists)[:k]
+        return [SearchHit(int(self.ids[rows[i]]), float(dists[i])) for i in top]
+
+
+def exact_search(vectors: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    """Row indices of the true k nearest neighbours (for recall measurement)"""
+    dists = ((vectors - query) ** 2).sum(axis=1)
+    top = np.argpartition(dists, min(k, len(dists) - 1))[:k]
+    return top[np.argsort(dists[top])]
+
+
+def recall_at_k(index: ReferenceIndex, vectors: np.ndarray, ids: np.ndarray, queries: np.ndarray, k: int, **search) -> Tuple[float, float]:
+    """
+    Mean recall@k against brute force, and mean query time in ms
+
+    Args:
+        vectors, ids: The indexed data in original order
+        queries: (Q, d) query embeddings
+        search: Extra arguments for ReferenceIndex.search
+    """
+    hits, elapsed = 0, 0.0
+    for query in queries:
+        truth = set(ids[exact_search(vectors, query, k)].tolist())
+        start = time.perf_counter()
+        found = index.search(query, k=k, **search)
+        elapsed += time.perf_counter() - start
+        hits += len(truth & {hit.id for hit in found})
+    return hits / (k * len(queries)), elapsed * 1000 / len(queries)
+
+
+# Singleton instance
+_reference_index: Optional[ReferenceIndex] = None
+
+def get_reference_index() -> Optional[ReferenceIndex]:
+    """Memory-mapped index from REFERENCE_INDEX_DIR, or None if not built yet"""
+    global _reference_index
+    if _reference_index is None:
+        from app.config import settings
+
+        directory = Path(settings.REFERENCE_INDEX_DIR)
+        if not (directory / "meta.json").exists():
+            logger.warning(f"No reference index at {directory}; run scripts/build_reference_index.py")
+            return None
+        _reference_index = ReferenceIndex.load(directory)
+        logger.info(f"Loaded reference index ({len(_reference_index)} cases) from {directory}")
+    return _reference_index
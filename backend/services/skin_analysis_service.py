@@ -4,16 +4,37 @@ Implements MediaPipe face detection and comprehensive skin analysis
 """
 
 import logging
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional, Tuple, Union
 import cv2
 import numpy as np
-import mediapipe as mp
 from PIL import Image
 import io
+import time
 from dataclasses import dataclass
 
+from app.config import settings
+from services.analyzer_graph import AnalyzerGraph, get_analyzer_pool
+from services.client_face import validate_client_face
+from services.deadline_scheduler import DARK_CIRCLES, WRINKLES, PipelineVariant
+from services.face_detection import YuNetFaceDetector, create_face_detector
+from services.image_quality_gate import ImageQualityError, ImageQualityGate, get_image_quality_gate
+from services.image_type_router import CLINICAL, PipelineRouter, get_pipeline_router
+
 logger = logging.getLogger(__name__)
 
+# Two-stage detection: margin around the YuNet box, and the longest side
+# of the crop handed to FaceMesh
+FACE_CROP_MARGIN = 0.25
+FACE_MESH_CROP_SIZE = 512
+
+# Analyzers and the planes they share (registered below); plugins add
+# nodes to this graph and their outputs appear in plugin_results
+SKIN_ANALYZERS = AnalyzerGraph()
+BUILTIN_ANALYZERS = (
+    "skin_tone", "texture", "acne", WRINKLES, DARK_CIRCLES, "skin_type", "confidence",
+)
+
 @dataclass
 class SkinAnalysisResult:
     """Results from skin analysis"""
@@ -28,292 +49,484 @@ class SkinAnalysisResult:
     skin_type: str
     confidence_score: float
     face_landmarks: Optional[List[Dict[str, float]]] = None
+    quality_warnings: Optional[List[str]] = None
+    face_detection: Optional[Dict[str, str]] = None
+    pipeline_variant: str = "full"
+    degraded: bool = False
+    skipped_analyzers: Optional[List[str]] = None
+    image_type: Optional[Dict] = None
+    analyzer_timings_ms: Optional[Dict[str, float]] = None
+    plugin_results: Optional[Dict[str, Any]] = None
+    ml_analysis: Optional[Dict[str, Any]] = None
+    quality_metrics: Optional[Dict[str, float]] = None
     
 class SkinAnalysisService:
     """Production-ready skin analysis using MediaPipe and OpenCV"""
     
-    def __init__(self):
-        """Initialize MediaPipe face detection and mesh"""
-        self.mp_face_detection = mp.solutions.face_detection
-        self.mp_face_mesh = mp.solutions.face_mesh
-        
-        # Initialize detectors with production settings
-        self.face_detection = self.mp_face_detection.FaceDetection(
-            model_selection=1,  # Full range model for better accuracy
-            min_detection_confidence=0.7
-        )
-        
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            static_image_mode=True,
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7
-        )
+    def __init__(
+        self,
+        quality_gate: Optional[ImageQualityGate] = None,
+        face_detector: Optional[YuNetFaceDetector] = None,
+        image_router: Optional[PipelineRouter] = None,
+        analyzers: Optional[AnalyzerGraph] = None,
+        executor: Optional[Executor] = None,
+    ):
+        """Initialize the service; MediaPipe loads on the first selfie"""
+        # Cheap pre-check; None disables the gate
+        self.quality_gate = quality_gate
+        # Fast front stage; None runs FaceMesh on the whole image
+        self.face_detector = face_detector
+        # Selfie vs dermoscopy routing; None treats every image as a selfie
+        self.image_router = image_router
+        # Analyzer graph, and the pool its nodes run on; None runs them inline
+        self.analyzers = analyzers if analyzers is not None else SKIN_ANALYZERS
+        self.executor = executor
+        self._face_mesh = None
         
         logger.info("Skin Analysis Service initialized successfully")
     
-    async def analyze_skin(self, image_data: bytes) -> SkinAnalysisResult:
+    @property
+    def face_mesh(self):
+        """MediaPipe FaceMesh, created when the selfie pipeline first needs it"""
+        if self._face_mesh is None:
+            import mediapipe as mp
+            
+            self._face_mesh = mp.solutions.face_mesh.FaceMesh(
+                static_image_mode=True,
+                max_num_faces=1,
+                refine_landmarks=True,
+                min_detection_confidence=0.7,
+                min_tracking_confidence=0.7
+            )
+            logger.info("Loaded MediaPipe FaceMesh")
+        return self._face_mesh
+    
+    async def analyze_skin(
+        self,
+        image_data: Union[bytes, np.ndarray],
+        client_face: Optional[dict] = None,
+        variant: Optional[PipelineVariant] = None,
+        ml_backend: Optional[Any] = None,
+        force_full: bool = False,
+    ) -> SkinAnalysisResult:
         """
         Analyze skin from image data
         
         Args:
-            image_data: Image bytes data
+            image_data: Image bytes, or an already decoded RGB array such
+                as the upload's analysis-size working copy
+            client_face: Optional browser-side detector output for a tight
+                face crop (see services/client_face.py); if it validates,
+                server-side face detection is skipped
+            variant: Cheaper pipeline chosen by the deadline scheduler;
+                None runs the full pipeline
+            ml_backend: Optional ``analyze_skin_with_ml`` provider (worker
+                pool client or in-process service), run on the face region
+                with the variant's ``ml_acne_only``
+            force_full: Ask ``ml_backend`` for every model; overrides the
+                cascade's early exit and the variant's ``ml_acne_only``
             
         Returns:
             SkinAnalysisResult with comprehensive analysis
+            
+        Raises:
+            ImageQualityError: If the quality gate rejects the image
         """
         try:
             # Convert bytes to image
-            image = self._bytes_to_image(image_data)
+            if isinstance(image_data, np.ndarray):
+                image = image_data
+            else:
+                image = self._bytes_to_image(image_data)
+            
+            # Selfies and dermoscopy close-ups take different pipelines
+            route = self.image_router.route(image) if self.image_router is not None else None
+            clinical = route is not None and route.image_type == CLINICAL
+            if clinical:
+                image = self._field_of_view(image)
+            
+            # Reject unusable images before the expensive pipeline
+            quality_warnings = quality_metrics = None
+            if self.quality_gate is not None:
+                report = self.quality_gate.check(image, require_face=False if clinical else None)
+                if not report.passed:
+                    raise ImageQualityError(report)
+                quality_warnings = report.warnings or None
+                quality_metrics = report.metrics
+            pipeline_start = time.perf_counter()
             
-            # Detect face
-            face_region, face_landmarks = self._detect_face(image)
+            if variant is not None and variant.max_side:
+                h, w = image.shape[:2]
+                scale = variant.max_side / max(h, w)
+                if scale < 1.0:
+                    image = cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+            skipped = list(variant.skip_analyzers) if variant is not None else []
+            
+            # Detect face, unless the client already did or there is none
+            client = validate_client_face(client_face, image.shape[1], image.shape[0])
+            if clinical:
+                # The whole field of view is skin; face-only analyzers do not apply
+                face_region, face_landmarks = image, None
+                skipped += [name for name in (WRINKLES, DARK_CIRCLES) if name not in skipped]
+            elif client.accepted:
+                face_region, face_landmarks = image, client.landmarks
+            else:
+                face_region, face_landmarks = self._detect_face(image)
             
             if face_region is None:
                 raise ValueError("No face detected in image")
             
-            # Analyze skin characteristics
-            skin_tone = self._analyze_skin_tone(face_region)
-            texture_quality = self._analyze_texture(face_region)
-            acne_detected, acne_severity = self._detect_acne(face_region)
-            wrinkles_detected, wrinkle_density = self._detect_wrinkles(face_region)
-            dark_circles_detected, dark_circle_severity = self._detect_dark_circles(
-                face_region, face_landmarks
+            # Analyze skin characteristics; independent analyzers run concurrently
+            run = self.analyzers.run(
+                {"image": face_region, "landmarks": face_landmarks}, self.executor, skip=skipped
             )
-            skin_type = self._determine_skin_type(face_region, texture_quality)
-            confidence_score = self._calculate_confidence(face_region)
+            values = run.values
+            ml_analysis = None
+            if ml_backend is not None:
+                ml_analysis = await ml_backend.analyze_skin_with_ml(
+                    face_region, force_full=force_full,
+                    acne_only=variant is not None and variant.ml_acne_only,
+                )
+            acne_detected, acne_severity = values["acne"]
+            wrinkles_detected, wrinkle_density = values.get(WRINKLES, (False, 0.0))
+            dark_circles_detected, dark_circle_severity = values.get(DARK_CIRCLES, (False, 0.0))
+            confidence_score = values["confidence"]
+            plugin_results = {
+                node.name: values[node.name]
+                for node in self.analyzers.nodes
+                if not node.plane and node.name not in BUILTIN_ANALYZERS and node.name in values
+            }
             
             result = SkinAnalysisResult(
-                skin_tone=skin_tone,
-                texture_quality=texture_quality,
+                skin_tone=values["skin_tone"],
+                texture_quality=values["texture"],
                 acne_detected=acne_detected,
                 acne_severity=acne_severity,
                 wrinkles_detected=wrinkles_detected,
                 wrinkle_density=wrinkle_density,
                 dark_circles_detected=dark_circles_detected,
                 dark_circle_severity=dark_circle_severity,
-                skin_type=skin_type,
+                skin_type=values["skin_type"],
                 confidence_score=confidence_score,
-                face_landmarks=face_landmarks
+                face_landmarks=face_landmarks,
+                quality_warnings=quality_warnings,
+                face_detection=client.summary(),
+                pipeline_variant=variant.name if variant is not None else "full",
+                degraded=variant is not None and variant.name != "full",
+                skipped_analyzers=run.skipped or None,
+                image_type=route.summary() if route is not None else None,
+                analyzer_timings_ms={name: round(ms, 3) for name, ms in run.timings_ms.items()},
+                plugin_results=plugin_results or None,
+                ml_analysis=ml_analysis,
+                quality_metrics=quality_metrics,
             )
             
+            pipeline_ms = (time.perf_counter() - pipeline_start) * 1000
+            if self.quality_gate is not None:
+                self.quality_gate.record_pipeline_time(pipeline_ms)
+            if route is not None:
+                self.image_router.record(route, pipeline_ms)
             logger.info(f"Skin analysis completed with confidence: {confidence_score:.2f}")
             return result
             
+        except ImageQualityError as e:
+            logger.info(f"Image rejected by quality gate: {e}")
+            raise
         except Exception as e:
             logger.error(f"Error in skin analysis: {str(e)}")
             raise
     
+    def analysis_region(self, image: np.ndarray) -> Optional[np.ndarray]:
+        """Region the live pipeline analyzes in an RGB image
+
+        The lit field of view for dermoscopy, the detected face crop for
+        selfies; None when a selfie has no face.
+        """
+        box = self.analysis_box(image)
+        if box is None:
+            return None
+        x0, y0, x1, y1 = box
+        return image[y0:y1, x0:x1]
+    
+    def analysis_box(self, image: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+        """(x0, y0, x1, y1) of ``analysis_region`` in ``image``; None when a selfie has no face"""
+        route = self.image_router.route(image) if self.image_router is not None else None
+        if route is not None and route.image_type == CLINICAL:
+            return self._field_of_view_box(image)
+        _, landmarks = self._detect_face(image)
+        if landmarks is None:
+            return None
+        h, w = image.shape[:2]
+        return _face_box(landmarks, w, h)
+    
     def _bytes_to_image(self, image_data: bytes) -> np.ndarray:
         """Convert bytes to OpenCV image"""
         nparr = np.frombuffer(image_data, np.uint8)
         image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
     
+    def _field_of_view(self, image: np.ndarray) -> np.ndarray:
+        """Crop a dermoscopy image to the lit field inside the vignette"""
+        x0, y0, x1, y1 = self._field_of_view_box(image)
+        return image[y0:y1, x0:x1]
+    
+    def _field_of_view_box(self, image: np.ndarray) -> Tuple[int, int, int, int]:
+        h, w = image.shape[:2]
+        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        ys, xs = np.nonzero(gray > 40)
+        if len(xs) == 0:
+            return 0, 0, w, h
+        # Inset the bounding box so the dark rim does not count as skin
+        x0, x1, y0, y1 = int(xs.min()), int(xs.max()) + 1, int(ys.min()), int(ys.max()) + 1
+        inset_x, inset_y = int((x1 - x0) * 0.15), int((y1 - y0) * 0.15)
+        box = (x0 + inset_x, y0 + inset_y, x1 - inset_x, y1 - inset_y)
+        return box if box[2] > box[0] and box[3] > box[1] else (0, 0, w, h)
+    
     def _detect_face(self, image: np.ndarray) -> Tuple[Optional[np.ndarray], Optional[List[Dict]]]:
-        """Detect face and extract region with landmarks"""
-        results = self.face_mesh.process(image)
+        """Detect face and extract region with landmarks
+        
+        With the YuNet front stage, images without a face are rejected at
+        YuNet's cost and FaceMesh only sees the resized face crop.
+        Landmarks are always normalized to the full image.
+        """
+        h, w = image.shape[:2]
+        x0, y0, crop_w, crop_h = 0, 0, w, h
+        mesh_input = image
+        
+        if self.face_detector is not None:
+            box = self.face_detector.detect(image)
+            if box is None:
+                return None, None
+            x0, y0, x1, y1 = box.expanded(FACE_CROP_MARGIN, w, h)
+            crop_w, crop_h = x1 - x0, y1 - y0
+            mesh_input = image[y0:y1, x0:x1]
+            scale = FACE_MESH_CROP_SIZE / max(crop_w, crop_h)
+            if scale < 1.0:
+                mesh_input = cv2.resize(
+                    mesh_input, (int(crop_w * scale), int(crop_h * scale)), interpolation=cv2.INTER_AREA
+                )
+        
+        results = self.face_mesh.process(np.ascontiguousarray(mesh_input))
         
         if not results.multi_face_landmarks:
             return None, None
         
         # Get face landmarks
         face_landmarks = results.multi_face_landmarks[0]
-        h, w = image.shape[:2]
         
-        # Extract landmarks as list of dicts
+        # Extract landmarks as list of dicts, mapped from crop to full image
         landmarks_list = [
-            {"x": landmark.x, "y": landmark.y, "z": landmark.z}
+            {
+                "x": (x0 + landmark.x * crop_w) / w,
+                "y": (y0 + landmark.y * crop_h) / h,
+                "z": landmark.z * crop_w / w,
+            }
             for landmark in face_landmarks.landmark
         ]
         
         # Get bounding box from landmarks
-        x_coords = [int(lm.x * w) for lm in face_landmarks.landmark]
-        y_coords = [int(lm.y * h) for lm in face_landmarks.landmark]
-        
-        x_min, x_max = max(0, min(x_coords) - 20), min(w, max(x_coords) + 20)
-        y_min, y_max = max(0, min(y_coords) - 20), min(h, max(y_coords) + 20)
-        
+        x_min, y_min, x_max, y_max = _face_box(landmarks_list, w, h)
         face_region = image[y_min:y_max, x_min:x_max]
         
         return face_region, landmarks_list
     
-    def _analyze_skin_tone(self, face_region: np.ndarray) -> str:
-        """Analyze skin tone using color analysis"""
-        # Convert to LAB color space for better skin tone analysis
-        lab = cv2.cvtColor(face_region, cv2.COLOR_RGB2LAB)
-        l_channel = lab[:, :, 0]
-        
-        mean_lightness = np.mean(l_channel)
-        
-        if mean_lightness > 200:
-            return "very_light"
-        elif mean_lightness > 170:
-            return "light"
-        elif mean_lightness > 140:
-            return "medium"
-        elif mean_lightness > 110:
-            return "medium_dark"
-        else:
-            return "dark"
+    def __del__(self):
+        """Cleanup resources"""
+        if getattr(self, '_face_mesh', None) is not None:
+            self._face_mesh.close()
+        logger.info("Skin Analysis Service resources released")
+
+
+def _face_box(landmarks: List[Dict[str, float]], w: int, h: int) -> Tuple[int, int, int, int]:
+    """Bounding box of normalized landmarks with a 20px margin, clipped to the image"""
+    x_coords = [int(lm["x"] * w) for lm in landmarks]
+    y_coords = [int(lm["y"] * h) for lm in landmarks]
+    return (
+        max(0, min(x_coords) - 20), max(0, min(y_coords) - 20),
+        min(w, max(x_coords) + 20), min(h, max(y_coords) + 20),
+    )
+
+
+# Shared planes
+
+@SKIN_ANALYZERS.register("gray", inputs=("image",), plane=True)
+def _gray(image: np.ndarray) -> np.ndarray:
+    return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+
+
+@SKIN_ANALYZERS.register("lab", inputs=("image",), plane=True)
+def _lab(image: np.ndarray) -> np.ndarray:
+    # LAB separates lightness, which tone and dark-circle analysis need
+    return cv2.cvtColor(image, cv2.COLOR_RGB2LAB)
+
+
+@SKIN_ANALYZERS.register("hsv", inputs=("image",), plane=True)
+def _hsv(image: np.ndarray) -> np.ndarray:
+    return cv2.cvtColor(image, cv2.COLOR_RGB2HSV)
+
+
+@SKIN_ANALYZERS.register("laplacian_var", inputs=("gray",), plane=True)
+def _laplacian_var(gray: np.ndarray) -> float:
+    # Used by both texture and confidence
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+# Analyzers
+
+@SKIN_ANALYZERS.register("skin_tone", inputs=("lab",))
+def analyze_skin_tone(lab: np.ndarray) -> str:
+    """Analyze skin tone using color analysis"""
+    mean_lightness = np.mean(lab[:, :, 0])
     
-    def _analyze_texture(self, face_region: np.ndarray) -> float:
-        """Analyze skin texture quality (0-1, higher is better)"""
-        gray = cv2.cvtColor(face_region, cv2.COLOR_RGB2GRAY)
-        
-        # Use Laplacian variance for texture analysis
-        laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
-        
-        # Normalize to 0-1 range (higher variance = more texture details)
-        # Inverse for quality score (smoother = better)
-        texture_quality = 1.0 - min(laplacian_var / 1000.0, 1.0)
-        
-        return float(texture_quality)
+    if mean_lightness > 200:
+        return "very_light"
+    elif mean_lightness > 170:
+        return "light"
+    elif mean_lightness > 140:
+        return "medium"
+    elif mean_lightness > 110:
+        return "medium_dark"
+    else:
+        return "dark"
+
+
+@SKIN_ANALYZERS.register("texture", inputs=("laplacian_var",))
+def analyze_texture(laplacian_var: float) -> float:
+    """Analyze skin texture quality (0-1, higher is better)"""
+    # Normalize to 0-1 range (higher variance = more texture details)
+    # Inverse for quality score (smoother = better)
+    texture_quality = 1.0 - min(laplacian_var / 1000.0, 1.0)
     
-    def _detect_acne(self, face_region: np.ndarray) -> Tuple[bool, str]:
-        """Detect acne and determine severity"""
-        # Convert to HSV for better color detection
-        hsv = cv2.cvtColor(face_region, cv2.COLOR_RGB2HSV)
-        
-        # Red/pink color range for acne detection
-        lower_red1 = np.array([0, 50, 50])
-        upper_red1 = np.array([10, 255, 255])
-        lower_red2 = np.array([160, 50, 50])
-        upper_red2 = np.array([180, 255, 255])
-        
-        mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-        mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-        red_mask = cv2.bitwise_or(mask1, mask2)
-        
-        # Count red pixels (potential acne)
-        red_pixels = np.sum(red_mask > 0)
-        total_pixels = face_region.shape[0] * face_region.shape[1]
-        acne_ratio = red_pixels / total_pixels
-        
-        if acne_ratio < 0.01:
-            return False, "none"
-        elif acne_ratio < 0.03:
-            return True, "mild"
-        elif acne_ratio < 0.06:
-            return True, "moderate"
-        else:
-            return True, "severe"
+    return float(texture_quality)
+
+
+@SKIN_ANALYZERS.register("acne", inputs=("hsv",))
+def detect_acne(hsv: np.ndarray) -> Tuple[bool, str]:
+    """Detect acne and determine severity"""
+    # Red/pink color range for acne detection
+    lower_red1 = np.array([0, 50, 50])
+    upper_red1 = np.array([10, 255, 255])
+    lower_red2 = np.array([160, 50, 50])
+    upper_red2 = np.array([180, 255, 255])
     
-    def _detect_wrinkles(self, face_region: np.ndarray) -> Tuple[bool, float]:
-        """Detect wrinkles using edge detection"""
-        gray = cv2.cvtColor(face_region, cv2.COLOR_RGB2GRAY)
-        
-        # Apply Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        
-        # Detect edges (wrinkles appear as fine lines)
-        edges = cv2.Canny(blurred, 30, 100)
-        
-        # Calculate wrinkle density
-        edge_pixels = np.sum(edges > 0)
-        total_pixels = face_region.shape[0] * face_region.shape[1]
-        wrinkle_density = edge_pixels / total_pixels
-        
-        wrinkles_detected = wrinkle_density > 0.05
-        
-        return wrinkles_detected, float(wrinkle_density)
+    mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
+    mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
+    red_mask = cv2.bitwise_or(mask1, mask2)
     
-    def _detect_dark_circles(
-        self, face_region: np.ndarray, landmarks: Optional[List[Dict]]
-    ) -> Tuple[bool, float]:
-        """Detect dark circles under eyes"""
-        if landmarks is None or len(landmarks) < 200:
-            return False, 0.0
-        
-        # Approximate eye region (MediaPipe landmarks)
-        # Under-eye region is typically darker
-        h, w = face_region.shape[:2]
-        
-        # Convert to LAB for luminance analysis
-        lab = cv2.cvtColor(face_region, cv2.COLOR_RGB2LAB)
-        l_channel = lab[:, :, 0]
-        
-        # Under-eye region (approximate)
-        eye_region_y_start = int(h * 0.4)
-        eye_region_y_end = int(h * 0.6)
-        under_eye_region = l_channel[eye_region_y_start:eye_region_y_end, :]
-        
-        under_eye_darkness = 255 - np.mean(under_eye_region)
-        face_darkness = 255 - np.mean(l_channel)
-        
-        # Calculate relative darkness
-        if face_darkness > 0:
-            darkness_ratio = under_eye_darkness / face_darkness
-            dark_circles_detected = darkness_ratio > 1.15
-            severity = min((darkness_ratio - 1.0) * 2.0, 1.0)
-        else:
-            dark_circles_detected = False
-            severity = 0.0
-        
-        return dark_circles_detected, float(severity)
+    # Count red pixels (potential acne)
+    red_pixels = np.sum(red_mask > 0)
+    total_pixels = hsv.shape[0] * hsv.shape[1]
+    acne_ratio = red_pixels / total_pixels
     
-    def _determine_skin_type(self, face_region: np.ndarray, texture_quality: float) -> str:
-        """Determine skin type (oily, dry, combination, normal)"""
-        # Convert to HSV
-        hsv = cv2.cvtColor(face_region, cv2.COLOR_RGB2HSV)
-        
-        # Analyze saturation and value
-        saturation = np.mean(hsv[:, :, 1])
-        value = np.mean(hsv[:, :, 2])
-        
-        # Higher saturation often indicates oily skin
-        # Lower value with low texture quality indicates dry skin
-        if saturation > 100 and value > 150:
-            return "oily"
-        elif saturation < 60 and texture_quality < 0.4:
-            return "dry"
-        elif saturation > 80:
-            return "combination"
-        else:
-            return "normal"
+    if acne_ratio < 0.01:
+        return False, "none"
+    elif acne_ratio < 0.03:
+        return True, "mild"
+    elif acne_ratio < 0.06:
+        return True, "moderate"
+    else:
+        return True, "severe"
+
+
+@SKIN_ANALYZERS.register(WRINKLES, inputs=("gray",))
+def detect_wrinkles(gray: np.ndarray) -> Tuple[bool, float]:
+    """Detect wrinkles using edge detection"""
+    # Apply Gaussian blur to reduce noise
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
     
-    def _calculate_confidence(self, face_region: np.ndarray) -> float:
-        """Calculate confidence score for the analysis"""
-        # Basic confidence based on image quality
-        if face_region.size == 0:
-            return 0.0
-        
-        # Check image quality metrics
-        h, w = face_region.shape[:2]
-        pixels = h * w
-        
-        # Image should be reasonably sized
-        if pixels < 10000:  # Less than 100x100
-            size_score = 0.5
-        elif pixels < 50000:  # Less than ~224x224
-            size_score = 0.7
-        else:
-            size_score = 1.0
-        
-        # Check sharpness using Laplacian
-        gray = cv2.cvtColor(face_region, cv2.COLOR_RGB2GRAY)
-        laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
-        
-        # Higher variance = sharper image
-        if laplacian_var < 50:
-            sharpness_score = 0.5
-        elif laplacian_var < 100:
-            sharpness_score = 0.7
-        else:
-            sharpness_score = 1.0
-        
-        confidence = (size_score + sharpness_score) / 2.0
-        
-        return float(confidence)
+    # Detect edges (wrinkles appear as fine lines)
+    edges = cv2.Canny(blurred, 30, 100)
     
-    def __del__(self):
-        """Cleanup resources"""
-        if hasattr(self, 'face_detection'):
-            self.face_detection.close()
-        if hasattr(self, 'face_mesh'):
-            self.face_mesh.close()
-        logger.info("Skin Analysis Service resources released")
+    # Calculate wrinkle density
+    edge_pixels = np.sum(edges > 0)
+    total_pixels = gray.shape[0] * gray.shape[1]
+    wrinkle_density = edge_pixels / total_pixels
+    
+    wrinkles_detected = wrinkle_density > 0.05
+    
+    return wrinkles_detected, float(wrinkle_density)
+
+
+@SKIN_ANALYZERS.register(DARK_CIRCLES, inputs=("lab", "landmarks"))
+def detect_dark_circles(lab: np.ndarray, landmarks: Optional[List[Dict]]) -> Tuple[bool, float]:
+    """Detect dark circles under eyes"""
+    if landmarks is None or len(landmarks) < 200:
+        return False, 0.0
+    
+    # Approximate eye region (MediaPipe landmarks)
+    # Under-eye region is typically darker
+    h = lab.shape[0]
+    l_channel = lab[:, :, 0]
+    
+    # Under-eye region (approximate)
+    eye_region_y_start = int(h * 0.4)
+    eye_region_y_end = int(h * 0.6)
+    under_eye_region = l_channel[eye_region_y_start:eye_region_y_end, :]
+    
+    under_eye_darkness = 255 - np.mean(under_eye_region)
+    face_darkness = 255 - np.mean(l_channel)
+    
+    # Calculate relative darkness
+    if face_darkness > 0:
+        darkness_ratio = under_eye_darkness / face_darkness
+        dark_circles_detected = darkness_ratio > 1.15
+        severity = min((darkness_ratio - 1.0) * 2.0, 1.0)
+    else:
+        dark_circles_detected = False
+        severity = 0.0
+    
+    return dark_circles_detected, float(severity)
+
+
+@SKIN_ANALYZERS.register("skin_type", inputs=("hsv", "texture"))
+def determine_skin_type(hsv: np.ndarray, texture: float) -> str:
+    """Determine skin type (oily, dry, combination, normal)"""
+    # Analyze saturation and value
+    saturation = np.mean(hsv[:, :, 1])
+    value = np.mean(hsv[:, :, 2])
+    
+    # Higher saturation often indicates oily skin
+    # Lower value with low texture quality indicates dry skin
+    if saturation > 100 and value > 150:
+        return "oily"
+    elif saturation < 60 and texture < 0.4:
+        return "dry"
+    elif saturation > 80:
+        return "combination"
+    else:
+        return "normal"
+
+
+@SKIN_ANALYZERS.register("confidence", inputs=("image", "laplacian_var"))
+def calculate_confidence(image: np.ndarray, laplacian_var: float) -> float:
+    """Calculate confidence score for the analysis"""
+    # Basic confidence based on image quality
+    if image.size == 0:
+        return 0.0
+    
+    # Check image quality metrics
+    h, w = image.shape[:2]
+    pixels = h * w
+    
+    # Image should be reasonably sized
+    if pixels < 10000:  # Less than 100x100
+        size_score = 0.5
+    elif pixels < 50000:  # Less than ~224x224
+        size_score = 0.7
+    else:
+        size_score = 1.0
+    
+    # Higher Laplacian variance = sharper image
+    if laplacian_var < 50:
+        sharpness_score = 0.5
+    elif laplacian_var < 100:
+        sharpness_score = 0.7
+    else:
+        sharpness_score = 1.0
+    
+    confidence = (size_score + sharpness_score) / 2.0
+    
+    return float(confidence)
 
 
 # Singleton instance
@@ -323,5 +536,13 @@ def get_skin_analysis_service() -> SkinAnalysisService:
     """Get or create singleton instance of SkinAnalysisService"""
     global _skin_analysis_service
     if _skin_analysis_service is None:
-        _skin_analysis_service = SkinAnalysisService()
+        gate = get_image_quality_gate() if settings.QUALITY_GATE_ENABLED else None
+        face_detector = None
+        if settings.FACE_DETECTOR == "yunet":
+            face_detector = create_face_detector(settings.YUNET_MODEL_PATH, settings.YUNET_AUTO_DOWNLOAD)
+        image_router = get_pipeline_router() if settings.IMAGE_TYPE_ROUTING_ENABLED else None
+        _skin_analysis_service = SkinAnalysisService(
+            quality_gate=gate, face_detector=face_detector, image_router=image_router,
+            executor=get_analyzer_pool(),
+        )
     return _skin_analysis_service
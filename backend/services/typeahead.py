@@ -0,0 +1,284 @@
+"""
+Typeahead Index (sorted arrays)
+Prefix suggestions over product names, brands and ingredient names,
+answered from memory without touching the database. Every entry is
+indexed under its full normalised text and under each later word, so
+"clean" finds "CeraVe Foaming Facial Cleanser". Keys are UTF-8 bytes
+packed into one blob with int32 offsets and sorted, so a prefix is two
+binary searches; the best entries of the matched range are taken by
+weight, and the answers for prefixes of up to three characters (the
+widest ranges) are precomputed at build time.
+
+The built index is immutable. ``LiveTypeahead`` layers a small index of
+changed entries over it, shadowing the entries they replace, until the
+next full rebuild.
+"""
+
+import math
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+PRODUCT = "product"
+BRAND = "brand"
+INGREDIENT = "ingredient"
+KINDS = (PRODUCT, BRAND, INGREDIENT)
+
+# Later words indexed per entry ("a b c" -> "a b c", "b c", "c")
+MAX_WORD_STARTS = 6
+# Prefix lengths whose top suggestions are precomputed
+PRECOMPUTED_CHARS = 3
+# Suggestions kept per precomputed prefix (above the largest served limit)
+PRECOMPUTED_K = 40
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and collapse everything but letters and digits to single spaces"""
+    folded = text.lower()
+    if not folded.isascii():
+        folded = "".join(c for c in unicodedata.normalize("NFKD", folded) if not unicodedata.combining(c))
+    return " ".join(re.findall(r"[^\W_]+", folded))
+
+
+def suggestion_weight(popularity: float, rating: Optional[float] = None, rating_scale: float = 5.0) -> float:
+    """Rank weight from a usage count and an optional rating out of ``rating_scale``"""
+    return math.log1p(max(popularity, 0.0)) + (rating or 0.0) / rating_scale
+
+
+@dataclass(frozen=True)
+class TypeaheadEntry:
+    """One suggestable item: ``ref`` identifies it within its kind"""
+    text: str
+    kind: str
+    ref: str
+    weight: float = 0.0
+
+
+@dataclass
+class Suggestion:
+    text: str
+    kind: str
+    ref: str
+    score: float
+
+
+class StringTable:
+    """Strings packed into one UTF-8 blob with int32 offsets"""
+
+    def __init__(self, blob: bytes, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings: Iterable[str]) -> "StringTable":
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int32)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(b"".join(encoded), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def raw(self, i: int) -> bytes:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]]
+
+    def __getitem__(self, i: int) -> str:
+        return self.raw(i).decode("utf-8")
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.blob) + self.offsets.nbytes
+
+
+class TypeaheadIndex:
+    """Immutable prefix index; build with ``TypeaheadIndex.build``"""
+
+    def __init__(
+        self,
+        keys: StringTable,
+        key_entry: np.ndarray,
+        texts: StringTable,
+        refs: StringTable,
+        kinds: np.ndarray,
+        weights: np.ndarray,
+    ):
+        self.keys = keys
+        self.key_entry = key_entry
+        self.texts = texts
+        self.refs = refs
+        self.kinds = kinds
+        self.weights = weights
+        # Weights in key order, for top-k over a matched key range
+        self.key_weights = weights[key_entry]
+        self._precomputed = self._precompute()
+
+    @classmethod
+    def build(cls, entries: Sequence[TypeaheadEntry]) -> "TypeaheadIndex":
+        keyed: List[Tuple[bytes, int]] = []
+        for i, entry in enumerate(entries):
+            words = normalize(entry.text).split(" ")
+            for start in range(min(len(words), MAX_WORD_STARTS)):
+                key = " ".join(words[start:])
+                if key:
+                    keyed.append((key.encode("utf-8"), i))
+        keyed.sort()
+
+        offsets = np.zeros(len(keyed) + 1, dtype=np.int32)
+        np.cumsum([len(key) for key, _ in keyed], out=offsets[1:])
+        return cls(
+            keys=StringTable(b"".join(key for key, _ in keyed), offsets),
+            key_entry=np.fromiter((i for _, i in keyed), dtype=np.int32, count=len(keyed)),
+            texts=StringTable.from_strings(entry.text for entry in entries),
+            refs=StringTable.from_strings(entry.ref for entry in entries),
+            kinds=np.fromiter((KINDS.index(entry.kind) for entry in entries), dtype=np.uint8, count=len(entries)),
+            weights=np.fromiter((entry.weight for entry in entries), dtype=np.float32, count=len(entries)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the arrays and string blobs"""
+        arrays = (self.key_entry, self.kinds, self.weights, self.key_weights, *self._precomputed.values())
+        strings = self.keys.nbytes + self.texts.nbytes + self.refs.nbytes
+        return strings + sum(a.nbytes for a in arrays)
+
+    def _bisect(self, prefix: bytes) -> int:
+        """First key position not below ``prefix``"""
+        lo, hi = 0, len(self.keys)
+        blob, offsets = self.keys.blob, self.keys.offsets
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if blob[offsets[mid]:offsets[mid + 1]] < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def key_range(self, prefix: str) -> Tuple[int, int]:
+        """Key positions ``[lo, hi)`` starting with the normalised prefix"""
+        encoded = prefix.encode("utf-8")
+        # 0xFF never occurs in UTF-8, so it sorts after every continuation
+        return self._bisect(encoded), self._bisect(encoded + b"\xff")
+
+    def _top_entries(self, lo: int, hi: int, count: int) -> List[int]:
+        """Distinct entries of the key range by descending weight, at most ``count``"""
+        span = hi - lo
+        if span <= 0:
+            return []
+        weights = self.key_weights[lo:hi]
+        # Room for an entry matching under several of its keys
+        take = min(span, count * MAX_WORD_STARTS)
+        if take < span:
+            positions = np.argpartition(-weights, take - 1)[:take]
+        else:
+            positions = np.arange(span)
+        positions = positions[np.lexsort((positions, -weights[positions]))]
+
+        entries: List[int] = []
+        seen: Set[int] = set()
+        for entry in self.key_entry[lo + positions]:
+            entry = int(entry)
+            if entry not in seen:
+                seen.add(entry)
+                entries.append(entry)
+                if len(entries) == count:
+                    break
+        return entries
+
+    def _precompute(self) -> Dict[bytes, np.ndarray]:
+        precomputed: Dict[bytes, np.ndarray] = {}
+        for length in range(1, PRECOMPUTED_CHARS + 1):
+            position = 0
+            while position < len(self.keys):
+                prefix = self.keys.raw(position)[:length]
+                if len(prefix) < length:
+                    position += 1
+                    continue
+                end = self._bisect(prefix + b"\xff")
+                if end - position > PRECOMPUTED_K:
+                    precomputed[prefix] = np.array(self._top_entries(position, end, PRECOMPUTED_K), dtype=np.int32)
+                position = end
+        return precomputed
+
+    def entry_ref(self, entry: int) -> Tuple[str, str]:
+        return KINDS[self.kinds[entry]], self.refs[entry]
+
+    def suggestion(self, entry: int) -> Suggestion:
+        return Suggestion(self.texts[entry], KINDS[self.kinds[entry]], self.refs[entry], float(self.weights[entry]))
+
+    def candidates(self, prefix: str, count: int) -> List[int]:
+        """Best ``count`` entries for an already normalised prefix"""
+        if not prefix:
+            return []
+        precomputed = self._precomputed.get(prefix.encode("utf-8"))
+        if precomputed is not None and count <= len(precomputed):
+            return precomputed[:count].tolist()
+        return self._top_entries(*self.key_range(prefix), count)
+
+    def suggest(self, query: str, limit: int = 10) -> List[Suggestion]:
+        """Best ``limit`` entries with a word starting with ``query``"""
+        return [self.suggestion(entry) for entry in self.candidates(normalize(query), limit)]
+
+
+_EMPTY = TypeaheadIndex.build([])
+
+
+class LiveTypeahead:
+    """A full index plus an overlay of entries changed since it was built
+
+    Overlay entries shadow base entries of the same kind and ref, and
+    removed refs are hidden, so updates are visible immediately; a full
+    rebuild (``replace``) folds them back into one index.
+    """
+
+    def __init__(self, base: Optional[TypeaheadIndex] = None):
+        self._lock = threading.Lock()
+        self._base = base or _EMPTY
+        self._overlay = _EMPTY
+        self._changed: Dict[Tuple[str, str], Optional[TypeaheadEntry]] = {}
+
+    @property
+    def pending(self) -> int:
+        """Changes not yet folded into the base index"""
+        return len(self._changed)
+
+    def replace(self, base: TypeaheadIndex) -> None:
+        with self._lock:
+            self._base, self._overlay, self._changed = base, _EMPTY, {}
+
+    def apply(self, entries: Iterable[TypeaheadEntry] = (), removed: Iterable[Tuple[str, str]] = ()) -> None:
+        """Upsert ``entries`` and hide ``removed`` (kind, ref) pairs"""
+        with self._lock:
+            changed = dict(self._changed)
+            for entry in entries:
+                changed[(entry.kind, entry.ref)] = entry
+            for key in removed:
+                changed[key] = None
+            overlay = TypeaheadIndex.build([entry for entry in changed.values() if entry is not None])
+            self._overlay, self._changed = overlay, changed
+
+    def suggest(self, query: str, limit: int = 10) -> List[Suggestion]:
+        with self._lock:
+            base, overlay, changed = self._base, self._overlay, self._changed
+        prefix = normalize(query)
+        merged = [overlay.suggestion(entry) for entry in overlay.candidates(prefix, limit)]
+        # Shadowed base entries are skipped, so ask for enough to refill
+        for entry in base.candidates(prefix, limit + min(len(changed), PRECOMPUTED_K)):
+            if changed and base.entry_ref(entry) in changed:
+                continue
+            merged.append(base.suggestion(entry))
+        merged.sort(key=lambda suggestion: -suggestion.score)
+        return merged[:limit]
+
+    @property
+    def nbytes(self) -> int:
+        return self._base.nbytes + self._overlay.nbytes
+
+    def __len__(self) -> int:
+        return len(self._base) + len(self._overlay)
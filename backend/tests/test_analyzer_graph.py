@@ -0,0 +1,114 @@
+# Unit tests for the concurrent analyzer graph
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+
+from services.analyzer_graph import AnalyzerGraph
+from services.image_type_router import ImageTypeClassifier, PipelineRouter
+from services.skin_analysis_service import SKIN_ANALYZERS, SkinAnalysisService
+from tests.test_image_type_router import _dermoscopy
+
+
+@pytest.fixture
+def pool():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield executor
+
+
+def _face(side=256):
+    rng = np.random.default_rng(0)
+    image = np.clip(np.full((side, side, 3), (200, 150, 120)) + rng.normal(0, 12, (side, side, 3)), 0, 255)
+    return image.astype(np.uint8)
+
+
+class TestAnalyzerGraph:
+    """Test suite for AnalyzerGraph"""
+
+    def test_nodes_run_after_their_inputs(self):
+        graph = AnalyzerGraph()
+        graph.register("double", inputs=("x",))(lambda x: x * 2)
+        graph.register("total", inputs=("double", "x"))(lambda double, x: double + x)
+
+        run = graph.run({"x": 3})
+
+        assert run.values["total"] == 9
+        assert set(run.timings_ms) == {"double", "total"}
+
+    def test_independent_nodes_overlap(self, pool):
+        graph = AnalyzerGraph()
+        for name in ("a", "b", "c"):
+            graph.register(name, inputs=("x",))(lambda x: time.sleep(0.1))
+
+        run = graph.run({"x": None}, pool)
+
+        assert run.wall_ms < 0.2 * 1000
+        assert run.serial_ms >= 0.3 * 1000
+
+    def test_skipped_node_blocks_its_dependents(self):
+        graph = AnalyzerGraph()
+        graph.register("plane", inputs=("x",), plane=True)(lambda x: x)
+        graph.register("a", inputs=("plane",))(lambda plane: 1)
+        graph.register("b", inputs=("a",))(lambda a: 2)
+        graph.register("needs_y", inputs=("y",))(lambda y: 3)
+
+        run = graph.run({"x": 0}, skip=["a"])
+
+        assert sorted(run.skipped) == ["a", "b", "needs_y"]
+        assert "plane" in run.values
+
+    def test_cycle_and_duplicate_registration_are_rejected(self):
+        graph = AnalyzerGraph()
+        graph.register("a", inputs=("b",))(lambda b: b)
+        graph.register("b", inputs=("a",))(lambda a: a)
+
+        with pytest.raises(ValueError):
+            graph.run({})
+        with pytest.raises(ValueError):
+            graph.register("a")(lambda: None)
+
+    def test_node_errors_propagate(self, pool):
+        graph = AnalyzerGraph()
+
+        @graph.register("broken", inputs=("x",))
+        def broken(x):
+            raise RuntimeError("bad plane")
+
+        with pytest.raises(RuntimeError):
+            graph.run({"x": 1}, pool)
+
+    def test_concurrent_matches_inline_for_skin_analyzers(self, pool):
+        seeds = {"image": _face(), "landmarks": None}
+        used = set()
+        graph = SKIN_ANALYZERS.copy()
+        graph.register("thread", inputs=("image",))(lambda image: used.add(threading.current_thread().name))
+
+        inline = graph.run(seeds)
+        concurrent = graph.run(seeds, pool)
+
+        for name in ("skin_tone", "texture", "acne", "wrinkles", "dark_circles", "skin_type", "confidence"):
+            assert concurrent.values[name] == inline.values[name]
+        assert any(name != threading.current_thread().name for name in used)
+        assert graph.stats()["runs"] == 2
+
+
+class TestAnalyzerPlugins:
+    """Test suite for analyzer plugins in SkinAnalysisService"""
+
+    def test_plugin_output_and_timings_reach_the_result(self, pool):
+        graph = SKIN_ANALYZERS.copy()
+        graph.register("mean_lightness", inputs=("lab",))(lambda lab: float(lab[:, :, 0].mean()))
+        service = SkinAnalysisService(
+            image_router=PipelineRouter(ImageTypeClassifier()), analyzers=graph, executor=pool
+        )
+        ok, encoded = cv2.imencode(".jpg", cv2.cvtColor(_dermoscopy(), cv2.COLOR_RGB2BGR))
+
+        result = asyncio.run(service.analyze_skin(encoded.tobytes()))
+
+        assert set(result.plugin_results) == {"mean_lightness"}
+        assert "mean_lightness" in result.analyzer_timings_ms and "lab" in result.analyzer_timings_ms
+        assert "mean_lightness" not in SKIN_ANALYZERS
@@ -0,0 +1,74 @@
+# Unit tests for burst capture frame selection
+import cv2
+import numpy as np
+
+from services.burst_selection import (
+    decode_video_frames,
+    select_best_decoded_frame,
+    select_best_encoded_frame,
+    split_mjpeg,
+)
+from services.image_quality_gate import ImageQualityGate, QualityThresholds
+
+
+def _skin_frame(blur=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(-40, 40, (480, 640, 1))
+    frame = np.clip(np.array([200, 150, 120]) + noise, 0, 255).astype(np.uint8)
+    return cv2.GaussianBlur(frame, (0, 0), blur) if blur else frame
+
+
+def _jpeg(frame):
+    return cv2.imencode(".jpg", cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))[1].tobytes()
+
+
+class TestBurstSelection:
+    """Test suite for best-frame selection"""
+
+    def setup_method(self):
+        self.gate = ImageQualityGate(QualityThresholds())
+
+    def test_sharpest_frame_selected(self):
+        frames = [_skin_frame(blur=6), _skin_frame(), _skin_frame(blur=2)]
+
+        best, scored = select_best_encoded_frame(self.gate, [_jpeg(f) for f in frames])
+
+        assert best == 1
+        assert scored[1].score > scored[2].score > scored[0].score
+
+    def test_passing_frame_beats_rejected_frame(self):
+        dark = (_skin_frame() * 0.1).astype(np.uint8)
+        soft = _skin_frame(blur=1.5)
+
+        best, scored = select_best_decoded_frame(self.gate, [dark, soft])
+
+        assert not scored[0].report.passed
+        assert best == 1
+
+    def test_scoring_does_not_count_towards_gate_stats(self):
+        select_best_encoded_frame(self.gate, [_jpeg(_skin_frame()), b"garbage"])
+
+        assert self.gate.stats()["checked"] == 0
+
+    def test_split_multipart_mjpeg(self):
+        jpegs = [_jpeg(_skin_frame(seed=i)) for i in range(3)]
+        stream = b"".join(
+            b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + j + b"\r\n" for j in jpegs
+        ) + b"--frame--\r\n"
+
+        assert split_mjpeg(stream, max_frames=8) == jpegs
+        assert len(split_mjpeg(b"".join(jpegs * 4), max_frames=5)) == 5
+
+    def test_decode_video_clip(self, tmp_path):
+        path = str(tmp_path / "burst.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (640, 480))
+        if not writer.isOpened():
+            return  # codec unavailable in this OpenCV build
+        for i in range(12):
+            writer.write(_skin_frame(seed=i))
+        writer.release()
+
+        frames = decode_video_frames(path, max_frames=4)
+
+        assert len(frames) == 4
+        assert frames[0].shape == (480, 640, 3)
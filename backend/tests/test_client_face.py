@@ -0,0 +1,52 @@
+# Unit tests for client-assisted face crop validation
+import pytest
+
+from services.client_face import validate_client_face
+
+YUNET_POINTS = [[0.3, 0.4], [0.7, 0.4], [0.5, 0.55], [0.35, 0.75], [0.65, 0.75]]
+
+
+def _metadata(**overrides):
+    metadata = {"detector": "yunet", "detector_version": "2023mar", "landmarks": YUNET_POINTS}
+    metadata.update(overrides)
+    return metadata
+
+
+class TestClientFace:
+    """Test suite for validate_client_face"""
+
+    def test_valid_crop_skips_server_detection(self):
+        result = validate_client_face(_metadata(), 300, 400)
+
+        assert result.accepted
+        assert result.summary() == {"source": "client", "detector": "yunet@2023mar"}
+        assert result.landmarks[2] == {"x": 0.5, "y": 0.55, "z": 0.0}
+
+    def test_browser_blazeface_crop_is_accepted(self):
+        landmarks = [[0.35, 0.4], [0.65, 0.4], [0.5, 0.55], [0.5, 0.72], [0.1, 0.45], [0.9, 0.45]]
+        result = validate_client_face(_metadata(detector="blazeface", detector_version="0.0.7", landmarks=landmarks), 512, 512)
+
+        assert result.accepted
+        assert result.detector == "blazeface@0.0.7"
+
+    def test_no_metadata_uses_server_detection(self):
+        assert validate_client_face(None, 300, 400).summary() == {"source": "server"}
+
+    @pytest.mark.parametrize("overrides,size,reason", [
+        ({"detector": "homegrown"}, (300, 400), "unsupported detector"),
+        ({"detector_version": ""}, (300, 400), "detector_version"),
+        ({}, (3000, 4000), "crop size"),
+        ({"landmarks": YUNET_POINTS[:4]}, (300, 400), "expected"),
+        ({"landmarks": [[0.3, 0.4], [0.7, 1.4]] + YUNET_POINTS[2:]}, (300, 400), "outside crop"),
+        ({"landmarks": [[0.45, 0.4], [0.5, 0.4]] + YUNET_POINTS[2:]}, (300, 400), "tight face crop"),
+        # A selfie whose face fills half the frame is not a face crop
+        ({"landmarks": [[0.4, 0.4], [0.6, 0.4]] + YUNET_POINTS[2:]}, (300, 400), "tight face crop"),
+        ({"landmarks": list(reversed(YUNET_POINTS))}, (300, 400), "geometry"),
+        ({"landmarks": [["a", "b"]] + YUNET_POINTS[1:]}, (300, 400), "malformed"),
+    ])
+    def test_invalid_metadata_falls_back(self, overrides, size, reason):
+        result = validate_client_face(_metadata(**overrides), *size)
+
+        assert not result.accepted
+        assert reason in result.reason
+        assert result.summary()["source"] == "server"
@@ -0,0 +1,160 @@
+# Unit tests for deadline-aware pipeline variant selection
+import asyncio
+import threading
+
+import pytest
+
+from services.deadline_scheduler import PIPELINE_VARIANTS, DeadlineScheduler, PipelineVariant
+from services.image_type_router import ImageTypeClassifier, PipelineRouter
+from services.skin_analysis_service import SkinAnalysisService
+from tests.test_image_type_router import _dermoscopy
+
+
+def _scheduler(**kwargs):
+    return DeadlineScheduler(initial_full_ms=1000.0, **kwargs)
+
+
+class TestDeadlineScheduler:
+    """Test suite for DeadlineScheduler"""
+
+    def test_idle_scheduler_runs_full_pipeline(self):
+        decision = _scheduler().choose(budget_ms=2000)
+
+        assert decision.variant.name == "full"
+        assert not decision.degraded
+
+    def test_tight_budget_picks_cheaper_variant(self):
+        decision = _scheduler().choose(budget_ms=600)
+
+        # 0.55 x 1000ms fits, the full 1000ms does not
+        assert decision.variant.name == "reduced_resolution"
+        assert decision.degraded
+
+    def test_backlog_degrades_later_requests(self):
+        scheduler = _scheduler(workers=1)
+
+        with scheduler.admit(1500) as first:
+            with scheduler.admit(1500) as second:
+                pass
+
+        assert first.variant.name == "full"
+        # 1000ms predicted wait leaves 500ms: only the cheaper variants fit
+        assert second.predicted_wait_ms == pytest.approx(1000.0)
+        assert second.variant.name == "acne_model_only"
+
+    def test_more_workers_shorten_predicted_wait(self):
+        scheduler = _scheduler(workers=2)
+
+        with scheduler.admit(1500):
+            decision = scheduler.choose(1500)
+
+        assert decision.predicted_wait_ms == pytest.approx(500.0)
+        assert decision.variant.name == "full"
+
+    def test_nothing_fits_falls_back_to_cheapest(self):
+        decision = _scheduler().choose(budget_ms=10)
+
+        assert decision.variant is PIPELINE_VARIANTS[-1]
+
+    def test_measured_times_replace_estimates(self):
+        scheduler = _scheduler()
+        with scheduler.admit(5000) as decision:
+            pass
+
+        assert decision.variant.name == "full"
+        # The mock run took ~0ms, so the full pipeline now fits any budget
+        assert scheduler.choose(budget_ms=50).variant.name == "full"
+
+    def test_stats_report_degraded_share(self):
+        scheduler = _scheduler()
+        with scheduler.admit(1):
+            pass
+        with scheduler.admit(5000):
+            pass
+
+        stats = scheduler.stats()
+        assert stats["requests"] == 2
+        assert stats["degraded"] == 1
+        assert stats["degraded_ratio"] == 0.5
+        assert stats["in_flight"] == 0
+
+    def test_failed_requests_release_backlog(self):
+        scheduler = _scheduler()
+        with pytest.raises(RuntimeError):
+            with scheduler.admit(5000):
+                raise RuntimeError("pipeline crashed")
+
+        assert scheduler.stats()["predicted_wait_ms"] == 0.0
+        assert scheduler.stats()["variants"]["full"]["requests"] == 0
+
+    def test_queued_runs_count_from_admission(self):
+        scheduler = _scheduler(workers=1)
+        release = threading.Event()
+
+        async def scenario():
+            first = asyncio.create_task(scheduler.run(1500, lambda variant: release.wait(5) and variant.name))
+            # The event loop stays free while the first pipeline computes
+            await asyncio.sleep(0.05)
+            second = asyncio.create_task(scheduler.run(1500, lambda variant: variant.name))
+            await asyncio.sleep(0.05)
+            in_flight = scheduler.stats()["in_flight"]
+            release.set()
+            return in_flight, await first, await second
+
+        in_flight, (first, _), (second, decision) = asyncio.run(scenario())
+
+        assert in_flight == 2
+        assert (first, second) == ("full", "acne_model_only")
+        # The second scan waited for the thread; only its own run is learned
+        assert decision.compute_ms < 10 < decision.elapsed_ms
+
+    def test_custom_variants(self):
+        variants = [PipelineVariant("full"), PipelineVariant("tiny", max_side=128, relative_cost=0.1)]
+
+        decision = DeadlineScheduler(variants, initial_full_ms=1000.0).choose(200)
+
+        assert decision.variant.name == "tiny"
+
+
+class _RecordingMLBackend:
+    def __init__(self):
+        self.calls = []
+
+    async def analyze_skin_with_ml(self, face_region, force_full=False, acne_only=False):
+        self.calls.append((face_region.shape, acne_only))
+        self.force_full = force_full
+        skipped = acne_only and not force_full
+        return {"acne_analysis": {}, "condition_analysis": {"skipped": skipped}}
+
+
+class TestVariantIsApplied:
+    """Test suite for running SkinAnalysisService with the scheduler's variant"""
+
+    def test_degraded_variant_reaches_analyzers_and_ml(self):
+        service = SkinAnalysisService(image_router=PipelineRouter(ImageTypeClassifier()))
+        backend = _RecordingMLBackend()
+        scheduler = _scheduler()
+
+        # Only the cheapest variant (0.25 x 1000ms) fits
+        with scheduler.admit(300) as decision:
+            result = asyncio.run(service.analyze_skin(_dermoscopy(), variant=decision.variant, ml_backend=backend))
+
+        (shape, acne_only), = backend.calls
+        assert acne_only and max(shape[:2]) <= decision.variant.max_side
+        assert result.pipeline_variant == "minimal" and result.degraded
+        assert result.ml_analysis["condition_analysis"]["skipped"]
+        # The scheduler learned the measured time of the real run
+        assert scheduler.stats()["variants"]["minimal"]["avg_compute_ms"] > 0
+
+    def test_force_full_overrides_acne_only_variant(self):
+        service = SkinAnalysisService(image_router=PipelineRouter(ImageTypeClassifier()))
+        backend = _RecordingMLBackend()
+
+        with _scheduler().admit(300) as decision:
+            result = asyncio.run(service.analyze_skin(
+                _dermoscopy(), variant=decision.variant, ml_backend=backend, force_full=True
+            ))
+
+        assert decision.variant.ml_acne_only and backend.force_full
+        assert result.pipeline_variant == "minimal"
+        assert not result.ml_analysis["condition_analysis"]["skipped"]
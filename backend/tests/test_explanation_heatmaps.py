@@ -0,0 +1,193 @@
+# Unit tests for lazy, cached Grad-CAM heatmaps
+import asyncio
+import io
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services.explanation_heatmaps import (
+    HeatmapRequest,
+    HeatmapService,
+    HeatmapUnavailable,
+    ml_grad_cam,
+    render_overlay,
+)
+from app.services.media_store import LocalMediaBackend, MediaStore
+from services import inference_worker
+from services.inference_worker import InferenceWorkerError, InferenceWorkerUnavailable
+from services.ml_inference_service import AcneBinaryModel, MLInferenceService, OtherConditionGAPModel
+
+
+class CountingExplainer:
+    """Stand-in explainer recording the batches it was asked for"""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, model, images, targets):
+        self.batches.append((model, len(images)))
+        self.shapes = [image.shape for image in images]
+        cams = np.stack([np.linspace(0, 1, 49, dtype=np.float32).reshape(7, 7)] * len(images))
+        return cams, [t or "acne" for t in targets]
+
+
+def _store(tmp_path, count=3):
+    store = MediaStore(LocalMediaBackend(str(tmp_path)))
+    digests = []
+    for i in range(count):
+        buf = io.BytesIO()
+        Image.new("RGB", (400, 300), (180, 120 + i * 20, 100)).save(buf, format="JPEG")
+        digests.append(asyncio.run(store.save(buf.getvalue())).digest)
+    return store, digests
+
+
+def _service(store, explainer, **kwargs):
+    return HeatmapService(store, explainer=explainer, overlay_side=128, **kwargs)
+
+
+class TestExplanationHeatmaps:
+    """Test suite for HeatmapService"""
+
+    def test_first_request_generates_then_cache_serves(self, tmp_path):
+        store, digests = _store(tmp_path, 1)
+        explainer = CountingExplainer()
+        service = _service(store, explainer)
+
+        first = asyncio.run(service.get(HeatmapRequest(digests[0])))
+        second = asyncio.run(service.get(HeatmapRequest(digests[0])))
+
+        assert first.generated and not second.generated
+        assert first.etag == second.etag
+        assert explainer.batches == [("acne", 1)]
+        overlay = cv2.imdecode(np.frombuffer(store.backend.get(first.key), np.uint8), cv2.IMREAD_UNCHANGED)
+        assert overlay.shape == (96, 128, 4)
+
+    def test_several_scans_are_explained_in_one_batch(self, tmp_path):
+        store, digests = _store(tmp_path, 3)
+        explainer = CountingExplainer()
+        service = _service(store, explainer)
+
+        heatmaps = asyncio.run(service.get_many([HeatmapRequest(d) for d in digests]))
+
+        assert len({h.digest for h in heatmaps}) == 3
+        assert explainer.batches == [("acne", 3)]
+
+    def test_concurrent_requests_are_coalesced(self, tmp_path):
+        store, digests = _store(tmp_path, 3)
+        explainer = CountingExplainer()
+        service = _service(store, explainer)
+
+        async def burst():
+            requests = [HeatmapRequest(d) for d in digests] + [HeatmapRequest(digests[0])]
+            return await asyncio.gather(*(service.get(r) for r in requests))
+
+        heatmaps = asyncio.run(burst())
+
+        assert explainer.batches == [("acne", 3)]
+        assert heatmaps[0].digest == heatmaps[3].digest
+
+    def test_batches_split_by_model_and_size(self, tmp_path):
+        store, digests = _store(tmp_path, 3)
+        explainer = CountingExplainer()
+        service = _service(store, explainer, max_batch=2)
+
+        requests = [HeatmapRequest(d, "condition") for d in digests] + [HeatmapRequest(digests[0], "acne")]
+        asyncio.run(service.get_many(requests))
+
+        assert sorted(explainer.batches) == [("acne", 1), ("condition", 1), ("condition", 2)]
+
+    def test_cache_key_changes_with_model_version_and_target(self, tmp_path):
+        store, digests = _store(tmp_path, 1)
+        request = HeatmapRequest(digests[0])
+
+        base = _service(store, CountingExplainer()).describe(request)
+        upgraded = _service(store, CountingExplainer(), model_version="2.0.0").describe(request)
+        targeted = _service(store, CountingExplainer()).describe(HeatmapRequest(digests[0], target="acne"))
+
+        assert len({base.digest, upgraded.digest, targeted.digest}) == 3
+
+    def test_missing_image_and_unknown_model_are_reported(self, tmp_path):
+        store, _ = _store(tmp_path, 0)
+        service = _service(store, CountingExplainer())
+
+        with pytest.raises(HeatmapUnavailable):
+            asyncio.run(service.get(HeatmapRequest("0" * 64)))
+        with pytest.raises(ValueError):
+            service.describe(HeatmapRequest("0" * 64, model="wrinkles"))
+
+    def test_explainer_receives_the_analyzed_region(self, tmp_path):
+        store, digests = _store(tmp_path, 1)
+        explainer = CountingExplainer()
+        service = HeatmapService(store, explainer, locate=lambda image: (100, 50, 300, 250), batch_window=0.0)
+
+        heatmap = asyncio.run(service.get(HeatmapRequest(digests[0])))
+
+        assert explainer.shapes == [(200, 200, 3)]
+        overlay = cv2.imread(str(tmp_path / heatmap.key), cv2.IMREAD_UNCHANGED)
+        # 400x300 image at 256px: the map covers x 64-192, y 32-160 only
+        assert overlay.shape == (192, 256, 4)
+        assert overlay[:32, :, 3].max() == 0 and overlay[:, :64, 3].max() == 0
+        assert overlay[32:160, 64:192, 3].max() > 100
+
+    def test_render_overlay_is_transparent_where_cold(self):
+        cam = np.zeros((7, 7), dtype=np.float32)
+        cam[3, 3] = 1.0
+
+        overlay = cv2.imdecode(np.frombuffer(render_overlay(cam, (70, 70)), np.uint8), cv2.IMREAD_UNCHANGED)
+
+        assert overlay[0, 0, 3] < 10
+        assert overlay[35, 35, 3] > 100
+
+
+class FailingBackend:
+    """Stand-in worker client whose grad_cam raises ``error``"""
+
+    def __init__(self, error):
+        self.error = error
+
+    def grad_cam(self, images, model, targets):
+        raise self.error
+
+
+class TestMlGradCam:
+    """Test suite for ml_grad_cam, which explains through the inference workers"""
+
+    def test_worker_errors_are_mapped(self, monkeypatch):
+        images = [np.zeros((8, 8, 3), np.uint8)]
+        cases = [
+            (InferenceWorkerError("ValueError: Unknown acne label", "ValueError"), ValueError),
+            (InferenceWorkerError("RuntimeError: model not loaded", "RuntimeError"), HeatmapUnavailable),
+            (InferenceWorkerUnavailable("no workers"), HeatmapUnavailable),
+        ]
+        for error, expected in cases:
+            monkeypatch.setattr(inference_worker, "get_skin_ml_backend", lambda: FailingBackend(error))
+            with pytest.raises(expected):
+                ml_grad_cam("acne", images, [None])
+
+
+class TestGradCam:
+    """Test suite for MLInferenceService.grad_cam"""
+
+    def test_batched_maps_are_normalised_per_image(self):
+        service = MLInferenceService()
+        service.acne_model = AcneBinaryModel().eval()
+        service.condition_model = OtherConditionGAPModel().eval()
+        images = [np.random.default_rng(i).integers(0, 255, (120, 90, 3), dtype=np.uint8) for i in range(3)]
+
+        acne_maps, acne_labels = service.grad_cam(images, "acne")
+        condition_maps, condition_labels = service.grad_cam(images, "condition", ["rosacea", None, None])
+
+        assert acne_maps.shape == (3, 56, 56)
+        assert condition_maps.shape == (3, 28, 28)
+        assert condition_labels[0] == "rosacea"
+        assert set(acne_labels) <= {"acne", "no_acne"}
+        assert acne_maps.min() >= 0 and acne_maps.max() <= 1
+
+    def test_unknown_target_is_rejected(self):
+        service = MLInferenceService()
+        service.acne_model = AcneBinaryModel().eval()
+
+        with pytest.raises(ValueError):
+            service.grad_cam([np.zeros((64, 64, 3), dtype=np.uint8)], "acne", ["rosacea"])
@@ -0,0 +1,53 @@
+# Unit tests for the YuNet face detection front stage
+import numpy as np
+
+from services.face_detection import FaceBox, YuNetFaceDetector, create_face_detector
+
+
+class FakeYuNet:
+    """Stand-in for cv2.FaceDetectorYN returning one fixed face"""
+
+    def __init__(self, faces):
+        self.faces = faces
+        self.input_size = None
+
+    def setInputSize(self, size):
+        self.input_size = size
+
+    def detect(self, image):
+        assert image.shape[1::-1] == self.input_size
+        return 1, self.faces
+
+
+def _detector(faces, input_size=320):
+    detector = YuNetFaceDetector.__new__(YuNetFaceDetector)
+    detector.input_size = input_size
+    detector._detector = FakeYuNet(faces)
+    return detector
+
+
+class TestFaceDetection:
+    """Test suite for YuNetFaceDetector"""
+
+    def test_detects_on_downscaled_image_and_rescales_box(self):
+        row = [40, 30, 80, 100] + [50, 60] * 5 + [0.95]
+        weak = [0, 0, 10, 10] + [0, 0] * 5 + [0.75]
+        detector = _detector(np.array([weak, row], dtype=np.float32))
+
+        box = detector.detect(np.zeros((2400, 3200, 3), dtype=np.uint8))
+
+        assert detector._detector.input_size == (320, 240)
+        assert (box.x, box.y, box.w, box.h) == (400, 300, 800, 1000)
+        assert box.score == np.float32(0.95)
+        assert box.landmarks[0] == (500.0, 600.0)
+
+    def test_no_face_returns_none(self):
+        assert _detector(None).detect(np.zeros((480, 640, 3), dtype=np.uint8)) is None
+
+    def test_expanded_box_is_clipped(self):
+        box = FaceBox(x=10, y=20, w=100, h=200, score=0.9, landmarks=[])
+
+        assert box.expanded(0.25, image_w=120, image_h=1000) == (0, 0, 120, 270)
+
+    def test_missing_weights_disable_front_stage(self, tmp_path):
+        assert create_face_detector(str(tmp_path / "missing.onnx")) is None
@@ -0,0 +1,73 @@
+# Unit tests for the pre-inference image quality gate
+import cv2
+import numpy as np
+
+from services.image_quality_gate import ImageQualityGate, QualityThresholds
+
+
+def _textured(size=1024, level=128):
+    rng = np.random.default_rng(0)
+    noise = rng.integers(-60, 60, (size, size, 1))
+    return np.clip(level + noise, 0, 255).astype(np.uint8).repeat(3, axis=2)
+
+
+def _codes(report):
+    return {issue.code for issue in report.issues}
+
+
+class TestImageQualityGate:
+    """Test suite for ImageQualityGate"""
+
+    def setup_method(self):
+        self.gate = ImageQualityGate(QualityThresholds(require_face=False))
+
+    def test_sharp_well_exposed_image_passes(self):
+        report = self.gate.check(_textured())
+
+        assert report.passed
+        assert report.issues == []
+
+    def test_blurry_image_rejected(self):
+        blurred = cv2.GaussianBlur(_textured(), (0, 0), 25)
+
+        report = self.gate.check(blurred)
+
+        assert not report.passed
+        assert "blurry" in _codes(report)
+        assert "steady" in report.feedback[0]
+
+    def test_dark_and_bright_images_rejected(self):
+        dark = self.gate.check(_textured(level=15))
+        bright = self.gate.check(_textured(level=245))
+
+        assert "underexposed" in _codes(dark)
+        assert "overexposed" in _codes(bright)
+
+    def test_missing_face_rejected_unless_skin_visible(self):
+        gate = ImageQualityGate(QualityThresholds(require_face=True))
+        blue = np.zeros((512, 512, 3), np.uint8)
+        blue[..., 2] = 200
+        blue = np.clip(blue.astype(int) + _textured(512) - 128, 0, 255).astype(np.uint8)
+        skin = np.clip(_textured(512, level=0).astype(int) // 4 + [200, 150, 120], 0, 255).astype(np.uint8)
+
+        assert "no_face" in _codes(gate.check(blue))
+        skin_report = gate.check(skin)
+        assert skin_report.passed
+        assert "no_face" not in _codes(skin_report)
+
+    def test_runs_on_thumbnail_and_tracks_savings(self):
+        report = self.gate.check(_textured(size=2048))
+        self.gate.check(cv2.GaussianBlur(_textured(), (0, 0), 25))
+        self.gate.record_pipeline_time(400.0)
+
+        stats = self.gate.stats()
+        assert report.elapsed_ms < 50
+        assert stats["checked"] == 2
+        assert stats["rejected"] == 1
+        assert stats["estimated_saved_ms"] == 400.0
+
+    def test_undecodable_bytes_rejected(self):
+        report = self.gate.check_bytes(b"not an image")
+
+        assert not report.passed
+        assert "unreadable" in _codes(report)
@@ -0,0 +1,113 @@
+# Unit tests for selfie vs dermoscopy pipeline routing
+import asyncio
+
+import cv2
+import numpy as np
+
+from services.image_type_router import (
+    CLINICAL,
+    SELFIE,
+    ImageTypeClassifier,
+    PipelineRouter,
+    load_pipeline_specs,
+)
+from services.skin_analysis_service import SkinAnalysisService
+
+
+def _dermoscopy(size=400):
+    """Skin-toned disc with a brown lesion inside a black dermoscope rim"""
+    image = np.zeros((size, size, 3), dtype=np.uint8)
+    cv2.circle(image, (size // 2, size // 2), int(size * 0.46), (205, 150, 125), -1)
+    cv2.ellipse(image, (size // 2, size // 2), (size // 8, size // 10), 20, 0, 360, (120, 70, 50), -1)
+    return image
+
+
+def _skin_closeup(size=400):
+    rng = np.random.default_rng(0)
+    image = np.full((size, size, 3), (200, 145, 120), dtype=np.uint8)
+    return np.clip(image + rng.integers(-10, 10, image.shape), 0, 255).astype(np.uint8)
+
+
+def _portrait(size=400):
+    """Face-coloured ellipse on a blue background"""
+    image = np.full((size, size, 3), (60, 90, 160), dtype=np.uint8)
+    cv2.ellipse(image, (size // 2, size // 2), (size // 5, size // 4), 0, 0, 360, (205, 150, 125), -1)
+    return image
+
+
+class CountingFaceCheck:
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+
+    def __call__(self, image):
+        self.calls += 1
+        return self.answer
+
+
+class TestImageTypeRouter:
+    """Test suite for ImageTypeClassifier and PipelineRouter"""
+
+    def test_registry_pipelines_are_loaded(self):
+        specs = load_pipeline_specs()
+
+        assert specs[SELFIE].name == "selfie_pipeline"
+        assert specs[CLINICAL].name == "clinical_pipeline"
+        assert "acne_binary_v1" in specs[SELFIE].models
+        assert specs[SELFIE].face_stage and not specs[CLINICAL].face_stage
+
+    def test_vignette_routes_to_clinical_without_face_check(self):
+        face_check = CountingFaceCheck(True)
+        router = PipelineRouter(ImageTypeClassifier(face_check=face_check))
+
+        decision = router.route(_dermoscopy())
+
+        assert decision.image_type == CLINICAL
+        assert decision.reason == "dermoscope_vignette"
+        assert face_check.calls == 0
+
+    def test_face_routes_to_selfie(self):
+        router = PipelineRouter(ImageTypeClassifier(face_check=CountingFaceCheck(True)))
+
+        decision = router.route(_skin_closeup())
+
+        assert decision.image_type == SELFIE
+        assert decision.reason == "face_found"
+
+    def test_faceless_skin_closeup_routes_to_clinical(self):
+        router = PipelineRouter(ImageTypeClassifier(face_check=CountingFaceCheck(False)))
+
+        assert router.route(_skin_closeup()).image_type == CLINICAL
+        assert router.route(_portrait()).image_type == SELFIE
+
+    def test_stats_report_routes_and_time_saved(self):
+        router = PipelineRouter(ImageTypeClassifier(face_check=CountingFaceCheck(False)))
+        selfie = router.route(_portrait())
+        clinical = router.route(_dermoscopy())
+        router.record(selfie, 120.0)
+        router.record(clinical, 30.0)
+
+        stats = router.stats()
+
+        assert stats["routes"] == 2
+        assert stats["pipelines"]["clinical_pipeline"]["routes"] == 1
+        assert stats["estimated_saved_ms"] == 90.0
+        assert stats["reasons"] == {"default": 1, "dermoscope_vignette": 1}
+
+
+class TestClinicalPipeline:
+    """Test suite for the clinical path of SkinAnalysisService"""
+
+    def test_dermoscopy_skips_face_stages_and_facemesh(self):
+        router = PipelineRouter(ImageTypeClassifier())
+        service = SkinAnalysisService(image_router=router)
+        ok, encoded = cv2.imencode(".jpg", cv2.cvtColor(_dermoscopy(), cv2.COLOR_RGB2BGR))
+
+        result = asyncio.run(service.analyze_skin(encoded.tobytes()))
+
+        assert result.image_type["pipeline"] == "clinical_pipeline"
+        assert result.face_landmarks is None
+        assert set(result.skipped_analyzers) == {"wrinkles", "dark_circles"}
+        # MediaPipe is never loaded for dermoscopy images
+        assert service._face_mesh is None
+        assert router.stats()["pipelines"]["clinical_pipeline"]["avg_pipeline_ms"] is not None
@@ -0,0 +1,163 @@
+# Unit tests for the shared-memory inference worker pool
+import asyncio
+import os
+import stat
+
+import numpy as np
+import pytest
+
+from services.inference_worker import (
+    InferenceClient,
+    InferenceWorkerError,
+    InferenceWorkerUnavailable,
+    SharedImageRing,
+    attach_segment,
+    read_image,
+    start_workers,
+    stop_workers,
+)
+
+
+AUTHKEY = b"test-secret"
+
+
+def _describe(image, **params):
+    return {"shape": list(image.shape), "sum": int(image.sum()), "params": params}
+
+
+def _fail(image):
+    raise ValueError("bad input")
+
+
+def _sums(images, **params):
+    return [int(image.sum()) for image in images]
+
+
+@pytest.fixture
+def worker_pool(tmp_path):
+    address = str(tmp_path / "inference.sock")
+    listener, workers = start_workers(
+        address, AUTHKEY, processes=2, tasks={"describe": _describe, "fail": _fail, "sums": _sums}, warmup=None
+    )
+    yield address
+    stop_workers(listener, workers)
+
+
+class TestSharedImageRing:
+    """Test suite for SharedImageRing"""
+
+    def test_round_trip_through_attached_segment(self):
+        ring = SharedImageRing(slots=2, slot_bytes=64 * 64 * 3)
+        image = np.random.default_rng(0).integers(0, 255, (64, 48, 3), dtype=np.uint8)
+        try:
+            slot = ring.acquire()
+            meta = ring.write(slot, image)
+            segment = attach_segment(ring.name)
+            view = read_image(segment, meta["offset"], meta["shape"], meta["dtype"])
+            assert np.array_equal(view, image)
+            del view
+            segment.close()
+        finally:
+            ring.close()
+
+    def test_full_ring_blocks_then_fails(self):
+        ring = SharedImageRing(slots=1, slot_bytes=16)
+        try:
+            ring.acquire()
+            with pytest.raises(InferenceWorkerUnavailable):
+                ring.acquire(timeout=0.01)
+        finally:
+            ring.close()
+
+    def test_oversized_image_is_rejected(self):
+        ring = SharedImageRing(slots=1, slot_bytes=16)
+        try:
+            with pytest.raises(ValueError):
+                ring.write(0, np.zeros((4, 4, 3), np.uint8))
+        finally:
+            ring.close()
+
+
+class TestInferenceClient:
+    """Test suite for InferenceClient against forked workers"""
+
+    def test_infer_reads_pixels_from_shared_memory(self, worker_pool):
+        client = InferenceClient(worker_pool, AUTHKEY, slots=2, max_image_side=128)
+        image = np.full((100, 80, 3), 2, np.uint8)
+        try:
+            result = client.infer("describe", image, force_full=True)
+        finally:
+            client.close()
+
+        assert result == {"shape": [100, 80, 3], "sum": 2 * 100 * 80 * 3, "params": {"force_full": True}}
+
+    def test_large_images_are_downscaled_to_fit(self, worker_pool):
+        client = InferenceClient(worker_pool, AUTHKEY, slots=1, max_image_side=64)
+        try:
+            result = client.infer("describe", np.zeros((256, 128, 3), np.uint8))
+        finally:
+            client.close()
+
+        assert result["shape"] == [64, 32, 3]
+
+    def test_concurrent_requests(self, worker_pool):
+        client = InferenceClient(worker_pool, AUTHKEY, slots=2, max_image_side=32, connections=2)
+
+        async def scenario():
+            return await asyncio.gather(*(
+                asyncio.to_thread(client.infer, "describe", np.full((8, 8, 3), i, np.uint8))
+                for i in range(6)
+            ))
+
+        try:
+            results = asyncio.run(scenario())
+        finally:
+            client.close()
+
+        assert [r["sum"] for r in results] == [i * 8 * 8 * 3 for i in range(6)]
+
+    def test_task_errors_are_raised(self, worker_pool):
+        client = InferenceClient(worker_pool, AUTHKEY, slots=1, max_image_side=16)
+        try:
+            with pytest.raises(InferenceWorkerError, match="bad input") as raised:
+                client.infer("fail", np.zeros((4, 4, 3), np.uint8))
+            assert raised.value.error_type == "ValueError"
+            # The connection stays usable after a task error
+            assert client.infer("describe", np.zeros((4, 4, 3), np.uint8))["sum"] == 0
+        finally:
+            client.close()
+
+    def test_batch_is_passed_as_a_list(self, worker_pool):
+        client = InferenceClient(worker_pool, AUTHKEY, slots=2, max_image_side=16)
+        images = [np.full((4, 4, 3), i, np.uint8) for i in range(5)]
+        try:
+            sums = [s for chunk in client.chunks(len(images)) for s in client.infer_batch("sums", images[chunk])]
+            with pytest.raises(ValueError):
+                client.infer_batch("sums", images)
+        finally:
+            client.close()
+
+        assert sums == [i * 4 * 4 * 3 for i in range(5)]
+
+    def test_missing_worker(self, tmp_path):
+        client = InferenceClient(str(tmp_path / "missing.sock"), AUTHKEY, slots=1, max_image_side=16)
+        try:
+            with pytest.raises(InferenceWorkerUnavailable):
+                client.infer("describe", np.zeros((4, 4, 3), np.uint8))
+        finally:
+            client.close()
+
+    def test_wrong_authkey_is_rejected(self, worker_pool):
+        intruder = InferenceClient(worker_pool, b"guessed", slots=1, max_image_side=16)
+        client = InferenceClient(worker_pool, AUTHKEY, slots=1, max_image_side=16)
+        try:
+            with pytest.raises(InferenceWorkerUnavailable):
+                intruder.infer("describe", np.zeros((4, 4, 3), np.uint8))
+            # The workers keep serving authenticated clients
+            assert client.infer("describe", np.zeros((4, 4, 3), np.uint8))["sum"] == 0
+        finally:
+            intruder.close()
+            client.close()
+
+    def test_socket_is_owner_only(self, worker_pool):
+        assert stat.S_IMODE(os.stat(worker_pool).st_mode) == 0o600
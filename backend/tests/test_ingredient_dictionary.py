@@ -0,0 +1,128 @@
+# Unit tests for the in-memory ingredient dictionary and one-pass safety summary
+import threading
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.services.ingredient_dictionary import (
+    IngredientDictionary,
+    IngredientDictionaryService,
+    folded_key,
+    summarize,
+)
+
+# (id, name_inci, common_names, safety_rating, is_allergen, pregnancy_concern)
+ROWS = [
+    (uuid.uuid4(), "Aqua", ["Water"], 1, 0, 0),
+    (uuid.uuid4(), "Alpha-Isomethyl Ionone", [], 4, 1, 0),
+    (uuid.uuid4(), "Retinol", ["Vitamin A"], 5, 0, 1),
+    (uuid.uuid4(), "Methylisothiazolinone", [], 9, 1, 0),
+    (uuid.uuid4(), "Water Lily Extract", ["Aqua"], 2, 0, 0),
+    (uuid.uuid4(), "Niacinamide", [], 1, 0, 0),
+]
+
+
+def _session_with(rows):
+    """In-memory SQLite with the ingredient columns the dictionary reads"""
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    table = sa.Table(
+        "ingredients", sa.MetaData(),
+        sa.Column("id", sa.Uuid, primary_key=True), sa.Column("name_inci", sa.String),
+        sa.Column("common_names", sa.JSON), sa.Column("safety_rating", sa.Integer),
+        sa.Column("is_allergen", sa.Integer), sa.Column("pregnancy_concern", sa.Integer),
+    )
+    table.create(engine)
+    with engine.begin() as connection:
+        connection.execute(table.insert(), [dict(zip(table.c.keys(), row)) for row in rows])
+    return Session(engine)
+
+
+class TestIngredientDictionary:
+    """Test suite for IngredientDictionary"""
+
+    def test_exact_folded_and_common_name_lookup(self):
+        dictionary = IngredientDictionary(ROWS)
+
+        assert dictionary.lookup("  AQUA ").name_inci == "Aqua"
+        assert dictionary.lookup("alpha isomethyl ionone").name_inci == "Alpha-Isomethyl Ionone"
+        assert dictionary.lookup("Retinol (Vitamin A)").name_inci == "Retinol"
+        assert dictionary.lookup("vitamin a").name_inci == "Retinol"
+        assert dictionary.lookup("Unobtainium") is None
+        assert folded_key("Crème-Légère [nano]") == "cremelegere"
+
+    def test_common_names_do_not_shadow_inci_names(self):
+        dictionary = IngredientDictionary(ROWS)
+
+        assert dictionary.lookup("aqua").name_inci == "Aqua"
+        assert dictionary.lookup("water").name_inci == "Aqua"
+
+    def test_normalizer_variants_resolve(self):
+        dictionary = IngredientDictionary(ROWS)
+
+        assert dictionary.lookup("Vitamin B3").name_inci == "Niacinamide"
+        assert dictionary.lookup("vitamin-b3").name_inci == "Niacinamide"
+        assert dictionary.lookup("Vitamin E") is None  # Tocopherol is not in this dictionary
+
+    def test_database_fallback_adds_new_ingredients(self):
+        dictionary = IngredientDictionary(ROWS[:2])
+        db = _session_with(ROWS)
+
+        resolved = dictionary.resolve(["aqua", "RETINOL", "Unobtainium"], db=db)
+        assert [facts and facts.name_inci for facts in resolved] == ["Aqua", "Retinol", None]
+        assert resolved[1].pregnancy_concern
+        assert dictionary.lookup("retinol") is resolved[1]
+
+    def test_names_missing_from_the_database_are_not_queried_again(self):
+        dictionary = IngredientDictionary(ROWS[:1])
+        db = _session_with(ROWS)
+        queries = []
+        sa.event.listen(db.get_bind(), "before_cursor_execute", lambda *args: queries.append(args[2]))
+
+        dictionary.resolve(["Unobtainium", "Retinol"], db=db)
+        resolved = dictionary.resolve(["unobtainium", "Retinol", "Aqua"], db=db)
+
+        assert len(queries) == 1
+        assert [facts and facts.name_inci for facts in resolved] == [None, "Retinol", "Aqua"]
+        # A reloaded dictionary starts without the negative cache
+        assert IngredientDictionary(ROWS).missing == set()
+
+    def test_summary_flags_come_from_attributes(self):
+        dictionary = IngredientDictionary(ROWS)
+        resolved = [dictionary.lookup(name) for name in ["Aqua", "Retinol", "Alpha-Isomethyl Ionone",
+                                                         "Methylisothiazolinone", "Aqua", "Unobtainium"]]
+
+        summary = summarize(resolved)
+        assert summary["overall_safety_score"] == (1 + 5 + 4 + 9) / 4
+        assert summary["allergen_warnings"] == ["Alpha-Isomethyl Ionone", "Methylisothiazolinone"]
+        assert [f["name"] for f in summary["flagged_ingredients"]] == ["Methylisothiazolinone"]
+        assert summary["pregnancy_safe"] is False
+        assert summarize([None])["overall_safety_score"] == 5.0
+        assert summarize(resolved[:1])["pregnancy_safe"] is True
+
+
+class TestIngredientDictionaryService:
+    """Test suite for IngredientDictionaryService"""
+
+    def test_stale_dictionary_is_served_while_reloading(self):
+        release = threading.Event()
+        sessions = []
+
+        def session_factory():
+            if sessions:
+                release.wait(5)
+            sessions.append(len(sessions))
+            return _session_with(ROWS[:len(sessions) + 1])
+
+        service = IngredientDictionaryService(session_factory, ttl_seconds=0)
+        first = service.get()
+        # Stale: starts one reload and keeps returning the loaded dictionary
+        assert service.get() is first
+        assert service.get() is first
+        release.set()
+        service._reload.join(5)
+
+        assert len(sessions) == 2
+        assert service._dictionary is not first and len(service._dictionary) == 3
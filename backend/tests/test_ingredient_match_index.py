@@ -0,0 +1,73 @@
+# Unit tests for the clustered ingredient-list match index
+import numpy as np
+
+from services.ingredient_match_index import IngredientMatchIndex, ingredient_key, query_names, recall_at_k
+from services.ingredient_similarity import build_matrix
+
+
+def _catalog(products: int = 600, families: int = 60, vocabulary: int = 400, seed: int = 0):
+    """Products as variants of shared base formulas, as (product, name, position) rows"""
+    rng = np.random.default_rng(seed)
+    bases = [rng.choice(vocabulary, size=rng.integers(8, 20), replace=False) for _ in range(families)]
+    lists = {}
+    for product in range(products):
+        base = bases[product % families]
+        kept = [f"ingredient {i}" for i in base if rng.random() > 0.2]
+        lists[f"p{product}"] = kept + [f"ingredient {i}" for i in rng.choice(vocabulary, size=2)]
+    rows = [
+        (product, ingredient_key(name), position)
+        for product, names in lists.items()
+        for position, name in enumerate(names, start=1)
+    ]
+    return rows, lists
+
+
+class TestIngredientMatchIndex:
+    """Test suite for IngredientMatchIndex"""
+
+    def test_search_matches_exact_search(self):
+        rows, lists = _catalog()
+        index = IngredientMatchIndex.build(build_matrix(rows, max_df=0.5), nlist=12)
+
+        queries = list(lists.values())[:50]
+        recall, _ = recall_at_k(index, queries, k=5, nprobe=4)
+        assert recall >= 0.9
+        # Probing every cluster is exact
+        assert recall_at_k(index, queries, k=5, nprobe=index.nlist)[0] == 1.0
+
+    def test_catalog_list_finds_itself_first(self):
+        rows, lists = _catalog()
+        index = IngredientMatchIndex.build(build_matrix(rows, max_df=0.5), nlist=12)
+
+        pasted = [name.upper() for name in lists["p7"]]  # normalizer output is INCI-cased
+        matches = index.search(pasted, k=3, nprobe=4)
+        assert matches[0].product_id == "p7"
+        assert abs(matches[0].score - 1.0) < 1e-5
+        assert [m.score for m in matches] == sorted((m.score for m in matches), reverse=True)
+
+    def test_unknown_ingredients_keep_their_position(self):
+        rows, lists = _catalog()
+        index = IngredientMatchIndex.build(build_matrix(rows, max_df=0.5), nlist=12)
+
+        known = lists["p3"]
+        cols, weights = index.vectorize(known)
+        shifted_cols, shifted_weights = index.vectorize(["Unobtainium Extract"] + known)
+        assert index.unknown(["Unobtainium Extract"] + known) == ["Unobtainium Extract"]
+        assert np.array_equal(cols, shifted_cols)
+        assert not np.allclose(weights, shifted_weights)
+        assert index.search(["Unobtainium Extract"]) == []
+
+    def test_min_score_and_round_trip(self, tmp_path):
+        rows, lists = _catalog()
+        index = IngredientMatchIndex.build(build_matrix(rows, max_df=0.5), nlist=12)
+        index.save(tmp_path)
+        loaded = IngredientMatchIndex.load(tmp_path)
+
+        query = lists["p11"][:6]
+        assert loaded.search(query, k=5, nprobe=4) == index.search(query, k=5, nprobe=4)
+        assert all(m.score >= 0.5 for m in loaded.search(query, k=20, min_score=0.5, nprobe=4))
+
+    def test_query_names_map_variants_without_a_database(self):
+        pasted = "Water, vitamin  E ,Retinol (Vitamin A), , Parfum (Fragrance, Citral), Cetearyl Alcohol"
+
+        assert query_names(pasted) == ["Aqua", "Tocopherol", "Retinol", "Parfum", "Cetearyl Alcohol"]
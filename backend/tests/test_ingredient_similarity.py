@@ -0,0 +1,65 @@
+# Unit tests for TF-IDF ingredient similarity and blocked top-k neighbours
+import numpy as np
+from scipy import sparse
+
+from services.ingredient_similarity import build_matrix, category_neighbours, position_weight, top_k_rows
+
+# (product, [ingredients in INCI order])
+CATALOG = {
+    "gel_a": ["aqua", "glycerin", "niacinamide", "zinc"],
+    "gel_b": ["aqua", "niacinamide", "zinc", "glycerin"],
+    "gel_c": ["aqua", "glycerin", "retinol", "squalane"],
+    "cream_a": ["aqua", "glycerin", "niacinamide", "zinc", "shea"],
+}
+CATEGORIES = {"gel_a": "Serum", "gel_b": "Serum", "gel_c": "Serum", "cream_a": "Cream"}
+
+
+def _rows(catalog=CATALOG):
+    return [
+        (product, ingredient, position)
+        for product, ingredients in catalog.items()
+        for position, ingredient in enumerate(ingredients, start=1)
+    ]
+
+
+class TestIngredientSimilarity:
+    """Test suite for the ingredient similarity job"""
+
+    def test_rows_are_unit_tf_idf_vectors(self):
+        matrix = build_matrix(_rows(), max_df=0.8)
+
+        norms = np.sqrt(np.asarray(matrix.matrix.multiply(matrix.matrix).sum(axis=1)).ravel())
+        assert np.allclose(norms, 1.0)
+        assert position_weight(np.array([1.0]))[0] == 1.0
+        assert position_weight(np.array([3.0]))[0] < position_weight(np.array([2.0]))[0]
+
+    def test_ubiquitous_ingredients_are_dropped(self):
+        matrix = build_matrix(_rows(), max_df=0.8)
+
+        for ingredient in ("aqua", "glycerin"):
+            assert matrix.matrix[:, matrix.ingredient_ids.index(ingredient)].nnz == 0
+        assert matrix.matrix[:, matrix.ingredient_ids.index("zinc")].nnz == 3
+
+    def test_blocked_top_k_matches_dense_search(self):
+        rng = np.random.default_rng(0)
+        dense = rng.random((50, 30)) * (rng.random((50, 30)) < 0.2)
+        dense /= np.maximum(np.linalg.norm(dense, axis=1, keepdims=True), 1e-9)
+        matrix = sparse.csr_matrix(dense.astype(np.float32))
+        similarities = dense @ dense.T
+        np.fill_diagonal(similarities, -1.0)
+
+        results = list(top_k_rows(matrix, k=5, min_score=0.0, max_block_cells=7 * 50))
+
+        assert [row for row, _, _ in results] == list(range(50))
+        for row, neighbours, scores in results:
+            expected = np.sort(similarities[row])[::-1][:5]
+            assert row not in neighbours
+            assert np.allclose(scores, expected[expected >= 0.0], atol=1e-5)
+
+    def test_neighbours_stay_in_category(self):
+        neighbours = dict(category_neighbours(build_matrix(_rows(), max_df=0.8), CATEGORIES, k=5, min_score=0.01))
+
+        assert [n for n, _ in neighbours["gel_a"]] == ["gel_b"]
+        assert neighbours["gel_a"][0][1] > 0.8
+        assert "cream_a" not in neighbours  # alone in its category
+        assert neighbours["gel_c"] == []
@@ -0,0 +1,151 @@
+# Unit tests for live preview guidance and frame dropping
+import asyncio
+
+import cv2
+import numpy as np
+import pytest
+
+from services.face_detection import FaceBox
+from services.image_quality_gate import ImageQualityGate, QualityThresholds
+from services.live_preview import (
+    LatestFrame,
+    PreviewAnalyzer,
+    PreviewLimits,
+    PreviewSessionLimiter,
+    run_preview_session,
+)
+
+
+class FixedFaceDetector:
+    def __init__(self, box):
+        self.box = box
+
+    def detect(self, image):
+        return self.box
+
+
+def _frame(brightness=130):
+    rng = np.random.default_rng(0)
+    image = np.clip(rng.normal(brightness, 40, (240, 320, 3)), 0, 255).astype(np.uint8)
+    return image
+
+
+def _encoded(image) -> bytes:
+    ok, buffer = cv2.imencode(".jpg", cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+    return buffer.tobytes()
+
+
+def _analyzer(box=None, **limits):
+    gate = ImageQualityGate(QualityThresholds(require_face=False))
+    factory = (lambda: FixedFaceDetector(box)) if box is not False else None
+    return PreviewAnalyzer(gate, face_detector_factory=factory, limits=PreviewLimits(**limits))
+
+
+class TestPreviewAnalyzer:
+    """Test suite for PreviewAnalyzer guidance"""
+
+    def test_centered_face_is_ready(self):
+        result = _analyzer(FaceBox(100, 60, 120, 120, 0.9, [])).analyze(_frame())
+
+        assert result["ready"] is True
+        assert result["guidance"] == []
+        assert result["face"]["w"] == pytest.approx(120 / 320)
+
+    def test_small_face_asks_to_move_closer(self):
+        result = _analyzer(FaceBox(140, 100, 40, 40, 0.9, [])).analyze(_frame())
+
+        assert [g["code"] for g in result["guidance"]] == ["move_closer"]
+
+    def test_off_center_face(self):
+        result = _analyzer(FaceBox(0, 60, 120, 120, 0.9, [])).analyze(_frame())
+
+        assert "center_face" in [g["code"] for g in result["guidance"]]
+
+    def test_missing_face_and_dark_frame(self):
+        result = _analyzer(None).analyze(_frame(brightness=10))
+
+        assert [g["code"] for g in result["guidance"]][:2] == ["no_face", "too_dark"]
+        assert result["ready"] is False
+
+    def test_oversized_frame_is_downscaled(self):
+        seen = []
+
+        class RecordingDetector:
+            def detect(self, image):
+                seen.append(image.shape)
+                return None
+
+        analyzer = PreviewAnalyzer(
+            ImageQualityGate(QualityThresholds(require_face=False)),
+            face_detector_factory=RecordingDetector,
+        )
+        analyzer.analyze_bytes(_encoded(np.zeros((960, 1280, 3), np.uint8)))
+
+        assert max(seen[0][:2]) == 320
+
+
+class TestFrameDropping:
+    """Test suite for LatestFrame, session limits and the session loop"""
+
+    def test_latest_frame_replaces_pending(self):
+        async def scenario():
+            slot = LatestFrame()
+            assert slot.put(1) is False
+            assert slot.put(2) is True
+            assert await slot.get() == 2
+            slot.close()
+            assert await slot.get() is None
+
+        asyncio.run(scenario())
+
+    def test_session_limiter_caps_connections(self):
+        limiter = PreviewSessionLimiter(capacity=2)
+
+        assert limiter.try_acquire() and limiter.try_acquire()
+        assert not limiter.try_acquire()
+        limiter.release()
+        assert limiter.try_acquire()
+
+    def test_burst_is_dropped_not_queued(self):
+        analyzer = _analyzer(False, max_fps=0)
+        frame = _encoded(_frame())
+        sent = []
+
+        async def scenario():
+            frames = asyncio.Queue()
+            for _ in range(10):
+                frames.put_nowait(frame)
+            frames.put_nowait(None)
+
+            async def send(message):
+                sent.append(message)
+
+            return await run_preview_session(frames.get, send, analyzer)
+
+        stats = asyncio.run(scenario())
+
+        assert stats["received"] == 10
+        assert stats["analyzed"] + stats["dropped"] == 10
+        assert stats["analyzed"] < 10
+        # Only the newest frame of the burst is answered last
+        assert sent[-1]["seq"] == 10
+
+    def test_oversized_frame_is_rejected(self):
+        analyzer = _analyzer(False, max_frame_bytes=10)
+        sent = []
+
+        async def scenario():
+            frames = iter([b"x" * 100, None])
+
+            async def receive():
+                return next(frames)
+
+            async def send(message):
+                sent.append(message)
+
+            return await run_preview_session(receive, send, analyzer)
+
+        stats = asyncio.run(scenario())
+
+        assert stats["rejected"] == 1
+        assert sent[0]["error"] == "frame_too_large"
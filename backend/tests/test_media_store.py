@@ -0,0 +1,207 @@
+# Unit tests for the content-addressed scan media store
+import asyncio
+import hashlib
+import io
+
+import pytest
+from PIL import Image, UnidentifiedImageError
+
+from app.services.media_store import (
+    ANALYSIS,
+    THUMBNAIL,
+    LocalMediaBackend,
+    MediaStore,
+    S3MediaBackend,
+    media_key,
+)
+
+
+def _jpeg_bytes(size=(1600, 1200), color=(200, 150, 120)) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+class _FakeBody:
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def read(self) -> bytes:
+        return self._data
+
+
+class _NotFound(Exception):
+    response = {"Error": {"Code": "404"}}
+
+
+class FakeS3Client:
+    """In-memory stand-in for a boto3 S3 client"""
+
+    def __init__(self):
+        self.objects = {}
+        self.put_calls = 0
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise _NotFound()
+        return {"ContentLength": len(self.objects[(Bucket, Key)])}
+
+    def put_object(self, Bucket, Key, Body, ContentType, **kwargs):
+        self.put_calls += 1
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise _NotFound()
+        return {"Body": _FakeBody(self.objects[(Bucket, Key)])}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://s3.test/{Params['Bucket']}/{Params['Key']}?ttl={ExpiresIn}"
+
+
+class TestMediaStore:
+    """Test suite for MediaStore with local and S3 backends"""
+
+    def test_sharded_content_addressed_key(self, tmp_path):
+        store = MediaStore(LocalMediaBackend(str(tmp_path)))
+        data = _jpeg_bytes()
+
+        stored = asyncio.run(store.save(data, "image/jpeg"))
+
+        digest = hashlib.sha256(data).hexdigest()
+        assert stored.digest == digest
+        assert stored.key == f"originals/{digest[:2]}/{digest[2:4]}/{digest}"
+        assert (tmp_path / stored.key).read_bytes() == data
+
+    def test_identical_uploads_are_deduplicated(self, tmp_path):
+        store = MediaStore(LocalMediaBackend(str(tmp_path)))
+        data = _jpeg_bytes()
+
+        first = asyncio.run(store.save(data))
+        second = asyncio.run(store.save(data))
+
+        assert first.deduplicated is False
+        assert second.deduplicated is True
+        assert first.key == second.key
+        assert len(list((tmp_path / "originals").rglob("*"))) == 3  # 2 shard dirs + 1 blob
+
+    def test_derivatives_are_small_webp(self, tmp_path):
+        store = MediaStore(LocalMediaBackend(str(tmp_path)), thumbnail_size=128, analysis_size=512)
+        stored = asyncio.run(store.save(_jpeg_bytes()))
+
+        keys = store.generate_derivatives(stored.digest)
+
+        for variant, max_side in ((THUMBNAIL, 128), (ANALYSIS, 512)):
+            image = Image.open(tmp_path / keys[variant])
+            assert image.format == "WEBP"
+            assert max(image.size) == max_side
+
+    def test_ingest_stores_only_the_analysis_copy(self, tmp_path):
+        store = MediaStore(LocalMediaBackend(str(tmp_path)), analysis_size=512)
+        data = _jpeg_bytes(size=(4000, 3000))
+
+        ingested = asyncio.run(store.ingest(data))
+
+        assert ingested.digest == hashlib.sha256(data).hexdigest()
+        assert ingested.source_size == (4000, 3000)
+        assert ingested.working.mode == "RGB"
+        assert max(ingested.working.size) == 512
+        assert store.backend.exists(media_key(ingested.digest, ANALYSIS))
+        assert not store.backend.exists(ingested.key)
+        assert not store.backend.exists(media_key(ingested.digest, THUMBNAIL))
+
+    def test_ingest_rejects_undecodable_data(self, tmp_path):
+        store = MediaStore(LocalMediaBackend(str(tmp_path)))
+
+        with pytest.raises(UnidentifiedImageError):
+            asyncio.run(store.ingest(b"not an image"))
+
+    def test_archive_stores_original_once(self, tmp_path):
+        store = MediaStore(LocalMediaBackend(str(tmp_path)), thumbnail_size=128)
+        data = _jpeg_bytes()
+
+        first = store.archive(asyncio.run(store.ingest(data)))
+        second = store.archive(asyncio.run(store.ingest(data)))
+
+        assert first.deduplicated is False
+        assert second.deduplicated is True
+        assert (tmp_path / first.key).read_bytes() == data
+        assert max(Image.open(tmp_path / media_key(first.digest, THUMBNAIL)).size) == 128
+
+    def test_archive_caps_large_originals(self, tmp_path):
+        store = MediaStore(LocalMediaBackend(str(tmp_path)), archive_max_side=2000)
+        ingested = asyncio.run(store.ingest(_jpeg_bytes(size=(4000, 3000))))
+
+        stored = store.archive(ingested)
+
+        archived = Image.open(tmp_path / stored.key)
+        assert stored.key == media_key(ingested.digest)
+        assert stored.content_type == "image/jpeg"
+        assert archived.size == (2000, 1500)
+
+    def test_derivatives_fall_back_to_analysis_copy(self, tmp_path):
+        store = MediaStore(LocalMediaBackend(str(tmp_path)), thumbnail_size=128, analysis_size=512)
+        ingested = asyncio.run(store.ingest(_jpeg_bytes()))
+
+        keys = store.generate_derivatives(ingested.digest)
+
+        assert max(Image.open(tmp_path / keys[THUMBNAIL]).size) == 128
+
+    def test_deleting_original_deletes_derivatives(self, tmp_path):
+        store = MediaStore(LocalMediaBackend(str(tmp_path)))
+        ingested = asyncio.run(store.ingest(_jpeg_bytes()))
+        store.archive(ingested)
+        other = store.archive(asyncio.run(store.ingest(_jpeg_bytes(color=(10, 20, 30)))))
+
+        store.delete(ingested.key)
+
+        for key in (ingested.key, media_key(ingested.digest, THUMBNAIL), media_key(ingested.digest, ANALYSIS)):
+            assert not store.backend.exists(key)
+        assert store.backend.exists(media_key(other.digest, THUMBNAIL))
+
+    def test_url_never_exposes_original(self, tmp_path):
+        store = MediaStore(LocalMediaBackend(str(tmp_path)))
+        digest = "ab" * 32
+
+        assert store.url_for(digest, THUMBNAIL) == f"/api/v1/media/thumbnail/{digest}"
+        assert store.url_for(digest, "originals") is None
+        assert store.url_for(None) is None
+
+    def test_s3_backend_round_trip(self):
+        client = FakeS3Client()
+        store = MediaStore(S3MediaBackend("scans", client=client))
+        data = _jpeg_bytes()
+
+        stored = asyncio.run(store.save(data))
+        asyncio.run(store.save(data))
+        store.generate_derivatives(stored.digest)
+        store.generate_derivatives(stored.digest)
+
+        # One original + two derivatives, no duplicate writes
+        assert client.put_calls == 3
+        assert ("scans", media_key(stored.digest, THUMBNAIL)) in client.objects
+        assert store.url_for(stored.digest).startswith("https://s3.test/scans/thumbnail/")
+
+    def test_repeated_ingest_writes_the_analysis_copy_once(self):
+        client = FakeS3Client()
+        store = MediaStore(S3MediaBackend("scans", client=client))
+        data = _jpeg_bytes()
+
+        first = asyncio.run(store.ingest(data))
+        second = asyncio.run(store.ingest(data))
+
+        assert client.put_calls == 1
+        assert second.working.size == first.working.size
+        assert ("scans", media_key(first.digest, ANALYSIS)) in client.objects
+
+    def test_s3_backend_propagates_unexpected_errors(self):
+        class BrokenClient(FakeS3Client):
+            def head_object(self, Bucket, Key):
+                raise RuntimeError("connection reset")
+
+        backend = S3MediaBackend("scans", client=BrokenClient())
+        with pytest.raises(RuntimeError):
+            backend.exists("originals/aa/bb/x")
@@ -0,0 +1,66 @@
+# Unit tests for cascaded early-exit inference
+import asyncio
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from services.ml_inference_service import MLInferenceService, cascade_can_exit
+
+
+class FixedLogits(nn.Module):
+    """Stand-in model returning the same logits for every input"""
+
+    def __init__(self, logits):
+        super().__init__()
+        self.logits = torch.tensor([logits], dtype=torch.float32)
+        self.calls = 0
+
+    def forward(self, x):
+        self.calls += 1
+        return self.logits.repeat(x.shape[0], 1)
+
+
+def _service(acne_logits, threshold=0.9):
+    service = MLInferenceService(cascade_threshold=threshold)
+    service.acne_model = FixedLogits(acne_logits)
+    service.condition_model = FixedLogits([0.0, 0.0, 5.0, 0.0, 0.0])
+    return service
+
+
+FACE = np.full((64, 64, 3), 128, dtype=np.uint8)
+
+
+class TestMLCascade:
+    """Test suite for the acne -> condition cascade"""
+
+    def test_confident_clear_skin_skips_condition_model(self):
+        service = _service([6.0, 0.0])
+
+        result = asyncio.run(service.analyze_skin_with_ml(FACE))
+
+        assert result["stages_run"] == ["acne_binary"]
+        assert result["early_exit"] is True
+        assert result["condition_analysis"]["condition"] == "normal"
+        assert service.condition_model.calls == 0
+
+    def test_uncertain_acne_runs_condition_model(self):
+        service = _service([0.5, 0.0])
+
+        result = asyncio.run(service.analyze_skin_with_ml(FACE))
+
+        assert result["stages_run"] == ["acne_binary", "condition"]
+        assert result["condition_analysis"]["condition"] == "rosacea"
+
+    def test_force_full_runs_every_stage(self):
+        service = _service([6.0, 0.0])
+
+        result = asyncio.run(service.analyze_skin_with_ml(FACE, force_full=True))
+
+        assert result["stages_run"] == ["acne_binary", "condition"]
+        assert result["early_exit"] is False
+
+    def test_exit_requires_clear_label(self):
+        assert cascade_can_exit({"label": "no_acne", "confidence": 0.95}, 0.9)
+        assert not cascade_can_exit({"label": "acne", "confidence": 0.99}, 0.9)
+        assert not cascade_can_exit({"label": "no_acne", "confidence": 0.85}, 0.9)
@@ -0,0 +1,38 @@
+# Unit tests for selectable model variants
+import pytest
+import torch
+
+from services.ml_inference_service import (
+    AcneBinaryGAPModel,
+    AcneBinaryModel,
+    MLInferenceService,
+    OtherConditionGAPModel,
+    OtherConditionModel,
+)
+
+
+class TestModelVariants:
+    """Test suite for the GAP-head variants and loader selection"""
+
+    @pytest.mark.parametrize("gap_cls,dense_cls,classes", [
+        (AcneBinaryGAPModel, AcneBinaryModel, 2),
+        (OtherConditionGAPModel, OtherConditionModel, 5),
+    ])
+    def test_gap_head_is_small_and_shares_features(self, gap_cls, dense_cls, classes):
+        gap, dense = gap_cls(), dense_cls()
+
+        assert gap(torch.zeros(1, 3, 224, 224)).shape == (1, classes)
+        assert sum(p.numel() for p in gap.parameters()) * 20 < sum(p.numel() for p in dense.parameters())
+        # Teacher conv weights load directly into the student
+        gap.features.load_state_dict(dense.features.state_dict())
+
+    def test_loader_selects_variant_weights(self):
+        service = MLInferenceService(model_variant="gap_v1")
+
+        assert service.acne_model_path.name == "acne_binary_gap_v1.pt"
+        assert service.condition_model_path.name == "other_condition_gap_v1.pt"
+        assert service.acne_model_cls is AcneBinaryGAPModel
+
+    def test_unknown_variant_rejected(self):
+        with pytest.raises(ValueError):
+            MLInferenceService(model_variant="v9")
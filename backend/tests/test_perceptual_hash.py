@@ -0,0 +1,100 @@
+# Unit tests for perceptual hashing and near-duplicate lookup
+import cv2
+import numpy as np
+import pytest
+
+from services.perceptual_hash import (
+    MultiIndexHash,
+    NearDuplicateIndex,
+    from_signed,
+    group_near_duplicates,
+    hamming,
+    hash_encoded,
+    image_hashes,
+    is_near_duplicate,
+    to_signed,
+)
+
+
+def _photo(seed: int) -> np.ndarray:
+    """Smooth random image with photo-like low-frequency structure"""
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 255, (12, 12, 3), dtype=np.uint8)
+    return cv2.GaussianBlur(cv2.resize(coarse, (400, 300), interpolation=cv2.INTER_CUBIC), (0, 0), 3)
+
+
+def _reencoded(image: np.ndarray) -> bytes:
+    smaller = cv2.resize(image, (360, 270), interpolation=cv2.INTER_AREA)
+    brighter = np.clip(smaller.astype(np.int16) + 15, 0, 255).astype(np.uint8)
+    bgr = cv2.cvtColor(brighter, cv2.COLOR_RGB2BGR)
+    return cv2.imencode(".jpg", bgr, [cv2.IMWRITE_JPEG_QUALITY, 60])[1].tobytes()
+
+
+class TestImageHashes:
+    """Test suite for pHash/dHash"""
+
+    def test_reencoded_copy_is_near_duplicate(self):
+        original = image_hashes(_photo(1))
+        copy = hash_encoded(_reencoded(_photo(1)))
+
+        assert is_near_duplicate(original, copy)
+        assert hamming(original.phash, copy.phash) <= 4
+
+    def test_different_images_are_far_apart(self):
+        assert not is_near_duplicate(image_hashes(_photo(1)), image_hashes(_photo(2)))
+
+    def test_undecodable_bytes(self):
+        assert hash_encoded(b"not an image") is None
+
+    def test_signed_round_trip(self):
+        for value in (0, 1, 2**63 - 1, 2**63, 2**64 - 1):
+            assert -(2**63) <= to_signed(value) < 2**63
+            assert from_signed(to_signed(value)) == value
+
+
+class TestMultiIndexHash:
+    """Test suite for MultiIndexHash"""
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        stored = [int(v) for v in rng.integers(0, 2**63, 2000)]
+        # Plant neighbours at every distance up to and just past the radius
+        query = stored[0]
+        for distance in range(10):
+            bits = rng.choice(64, distance, replace=False)
+            stored.append(query ^ sum(1 << int(b) for b in bits))
+        index = MultiIndexHash(max_distance=7)
+        for position, value in enumerate(stored):
+            index.add(value, position)
+
+        hits = index.search(query)
+
+        expected = sorted((hamming(query, v), i) for i, v in enumerate(stored) if hamming(query, v) <= 7)
+        assert sorted(hits) == expected
+        assert [d for d, _ in hits] == sorted(d for d, _ in hits)
+
+    def test_radius_is_bounded(self):
+        with pytest.raises(ValueError):
+            MultiIndexHash(max_distance=64)
+
+
+class TestNearDuplicateGroups:
+    """Test suite for NearDuplicateIndex and group_near_duplicates"""
+
+    def test_dhash_must_confirm_phash(self):
+        index = NearDuplicateIndex(max_distance=7, dhash_max_distance=2)
+        hashes = image_hashes(_photo(3))
+        index.add(hashes, "a")
+
+        assert index.matches(hashes) == [(0, "a")]
+        assert index.matches(type(hashes)(hashes.phash, hashes.dhash ^ 0b111)) == []
+
+    def test_groups_keep_earliest_member_first(self):
+        entries = [
+            ("ham10000/a", image_hashes(_photo(1))),
+            ("ham10000/b", image_hashes(_photo(2))),
+            ("isic/a-copy", hash_encoded(_reencoded(_photo(1)))),
+            ("scin/7", image_hashes(_photo(1))),
+        ]
+
+        assert group_near_duplicates(entries) == [["ham10000/a", "isic/a-copy", "scin/7"]]
@@ -0,0 +1,103 @@
+# Unit tests for ranked product search
+import uuid
+
+import pytest
+from sqlalchemy import Column, MetaData, String, Table, Uuid, create_engine, insert
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.services.product_search import (
+    rank_in_memory,
+    ranked_product_ids,
+    ranked_search_statement,
+    term_similarity,
+    trigrams,
+)
+
+CATALOG = [
+    ("CeraVe", "Foaming Facial Cleanser", "Cleanser"),
+    ("CeraVe", "Moisturizing Cream", "Moisturizer"),
+    ("La Roche-Posay", "Toleriane Cleanser with Ceramides", "Cleanser"),
+    ("The Ordinary", "Niacinamide 10% + Zinc 1%", "Serum"),
+    ("Paula's Choice", "Skin Perfecting 2% BHA Liquid Exfoliant", "Exfoliant"),
+    ("Dupe Lab", "CeraVe-Style Barrier Cream", "Moisturizer"),
+]
+
+
+@pytest.fixture
+def session():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    # Only the columns search reads; the full model uses PostgreSQL-only types
+    table = Table(
+        "products", MetaData(),
+        Column("id", Uuid, primary_key=True),
+        Column("brand", String), Column("name", String), Column("category", String),
+    )
+    table.create(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(table), [
+            {"id": uuid.UUID(int=i + 1), "brand": brand, "name": name, "category": category}
+            for i, (brand, name, category) in enumerate(CATALOG)
+        ])
+    return sessionmaker(bind=engine)()
+
+
+def _names(ids):
+    return [CATALOG[row_id.int - 1][1] for row_id in ids]
+
+
+class TestProductSearch:
+    """Test suite for product search ranking"""
+
+    def test_trigrams_match_pg_trgm(self):
+        assert trigrams("cat") == {"  c", " ca", "cat", "at "}
+        assert term_similarity("clean", ["cleanser"]) == 1.0
+        assert term_similarity("niacinamde", ["niacinamide"]) > 0.6
+
+    def test_brand_matches_rank_first(self, session):
+        ids = ranked_product_ids(session, "cerave", brand_boost=0.5)
+
+        assert set(_names(ids)[:2]) == {"Foaming Facial Cleanser", "Moisturizing Cream"}
+        assert _names(ids)[2] == "CeraVe-Style Barrier Cream"
+        assert "Toleriane Cleanser with Ceramides" not in _names(ids)
+
+    def test_prefix_terms_must_all_match(self, session):
+        ids = ranked_product_ids(session, "cerave clean", brand_boost=0.5)
+
+        assert _names(ids) == ["Foaming Facial Cleanser"]
+
+    def test_typos_are_tolerated(self, session):
+        ids = ranked_product_ids(session, "niacinamde", brand_boost=0.5)
+
+        assert _names(ids) == ["Niacinamide 10% + Zinc 1%"]
+
+    def test_filters_and_paging(self, session):
+        assert _names(ranked_product_ids(session, "cleanser", category="Cleanser", brand_boost=0.5, limit=1)) == [
+            "Foaming Facial Cleanser"
+        ]
+        assert _names(ranked_product_ids(session, "cleanser", brand="roche", brand_boost=0.5)) == [
+            "Toleriane Cleanser with Ceramides"
+        ]
+        assert ranked_product_ids(session, "%%", brand_boost=0.5) == []
+
+    def test_rank_in_memory_skips_unrelated_rows(self):
+        rows = [(1, "Hydrating Toner", "Klairs"), (2, "Vitamin C Serum", "Klairs")]
+
+        assert rank_in_memory(rows, "sunscreen") == []
+
+    def test_postgres_query_uses_indexed_predicates(self):
+        statement = ranked_search_statement("CeraVe clean", brand="cera", limit=20, offset=40)
+
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        params = statement.compile(dialect=postgresql.dialect()).params
+        assert "products.search_vector @@ to_tsquery" in sql
+        assert sql.count("<%") == 2
+        assert "ts_rank_cd(products.search_vector" in sql
+        assert "ORDER BY score DESC" in sql
+        assert "cerave:* & clean:*" in params.values()
+        assert params["search_text"] == "cerave clean"
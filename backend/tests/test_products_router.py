@@ -0,0 +1,82 @@
+# Unit tests for the products router
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.routers import products
+from app.services import product_search
+
+
+def _client():
+    app = FastAPI()
+    app.include_router(products.router)
+    app.dependency_overrides[get_db] = lambda: "db"
+    return TestClient(app)
+
+
+class TestProductsRouter:
+    """Test suite for the products router"""
+
+    def test_list_calls_search_service(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(
+            product_search, "search_products",
+            lambda db, query, **filters: calls.append((db, query, filters)) or [],
+        )
+        client = _client()
+
+        assert client.get("/api/v1/products", params={"search": "cerave cleanser", "brand": "CeraVe"}).json() == []
+        assert client.get("/api/v1/products", params={"limit": 5}).status_code == 200
+        assert calls == [
+            ("db", "cerave cleanser", {"brand": "CeraVe", "category": None, "limit": 10, "offset": 0}),
+            ("db", None, {"brand": None, "category": None, "limit": 5, "offset": 0}),
+        ]
+
+    def test_match_ingredients_normalizes_in_memory(self, monkeypatch):
+        searched = []
+
+        class FakeIndex:
+            def search(self, names, **options):
+                searched.append(names)
+                return []
+
+            def unknown(self, names):
+                return names[-1:]
+
+        monkeypatch.setattr(products, "get_ingredient_match_index", lambda: FakeIndex())
+
+        response = _client().post("/api/v1/products/match-ingredients", json={"ingredients": "Water, Vitamin E"})
+
+        assert response.status_code == 200
+        assert searched == [["Aqua", "Tocopherol"]]
+        assert response.json() == {"matches": [], "normalized": ["Aqua", "Tocopherol"], "unrecognized": ["Tocopherol"]}
+
+    def test_analyze_resolves_off_the_event_loop(self, monkeypatch):
+        threads = []
+
+        class FakeDictionary:
+            def resolve(self, names, db=None):
+                threads.append(threading.current_thread())
+                return [None for _ in names]
+
+        def get_dictionary():
+            # A cold dictionary loads inside this call
+            threads.append(threading.current_thread())
+            return FakeDictionary()
+
+        monkeypatch.setattr(products, "get_ingredient_dictionary", get_dictionary)
+        loop_thread = []
+        app = _client().app
+
+        @app.middleware("http")
+        async def record_loop_thread(request, call_next):
+            loop_thread.append(threading.current_thread())
+            return await call_next(request)
+
+        response = TestClient(app).post("/api/v1/products/analyze", json={"ingredients": ["Aqua"]})
+
+        assert response.status_code == 200
+        assert response.json()["overall_safety_score"] == 5.0
+        assert len(threads) == 2 and loop_thread[0] not in threads
@@ -0,0 +1,200 @@
+# Unit tests for the sliding-window rate limiter
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+
+from middleware.rate_limiter import (
+    InMemoryRateLimitStore,
+    RateLimiterMiddleware,
+    RateLimitRule,
+    RedisRateLimitStore,
+)
+
+
+class FakeRedisPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def incr(self, key):
+        self.ops.append(("incr", key))
+
+    def pexpire(self, key, ms):
+        self.ops.append(("pexpire", key))
+
+    def get(self, key):
+        self.ops.append(("get", key))
+
+    async def execute(self):
+        results = []
+        for op, key in self.ops:
+            if op == "incr":
+                results.append(await self.client.incr(key))
+            elif op == "pexpire":
+                results.append(True)
+            else:
+                results.append(self.client.data.get(key))
+        return results
+
+
+class FakeRedis:
+    """In-memory stand-in for redis.asyncio.Redis shared by several 'workers'"""
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self, transaction=True):
+        return FakeRedisPipeline(self)
+
+    async def incr(self, key):
+        self.data[key] = self.data.get(key, 0) + 1
+        return self.data[key]
+
+    async def decr(self, key):
+        self.data[key] = self.data.get(key, 0) - 1
+        return self.data[key]
+
+
+def _hits(store, n, limit=3, window=60, now=600.0, key="k"):
+    return [asyncio.run(store.hit(key, limit, window, now=now)) for _ in range(n)]
+
+
+class TestSlidingWindow:
+    """Test suite for the in-memory store"""
+
+    def test_limit_enforced_within_window(self):
+        decisions = _hits(InMemoryRateLimitStore(), 4)
+
+        assert [d.allowed for d in decisions] == [True, True, True, False]
+        assert [d.remaining for d in decisions[:3]] == [2, 1, 0]
+        assert decisions[3].retry_after > 0
+
+    def test_previous_window_decays(self):
+        store = InMemoryRateLimitStore()
+        _hits(store, 3, now=600.0)
+
+        # Half way through the next window the previous 3 weigh 1.5
+        assert asyncio.run(store.hit("k", 3, 60, now=690.0)).allowed
+        assert not asyncio.run(store.hit("k", 3, 60, now=690.0)).allowed
+        # Two windows later everything has expired
+        assert asyncio.run(store.hit("k", 3, 60, now=780.0)).remaining == 2
+
+    def test_denied_requests_are_not_counted(self):
+        store = InMemoryRateLimitStore()
+        _hits(store, 10, now=600.0)
+
+        # Only the 3 admitted requests carry into the next window
+        decision = asyncio.run(store.hit("k", 3, 60, now=700.0))
+        assert decision.allowed
+
+    def test_prune_drops_stale_keys(self):
+        store = InMemoryRateLimitStore(prune_every=1)
+        asyncio.run(store.hit("old", 3, 60, now=0.0))
+        asyncio.run(store.hit("new", 3, 60, now=600.0))
+
+        assert set(store._counters) == {"new"}
+
+    def test_redis_limit_shared_across_workers(self):
+        client = FakeRedis()
+        worker_a = RedisRateLimitStore(client)
+        worker_b = RedisRateLimitStore(client)
+
+        decisions = _hits(worker_a, 2) + _hits(worker_b, 2)
+
+        assert [d.allowed for d in decisions] == [True, True, True, False]
+        # The denied request was refunded
+        assert client.data["ratelimit:k:10"] == 3
+
+
+def _run_request(middleware, path="/api/v1/scan/upload", client=("10.0.0.1", 1234), method="GET"):
+    scope = {"type": "http", "method": method, "path": path, "headers": [], "client": client}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return messages[0]["status"], dict(messages[0]["headers"])
+
+
+async def _ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+class TestRateLimiterMiddleware:
+    """Test suite for the ASGI middleware"""
+
+    def test_returns_429_with_retry_after(self):
+        middleware = RateLimiterMiddleware(_ok_app, rules=[RateLimitRule("/api/v1/scan", limit=2)])
+
+        statuses = [_run_request(middleware)[0] for _ in range(2)]
+        status, headers = _run_request(middleware)
+
+        assert statuses == [200, 200]
+        assert status == 429
+        assert int(headers[b"retry-after"]) > 0
+
+    def test_unmatched_paths_pass_through(self):
+        middleware = RateLimiterMiddleware(_ok_app, rules=[RateLimitRule("/api/v1/scan", limit=0)])
+
+        status, headers = _run_request(middleware, path="/health")
+
+        assert status == 200
+        assert b"x-ratelimit-limit" not in headers
+
+    def test_longest_prefix_and_user_override(self):
+        rules = [
+            RateLimitRule("/api/v1", limit=100),
+            RateLimitRule("/api/v1/scan", limit=1, user_limits={"ip:10.0.0.9": 5}),
+        ]
+        middleware = RateLimiterMiddleware(_ok_app, rules=rules)
+
+        assert _run_request(middleware)[1][b"x-ratelimit-limit"] == b"1"
+        assert _run_request(middleware)[0] == 429
+        assert _run_request(middleware, client=("10.0.0.9", 1))[1][b"x-ratelimit-limit"] == b"5"
+
+    def test_fails_open_when_store_errors(self):
+        class BrokenStore(InMemoryRateLimitStore):
+            async def hit(self, *args, **kwargs):
+                raise ConnectionError("redis down")
+
+        middleware = RateLimiterMiddleware(_ok_app, rules=[RateLimitRule("/", limit=0)], store=BrokenStore())
+
+        assert _run_request(middleware)[0] == 200
+
+    def test_rule_scoped_to_methods_and_suffixes(self):
+        rule = RateLimitRule("/api/v1/scan", limit=1, methods=("POST",), path_suffixes=("/upload",))
+        middleware = RateLimiterMiddleware(_ok_app, rules=[rule])
+
+        assert _run_request(middleware, path="/api/v1/scan/abc/upload", method="POST")[0] == 200
+        # Polling and other routes under the prefix are not limited
+        assert _run_request(middleware, path="/api/v1/scan/abc", method="GET")[0] == 200
+        assert _run_request(middleware, path="/api/v1/scan/abc/upload", method="GET")[0] == 200
+        assert _run_request(middleware, path="/api/v1/scan/abc/upload", method="OPTIONS")[0] == 200
+        assert _run_request(middleware, path="/api/v1/scan/abc/upload", method="POST")[0] == 429
+
+    def test_cors_wraps_limiter(self):
+        app = FastAPI()
+        app.post("/api/v1/scan/upload")(lambda: {"ok": True})
+        # Same order as app.main: the limiter first, so CORS is outermost
+        app.add_middleware(RateLimiterMiddleware, rules=[RateLimitRule("/api/v1/scan", limit=2)])
+        app.add_middleware(
+            CORSMiddleware, allow_origins=["https://app.example"], allow_methods=["*"],
+            expose_headers=["Retry-After"],
+        )
+        client = TestClient(app)
+        origin = {"Origin": "https://app.example"}
+        preflight = {**origin, "Access-Control-Request-Method": "POST"}
+
+        assert [client.options("/api/v1/scan/upload", headers=preflight).status_code for _ in range(3)] == [200] * 3
+        assert [client.post("/api/v1/scan/upload", headers=origin).status_code for _ in range(2)] == [200, 200]
+        rejected = client.post("/api/v1/scan/upload", headers=origin)
+        assert rejected.status_code == 429
+        assert rejected.headers["access-control-allow-origin"] == "https://app.example"
+        assert "Retry-After" in rejected.headers["access-control-expose-headers"]
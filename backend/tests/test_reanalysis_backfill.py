@@ -0,0 +1,198 @@
+# Unit tests for the throttled, resumable re-analysis backfill
+import asyncio
+import io
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from PIL import Image
+from sqlalchemy.dialects import postgresql
+
+from app.services.media_store import LocalMediaBackend, MediaStore
+from app.services.reanalysis_backfill import (
+    BackfillProgress,
+    ReanalysisBackfill,
+    pending_scans_query,
+    reanalyze_image,
+)
+from services.image_type_router import ImageTypeClassifier, PipelineRouter
+from services.skin_analysis_service import SkinAnalysisService
+from tests.test_image_type_router import _dermoscopy
+
+
+class InMemoryBackfill(ReanalysisBackfill):
+    """Backfill over a list of scans instead of the database"""
+
+    def __init__(self, scans, **kwargs):
+        kwargs.setdefault("reanalyze", self._reanalyze)
+        kwargs.setdefault("load_image", lambda digest: digest.encode())
+        super().__init__(session_factory=None, model_version="2.0.0", **kwargs)
+        self.scans = scans
+        self.checkpoint = None
+        self.stored = {}
+        self.commits = 0
+        self.active = 0
+        self.peak_active = 0
+
+    async def _reanalyze(self, data):
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        await asyncio.sleep(0.001)
+        self.active -= 1
+        return {"acne": len(data)}
+
+    def load_checkpoint(self):
+        return self.checkpoint
+
+    def reset_checkpoint(self):
+        self.checkpoint = None
+
+    def _pending(self, after):
+        return [
+            s for s in self.scans
+            if s.id not in self.stored and (after is None or (s.created_at, s.id) > after)
+        ]
+
+    def count_pending(self, after):
+        return len(self._pending(after))
+
+    def fetch_batch(self, after):
+        return self._pending(after)[:self.batch_size]
+
+    def commit_batch(self, results, last, processed, failed):
+        self.stored.update(results)
+        self.checkpoint = last
+        self.commits += 1
+
+
+def _scans(count):
+    start = datetime(2026, 1, 1)
+    return [
+        SimpleNamespace(id=uuid.UUID(int=i + 1), created_at=start + timedelta(seconds=i // 2), image_hash=f"{i:064x}")
+        for i in range(count)
+    ]
+
+
+class TestReanalysisBackfill:
+    """Test suite for ReanalysisBackfill"""
+
+    def test_processes_every_scan_in_batches(self):
+        job = InMemoryBackfill(_scans(25), batch_size=10)
+
+        progress = asyncio.run(job.run())
+
+        assert progress.pending == 25
+        assert progress.processed == 25
+        assert job.commits == 3
+        assert all(r["model_version"] == "2.0.0" for r in job.stored.values())
+
+    def test_resumes_from_checkpoint(self):
+        scans = _scans(20)
+        job = InMemoryBackfill(scans, batch_size=5)
+
+        first = asyncio.run(job.run(max_scans=10))
+        second = asyncio.run(job.run())
+
+        assert first.processed == 10
+        assert second.pending == 10
+        assert second.processed == 10
+        assert set(job.stored) == {s.id for s in scans}
+
+    def test_concurrency_is_capped(self):
+        job = InMemoryBackfill(_scans(30), batch_size=30, concurrency=3)
+
+        asyncio.run(job.run())
+
+        assert job.peak_active == 3
+
+    def test_missing_images_are_counted_as_failed(self):
+        job = InMemoryBackfill(_scans(6), batch_size=10, load_image=lambda digest: None)
+
+        progress = asyncio.run(job.run())
+
+        assert progress.failed == 6
+        assert job.stored == {}
+        # The checkpoint still advances past unrecoverable scans
+        assert job.checkpoint is not None
+        assert asyncio.run(job.run()).pending == 0
+
+    def test_yields_while_live_traffic_is_busy(self):
+        answers = iter([True, True, False])
+        job = InMemoryBackfill(
+            _scans(4), traffic_probe=lambda: next(answers, False), probe_interval=60, yield_seconds=0.01
+        )
+
+        progress = asyncio.run(job.run())
+
+        assert progress.processed == 4
+        assert progress.paused_seconds == pytest.approx(0.02)
+
+    def test_progress_reports_eta(self):
+        progress = BackfillProgress(pending=100, processed=25)
+        progress.started -= 10
+
+        assert progress.throughput == pytest.approx(2.5, rel=0.05)
+        assert progress.eta_seconds == pytest.approx(30, rel=0.05)
+        assert "25/100" in progress.summary()
+
+    def test_pending_query_uses_keyset_position(self):
+        after = (datetime(2026, 1, 1), uuid.UUID(int=7))
+
+        sql = str(pending_scans_query("2.0.0", after, limit=500).compile(dialect=postgresql.dialect()))
+
+        assert "ORDER BY scan_sessions.created_at, scan_sessions.id" in sql
+        assert "scan_sessions.created_at >" in sql
+        assert "NOT (EXISTS" in sql
+        assert "OFFSET" not in sql
+        assert "LIMIT" in sql
+
+
+class _RecordingMLBackend:
+    def __init__(self):
+        self.regions = []
+
+    async def analyze_skin_with_ml(self, face_region, force_full=False, acne_only=False):
+        self.regions.append(face_region)
+        return {"force_full": force_full}
+
+
+class TestReanalyzeImage:
+    """Test suite for reanalyze_image"""
+
+    def test_backend_gets_rgb_face_crop_of_working_copy(self, tmp_path):
+        store = MediaStore(LocalMediaBackend(str(tmp_path)), analysis_size=512)
+        buffer = io.BytesIO()
+        Image.new("RGB", (2048, 1536), (220, 40, 30)).save(buffer, format="PNG")
+        backend = _RecordingMLBackend()
+        decoded = []
+
+        def crop(image):
+            decoded.append(image.shape)
+            return image[100:300, 150:350]
+
+        def decode(data):
+            return np.asarray(store.decode_working_copy(data)[0])
+
+        result = asyncio.run(reanalyze_image(buffer.getvalue(), decode, crop, backend))
+
+        assert result == {"force_full": True}
+        assert decoded == [(384, 512, 3)]
+        region, = backend.regions
+        assert region.shape == (200, 200, 3)
+        # Red stays in the first channel: no BGR swap on the way
+        assert tuple(region[0, 0]) == (220, 40, 30)
+
+    def test_dermoscopy_region_matches_live_pipeline(self):
+        service = SkinAnalysisService(image_router=PipelineRouter(ImageTypeClassifier()))
+        image = _dermoscopy()
+
+        region = service.analysis_region(image)
+
+        assert np.array_equal(region, service._field_of_view(image))
+        assert region.shape[0] < image.shape[0]
+
+    def test_no_face_fails_the_scan(self):
+        with pytest.raises(ValueError, match="No face"):
+            asyncio.run(reanalyze_image(b"x", lambda data: np.zeros((4, 4, 3)), lambda image: None, _RecordingMLBackend()))
@@ -0,0 +1,117 @@
+# Unit tests for the IVF-PQ reference case index and similar-case lookup
+import asyncio
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services.media_store import LocalMediaBackend, MediaStore
+from app.services.reference_cases import ReferenceCaseService, ReferenceIndexUnavailable
+from services.reference_index import ReferenceIndex, recall_at_k
+
+
+def _embeddings(count=2000, dim=64, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(20, dim)).astype(np.float32)
+    vectors = centres[rng.integers(20, size=count)] + 0.3 * rng.normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture(scope="module")
+def index_data():
+    vectors = _embeddings()
+    ids = np.arange(1000, 1000 + len(vectors))
+    return vectors, ids, ReferenceIndex.build(vectors, ids, m=8, iterations=8)
+
+
+class TestReferenceIndex:
+    """Test suite for ReferenceIndex"""
+
+    def test_indexed_vector_finds_itself(self, index_data):
+        vectors, ids, index = index_data
+
+        hits = index.search(vectors[42], k=3)
+
+        assert hits[0].id == ids[42]
+        assert hits[0].distance == pytest.approx(0.0, abs=1e-3)
+        assert [h.distance for h in hits] == sorted(h.distance for h in hits)
+
+    def test_recall_with_reranking(self, index_data):
+        vectors, ids, index = index_data
+        queries = vectors[:50] + 0.01
+
+        reranked, _ = recall_at_k(index, vectors, ids, queries, k=5, nprobe=16, rerank=20)
+        pq_only, _ = recall_at_k(index, vectors, ids, queries, k=5, nprobe=16, rerank=0)
+
+        assert reranked >= 0.9
+        assert reranked >= pq_only
+
+    def test_codes_are_one_byte_per_subquantizer(self, index_data):
+        vectors, _, index = index_data
+
+        assert index.codes.shape == (len(vectors), 8)
+        assert index.codes.dtype == np.uint8
+        assert index.offsets[-1] == len(vectors)
+
+    def test_saved_index_is_memory_mapped(self, index_data, tmp_path):
+        vectors, ids, index = index_data
+        index.save(tmp_path, extra_meta={"model_version": "1.0.0"})
+
+        mapped = ReferenceIndex.load(tmp_path)
+
+        assert isinstance(mapped.codes, np.memmap)
+        assert mapped.meta["model_version"] == "1.0.0"
+        assert [h.id for h in mapped.search(vectors[7], k=5)] == [h.id for h in index.search(vectors[7], k=5)]
+
+    def test_dimension_must_split_into_subvectors(self):
+        with pytest.raises(ValueError):
+            ReferenceIndex.build(np.zeros((10, 30), dtype=np.float32), np.arange(10), m=8)
+
+
+class TestReferenceCaseService:
+    """Test suite for ReferenceCaseService"""
+
+    def _store(self, tmp_path):
+        store = MediaStore(LocalMediaBackend(str(tmp_path)))
+        buf = io.BytesIO()
+        Image.new("RGB", (64, 64), (200, 150, 120)).save(buf, format="JPEG")
+        return store, asyncio.run(store.save(buf.getvalue())).digest
+
+    def test_embedding_is_cached_per_digest(self, index_data, tmp_path):
+        vectors, ids, index = index_data
+        store, digest = self._store(tmp_path)
+        calls = []
+
+        def embedder(images):
+            calls.append(len(images))
+            return vectors[3:4]
+
+        service = ReferenceCaseService(index, store, embedder=embedder)
+        first = service.similar(digest, k=4)
+        second = service.similar(digest, k=4)
+
+        assert calls == [1]
+        assert not first.cached_embedding and second.cached_embedding
+        assert first.hits[0].id == ids[3]
+
+    def test_query_image_is_cropped_like_the_index(self, index_data, tmp_path):
+        vectors, _, index = index_data
+        store, digest = self._store(tmp_path)
+        shapes = []
+
+        def embedder(images):
+            shapes.extend(image.shape for image in images)
+            return vectors[:len(images)]
+
+        ReferenceCaseService(index, store, embedder=embedder, crop=lambda image: image[8:40, 16:32]).similar(digest)
+        ReferenceCaseService(index, store, embedder=embedder, crop=lambda image: None).similar(digest)
+
+        # The crop when there is one, the whole image when there is not
+        assert shapes == [(32, 16, 3), (64, 64, 3)]
+
+    def test_missing_index_is_reported(self, tmp_path):
+        store, digest = self._store(tmp_path)
+
+        with pytest.raises(ReferenceIndexUnavailable):
+            ReferenceCaseService(None, store).similar(digest)
@@ -0,0 +1,106 @@
+# Unit tests for the indexed retention sweeper and temp file tracking
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.retention import RetentionEntry
+from app.services.retention import FILE, RetentionSweeper, register_for_retention
+from middleware.file_cleanup import TempFileTracker, track_temp_files
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    RetentionEntry.__table__.create(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def _write_files(tmp_path, count):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"scan_{i}.jpg"
+        path.write_bytes(b"x")
+        paths.append(str(path))
+    return paths
+
+
+class TestRetentionSweeper:
+    """Test suite for RetentionSweeper"""
+
+    def test_only_expired_files_are_deleted(self, session_factory, tmp_path):
+        expired, fresh = _write_files(tmp_path, 2)
+        db = session_factory()
+        register_for_retention(db, expired, timedelta(hours=-1), storage=FILE)
+        register_for_retention(db, fresh, timedelta(days=1), storage=FILE)
+        db.commit()
+
+        removed = RetentionSweeper(session_factory).sweep()
+
+        assert removed == 1
+        assert not (tmp_path / "scan_0.jpg").exists()
+        assert (tmp_path / "scan_1.jpg").exists()
+        assert session_factory().query(RetentionEntry).count() == 1
+
+    def test_batches_are_bounded(self, session_factory, tmp_path):
+        paths = _write_files(tmp_path, 5)
+        db = session_factory()
+        for path in paths:
+            register_for_retention(db, path, timedelta(seconds=-1), storage=FILE)
+        db.commit()
+
+        sweeper = RetentionSweeper(session_factory, batch_size=2)
+
+        assert sweeper.sweep_batch() == 2
+        assert sweeper.sweep() == 3
+        assert session_factory().query(RetentionEntry).count() == 0
+
+    def test_reregistering_keeps_later_expiry(self, session_factory):
+        db = session_factory()
+        register_for_retention(db, "originals/aa/bb/x", timedelta(days=30))
+        db.commit()
+        register_for_retention(db, "originals/aa/bb/x", timedelta(days=1))
+        db.commit()
+
+        entry = db.query(RetentionEntry).one()
+        assert entry.expires_at > datetime.utcnow() + timedelta(days=29)
+
+    def test_failed_delete_is_retried_later(self, session_factory):
+        db = session_factory()
+        register_for_retention(db, "originals/aa/bb/x", timedelta(seconds=-1))
+        db.commit()
+
+        sweeper = RetentionSweeper(session_factory)
+        sweeper.deleters["media"] = lambda location: (_ for _ in ()).throw(OSError("backend down"))
+
+        assert sweeper.sweep() == 0
+        entry = session_factory().query(RetentionEntry).one()
+        assert entry.expires_at > datetime.utcnow()
+
+
+class TestTempFileTracker:
+    """Test suite for the per-request temp file dependency"""
+
+    def test_dependency_removes_files_after_request(self, tmp_path):
+        dependency = track_temp_files()
+        tracker = next(dependency)
+        created = tracker.create(suffix=".jpg")
+        registered = tracker.register(_write_files(tmp_path, 1)[0])
+
+        with pytest.raises(StopIteration):
+            next(dependency)
+
+        for path in (created, registered):
+            assert not (tmp_path / path).exists()
+
+    def test_missing_files_are_ignored(self):
+        tracker = TempFileTracker()
+        tracker.register("/nonexistent/file.jpg")
+        tracker.cleanup()
+        assert tracker.files == set()
@@ -0,0 +1,144 @@
+# Unit tests for single-statement scan outcome persistence
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.scan import ScanSession, ScanStatus
+from app.services.scan_persistence import (
+    AnalysisRecord,
+    build_outcome_statement,
+    save_scan_outcome,
+    stored_scan_result,
+)
+from services.perceptual_hash import ImageHashes
+
+
+def _compile(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def _analysis() -> AnalysisRecord:
+    return AnalysisRecord(
+        skin_type="oily",
+        fitzpatrick_scale=4,
+        concerns=[{"concern_type": "acne", "severity": "mild", "confidence": 0.8}],
+        confidence_scores={"acne": 0.8},
+        overall_confidence=0.8,
+        analysis_version="1.0.0",
+        uncertainty_factors=["low_light"],
+    )
+
+
+class RecordingSession:
+    """Stands in for a Session and counts database round trips"""
+
+    def __init__(self, row):
+        self.row = row
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def execute(self, stmt):
+        self.statements.append(_compile(stmt))
+        return SimpleNamespace(one=lambda: self.row)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def refresh(self, instance):
+        raise AssertionError("refresh is a redundant round trip")
+
+
+class TestBuildOutcomeStatement:
+    """Test suite for build_outcome_statement"""
+
+    def test_all_writes_are_one_statement(self):
+        sql = _compile(build_outcome_statement(
+            uuid.uuid4(), "completed", datetime.utcnow(),
+            image_hash="abc", scan_metadata={"result": {}},
+            analysis=_analysis(), retention_key="ab/abc.jpg",
+            retention_expires_at=datetime.utcnow(),
+        ))
+
+        for table in ("skin_analyses", "confidence_metrics", "fairness_metrics", "media_retention"):
+            assert f"INSERT INTO {table}" in sql
+        assert "UPDATE scan_sessions" in sql
+        assert "ON CONFLICT (location) DO UPDATE" in sql
+        assert sql.count("RETURNING") == 5
+
+    def test_status_only_update_has_no_inserts(self):
+        sql = _compile(build_outcome_statement(uuid.uuid4(), "failed", datetime.utcnow()))
+
+        assert "INSERT" not in sql
+        assert "completed_at" not in sql.split("RETURNING")[0]
+
+    def test_perceptual_hashes_are_stored_signed(self):
+        stmt = build_outcome_statement(
+            uuid.uuid4(), "completed", datetime.utcnow(),
+            image_hashes=ImageHashes(phash=2**64 - 1, dhash=5),
+        )
+        compiled = stmt.compile(dialect=postgresql.dialect())
+
+        assert "perceptual_hash=" in str(compiled) and "difference_hash=" in str(compiled)
+        assert {-1, 5} <= set(compiled.params.values())
+
+    def test_metric_rows_reference_the_analysis_row(self):
+        stmt = build_outcome_statement(uuid.uuid4(), "completed", datetime.utcnow(), analysis=_analysis())
+        params = stmt.compile(dialect=postgresql.dialect()).params
+        ids = [value for value in params.values() if isinstance(value, uuid.UUID)]
+
+        # scan id, analysis id and two metric ids, plus the analysis id
+        # repeated as each metric row's foreign key
+        assert len(ids) == 7
+        analysis_id = max(set(ids), key=ids.count)
+        assert ids.count(analysis_id) == 3
+
+    def test_unknown_status_is_rejected(self):
+        with pytest.raises(ValueError):
+            build_outcome_statement(uuid.uuid4(), "done", datetime.utcnow())
+
+
+class TestSaveScanOutcome:
+    """Test suite for save_scan_outcome"""
+
+    def _scan(self):
+        return ScanSession(id=uuid.uuid4(), user_id=1, status=ScanStatus.PENDING, scan_metadata={"device": "web"})
+
+    def test_one_round_trip_and_no_refresh(self):
+        now = datetime.utcnow()
+        db = RecordingSession(SimpleNamespace(status=ScanStatus.COMPLETED, updated_at=now, completed_at=now))
+        scan = self._scan()
+
+        saved = save_scan_outcome(
+            db, scan, "completed", result={"scan_id": scan.id, "scores": {"acne": 30}},
+            image_hash="abc", analysis=_analysis(),
+            retention_key="ab/abc.jpg", retention_ttl=timedelta(days=90),
+        )
+
+        assert len(db.statements) == 1
+        assert db.commits == 1
+        assert saved.status == ScanStatus.COMPLETED
+        assert saved.completed_at == now
+        assert saved.image_hash == "abc"
+        assert saved.scan_metadata["device"] == "web"
+        # UUIDs are stored as strings so the result is valid JSONB
+        assert stored_scan_result(saved)["scan_id"] == str(scan.id)
+
+    def test_failure_rolls_back(self):
+        class FailingSession(RecordingSession):
+            def execute(self, stmt):
+                raise RuntimeError("connection lost")
+
+        db = FailingSession(None)
+
+        with pytest.raises(RuntimeError):
+            save_scan_outcome(db, self._scan(), "failed")
+
+        assert db.commits == 0
+        assert db.rollbacks == 1
@@ -1,8 +1,92 @@
 # Unit tests for Face Scan Router - Sprint 2 Phase 3
+import uuid
+from dataclasses import asdict
+from datetime import datetime
+from types import SimpleNamespace
+
 import pytest
-from fastapi import status
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
 from io import BytesIO
 import base64
+from PIL import Image
+from sqlalchemy.dialects import postgresql
+
+from app.core.security import get_current_user
+from app.database import get_db
+from app.models.scan import ScanSession, ScanStatus
+from app.routers import scan as scan_router
+from app.services import scan_persistence
+from app.services.media_store import LocalMediaBackend, MediaStore
+from services.skin_analysis_service import SkinAnalysisResult
+
+
+class RecordingSession:
+    """Stands in for a Session holding one scan; records executed statements"""
+
+    def __init__(self, scan):
+        self.scan = scan
+        self.statements = []
+
+    def query(self, model):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def first(self):
+        return self.scan
+
+    def execute(self, stmt):
+        self.statements.append(stmt.compile(dialect=postgresql.dialect()))
+        now = datetime.utcnow()
+        return SimpleNamespace(one=lambda: SimpleNamespace(status=ScanStatus.COMPLETED, updated_at=now, completed_at=now))
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def _analysis(**overrides) -> dict:
+    result = SkinAnalysisResult(
+        skin_tone="medium", texture_quality=0.8, acne_detected=True, acne_severity="moderate",
+        wrinkles_detected=False, wrinkle_density=0.01, dark_circles_detected=True, dark_circle_severity=0.6,
+        skin_type="oily", confidence_score=0.85, quality_warnings=["Image is slightly out of focus"],
+        ml_analysis={"acne_analysis": {"probabilities": {"no_acne": 0.1, "acne": 0.9}}},
+        quality_metrics={"sharpness": 80.0, "brightness": 128.0, "dark_fraction": 0.0, "bright_fraction": 0.0},
+    )
+    return {**asdict(result), **overrides}
+
+
+@pytest.fixture
+def scan_api(tmp_path, monkeypatch):
+    """app.routers.scan on its own app, with one pending scan and a local media store"""
+    user = SimpleNamespace(id=7)
+    db = RecordingSession(ScanSession(id=uuid.uuid4(), user_id=user.id, status=ScanStatus.PENDING))
+    store = MediaStore(LocalMediaBackend(str(tmp_path)))
+    monkeypatch.setattr(scan_router, "get_media_store", lambda: store)
+    monkeypatch.setattr(scan_router, "find_near_duplicate_scan", lambda *args, **kwargs: None)
+    runs = []
+
+    def run_analysis(working, client_face, variant, full_analysis=False):
+        runs.append({"client_face": client_face, "variant": variant, "full_analysis": full_analysis})
+        return _analysis()
+
+    monkeypatch.setattr(scan_router, "_run_analysis", run_analysis)
+
+    app = FastAPI()
+    app.include_router(scan_router.router)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: user
+    return SimpleNamespace(client=TestClient(app), db=db, scan=db.scan, runs=runs)
+
+
+def _jpeg_bytes(size=(320, 240)) -> bytes:
+    buf = BytesIO()
+    Image.new("RGB", size, (200, 150, 120)).save(buf, format="JPEG")
+    return buf.getvalue()
 
 
 class TestScanRouter:
@@ -122,3 +206,79 @@ class TestScanRouter:
         data = response.json()
         assert "scans" in data
         assert isinstance(data["scans"], list)
+
+
+class TestScanUploadPersistence:
+    """Test suite for what an upload through app.routers.scan writes"""
+
+    def test_completed_upload_writes_analysis_and_metric_rows(self, scan_api, monkeypatch):
+        records = []
+        build = scan_persistence.build_outcome_statement
+        monkeypatch.setattr(
+            scan_persistence, "build_outcome_statement",
+            lambda *args, **kwargs: records.append(kwargs["analysis"]) or build(*args, **kwargs),
+        )
+
+        response = scan_api.client.post(
+            f"/api/v1/scan/{scan_api.scan.id}/upload",
+            files={"file": ("face.jpg", _jpeg_bytes(), "image/jpeg")},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        (statement,), (record,) = scan_api.db.statements, records
+        for table in ("skin_analyses", "confidence_metrics", "fairness_metrics"):
+            assert f"INSERT INTO {table}" in str(statement)
+        assert (record.skin_type, record.fitzpatrick_scale, record.overall_confidence) == ("oily", 3, 0.85)
+        assert [c["concern_type"] for c in record.concerns] == ["acne", "dark_circles"]
+        assert record.confidence_scores == {"acne": 0.9, "dark_circles": 0.85}
+        assert record.uncertainty_factors == ["Image is slightly out of focus"]
+        assert (record.image_quality_score, record.lighting_quality_score) == (0.8, 1.0)
+
+    def test_full_analysis_reaches_the_pipeline(self, scan_api):
+        response = scan_api.client.post(
+            f"/api/v1/scan/{scan_api.scan.id}/upload",
+            files={"file": ("face.jpg", _jpeg_bytes(), "image/jpeg")},
+            data={"full_analysis": "true"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        (run,) = scan_api.runs
+        assert run["full_analysis"] is True
+
+    def test_client_face_upload_checks_type_before_opening(self, scan_api, monkeypatch):
+        opened = []
+        monkeypatch.setattr(scan_router.Image, "open", lambda fp: opened.append(fp))
+
+        response = scan_api.client.post(
+            f"/api/v1/scan/{scan_api.scan.id}/upload",
+            files={"file": ("face.txt", b"not an image", "text/plain")},
+            data={"client_face": '{"detector": "blazeface", "landmarks": []}'},
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert opened == [] and scan_api.runs == []
+
+
+class TestScanBurstUpload:
+    """Test suite for POST /api/v1/scan/{scan_id}/upload-burst"""
+
+    def test_upload_burst_selects_sharpest_frame(self, scan_api):
+        """Test burst upload analyzes only the best frame"""
+        import cv2
+        import numpy as np
+
+        rng = np.random.default_rng(0)
+        sharp = np.clip(np.array([120, 150, 200]) + rng.integers(-40, 40, (480, 640, 1)), 0, 255).astype(np.uint8)
+        frames = [cv2.GaussianBlur(sharp, (0, 0), 5), sharp, cv2.GaussianBlur(sharp, (0, 0), 2)]
+        files = [
+            ("files", (f"frame{i}.jpg", cv2.imencode(".jpg", frame)[1].tobytes(), "image/jpeg"))
+            for i, frame in enumerate(frames)
+        ]
+
+        response = scan_api.client.post(f"/api/v1/scan/{scan_api.scan.id}/upload-burst", files=files)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["frames_received"] == 3
+        assert data["selected_frame"] == 1
+        assert len(scan_api.runs) == 1
@@ -0,0 +1,89 @@
+# Unit tests for the sorted-array typeahead index
+from services.typeahead import (
+    BRAND,
+    INGREDIENT,
+    PRECOMPUTED_K,
+    PRODUCT,
+    LiveTypeahead,
+    TypeaheadEntry,
+    TypeaheadIndex,
+    normalize,
+    suggestion_weight,
+)
+
+ENTRIES = [
+    TypeaheadEntry("CeraVe Foaming Facial Cleanser", PRODUCT, "p1", 3.0),
+    TypeaheadEntry("CeraVe Moisturizing Cream", PRODUCT, "p2", 4.0),
+    TypeaheadEntry("CeraVe", BRAND, "CeraVe", 5.0),
+    TypeaheadEntry("Ceramide NP", INGREDIENT, "i1", 2.0),
+    TypeaheadEntry("Crème Hydratante Légère", PRODUCT, "p3", 1.0),
+    TypeaheadEntry("Niacinamide", INGREDIENT, "i2", 2.5),
+]
+
+
+def _texts(suggestions):
+    return [s.text for s in suggestions]
+
+
+class TestTypeaheadIndex:
+    """Test suite for TypeaheadIndex"""
+
+    def test_normalize_folds_case_accents_and_punctuation(self):
+        assert normalize("  Crème—Légère, 50ml ") == "creme legere 50ml"
+        assert normalize("Paula's Choice") == "paula s choice"
+
+    def test_prefix_suggestions_by_weight(self):
+        index = TypeaheadIndex.build(ENTRIES)
+
+        assert _texts(index.suggest("cer")) == [
+            "CeraVe", "CeraVe Moisturizing Cream", "CeraVe Foaming Facial Cleanser", "Ceramide NP",
+        ]
+        assert _texts(index.suggest("cerav", limit=2)) == ["CeraVe", "CeraVe Moisturizing Cream"]
+
+    def test_later_words_match_once(self):
+        index = TypeaheadIndex.build(ENTRIES)
+
+        assert _texts(index.suggest("clean")) == ["CeraVe Foaming Facial Cleanser"]
+        assert _texts(index.suggest("cerave f")) == ["CeraVe Foaming Facial Cleanser"]
+        assert _texts(index.suggest("creme")) == ["Crème Hydratante Légère"]
+        assert index.suggest("zinc") == []
+        assert index.suggest("  ") == []
+
+    def test_precomputed_prefixes_match_range_scan(self):
+        entries = [TypeaheadEntry(f"Serum {i}", PRODUCT, str(i), float(i)) for i in range(PRECOMPUTED_K * 5)]
+        index = TypeaheadIndex.build(entries)
+
+        assert b"s" in index._precomputed
+        assert index.candidates("s", 10) == index._top_entries(*index.key_range("s"), 10)
+
+    def test_weight_combines_popularity_and_rating(self):
+        assert suggestion_weight(0) == 0.0
+        assert suggestion_weight(0, rating=5.0) == 1.0
+        assert suggestion_weight(10, rating=4.0) > suggestion_weight(10, rating=2.0) > suggestion_weight(3)
+
+
+class TestLiveTypeahead:
+    """Test suite for LiveTypeahead"""
+
+    def test_changes_shadow_the_base_index(self):
+        live = LiveTypeahead(TypeaheadIndex.build(ENTRIES))
+
+        live.apply(
+            [TypeaheadEntry("CeraVe Foaming Facial Cleanser", PRODUCT, "p1", 9.0),
+             TypeaheadEntry("CeraVe Hydrating Sunscreen", PRODUCT, "p4", 0.5)],
+            removed=[(PRODUCT, "p2")],
+        )
+
+        assert _texts(live.suggest("cerave")) == [
+            "CeraVe Foaming Facial Cleanser", "CeraVe", "CeraVe Hydrating Sunscreen",
+        ]
+        assert live.pending == 3
+
+    def test_replace_folds_changes_in(self):
+        live = LiveTypeahead(TypeaheadIndex.build(ENTRIES))
+        live.apply([TypeaheadEntry("Zinc Oxide", INGREDIENT, "i3", 1.0)])
+
+        live.replace(TypeaheadIndex.build(ENTRIES))
+
+        assert live.pending == 0
+        assert live.suggest("zinc") == []
@@ -2,6 +2,7 @@
 import React, { useState, useCallback } from "react";
 import { Link } from "react-router-dom";
 import { initScan, uploadScanImage, getScanStatus, getScanResult } from "../services/scanApi";
+import { faceDetectionService } from "../services/faceDetection";
 
 export default function ScanPage() {
   const [file, setFile] = useState<File | null>(null);
@@ -30,7 +31,13 @@ export default function ScanPage() {
       const initResponse = await initScan();
       const sessionId = initResponse.session_id;
       
-      await uploadScanImage(sessionId, file);
+      // Upload a face crop with landmarks when the browser detector found
+      // a face, so the server skips detection; otherwise the full photo
+      const detection = await faceDetectionService.validateFace(file);
+      const faceCrop = detection.faceDetected
+        ? await faceDetectionService.createFaceCrop(file, detection)
+        : null;
+      await uploadScanImage(sessionId, faceCrop?.crop ?? file, faceCrop?.metadata);
       
       // Poll for results
       let attempts = 0;
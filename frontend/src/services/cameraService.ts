@@ -87,6 +87,42 @@ export class CameraService {
     });
   }
 
+  /**
+   * Capture a short burst of frames so the server can analyze the sharpest one.
+   * Frames are encoded at a lower quality than single captures to keep the upload small.
+   */
+  async captureBurst(frameCount = 5, intervalMs = 120, quality = 0.85): Promise<Blob[]> {
+    if (!this.videoElement || !this.stream) {
+      throw new Error('Camera not initialized');
+    }
+
+    const canvas = document.createElement('canvas');
+    canvas.width = this.videoElement.videoWidth;
+    canvas.height = this.videoElement.videoHeight;
+
+    const ctx = canvas.getContext('2d');
+    if (!ctx) {
+      throw new Error('Failed to get canvas context');
+    }
+
+    const frames: Blob[] = [];
+    for (let i = 0; i < frameCount; i++) {
+      if (i > 0) {
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+      }
+      ctx.drawImage(this.videoElement, 0, 0);
+      const blob = await new Promise<Blob | null>(resolve =>
+        canvas.toBlob(resolve, 'image/jpeg', quality)
+      );
+      if (!blob) {
+        throw new Error('Failed to create image blob');
+      }
+      frames.push(blob);
+    }
+
+    return frames;
+  }
+
   /**
    * Stop camera stream
    */
@@ -13,12 +13,43 @@ export interface FaceDetectionResult {
     height: number;
   };
   warning?: string;
+  /** Landmarks in source-image pixels, when a landmark model ran */
+  landmarks?: Array<{ x: number; y: number; z?: number }>;
+  /** Detector identifier accepted by the backend, e.g. 'mediapipe-face-landmarker' */
+  detector?: string;
+  detectorVersion?: string;
 }
 
+/**
+ * Client-assisted scan contract: landmarks normalized to the face crop.
+ * Sent as the `client_face` form field next to the cropped image.
+ */
+export interface ClientFaceMetadata {
+  detector: string;
+  detector_version: string;
+  landmarks: number[][];
+}
+
+export interface FaceCrop {
+  crop: Blob;
+  metadata: ClientFaceMetadata;
+}
+
+/** Identifier the backend accepts for BlazeFace (6 landmarks: eyes, nose, mouth, ears) */
+const BLAZEFACE_DETECTOR = 'blazeface';
+const BLAZEFACE_VERSION = '0.0.7';
+const MIN_FACE_PROBABILITY = 0.8;
+
+type BlazeFaceModel = import('@tensorflow-models/blazeface').BlazeFaceModel;
+
 export class FaceDetectionService {
+  private model: Promise<BlazeFaceModel | null> | null = null;
+
   /**
-   * Validate if image contains a face using basic heuristics
-   * Note: For MVP, we use simple checks. Production would use ML models
+   * Validate if image contains a face
+   * Size and brightness are checked heuristically; BlazeFace then finds the
+   * face box and landmarks used for the client-side crop. If the model
+   * cannot load, the result has no landmarks and the backend detects.
    */
   async validateFace(imageBlob: Blob): Promise<FaceDetectionResult> {
     try {
@@ -44,8 +75,12 @@ export class FaceDetectionService {
         };
       }
 
-      // For MVP: Return optimistic result
-      // Backend will perform actual face detection with ML
+      const model = await this.loadModel();
+      if (model) {
+        return await this.detectWithModel(model, imageData);
+      }
+
+      // No model: optimistic result, the backend performs face detection
       return {
         faceDetected: true,
         confidence: 0.85,
@@ -66,6 +101,123 @@ export class FaceDetectionService {
     }
   }
 
+  /**
+   * Load BlazeFace once, on first use; null if it cannot be loaded
+   */
+  private loadModel(): Promise<BlazeFaceModel | null> {
+    if (!this.model) {
+      this.model = (async () => {
+        try {
+          const [tf, blazeface] = await Promise.all([
+            import('@tensorflow/tfjs'),
+            import('@tensorflow-models/blazeface')
+          ]);
+          await tf.ready();
+          return await blazeface.load();
+        } catch (error) {
+          console.warn('BlazeFace unavailable, using server face detection:', error);
+          return null;
+        }
+      })();
+    }
+    return this.model;
+  }
+
+  private async detectWithModel(model: BlazeFaceModel, imageData: ImageData): Promise<FaceDetectionResult> {
+    const faces = await model.estimateFaces(imageData, false);
+    // Largest face is the subject
+    const face = faces
+      .map(f => ({
+        topLeft: f.topLeft as [number, number],
+        bottomRight: f.bottomRight as [number, number],
+        landmarks: (f.landmarks ?? []) as number[][],
+        probability: Number(f.probability ?? 0)
+      }))
+      .filter(f => f.probability >= MIN_FACE_PROBABILITY)
+      .sort((a, b) =>
+        (b.bottomRight[0] - b.topLeft[0]) * (b.bottomRight[1] - b.topLeft[1]) -
+        (a.bottomRight[0] - a.topLeft[0]) * (a.bottomRight[1] - a.topLeft[1])
+      )[0];
+
+    if (!face) {
+      return {
+        faceDetected: false,
+        confidence: 0,
+        warning: 'No face found. Look directly at the camera'
+      };
+    }
+
+    const [x0, y0] = face.topLeft;
+    const [x1, y1] = face.bottomRight;
+    return {
+      faceDetected: true,
+      confidence: face.probability,
+      boundingBox: { x: x0, y: y0, width: x1 - x0, height: y1 - y0 },
+      landmarks: face.landmarks.map(([x, y]) => ({ x, y })),
+      detector: BLAZEFACE_DETECTOR,
+      detectorVersion: BLAZEFACE_VERSION
+    };
+  }
+
+  /**
+   * Cut a tight face crop and express landmarks relative to it, so the
+   * backend can skip its own face detection. Returns null when the
+   * detector produced no landmarks; callers then upload the full image.
+   * The margin stays small: the backend rejects crops where the face
+   * does not dominate the frame.
+   */
+  async createFaceCrop(
+    imageBlob: Blob,
+    result: FaceDetectionResult,
+    margin = 0.15,
+    maxSide = 512
+  ): Promise<FaceCrop | null> {
+    const { boundingBox, landmarks, detector, detectorVersion } = result;
+    if (!boundingBox || !landmarks?.length || !detector || !detectorVersion) {
+      return null;
+    }
+
+    const bitmap = await createImageBitmap(imageBlob);
+    const x0 = Math.max(0, boundingBox.x - boundingBox.width * margin);
+    const y0 = Math.max(0, boundingBox.y - boundingBox.height * margin);
+    const x1 = Math.min(bitmap.width, boundingBox.x + boundingBox.width * (1 + margin));
+    const y1 = Math.min(bitmap.height, boundingBox.y + boundingBox.height * (1 + margin));
+    const cropWidth = x1 - x0;
+    const cropHeight = y1 - y0;
+    const scale = Math.min(1, maxSide / Math.max(cropWidth, cropHeight));
+
+    const canvas = document.createElement('canvas');
+    canvas.width = Math.round(cropWidth * scale);
+    canvas.height = Math.round(cropHeight * scale);
+    const ctx = canvas.getContext('2d');
+    if (!ctx) {
+      bitmap.close();
+      return null;
+    }
+    ctx.drawImage(bitmap, x0, y0, cropWidth, cropHeight, 0, 0, canvas.width, canvas.height);
+    bitmap.close();
+
+    const crop = await new Promise<Blob | null>(resolve =>
+      canvas.toBlob(resolve, 'image/jpeg', 0.92)
+    );
+    if (!crop) {
+      return null;
+    }
+
+    return {
+      crop,
+      metadata: {
+        detector,
+        detector_version: detectorVersion,
+        landmarks: landmarks.map(point => [
+          (point.x - x0) / cropWidth,
+          (point.y - y0) / cropHeight,
+          point.z ?? 0
+        ])
+      }
+    };
+  }
+
   /**
    * Load image blob into canvas for analysis
    */
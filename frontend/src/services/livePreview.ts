@@ -0,0 +1,104 @@
+/**
+ * Live Preview Service
+ * Streams small preview frames over a WebSocket and receives capture
+ * guidance ("move closer", "too dark") before the user takes the photo
+ */
+
+export interface PreviewGuidance {
+  seq: number;
+  ready: boolean;
+  guidance: Array<{ code: string; message: string }>;
+  face: { x: number; y: number; w: number; h: number } | null;
+  metrics: { brightness: number; sharpness: number };
+  dropped: number;
+  error?: string;
+}
+
+export interface LivePreviewOptions {
+  maxSide?: number;
+  maxFps?: number;
+  quality?: number;
+}
+
+const API_BASE: string = import.meta.env.VITE_API_URL || window.location.origin;
+
+function liveUrl(token: string): string {
+  const url = new URL('/api/v1/scan/live', API_BASE);
+  url.protocol = url.protocol === 'https:' ? 'wss:' : 'ws:';
+  url.searchParams.set('token', token);
+  return url.toString();
+}
+
+export class LivePreviewClient {
+  private socket: WebSocket | null = null;
+  private timer: number | null = null;
+  private canvas = document.createElement('canvas');
+  // One frame in flight at a time; the server drops anything older anyway
+  private awaitingReply = false;
+
+  constructor(private onGuidance: (guidance: PreviewGuidance) => void) {}
+
+  /**
+   * Start streaming frames from a playing video element
+   */
+  start(videoElement: HTMLVideoElement, options: LivePreviewOptions = {}): void {
+    const { maxSide = 320, maxFps = 8, quality = 0.7 } = options;
+    const token = localStorage.getItem('auth_token');
+    if (!token || this.socket) {
+      return;
+    }
+
+    this.socket = new WebSocket(liveUrl(token));
+    this.socket.binaryType = 'arraybuffer';
+    this.socket.onmessage = event => {
+      this.awaitingReply = false;
+      this.onGuidance(JSON.parse(event.data as string) as PreviewGuidance);
+    };
+    this.socket.onclose = () => this.stop();
+
+    this.timer = window.setInterval(() => {
+      if (!this.socket || this.socket.readyState !== WebSocket.OPEN || this.awaitingReply) {
+        return;
+      }
+      if (!videoElement.videoWidth) {
+        return;
+      }
+      const scale = Math.min(1, maxSide / Math.max(videoElement.videoWidth, videoElement.videoHeight));
+      this.canvas.width = Math.round(videoElement.videoWidth * scale);
+      this.canvas.height = Math.round(videoElement.videoHeight * scale);
+      const ctx = this.canvas.getContext('2d');
+      if (!ctx) {
+        return;
+      }
+      ctx.drawImage(videoElement, 0, 0, this.canvas.width, this.canvas.height);
+      this.awaitingReply = true;
+      this.canvas.toBlob(
+        blob => {
+          if (blob && this.socket?.readyState === WebSocket.OPEN) {
+            this.socket.send(blob);
+          } else {
+            this.awaitingReply = false;
+          }
+        },
+        'image/jpeg',
+        quality
+      );
+    }, 1000 / maxFps);
+  }
+
+  /**
+   * Stop streaming and close the connection
+   */
+  stop(): void {
+    if (this.timer !== null) {
+      window.clearInterval(this.timer);
+      this.timer = null;
+    }
+    if (this.socket) {
+      this.socket.onclose = null;
+      this.socket.close();
+      this.socket = null;
+    }
+    this.awaitingReply = false;
+  }
+}
@@ -1,6 +1,7 @@
 // src/api/scanApi.ts
 
 import type { ScanInitResponse } from "../types/scan";
+import type { ClientFaceMetadata } from "./faceDetection";
 
 export type ScanStatusResponse = {
   status: "pending" | "processing" | "completed" | "failed" | string;
@@ -78,10 +79,18 @@ export async function initScan(): Promise<ScanInitResponse> {
 
 /**
  * POST /api/v1/scan/{session_id}/upload
+ * Pass `clientFace` with a face crop to let the backend skip detection.
  */
-export async function uploadScanImage(sessionId: string, file: File): Promise<{ ok: true }> {
+export async function uploadScanImage(
+  sessionId: string,
+  file: Blob,
+  clientFace?: ClientFaceMetadata
+): Promise<{ ok: true }> {
   const formData = new FormData();
   formData.append("file", file);
+  if (clientFace) {
+    formData.append("client_face", JSON.stringify(clientFace));
+  }
 
   await fetchJson<unknown>(`/api/v1/scan/${encodeURIComponent(sessionId)}/upload`, {
     method: "POST",
@@ -91,6 +100,33 @@ export async function uploadScanImage(sessionId: string, file: File): Promise<{
   return { ok: true };
 }
 
+export type BurstUploadResponse = {
+  scan_id: string;
+  status: string;
+  image_url?: string;
+  message: string;
+  frames_received: number;
+  selected_frame: number;
+  frame_scores: number[];
+  quality_warnings: string[];
+};
+
+/**
+ * POST /api/v1/scan/{session_id}/upload-burst
+ * The backend scores every frame cheaply and analyzes only the best one.
+ */
+export async function uploadScanBurst(sessionId: string, frames: Blob[]): Promise<BurstUploadResponse> {
+  const formData = new FormData();
+  frames.forEach((frame, index) => {
+    formData.append("files", frame, `frame-${index}.jpg`);
+  });
+
+  return fetchJson<BurstUploadResponse>(`/api/v1/scan/${encodeURIComponent(sessionId)}/upload-burst`, {
+    method: "POST",
+    body: formData,
+  });
+}
+
 /**
  * GET /api/v1/scan/{session_id}/status
  */